@@ -0,0 +1,59 @@
+# benchmarks/bench_call_recorder.py
+#
+# Per-call CPU overhead of the local two-leg recorder.
+# Simulates one call second as 50 inbound frames (20ms mu-law) plus a burst of
+# agent audio, and reports CPU time per second of call audio.
+#
+#   python benchmarks/bench_call_recorder.py [call_seconds]
+#
+# Target: < 1% of one core per call (i.e. < 10ms CPU per second of audio).
+import base64
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.speech.call_audio_recorder import CallAudioRecorder
+
+FRAME_BYTES = 160          # 20ms of 8kHz mu-law
+FRAMES_PER_SECOND = 50
+AGENT_TALK_RATIO = 0.5     # agent speaks half the call
+
+
+def run(call_seconds: int) -> float:
+    inbound_frame = base64.b64encode(os.urandom(FRAME_BYTES)).decode("ascii")
+    # ElevenLabs chunks are irregular; ~0.5s per chunk is typical
+    outbound_chunk = base64.b64encode(os.urandom(FRAME_BYTES * 25)).decode("ascii")
+
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = CallAudioRecorder(os.path.join(directory, "bench.wav"))
+
+        start = time.process_time()
+        for second in range(call_seconds):
+            if (second % 10) < AGENT_TALK_RATIO * 10:
+                recorder.write_outbound(outbound_chunk)
+                recorder.write_outbound(outbound_chunk)
+            for _ in range(FRAMES_PER_SECOND):
+                recorder.write_inbound(inbound_frame)
+            if second % 30 == 29:
+                recorder.clear_outbound()
+        recorder.close()
+        cpu = time.process_time() - start
+
+        size = os.path.getsize(recorder.path)
+
+    per_second_ms = cpu / call_seconds * 1000
+    print(f"call audio:        {call_seconds}s")
+    print(f"wav size:          {size / 1024:.0f} KB")
+    print(f"cpu total:         {cpu * 1000:.1f} ms")
+    print(f"cpu per call-sec:  {per_second_ms:.3f} ms")
+    print(f"core utilisation:  {per_second_ms / 10:.3f} % per concurrent call")
+    return per_second_ms
+
+
+if __name__ == "__main__":
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    result = run(seconds)
+    sys.exit(0 if result < 10 else 1)
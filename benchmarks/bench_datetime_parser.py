@@ -0,0 +1,104 @@
+# benchmarks/bench_datetime_parser.py
+#
+# Coverage, accuracy and latency of the rule-based date/time parser that
+# runs ahead of the LLM in DateTimeParserService, on a corpus of booking-mode
+# utterances (one JSON object per line).
+#
+#   python benchmarks/bench_datetime_parser.py
+#   python benchmarks/bench_datetime_parser.py --corpus exported_turns.jsonl --today 2025-06-02
+#   python benchmarks/bench_datetime_parser.py -v       # print every utterance
+#
+# Corpus lines: {"text": ...} plus, optionally, what the answer should be:
+#   {"date": "YYYY-MM-DD" | null, "time": "HH:MM" | null}   rules must produce exactly this
+#   {"is_now": true}                                        "as soon as possible"
+#   {"llm": true}                                           rules must hand it to the LLM
+# Lines with no expectation (e.g. raw user turns exported from
+# conversation_turns) only count towards coverage and latency. Relative dates
+# are resolved against --today (the bundled corpus assumes Wed 2025-03-12).
+# Exits 1 if any expectation is not met.
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.datetime_rules import parse_datetime_rules
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "datetime_utterances.jsonl")
+BUSINESS_HOURS = {"start": "09:00", "end": "18:00"}
+REPEAT = 7
+
+
+def load_corpus(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check(row: dict, result: dict):
+    """None if the result meets the row's expectation, else what went wrong"""
+    if row.get("llm"):
+        return None if not result["resolved"] else "resolved by rules, expected the LLM"
+    if not result["resolved"]:
+        return "sent to the LLM" if "date" in row or row.get("is_now") else None
+    if row.get("is_now"):
+        return None if result["is_now"] else "expected 'as soon as possible'"
+    if "date" not in row and "time" not in row:
+        return None
+    got_date = result["date"].isoformat() if result["date"] else None
+    got_time = result["time"].strftime("%H:%M") if result["time"] else None
+    if (got_date, got_time) != (row.get("date"), row.get("time")):
+        return f"got {got_date} {got_time}, expected {row.get('date')} {row.get('time')}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--today", default="2025-03-12", help="reference date for relative expressions")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    today = date.fromisoformat(args.today)
+
+    counts = {"rules": 0, "no_datetime": 0, "llm": 0}
+    failures = []
+    for row in corpus:
+        result = parse_datetime_rules(row["text"], today, BUSINESS_HOURS)
+        if not result["resolved"]:
+            outcome = "llm"
+        else:
+            outcome = "rules" if result["has_datetime"] else "no_datetime"
+        counts[outcome] += 1
+        problem = check(row, result)
+        if problem:
+            failures.append((row["text"], problem))
+        if args.verbose:
+            print(f"{outcome:12} {row['text'][:50]:50} {result['date']} {result['time']} | {result['reasoning']}")
+
+    texts = [row["text"] for row in corpus]
+    timer = timeit.Timer(lambda: [parse_datetime_rules(text, today, BUSINESS_HOURS) for text in texts])
+    number, _ = timer.autorange()
+    per_utterance_us = min(timer.repeat(repeat=REPEAT, number=number)) / (number * len(texts)) * 1e6
+
+    total = len(corpus)
+    print(f"{total} utterances from {args.corpus}")
+    print(f"  resolved by rules:   {counts['rules']:5} ({counts['rules'] / total:.0%})")
+    print(f"  no date/time:        {counts['no_datetime']:5} ({counts['no_datetime'] / total:.0%})")
+    print(f"  sent to the LLM:     {counts['llm']:5} ({counts['llm'] / total:.0%})")
+    print(f"  LLM calls avoided:   {(total - counts['llm']) / total:.0%}")
+    print(f"  rule parser latency: {per_utterance_us:.1f} us/utterance")
+
+    if failures:
+        print(f"\n{len(failures)} expectation(s) not met:")
+        for text, problem in failures:
+            print(f"  {text!r}: {problem}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+# benchmarks/bench_hot_path.py
+#
+# Microbenchmarks for the functions every call runs per media frame or per
+# turn, on fixed inputs, compared against a stored baseline so a CPU
+# regression shows up before it reaches production.
+#
+#   python benchmarks/bench_hot_path.py                 # compare to baseline
+#   python benchmarks/bench_hot_path.py --save          # record a new baseline
+#   python benchmarks/bench_hot_path.py --only audio    # cases whose name contains "audio"
+#
+# Baselines are per machine: record one on the box you compare on (CI runner
+# or a quiet dev machine) and commit it alongside the change that moved it.
+# Exits 1 if any case is slower than baseline by more than --tolerance.
+import argparse
+import base64
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import timeit
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.speech.audio_codec import (
+    convert_elevenlabs_to_exotel,
+    convert_exotel_audio_to_deepgram,
+    convert_twilio_audio,
+)
+from services.datetime_rules import parse_datetime_rules
+from services.prompt_template_service import PromptTemplateService
+from services.rag.prompt_compiler import PromptCompiler
+from services.slot_manager_service import slot_manager_service
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline_hot_path.json")
+FRAMES_PER_SECOND = 50     # 20ms media frames
+REPEAT = 7
+
+_rng = random.Random(42)
+
+# Inputs (fixed, so runs are comparable)
+
+TWILIO_FRAME = base64.b64encode(bytes(_rng.randrange(256) for _ in range(160))).decode("ascii")
+EXOTEL_FRAME = base64.b64encode(bytes(_rng.randrange(256) for _ in range(320))).decode("ascii")
+# ElevenLabs ulaw_8000 chunks are irregular; ~0.5s is typical
+ELEVENLABS_CHUNK = base64.b64encode(bytes(_rng.randrange(256) for _ in range(4000))).decode("ascii")
+
+MEDIA_MESSAGE = json.dumps({
+    "event": "media",
+    "sequenceNumber": "1234",
+    "media": {"track": "inbound", "chunk": "1233", "timestamp": "24660", "payload": TWILIO_FRAME},
+    "streamSid": "MZ18ad3ab5a668481ce02b83e7395059f0"
+})
+OUTBOUND_MEDIA = {
+    "event": "media",
+    "streamSid": "MZ18ad3ab5a668481ce02b83e7395059f0",
+    "media": {"payload": ELEVENLABS_CHUNK}
+}
+
+AGENT = {
+    "agent_id": "bench-agent",
+    "name": "Maya",
+    "prompt": "Help callers with appointments, pricing and general questions about the clinic. " * 4,
+    "max_response_tokens": 150,
+    "additional_context": {
+        "tone": "friendly",
+        "language": "english",
+        "businessContext": "Multi-speciality health and diagnostic lab offering consultations, "
+                           "blood tests, imaging and home sample collection across the city.",
+        "roleDescription": "Front desk assistant for bookings and enquiries"
+    }
+}
+
+CUSTOMER_MESSAGES = [
+    "Hi, I wanted to know if you have any slots available this week for a blood test",
+    "I'm really frustrated, my test results were supposed to come yesterday",
+    "No thanks, I'm not interested, please stop calling",
+    "Yes sure, that sounds good, can you book me for tomorrow morning",
+    "What's the difference between the basic and the full body checkup",
+    "Okay so basically I called last week about my father's report and nobody got back to me, I have been "
+    "waiting and the clinic said the sample would be processed by Monday but it is now Thursday and we still "
+    "do not have anything, can you please check what is going on with it and let me know",
+]
+
+RAG_CONTEXT = "\n\n".join(
+    f"Document {i}: The full body checkup includes {60 + i} parameters, costs Rs {1999 + i * 100} "
+    f"and home collection is available between 7 AM and 11 AM on all days." for i in range(4)
+)
+
+QUESTION = "Can I book it for Saturday morning?"
+
+CONVERSATION_CONTEXT = [
+    {"role": "system", "content": "AI analysis - Buying Readiness: 75% | Customer Intent: booking | "
+                                  "Sentiment: positive | Objection Type: none"},
+    {"role": "user", "content": "Tell me more about the full body checkup"},
+    {"role": "assistant", "content": "It covers 64 parameters including thyroid, lipid profile and vitamins."},
+    {"role": "user", "content": "Okay, that sounds useful"},
+]
+
+BOOKING_UTTERANCES = [
+    "Yes, that works",
+    "My email is priya.sharma91@gmail.com",
+    "Tomorrow morning at 9:30",
+    "How about Friday at 4 pm?",
+]
+TODAY = date(2025, 3, 12)
+
+DATABASE_SLOTS = {
+    "source": "database",
+    "slots": [
+        {"start": f"2025-03-{10 + i:02d}T0{9 + i % 2}:30:00Z", "max_capacity": 1 + i % 3, "available_capacity": 1}
+        for i in range(8)
+    ]
+}
+
+
+def _cases():
+    prompts = PromptTemplateService()
+    compiler = PromptCompiler()
+    slots = slot_manager_service
+    messages = CUSTOMER_MESSAGES
+
+    def sentiment():
+        for message in messages:
+            prompts.detect_sentiment_and_urgency(message, AGENT)
+
+    def datetime_rules():
+        for utterance in BOOKING_UTTERANCES:
+            parse_datetime_rules(utterance, TODAY)
+
+    def acknowledgment():
+        for message in messages:
+            prompts.generate_rag_acknowledgment(message, AGENT)
+
+    return {
+        # name: (callable, calls per invocation, invocations per call-second or None)
+        "audio.convert_twilio_audio": (lambda: convert_twilio_audio(TWILIO_FRAME), 1, FRAMES_PER_SECOND),
+        "audio.convert_exotel_audio_to_deepgram": (lambda: convert_exotel_audio_to_deepgram(EXOTEL_FRAME), 1, FRAMES_PER_SECOND),
+        "audio.convert_elevenlabs_to_exotel": (lambda: convert_elevenlabs_to_exotel(ELEVENLABS_CHUNK), 1, None),
+        "media.parse": (lambda: json.loads(MEDIA_MESSAGE), 1, FRAMES_PER_SECOND),
+        "media.serialize": (lambda: json.dumps(OUTBOUND_MEDIA), 1, None),
+        "turn.detect_sentiment_and_urgency": (sentiment, len(messages), None),
+        "turn.generate_rag_acknowledgment": (acknowledgment, len(messages), None),
+        "turn.build_prompt_incoming": (
+            lambda: compiler.build_messages(AGENT, RAG_CONTEXT, QUESTION, "incoming", CONVERSATION_CONTEXT), 1, None
+        ),
+        "turn.build_prompt_outgoing": (
+            lambda: compiler.build_messages(AGENT, RAG_CONTEXT, QUESTION, "outgoing", CONVERSATION_CONTEXT), 1, None
+        ),
+        "turn.parse_datetime_rules": (datetime_rules, len(BOOKING_UTTERANCES), None),
+        "turn.format_slots_for_prompt": (lambda: slots.format_slots_for_prompt(DATABASE_SLOTS), 1, None),
+    }
+
+
+def measure(func, calls: int) -> float:
+    """Best-of-REPEAT microseconds per call"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=REPEAT, number=number))
+    return best / (number * calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--only", help="run cases whose name contains this")
+    args = parser.parse_args()
+
+    # Keep service logging (e.g. rejection detection) out of the timings
+    logging.disable(logging.CRITICAL)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+
+    results = {}
+    regressions = []
+    frame_cpu_us = 0.0
+    print(f"{'case':42} {'us/call':>10} {'baseline':>10} {'change':>8}")
+    for name, (func, calls, per_second) in _cases().items():
+        if args.only and args.only not in name:
+            continue
+        us = measure(func, calls)
+        results[name] = round(us, 3)
+        if per_second:
+            frame_cpu_us += us * per_second
+
+        line = f"{name:42} {us:10.2f}"
+        if name in baseline:
+            change = us / baseline[name] - 1
+            line += f" {baseline[name]:10.2f} {change:+7.0%}"
+            if change > args.tolerance:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if frame_cpu_us:
+        print(f"\nper-frame path:  {frame_cpu_us / 1000:.3f} ms CPU per call-second "
+              f"({frame_cpu_us / 10000:.3f} % of a core per concurrent call)")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+                "results": results
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+    elif not baseline:
+        print("\nno baseline; run with --save to record one")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
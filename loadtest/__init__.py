@@ -0,0 +1 @@
+"""Synthetic media-stream load testing: vendor stand-ins and a call generator."""
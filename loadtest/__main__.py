@@ -0,0 +1,105 @@
+"""
+python -m loadtest stubs  ...   run the vendor stand-ins
+python -m loadtest calls  ...   run synthetic calls against a worker
+
+See loadtest/README.md.
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+from loadtest.generator import CallerProfile, LoadGenerator, load_mulaw, synthetic_speech
+from loadtest.stubs import LOADTEST_AGENT_ID, LOADTEST_COMPANY_ID, LatencyModel, StubConfig, serve_stubs
+
+
+async def _run_stubs(args):
+    config = StubConfig(
+        stt_final=LatencyModel.parse(args.stt_latency),
+        llm_first_token=LatencyModel.parse(args.llm_latency),
+        llm_token_ms=args.llm_token_ms,
+        embedding=LatencyModel.parse(args.embedding_latency),
+        tts_first_byte=LatencyModel.parse(args.tts_latency),
+        tts_realtime_factor=args.tts_realtime_factor,
+        endpointing_ms=args.endpointing_ms
+    )
+    runner = await serve_stubs(config, args.host, args.port)
+    logging.info(
+        f"stt={config.stt_final} llm_first_token={config.llm_first_token} "
+        f"embedding={config.embedding} tts_first_byte={config.tts_first_byte}"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def _run_calls(args):
+    utterance = load_mulaw(args.audio) if args.audio else synthetic_speech(args.utterance_seconds)
+    profile = CallerProfile(
+        utterance=utterance,
+        pause_seconds=args.pause_seconds,
+        turns=args.turns,
+        hold_seconds=args.hold_seconds
+    )
+    generator = LoadGenerator(
+        target=args.target,
+        calls=args.calls,
+        duration=args.duration,
+        provider=args.provider,
+        direction=args.direction,
+        profile=profile,
+        ramp_per_second=args.ramp,
+        workers=args.workers,
+        query={"company_id": args.company_id, "agent_id": args.agent_id, "customer_name": "Load Test"}
+    )
+    report = await generator.run()
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m loadtest")
+    parser.add_argument("--log-level", default="INFO")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stubs = commands.add_parser("stubs", help="Serve Deepgram / OpenAI / ElevenLabs / Callsure stand-ins")
+    stubs.add_argument("--host", default="127.0.0.1")
+    stubs.add_argument("--port", type=int, default=9100)
+    stubs.add_argument("--stt-latency", default="150:400", help="final transcript delay after endpointing, median[:p95] ms")
+    stubs.add_argument("--llm-latency", default="350:900", help="LLM time to first token, median[:p95] ms")
+    stubs.add_argument("--llm-token-ms", type=float, default=15, help="delay between streamed tokens")
+    stubs.add_argument("--embedding-latency", default="60:150", help="median[:p95] ms")
+    stubs.add_argument("--tts-latency", default="250:600", help="TTS time to first byte, median[:p95] ms")
+    stubs.add_argument("--tts-realtime-factor", type=float, default=4.0, help="TTS audio streamed at N x real time")
+    stubs.add_argument("--endpointing-ms", type=int, default=250)
+
+    calls = commands.add_parser("calls", help="Open concurrent synthetic media streams against a worker")
+    calls.add_argument("--target", default="http://127.0.0.1:8000", help="worker base URL")
+    calls.add_argument("--calls", type=int, default=10, help="concurrent calls")
+    calls.add_argument("--duration", type=float, default=120, help="seconds to keep starting calls")
+    calls.add_argument("--ramp", type=float, default=5.0, help="new calls per second while ramping up")
+    calls.add_argument("--provider", choices=("twilio", "exotel"), default="twilio")
+    calls.add_argument("--direction", choices=("inbound", "outbound"), default="inbound",
+                       help="inbound: /incoming-call + /media-stream, outbound: /outbound-connect + /outbound-stream")
+    calls.add_argument("--workers", type=int, default=1, help="worker processes behind --target, for per-worker numbers")
+    calls.add_argument("--audio", help="caller utterance: WAV or raw μ-law 8 kHz (default: synthetic speech)")
+    calls.add_argument("--utterance-seconds", type=float, default=1.5)
+    calls.add_argument("--pause-seconds", type=float, default=4.0, help="silence after each utterance")
+    calls.add_argument("--turns", type=int, default=5, help="utterances per call")
+    calls.add_argument("--hold-seconds", type=float, default=2.0, help="silence before the first utterance")
+    calls.add_argument("--company-id", default=LOADTEST_COMPANY_ID)
+    calls.add_argument("--agent-id", default=LOADTEST_AGENT_ID)
+
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper()),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    try:
+        asyncio.run(_run_stubs(args) if args.command == "stubs" else _run_calls(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Synthetic media-stream callers.
+
+Each simulated call hits the worker's voice webhook exactly like the
+provider would, takes the stream URL and signed context from the response,
+opens the media WebSocket and speaks the provider's protocol: `connected` /
+`start` / `media` / `stop`, with 20 ms μ-law frames paced in real time.
+
+The caller alternates speech and silence. A turn is measured from the end
+of the caller's utterance (the last loud frame sent) to the first agent
+media frame received after it, which is what the person on the phone
+would hear as the agent's response time.
+"""
+import asyncio
+import audioop
+import base64
+import logging
+import math
+import random
+import statistics
+import time
+import uuid
+import wave
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlencode, urlparse
+from xml.etree import ElementTree
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+FRAME_SECONDS = 0.02
+FRAME_BYTES = 160  # 20 ms of 8 kHz μ-law
+
+PROVIDER_PATHS = {
+    "twilio": "/api/v1/twilio-elevenlabs",
+    "exotel": "/api/v1/exotel-elevenlabs",
+}
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 in milliseconds"""
+    if not samples:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "count": len(ordered),
+        "p50_ms": round(ordered[min(last, int(len(ordered) * 0.50))] * 1000, 1),
+        "p95_ms": round(ordered[min(last, int(len(ordered) * 0.95))] * 1000, 1),
+        "p99_ms": round(ordered[min(last, int(len(ordered) * 0.99))] * 1000, 1)
+    }
+
+
+def load_mulaw(path: str) -> bytes:
+    """μ-law 8 kHz mono audio from a WAV (μ-law or 16-bit PCM) or raw .ulaw file"""
+    if not path.endswith(".wav"):
+        with open(path, "rb") as f:
+            return f.read()
+    with wave.open(path, "rb") as wav:
+        frames = wav.readframes(wav.getnframes())
+        width, channels, rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+        if wav.getcomptype() == "ULAW":
+            return frames
+    if channels == 2:
+        frames = audioop.tomono(frames, width, 0.5, 0.5)
+    if width != 2:
+        frames = audioop.lin2lin(frames, width, 2)
+    if rate != 8000:
+        frames, _ = audioop.ratecv(frames, 2, 1, rate, 8000, None)
+    return audioop.lin2ulaw(frames, 2)
+
+
+def synthetic_speech(seconds: float) -> bytes:
+    """Voice-band noise loud enough to trip the STT stub's endpointing"""
+    samples = int(seconds * 8000)
+    pcm = b"".join(
+        int(6000 * math.sin(2 * math.pi * (180 + 40 * math.sin(i / 400)) * i / 8000)
+            + random.uniform(-1500, 1500)).to_bytes(2, "little", signed=True)
+        for i in range(samples)
+    )
+    return audioop.lin2ulaw(pcm, 2)
+
+
+@dataclass
+class CallerProfile:
+    """How a simulated caller talks"""
+    utterance: bytes
+    pause_seconds: float = 4.0
+    turns: int = 5
+    hold_seconds: float = 2.0
+
+
+@dataclass
+class LoadStats:
+    started: int = 0
+    connected: int = 0
+    completed: int = 0
+    failed: int = 0
+    active: int = 0
+    peak_active: int = 0
+    closed_by_server: int = 0
+    frames_sent: int = 0
+    frames_received: int = 0
+    turn_latencies: List[float] = field(default_factory=list)
+    unanswered_turns: int = 0
+    setup_latencies: List[float] = field(default_factory=list)
+    greeting_latencies: List[float] = field(default_factory=list)
+    loop_lag: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+class SyntheticCall:
+    """One caller: webhook, media WebSocket, scripted turns"""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        target: str,
+        provider: str,
+        direction: str,
+        profile: CallerProfile,
+        stats: LoadStats,
+        query: Dict[str, str]
+    ):
+        self.session = session
+        self.target = target.rstrip("/")
+        self.provider = provider
+        self.direction = direction
+        self.profile = profile
+        self.stats = stats
+        self.query = query
+        self.call_sid = f"CA{uuid.uuid4().hex}"
+        self.stream_sid = f"MZ{uuid.uuid4().hex}"
+
+        self._stream_opened = 0.0
+        self._utterance_ended: Optional[float] = None
+        self._awaiting_reply = False
+        self._first_media: Optional[float] = None
+
+    # Webhook
+
+    async def _stream_target(self) -> tuple:
+        """(ws_url, custom_parameters) taken from the webhook response"""
+        webhook = "incoming-call" if self.direction == "inbound" else "outbound-connect"
+        url = f"{self.target}{PROVIDER_PATHS[self.provider]}/{webhook}?{urlencode(self.query)}"
+        form = {"CallSid": self.call_sid, "From": "+15550000001", "To": "+15550000002"}
+        async with self.session.post(url, data=form) as response:
+            body = await response.text()
+        if response.status != 200:
+            raise RuntimeError(f"webhook returned {response.status}")
+
+        stream = ElementTree.fromstring(body).find(".//Stream")
+        if stream is None:
+            raise RuntimeError("no <Stream> in webhook response")
+        parameters = {p.get("name"): p.get("value") for p in stream.findall("Parameter")}
+
+        # Keep the path and query the worker issued, but dial the target we were given
+        issued = urlparse(stream.get("url"))
+        base = urlparse(self.target)
+        scheme = "wss" if base.scheme == "https" else "ws"
+        ws_url = f"{scheme}://{base.netloc}{issued.path}"
+        # Like the real providers: Twilio drops the query string, Exotel keeps it
+        if issued.query and self.provider != "twilio":
+            ws_url += f"?{issued.query}"
+        return ws_url, parameters
+
+    def _start_event(self, parameters: Dict[str, str]) -> dict:
+        start = {
+            "streamSid": self.stream_sid,
+            "callSid": self.call_sid,
+            "tracks": ["inbound"],
+            "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": 8000, "channels": 1},
+        }
+        key = "customParameters" if self.provider == "twilio" else "custom_parameters"
+        start[key] = parameters
+        if self.provider == "exotel":
+            start.update({"stream_sid": self.stream_sid, "call_sid": self.call_sid})
+        return {"event": "start", "sequenceNumber": "1", "start": start, "streamSid": self.stream_sid}
+
+    def _media_event(self, seq: int, payload: bytes) -> dict:
+        # Exotel streams 16-bit PCM; Twilio streams μ-law
+        if self.provider == "exotel":
+            payload = audioop.ulaw2lin(payload, 2)
+        return {
+            "event": "media",
+            "sequenceNumber": str(seq),
+            "streamSid": self.stream_sid,
+            "media": {
+                "track": "inbound",
+                "chunk": str(seq),
+                "timestamp": str(int(seq * FRAME_SECONDS * 1000)),
+                "payload": base64.b64encode(payload).decode("ascii")
+            }
+        }
+
+    # Session
+
+    async def run(self):
+        stats = self.stats
+        stats.started += 1
+        opened = time.perf_counter()
+        try:
+            ws_url, parameters = await self._stream_target()
+            async with self.session.ws_connect(ws_url, heartbeat=None, max_msg_size=0) as ws:
+                stats.connected += 1
+                stats.active += 1
+                stats.peak_active = max(stats.peak_active, stats.active)
+                stats.setup_latencies.append(time.perf_counter() - opened)
+                try:
+                    await ws.send_json({"event": "connected", "protocol": "Call", "version": "1.0.0"})
+                    await ws.send_json(self._start_event(parameters))
+                    self._stream_opened = time.perf_counter()
+                    receiver = asyncio.create_task(self._receive(ws))
+                    try:
+                        await self._speak(ws)
+                    finally:
+                        receiver.cancel()
+                    if not ws.closed:
+                        await ws.send_json({"event": "stop", "streamSid": self.stream_sid})
+                    stats.completed += 1
+                finally:
+                    stats.active -= 1
+        except Exception as e:
+            stats.failed += 1
+            stats.error(type(e).__name__)
+            logger.debug(f"Call {self.call_sid} failed: {e}")
+
+    async def _receive(self, ws: aiohttp.ClientWebSocketResponse):
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            data = msg.json()
+            if data.get("event") != "media":
+                continue
+            now = time.perf_counter()
+            self.stats.frames_received += 1
+            if self._first_media is None:
+                self._first_media = now
+                self.stats.greeting_latencies.append(now - self._stream_opened)
+            if self._awaiting_reply and self._utterance_ended is not None:
+                self.stats.turn_latencies.append(now - self._utterance_ended)
+                self._awaiting_reply = False
+        self.stats.closed_by_server += 1
+
+    async def _send_paced(self, ws: aiohttp.ClientWebSocketResponse, audio: bytes, seq: int) -> int:
+        """Send audio as 20 ms frames on a real-time clock (no drift under load)"""
+        started = time.perf_counter()
+        for frame_index, offset in enumerate(range(0, len(audio), FRAME_BYTES), 1):
+            if ws.closed:
+                raise ConnectionError("stream closed by worker")
+            frame = audio[offset:offset + FRAME_BYTES].ljust(FRAME_BYTES, b"\xff")
+            await ws.send_json(self._media_event(seq, frame))
+            seq += 1
+            self.stats.frames_sent += 1
+            delay = started + frame_index * FRAME_SECONDS - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return seq
+
+    async def _speak(self, ws: aiohttp.ClientWebSocketResponse):
+        profile = self.profile
+        silence = b"\xff" * int(FRAME_BYTES / FRAME_SECONDS * profile.pause_seconds)
+        seq = 2
+        # Let the greeting play before the first utterance
+        seq = await self._send_paced(ws, b"\xff" * int(8000 * profile.hold_seconds), seq)
+        for _ in range(profile.turns):
+            if self._awaiting_reply:
+                self.stats.unanswered_turns += 1
+            seq = await self._send_paced(ws, profile.utterance, seq)
+            self._utterance_ended = time.perf_counter()
+            self._awaiting_reply = True
+            seq = await self._send_paced(ws, silence, seq)
+        if self._awaiting_reply:
+            self.stats.unanswered_turns += 1
+
+
+class LoadGenerator:
+    """
+    Ramps up `calls` concurrent SyntheticCalls (at `ramp_per_second`) and
+    keeps starting new ones as they finish until `duration` seconds pass.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        calls: int,
+        duration: float,
+        provider: str = "twilio",
+        direction: str = "inbound",
+        profile: Optional[CallerProfile] = None,
+        ramp_per_second: float = 5.0,
+        workers: int = 1,
+        query: Optional[Dict[str, str]] = None
+    ):
+        self.target = target
+        self.calls = calls
+        self.duration = duration
+        self.provider = provider
+        self.direction = direction
+        self.profile = profile or CallerProfile(utterance=synthetic_speech(1.5))
+        self.ramp_per_second = ramp_per_second
+        self.workers = workers
+        self.query = query or {}
+        self.stats = LoadStats()
+        self.worker_stats: Optional[dict] = None
+
+    async def _monitor_loop_lag(self, interval: float = 0.1):
+        """Lag of this process's event loop; if it grows, the generator itself is the bottleneck"""
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            self.stats.loop_lag.append(max(0.0, time.perf_counter() - expected))
+
+    async def _caller(self, session: aiohttp.ClientSession, deadline: float):
+        while time.perf_counter() < deadline:
+            call = SyntheticCall(
+                session, self.target, self.provider, self.direction,
+                self.profile, self.stats, self.query
+            )
+            await call.run()
+
+    async def _fetch_worker_stats(self, session: aiohttp.ClientSession) -> Optional[dict]:
+        try:
+            async with session.get(f"{self.target.rstrip('/')}/stats") as response:
+                return await response.json()
+        except Exception as e:
+            logger.warning(f"Could not read worker /stats: {e}")
+            return None
+
+    async def run(self) -> dict:
+        deadline = time.perf_counter() + self.duration
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=None, connect=30)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            monitor = asyncio.create_task(self._monitor_loop_lag())
+            callers = []
+            for _ in range(self.calls):
+                callers.append(asyncio.create_task(self._caller(session, deadline)))
+                await asyncio.sleep(1 / self.ramp_per_second)
+            await asyncio.gather(*callers)
+            monitor.cancel()
+            self.worker_stats = await self._fetch_worker_stats(session)
+        return self.report()
+
+    def report(self) -> dict:
+        stats = self.stats
+        answered = len(stats.turn_latencies)
+        report = {
+            "target": self.target,
+            "provider": self.provider,
+            "direction": self.direction,
+            "calls": {
+                "started": stats.started,
+                "connected": stats.connected,
+                "completed": stats.completed,
+                "failed": stats.failed,
+                "closed_by_worker": stats.closed_by_server,
+                "peak_concurrent": stats.peak_active,
+                "peak_per_worker": round(stats.peak_active / max(1, self.workers), 1),
+                "errors": stats.errors
+            },
+            "turns": {
+                "answered": answered,
+                "unanswered": stats.unanswered_turns,
+                "latency": percentiles(stats.turn_latencies)
+            },
+            "stream_setup": percentiles(stats.setup_latencies),
+            "greeting_first_audio": percentiles(stats.greeting_latencies),
+            "media": {"frames_sent": stats.frames_sent, "frames_received": stats.frames_received},
+            "generator_loop_lag": percentiles(stats.loop_lag)
+        }
+        if stats.loop_lag:
+            report["generator_loop_lag"]["max_ms"] = round(max(stats.loop_lag) * 1000, 1)
+            report["generator_loop_lag"]["mean_ms"] = round(statistics.fmean(stats.loop_lag) * 1000, 2)
+        if self.worker_stats:
+            report["worker"] = {
+                key: self.worker_stats.get(key)
+                for key in ("event_loop", "turn_latency", "resources")
+                if key in self.worker_stats
+            }
+        return report
@@ -0,0 +1,367 @@
+"""
+Local stand-ins for the vendors a call touches: Deepgram live transcription,
+OpenAI chat completions / embeddings, ElevenLabs streaming TTS and the
+Callsure agent API.
+
+Each speaks just enough of the real wire protocol for the SDKs the worker
+uses, with latencies drawn from configurable log-normal distributions, so a
+worker pointed at them (see README) behaves like it does in production
+without spending anything.
+"""
+import asyncio
+import audioop
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from aiohttp import WSMsgType, web
+
+logger = logging.getLogger(__name__)
+
+LOADTEST_USER_ID = "loadtest-user"
+LOADTEST_COMPANY_ID = "loadtest-company"
+LOADTEST_AGENT_ID = "loadtest-agent"
+
+# What the simulated callers say, in order, one line per detected utterance
+DEFAULT_SCRIPT = [
+    "Hi, I wanted to ask about your pricing plans",
+    "What does the premium plan include?",
+    "Can I book a demo for tomorrow at 2 PM?",
+    "My email is loadtest@example.com",
+    "Great, thanks for your help",
+]
+
+ANSWER = (
+    "Sure, happy to help with that. Our plans start with a free tier, and the premium "
+    "plan adds priority support and advanced analytics. Would you like to book a demo?"
+)
+
+
+class LatencyModel:
+    """
+    Log-normal latency given its median and p95 in milliseconds.
+
+    Parsed from "median" or "median:p95" (e.g. "350:900"); p95 defaults to
+    twice the median.
+    """
+
+    def __init__(self, median_ms: float, p95_ms: Optional[float] = None):
+        p95_ms = p95_ms or median_ms * 2
+        self.median_ms = median_ms
+        self.p95_ms = p95_ms
+        self._mu = math.log(max(median_ms, 0.001))
+        self._sigma = max(0.0, math.log(max(p95_ms, median_ms) / max(median_ms, 0.001)) / 1.645)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        median, _, p95 = spec.partition(":")
+        return cls(float(median), float(p95) if p95 else None)
+
+    def sample(self) -> float:
+        """One latency in seconds"""
+        return random.lognormvariate(self._mu, self._sigma) / 1000
+
+    def __repr__(self):
+        return f"{self.median_ms:g}:{self.p95_ms:g}ms"
+
+
+@dataclass
+class StubConfig:
+    stt_final: LatencyModel = field(default_factory=lambda: LatencyModel(150, 400))
+    llm_first_token: LatencyModel = field(default_factory=lambda: LatencyModel(350, 900))
+    llm_token_ms: float = 15
+    embedding: LatencyModel = field(default_factory=lambda: LatencyModel(60, 150))
+    tts_first_byte: LatencyModel = field(default_factory=lambda: LatencyModel(250, 600))
+    tts_realtime_factor: float = 4.0
+    endpointing_ms: int = 250
+    vad_rms_threshold: int = 500
+    script: List[str] = field(default_factory=lambda: list(DEFAULT_SCRIPT))
+
+
+class VendorStubs:
+    """aiohttp application serving every vendor stand-in on one port"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.stats: Dict[str, int] = {
+            "deepgram_sessions": 0,
+            "deepgram_active": 0,
+            "transcripts": 0,
+            "chat_completions": 0,
+            "embeddings": 0,
+            "tts_requests": 0,
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get("/v1/listen", self.deepgram_listen),
+            web.post("/v1/chat/completions", self.openai_chat),
+            web.post("/v1/embeddings", self.openai_embeddings),
+            web.post("/v1/text-to-speech/{voice_id}/stream", self.elevenlabs_stream),
+            web.post("/v1/text-to-speech/{voice_id}", self.elevenlabs_stream),
+            web.get("/api/users/me/id", self.callsure_user),
+            web.get("/api/agent/user/{user_id}", self.callsure_agents),
+            web.get("/company/user/{user_id}", self.callsure_companies),
+            web.get("/stats", self.get_stats),
+        ])
+        return app
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    # Deepgram live transcription
+
+    def _result(self, transcript: str, start: float, duration: float) -> str:
+        return json.dumps({
+            "type": "Results",
+            "channel_index": [0, 1],
+            "duration": round(duration, 3),
+            "start": round(start, 3),
+            "is_final": True,
+            "speech_final": True,
+            "from_finalize": False,
+            "channel": {"alternatives": [{"transcript": transcript, "confidence": 0.97, "words": []}]},
+            "metadata": {
+                "request_id": str(uuid.uuid4()),
+                "model_info": {"name": "stub", "version": "1", "arch": "stub"},
+                "model_uuid": str(uuid.uuid4())
+            }
+        })
+
+    async def deepgram_listen(self, request: web.Request) -> web.WebSocketResponse:
+        """
+        Energy-based endpointing over the streamed linear16 audio: an utterance
+        is a run of loud frames followed by `endpointing_ms` of quiet; its final
+        transcript (the next script line) is sent after an stt_final delay.
+        """
+        ws = web.WebSocketResponse(heartbeat=None)
+        await ws.prepare(request)
+        self.stats["deepgram_sessions"] += 1
+        self.stats["deepgram_active"] += 1
+
+        sample_rate = int(request.query.get("sample_rate", 16000))
+        bytes_per_second = sample_rate * 2
+        config = self.config
+        audio_seconds = 0.0
+        speech_start: Optional[float] = None
+        last_voice = 0.0
+        line = 0
+        pending: List[asyncio.Task] = []
+
+        async def send_final(transcript: str, start: float, duration: float):
+            await asyncio.sleep(config.stt_final.sample())
+            if not ws.closed:
+                await ws.send_str(self._result(transcript, start, duration))
+                await ws.send_str(json.dumps({"type": "UtteranceEnd", "channel": [0, 1], "last_word_end": start + duration}))
+                self.stats["transcripts"] += 1
+
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.BINARY:
+                    chunk_seconds = len(msg.data) / bytes_per_second
+                    loud = audioop.rms(msg.data, 2) >= config.vad_rms_threshold if msg.data else False
+                    if loud:
+                        if speech_start is None:
+                            speech_start = audio_seconds
+                            await ws.send_str(json.dumps({"type": "SpeechStarted", "channel": [0, 1], "timestamp": audio_seconds}))
+                        last_voice = audio_seconds + chunk_seconds
+                    audio_seconds += chunk_seconds
+                    if speech_start is not None and audio_seconds - last_voice >= config.endpointing_ms / 1000:
+                        transcript = config.script[line % len(config.script)]
+                        line += 1
+                        pending.append(asyncio.create_task(
+                            send_final(transcript, speech_start, last_voice - speech_start)
+                        ))
+                        speech_start = None
+                elif msg.type == WSMsgType.TEXT:
+                    if json.loads(msg.data).get("type") == "CloseStream":
+                        break
+                elif msg.type in (WSMsgType.ERROR, WSMsgType.CLOSE):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            self.stats["deepgram_active"] -= 1
+            if not ws.closed:
+                await ws.send_str(json.dumps({
+                    "type": "Metadata",
+                    "request_id": str(uuid.uuid4()),
+                    "duration": audio_seconds,
+                    "channels": 1
+                }))
+                await ws.close()
+        return ws
+
+    # OpenAI
+
+    def _completion_text(self, body: dict) -> str:
+        """Plausible content for whichever prompt this is"""
+        messages = body.get("messages", [])
+        prompt = " ".join(str(m.get("content", "")) for m in messages)
+        if "Which specialist?" in prompt:
+            return "MASTER"
+        if body.get("response_format", {}).get("type") == "json_object" or "valid JSON" in prompt:
+            # Superset of the classifier schemas (routing, intent, date/time parsing)
+            return json.dumps({
+                "needs_documents": True,
+                "response_strategy": random.choice(["conversation_context", "document_retrieval"]),
+                "reasoning": "load test",
+                "confidence": 0.9,
+                "topic_continuity": "new_topic",
+                "can_answer_from_history": False,
+                "intent_type": "question",
+                "sentiment": "neutral",
+                "buying_readiness": 40,
+                "should_book": False,
+                "should_persuade": True,
+                "should_end_call": False,
+                "objection_type": "none",
+                "parsed_successfully": False
+            })
+        return ANSWER
+
+    async def openai_chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.stats["chat_completions"] += 1
+        text = self._completion_text(body)
+        created = int(time.time())
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "stub")
+        tokens = text.split(" ")
+
+        await asyncio.sleep(self.config.llm_first_token.sample())
+
+        if not body.get("stream"):
+            await asyncio.sleep(len(tokens) * self.config.llm_token_ms / 1000)
+            return web.json_response({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 100, "completion_tokens": len(tokens), "total_tokens": 100 + len(tokens)}
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        def chunk(delta: dict, finish_reason=None) -> bytes:
+            return ("data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }) + "\n\n").encode()
+
+        await response.write(chunk({"role": "assistant", "content": ""}))
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.config.llm_token_ms / 1000)
+            await response.write(chunk({"content": token if i == 0 else " " + token}))
+        await response.write(chunk({}, "stop"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def openai_embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.stats["embeddings"] += 1
+        inputs = body.get("input", [])
+        if isinstance(inputs, (str, int)) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        dimensions = int(body.get("dimensions") or 1536)
+
+        await asyncio.sleep(self.config.embedding.sample())
+
+        data = []
+        for index, item in enumerate(inputs):
+            # Deterministic per input, so the same question embeds the same way
+            rng = random.Random(hashlib.sha256(str(item).encode()).digest())
+            vector = [rng.uniform(-1, 1) for _ in range(dimensions)]
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            data.append({"object": "embedding", "index": index, "embedding": [v / norm for v in vector]})
+        return web.json_response({
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "stub"),
+            "usage": {"prompt_tokens": 10 * len(inputs), "total_tokens": 10 * len(inputs)}
+        })
+
+    # ElevenLabs
+
+    async def elevenlabs_stream(self, request: web.Request) -> web.StreamResponse:
+        """
+        μ-law 8 kHz speech-length audio (~60 ms per character) streamed at
+        `tts_realtime_factor` times real time after a first-byte delay.
+        """
+        body = await request.json()
+        self.stats["tts_requests"] += 1
+        text = body.get("text", "")
+        total_bytes = int(len(text) * 0.06 * 8000)
+
+        response = web.StreamResponse(headers={"Content-Type": "audio/basic"})
+        await response.prepare(request)
+        await asyncio.sleep(self.config.tts_first_byte.sample())
+
+        chunk_bytes = 1600  # 200 ms of audio
+        # A quiet tone rather than digital silence, so recordings show where speech was
+        pcm = b"".join(
+            int(800 * math.sin(2 * math.pi * 220 * i / 8000)).to_bytes(2, "little", signed=True)
+            for i in range(chunk_bytes)
+        )
+        frame = audioop.lin2ulaw(pcm, 2)
+        interval = chunk_bytes / 8000 / self.config.tts_realtime_factor
+
+        sent = 0
+        while sent < total_bytes:
+            size = min(chunk_bytes, total_bytes - sent)
+            await response.write(frame[:size])
+            sent += size
+            await asyncio.sleep(interval)
+        await response.write_eof()
+        return response
+
+    # Callsure agent API
+
+    async def callsure_user(self, request: web.Request) -> web.Response:
+        return web.json_response({"user_id": LOADTEST_USER_ID})
+
+    async def callsure_agents(self, request: web.Request) -> web.Response:
+        return web.json_response([{
+            "id": LOADTEST_AGENT_ID,
+            "name": "Load Test Agent",
+            "company_id": LOADTEST_COMPANY_ID,
+            "is_active": True,
+            "type": "base",
+            "prompt": "You are a helpful sales assistant.",
+            "additional_context": {
+                "businessContext": "SaaS analytics platform",
+                "roleDescription": "Answers product questions and books demos",
+                "tone": "friendly",
+                "language": "english"
+            }
+        }])
+
+    async def callsure_companies(self, request: web.Request) -> web.Response:
+        return web.json_response([{"id": LOADTEST_COMPANY_ID, "name": "Load Test Co"}])
+
+
+async def serve_stubs(config: StubConfig, host: str, port: int) -> web.AppRunner:
+    stubs = VendorStubs(config)
+    runner = web.AppRunner(stubs.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Vendor stubs listening on http://{host}:{port}")
+    return runner
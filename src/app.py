@@ -3,16 +3,30 @@ Main FastAPI application for CSAI Processor
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import RedirectResponse
+from starlette.responses import RedirectResponse, Response
 import logging
 import asyncio
 from contextlib import asynccontextmanager
 
 from config.settings import settings
-from database.config import init_database, close_database, get_db
+from database.config import init_database, close_database, get_db, get_pool_metrics
 from database.models import Base
 from services.vector_store.qdrant_service import QdrantService
 from services.rag.rag_service import RAGService
+from handlers.s3_handler import shutdown_s3_executor
+from services.transcript_rollup_service import shutdown_rollup_executor
+from services.db_write_buffer import db_write_buffer
+from services.call_finalization_service import call_finalization_service
+from services.call_state_store import call_state_store
+from services.resource_registry import resource_registry
+from services.event_loop_monitor import event_loop_monitor
+from services.turn_tracer import turn_tracer
+from services.turn_deadline import turn_deadlines
+from services.rag.prompt_compiler import prompt_compiler
+from services.rag.hedged_llm import llm_hedging_metrics
+from services.conversation_memory import conversation_memory_service
+from services.datetime_parser_service import datetime_parser_service
+from services.slot_manager_service import slot_manager_service
 from routes.s3 import router as s3_router
 from routes.document_routes import router as document_router
 from routes.twilio_elevenlabs_routes import router as twilio_elevenlabs_router
@@ -121,7 +135,20 @@ def create_app() -> FastAPI:
                     "name": settings.app_name,
                     "version": settings.app_version,
                     "uptime": asyncio.get_event_loop().time()
-                }
+                },
+                "database_pool": get_pool_metrics(),
+                "db_write_buffer": db_write_buffer.get_stats(),
+                "call_finalization": call_finalization_service.get_stats(),
+                "call_state": call_state_store.get_stats(),
+                "resources": resource_registry.get_stats(),
+                "turn_latency": turn_tracer.get_stats(),
+                "turn_budget": turn_deadlines.get_stats(),
+                "event_loop": event_loop_monitor.get_stats(),
+                "prompt_prefixes": prompt_compiler.get_stats(),
+                "conversation_memory": conversation_memory_service.get_stats(),
+                "llm_hedging": llm_hedging_metrics.get_stats(),
+                "datetime_parser": datetime_parser_service.get_stats(),
+                "slot_cache": slot_manager_service.get_stats()
             }
             
             return stats
@@ -130,6 +157,15 @@ def create_app() -> FastAPI:
             logger.error(f"Failed to get stats: {str(e)}")
             return {"error": f"Failed to retrieve statistics: {str(e)}"}
 
+    # Prometheus scrape endpoint (per-turn latency histograms)
+    @app.get("/metrics")
+    async def get_metrics():
+        payload = turn_tracer.metrics_payload()
+        if payload is None:
+            return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+        body, content_type = payload
+        return Response(body, media_type=content_type)
+
     return app
 
 async def startup_event():
@@ -148,9 +184,21 @@ async def startup_event():
         logger.info("Starting CSAI Processor...")
         
         # Initialize database
-        init_database()
+        await init_database()
         logger.info("Database initialized")
 
+        # Start write-behind buffer for turns and call status writes
+        await db_write_buffer.start()
+
+        # Start post-call finalization workers (resumes spooled jobs)
+        await call_finalization_service.start()
+
+        # Reap per-call state left behind by calls that never cleaned up
+        await resource_registry.start()
+
+        # Sample event-loop lag for /stats
+        await event_loop_monitor.start()
+
         # Initialize vector store
         vector_store = QdrantService()
         logger.info("Vector store initialized")
@@ -183,12 +231,55 @@ async def shutdown_event():
     try:
         logger.info("Shutting down CSAI Processor...")
         
+        # Stop the per-call resource reaper and loop monitor
+        try:
+            await resource_registry.stop()
+            await event_loop_monitor.stop()
+        except Exception as e:
+            logger.error(f"Error stopping resource reaper: {str(e)}")
+
+        # Let in-flight finalizations finish; the rest stay spooled for next start
+        try:
+            await call_finalization_service.stop()
+        except Exception as e:
+            logger.error(f"Error stopping call finalization: {str(e)}")
+
+        # Flush buffered writes before the pool goes away
+        try:
+            await db_write_buffer.stop()
+        except Exception as e:
+            logger.error(f"Error flushing DB write buffer: {str(e)}")
+
+        # Close the slot backend session
+        try:
+            await slot_manager_service.close()
+        except Exception as e:
+            logger.error(f"Error closing slot manager session: {str(e)}")
+
+        # Release the shared call state connection
+        try:
+            await call_state_store.close()
+        except Exception as e:
+            logger.error(f"Error closing call state store: {str(e)}")
+
         # Close database connections
         try:
-            close_database()
+            await close_database()
             logger.info("Database connections closed")
         except Exception as e:
             logger.error(f"Error closing database connections: {str(e)}")
+
+        # Stop the S3 I/O executor
+        try:
+            shutdown_s3_executor()
+        except Exception as e:
+            logger.error(f"Error stopping S3 executor: {str(e)}")
+
+        # Stop the transcript rollup process
+        try:
+            shutdown_rollup_executor()
+        except Exception as e:
+            logger.error(f"Error stopping rollup executor: {str(e)}")
         
         logger.info("CSAI Processor shutdown complete")
         
@@ -26,6 +26,18 @@ class Settings(BaseSettings):
     database_url: str = Field(..., env="DATABASE_URL")
     database_pool_size: int = Field(default=10, env="DATABASE_POOL_SIZE")
     database_max_overflow: int = Field(default=20, env="DATABASE_MAX_OVERFLOW")
+    database_pool_timeout: int = Field(default=5, env="DATABASE_POOL_TIMEOUT")
+    database_pool_recycle: int = Field(default=1800, env="DATABASE_POOL_RECYCLE")
+
+    # Write-behind buffer for turns and call lifecycle writes
+    db_write_flush_interval_ms: int = Field(default=250, env="DB_WRITE_FLUSH_INTERVAL_MS")
+    db_write_batch_size: int = Field(default=500, env="DB_WRITE_BATCH_SIZE")
+    db_write_max_buffered: int = Field(default=50000, env="DB_WRITE_MAX_BUFFERED")
+
+    # Post-call finalization queue
+    finalization_spool_dir: str = Field(default="/var/tmp/csai-finalization", env="FINALIZATION_SPOOL_DIR")
+    finalization_workers: int = Field(default=4, env="FINALIZATION_WORKERS")
+    finalization_max_attempts: int = Field(default=8, env="FINALIZATION_MAX_ATTEMPTS")
 
     # Server Configuration
     server_url: str = Field(..., env="SERVER")
@@ -34,12 +46,65 @@ class Settings(BaseSettings):
 
     # Recording
     recording_enabled: bool = Field(default=False, env="RECORDING_ENABLED")
+    local_recording_enabled: bool = Field(default=False, env="LOCAL_RECORDING_ENABLED")
+    local_recording_dir: str = Field(default="/var/tmp/csai-recordings", env="LOCAL_RECORDING_DIR")
 
     # Service Selection
     default_service: str = Field(default="elevenlabs", env="DEFAULT_SERVICE")
 
     # Redis
     redis_url: str = Field(default="redis://localhost:6379", env="REDIS_DB_URL")
+
+    # Per-call state shared between workers ("memory" for a single worker, "redis" otherwise)
+    call_state_backend: str = Field(default="memory", env="CALL_STATE_BACKEND")
+    call_state_key_prefix: str = Field(default="csai:call", env="CALL_STATE_KEY_PREFIX")
+    call_state_ttl_seconds: int = Field(default=7200, env="CALL_STATE_TTL_SECONDS")
+
+    # In-process per-call resources (sessions, recorders, ...): idle TTL, hard cap, reaper period
+    call_resource_idle_seconds: int = Field(default=900, env="CALL_RESOURCE_IDLE_SECONDS")
+    call_resource_max_entries: int = Field(default=5000, env="CALL_RESOURCE_MAX_ENTRIES")
+    resource_reaper_interval_seconds: int = Field(default=30, env="RESOURCE_REAPER_INTERVAL_SECONDS")
+
+    # Per-campaign available-slot cache for booking turns
+    slot_cache_ttl_seconds: int = Field(default=60, env="SLOT_CACHE_TTL_SECONDS")
+    slot_cache_max_entries: int = Field(default=1000, env="SLOT_CACHE_MAX_ENTRIES")
+
+    # Event-loop lag sampling period reported on /stats
+    event_loop_lag_sample_seconds: float = Field(default=0.1, env="EVENT_LOOP_LAG_SAMPLE_SECONDS")
+
+    # Campaign dialer coordination ("memory" for a single worker, "redis" for a cluster)
+    dialer_backend: str = Field(default="memory", env="DIALER_BACKEND")
+    dialer_key_prefix: str = Field(default="csai:dialer", env="DIALER_KEY_PREFIX")
+    dialer_max_concurrent_calls: int = Field(default=5, env="DIALER_MAX_CONCURRENT_CALLS")
+    dialer_slot_ttl_seconds: int = Field(default=30, env="DIALER_SLOT_TTL_SECONDS")
+    dialer_call_lease_seconds: int = Field(default=120, env="DIALER_CALL_LEASE_SECONDS")
+    dialer_campaign_sync_seconds: int = Field(default=5, env="DIALER_CAMPAIGN_SYNC_SECONDS")
+
+    # Predictive pacing
+    pacing_max_live_calls: int = Field(default=5, env="PACING_MAX_LIVE_CALLS")
+    pacing_target_utilization: float = Field(default=0.85, env="PACING_TARGET_UTILIZATION")
+    pacing_llm_latency_slo_ms: float = Field(default=1500, env="PACING_LLM_LATENCY_SLO_MS")
+    pacing_tts_latency_slo_ms: float = Field(default=800, env="PACING_TTS_LATENCY_SLO_MS")
+    pacing_window_seconds: int = Field(default=900, env="PACING_WINDOW_SECONDS")
+
+    # Per-turn latency tracing (Prometheus histograms, optional OpenTelemetry spans)
+    turn_metrics_enabled: bool = Field(default=True, env="TURN_METRICS_ENABLED")
+    turn_tracing_otel_enabled: bool = Field(default=False, env="TURN_TRACING_OTEL_ENABLED")
+    turn_metrics_window: int = Field(default=2048, env="TURN_METRICS_WINDOW")
+
+    # End-to-end turn budget from the final transcript: stages before the answer get what is left
+    # minus the answer reserve and degrade when it runs out; the answer LLM gets at least the floor
+    turn_budget_enabled: bool = Field(default=True, env="TURN_BUDGET_ENABLED")
+    turn_budget_ms: float = Field(default=2500, env="TURN_BUDGET_MS")
+    turn_budget_answer_reserve_ms: float = Field(default=1200, env="TURN_BUDGET_ANSWER_RESERVE_MS")
+    turn_budget_llm_floor_ms: float = Field(default=1500, env="TURN_BUDGET_LLM_FLOOR_MS")
+
+    # Conversation memory: verbatim history budgets (tokens) and rolling summary of older turns
+    conversation_history_tokens: int = Field(default=1200, env="CONVERSATION_HISTORY_TOKENS")
+    conversation_router_history_tokens: int = Field(default=400, env="CONVERSATION_ROUTER_HISTORY_TOKENS")
+    conversation_summary_trigger_tokens: int = Field(default=300, env="CONVERSATION_SUMMARY_TRIGGER_TOKENS")
+    conversation_summary_model: str = Field(default="gpt-4o-mini", env="CONVERSATION_SUMMARY_MODEL")
+    conversation_summary_max_tokens: int = Field(default=200, env="CONVERSATION_SUMMARY_MAX_TOKENS")
     
     # Vector Store
     #qdrant_url: str = Field(default="http://localhost:6333", env="QDRANT_URL")
@@ -58,6 +123,24 @@ class Settings(BaseSettings):
     openai_model: str = Field(default="gpt-4", env="OPENAI_MODEL")
     openai_max_tokens: int = Field(default=2000, env="OPENAI_MAX_TOKENS")
     openai_temperature: float = Field(default=0.7, env="OPENAI_TEMPERATURE")
+    # Vendor endpoints; override to point a worker at local stand-ins (see loadtest/)
+    openai_base_url: Optional[str] = Field(default=None, env="OPENAI_BASE_URL")
+
+    # Hedged answer-LLM requests: a duplicate request goes out when the first token is slower
+    # than the observed percentile (clamped to min/max), to the fallback model / endpoint if set
+    llm_hedging_enabled: bool = Field(default=True, env="LLM_HEDGING_ENABLED")
+    llm_hedge_percentile: float = Field(default=0.95, env="LLM_HEDGE_PERCENTILE")
+    llm_hedge_initial_delay_ms: float = Field(default=1500, env="LLM_HEDGE_INITIAL_DELAY_MS")
+    llm_hedge_min_delay_ms: float = Field(default=400, env="LLM_HEDGE_MIN_DELAY_MS")
+    llm_hedge_max_delay_ms: float = Field(default=3000, env="LLM_HEDGE_MAX_DELAY_MS")
+    llm_hedge_window: int = Field(default=500, env="LLM_HEDGE_WINDOW")
+    llm_hedge_fallback_model: Optional[str] = Field(default=None, env="LLM_HEDGE_FALLBACK_MODEL")
+    llm_hedge_fallback_base_url: Optional[str] = Field(default=None, env="LLM_HEDGE_FALLBACK_BASE_URL")
+    llm_hedge_fallback_api_key: Optional[str] = Field(default=None, env="LLM_HEDGE_FALLBACK_API_KEY")
+    # Hard limit for the first token of an answer (either request); the caller's error path speaks
+    llm_deadline_seconds: float = Field(default=8, env="LLM_DEADLINE_SECONDS")
+    # Hard limit for a whole non-streaming completion (function calling); not capped by the turn budget
+    llm_completion_deadline_seconds: float = Field(default=20, env="LLM_COMPLETION_DEADLINE_SECONDS")
     
     # WebSocket
     websocket_ping_interval: int = Field(default=20, env="WEBSOCKET_PING_INTERVAL")
@@ -89,6 +172,10 @@ class Settings(BaseSettings):
     jwt_algorithm: str = Field(default="HS256", env="JWT_ALGORITHM")
     jwt_expiration: int = Field(default=3600, env="JWT_EXPIRATION")  # 1 hour
     callsure_api_token: str = Field(..., env="CALLSURE_API_TOKEN")
+    # Signed call context passed from the voice webhook to the media stream (falls back to a
+    # non-default secret_key; startup fails if neither is set)
+    call_context_token_secret: Optional[str] = Field(default=None, env="CALL_CONTEXT_TOKEN_SECRET")
+    call_context_token_ttl_seconds: int = Field(default=300, env="CALL_CONTEXT_TOKEN_TTL_SECONDS")
     
     # Background Tasks
     background_worker_enabled: bool = Field(default=True, env="BACKGROUND_WORKER_ENABLED")
@@ -116,6 +203,9 @@ class Settings(BaseSettings):
     claude_api_key: Optional[str] = Field(default=None, env="CLAUDE_API_KEY")
     deepgram_api_key: Optional[str] = Field(default=None, env="DEEPGRAM_API_KEY")
     eleven_labs_api_key: Optional[str] = Field(default=None, env="ELEVEN_LABS_API_KEY")
+    deepgram_api_url: Optional[str] = Field(default=None, env="DEEPGRAM_API_URL")
+    elevenlabs_base_url: str = Field(default="https://api.elevenlabs.io", env="ELEVENLABS_BASE_URL")
+    callsure_api_base_url: str = Field(default="https://beta.callsure.ai", env="CALLSURE_API_BASE_URL")
     elevenlabs_voice_id: str = Field(default="21m00Tcm4TlvDq8ikWAM", env="ELEVENLABS_VOICE_ID")
     voice_id: Optional[str] = Field(default=None, env="VOICE_ID")
     
@@ -1,8 +1,16 @@
 # Create a file: src/create_outbound_table.py
 
+import asyncio
 from database.config import engine
 from database.models import OutboundCall, Base
 
-# Create the table
-Base.metadata.create_all(engine, tables=[OutboundCall.__table__])
-print("✅ outbound_calls table created!")
+
+async def main():
+    # Create the table
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[OutboundCall.__table__])
+    await engine.dispose()
+    print("✅ outbound_calls table created!")
+
+
+asyncio.run(main())
@@ -1,6 +1,14 @@
+import asyncio
 from database.config import engine
 from database.models import Base
 
-# This will create all tables that don't exist
-Base.metadata.create_all(bind=engine)
-print("All missing tables created!")
\ No newline at end of file
+
+async def main():
+    # This will create all tables that don't exist
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+    print("All missing tables created!")
+
+
+asyncio.run(main())
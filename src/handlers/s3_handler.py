@@ -1,14 +1,46 @@
 import os
 import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional, BinaryIO
+from typing import List, Dict, Any, Optional, BinaryIO, AsyncIterator
 import boto3
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError, NoCredentialsError
 from fastapi import UploadFile
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Size of each read from a streaming S3 body (64KB keeps memory per download flat)
+S3_STREAM_CHUNK_SIZE = 64 * 1024
+
+# DeleteObjects accepts at most 1000 keys per request
+S3_DELETE_BATCH_SIZE = 1000
+
+# Dedicated pool for blocking boto3 calls, so S3 traffic never competes with
+# the default executor (used for ElevenLabs chunk reads on the call path)
+_s3_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_s3_executor(max_workers: int = 16) -> ThreadPoolExecutor:
+    """Get (or lazily create) the executor shared by all S3Handler instances"""
+    global _s3_executor
+    if _s3_executor is None:
+        _s3_executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="s3-io"
+        )
+    return _s3_executor
+
+
+def shutdown_s3_executor():
+    """Stop the S3 I/O executor (called on application shutdown)"""
+    global _s3_executor
+    if _s3_executor is not None:
+        _s3_executor.shutdown(wait=False)
+        _s3_executor = None
+
 class S3Config:
     def __init__(
         self,
@@ -21,6 +53,8 @@ class S3Config:
         self.access_key_id = access_key_id or os.getenv('aws_access_key_id')
         self.secret_access_key = secret_access_key or os.getenv('aws_secret_access_key')
         self.bucket_name = bucket_name or os.getenv('s3_bucket_name')
+        self.max_pool_connections = int(os.getenv('s3_max_pool_connections', '50'))
+        self.io_workers = int(os.getenv('s3_io_workers', '16'))
 
 class S3Handler:
     def __init__(self, config: S3Config = None):
@@ -33,9 +67,22 @@ class S3Handler:
             's3',
             region_name=self.config.region,
             aws_access_key_id=self.config.access_key_id,
-            aws_secret_access_key=self.config.secret_access_key
+            aws_secret_access_key=self.config.secret_access_key,
+            config=BotoConfig(
+                max_pool_connections=self.config.max_pool_connections,
+                retries={'max_attempts': 5, 'mode': 'adaptive'}
+            )
         )
         self.bucket_name = self.config.bucket_name
+        self._executor = get_s3_executor(self.config.io_workers)
+
+    async def _run(self, fn, *args, **kwargs):
+        """Run a blocking boto3 call on the dedicated S3 executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(fn, *args, **kwargs)
+        )
 
     async def upload_file(
         self, 
@@ -64,9 +111,7 @@ class S3Handler:
             if enable_public_read_access:
                 upload_params['ACL'] = 'public-read'
             
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None, 
+            result = await self._run(
                 lambda: self.s3_client.put_object(**upload_params)
             )
 
@@ -102,6 +147,91 @@ class S3Handler:
                 "error": str(e)
             }
 
+    async def put_bytes(
+        self,
+        key: str,
+        data: bytes,
+        content_type: str = 'application/octet-stream',
+        content_encoding: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Upload an in-memory payload (no UploadFile wrapper needed)"""
+        try:
+            params = {
+                'Bucket': self.bucket_name,
+                'Key': key,
+                'Body': data,
+                'ContentType': content_type
+            }
+            if content_encoding:
+                params['ContentEncoding'] = content_encoding
+            if metadata:
+                params['Metadata'] = metadata
+
+            result = await self._run(self.s3_client.put_object, **params)
+
+            return {
+                "success": True,
+                "key": key,
+                "url": f"https://{self.bucket_name}.s3.{self.config.region}.amazonaws.com/{key}",
+                "data": {
+                    "etag": result.get('ETag'),
+                    "version_id": result.get('VersionId'),
+                    "size": len(data)
+                }
+            }
+
+        except ClientError as e:
+            logger.error(f"S3 put error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"S3 put error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def upload_local_file(
+        self,
+        path: str,
+        key: str,
+        content_type: str = 'application/octet-stream'
+    ) -> Dict[str, Any]:
+        """Upload a file from disk (boto3 managed transfer, multipart for large files)"""
+        try:
+            await self._run(
+                self.s3_client.upload_file,
+                path,
+                self.bucket_name,
+                key,
+                ExtraArgs={'ContentType': content_type}
+            )
+
+            return {
+                "success": True,
+                "key": key,
+                "url": f"https://{self.bucket_name}.s3.{self.config.region}.amazonaws.com/{key}",
+                "data": {
+                    "size": os.path.getsize(path)
+                }
+            }
+
+        except ClientError as e:
+            logger.error(f"S3 file upload error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"S3 file upload error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
     async def upload_multiple_files(self, files: List[UploadFile]) -> List[Dict[str, Any]]:
         logger.info(f"Uploading {len(files)} files")
         
@@ -128,9 +258,7 @@ class S3Handler:
     async def get_file_details(self, key: str) -> Dict[str, Any]:
         try:
             # Use head_object to get metadata
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
+            response = await self._run(
                 lambda: self.s3_client.head_object(
                     Bucket=self.bucket_name,
                     Key=key
@@ -172,13 +300,11 @@ class S3Handler:
 
     async def download_file(self, key: str) -> Dict[str, Any]:
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
+            result = await self._run(
                 lambda: self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
             )
             
-            file_content = result['Body'].read()
+            file_content = await self._run(result['Body'].read)
             
             return {
                 "success": True,
@@ -205,11 +331,81 @@ class S3Handler:
                 "error": str(e)
             }
 
+    async def open_download_stream(
+        self,
+        key: str,
+        byte_range: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Open a GET on the object without reading the body.
+
+        byte_range is an HTTP Range value (e.g. "bytes=0-1023") passed through
+        to S3. The returned "body" must be consumed with iter_body().
+        """
+        try:
+            params = {'Bucket': self.bucket_name, 'Key': key}
+            if byte_range:
+                params['Range'] = byte_range
+
+            result = await self._run(
+                lambda: self.s3_client.get_object(**params)
+            )
+
+            return {
+                "success": True,
+                "body": result['Body'],
+                "content_type": result.get('ContentType'),
+                "content_length": result.get('ContentLength'),
+                "content_range": result.get('ContentRange'),
+                "etag": result.get('ETag'),
+                "last_modified": result.get('LastModified'),
+                "partial": result.get('ContentRange') is not None
+            }
+
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            error_code = error.get('Code')
+            if error_code in ('NoSuchKey', '404'):
+                return {
+                    "success": False,
+                    "error": "File not found"
+                }
+            if error_code == 'InvalidRange':
+                return {
+                    "success": False,
+                    "error": "Requested range not satisfiable",
+                    "range_not_satisfiable": True,
+                    "object_size": error.get('ActualObjectSize')
+                }
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Open download stream error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def iter_body(
+        self,
+        body,
+        chunk_size: int = S3_STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Yield a botocore StreamingBody in chunks without blocking the loop"""
+        try:
+            while True:
+                chunk = await self._run(body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
     async def delete_file(self, key: str) -> Dict[str, Any]:
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
+            await self._run(
                 lambda: self.s3_client.delete_object(Bucket=self.bucket_name, Key=key)
             )
             
@@ -231,37 +427,138 @@ class S3Handler:
             }
 
     async def delete_multiple_files(self, keys: List[str]) -> List[Dict[str, Any]]:
-        tasks = [self.delete_file(key) for key in keys]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
+        """Delete keys with batched DeleteObjects calls (up to 1000 keys each)"""
         processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append({
-                    "success": False,
-                    "error": str(result),
-                    "key": keys[i]
-                })
-            else:
-                processed_results.append({**result, "key": keys[i]})
-        
+        for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            batch = keys[start:start + S3_DELETE_BATCH_SIZE]
+            try:
+                result = await self._run(
+                    lambda: self.s3_client.delete_objects(
+                        Bucket=self.bucket_name,
+                        Delete={
+                            'Objects': [{'Key': key} for key in batch],
+                            'Quiet': False
+                        }
+                    )
+                )
+            except Exception as e:
+                logger.error(f"Batch delete error: {e}")
+                processed_results.extend(
+                    {"success": False, "error": str(e), "key": key} for key in batch
+                )
+                continue
+
+            errors = {err['Key']: err.get('Message', err.get('Code')) for err in result.get('Errors', [])}
+            for key in batch:
+                if key in errors:
+                    processed_results.append({
+                        "success": False,
+                        "error": errors[key],
+                        "key": key
+                    })
+                else:
+                    processed_results.append({
+                        "success": True,
+                        "message": f"File {key} deleted successfully",
+                        "key": key
+                    })
+
         return processed_results
 
+    async def _iter_list_results(
+        self,
+        prefix: str = "",
+        page_size: int = 1000,
+        delimiter: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield raw ListObjectsV2 responses for a prefix, following continuation tokens"""
+        continuation_token = None
+        while True:
+            params = {
+                'Bucket': self.bucket_name,
+                'Prefix': prefix,
+                'MaxKeys': page_size
+            }
+            if delimiter:
+                params['Delimiter'] = delimiter
+            if continuation_token:
+                params['ContinuationToken'] = continuation_token
+
+            result = await self._run(self.s3_client.list_objects_v2, **params)
+            yield result
+
+            if not result.get('IsTruncated'):
+                break
+            continuation_token = result.get('NextContinuationToken')
+
+    async def iter_list_pages(
+        self,
+        prefix: str = "",
+        page_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield every object under a prefix one ListObjectsV2 page at a time"""
+        async for result in self._iter_list_results(prefix, page_size):
+            yield result.get('Contents', [])
+
+    async def list_prefixes(self, prefix: str = "", delimiter: str = "/") -> List[str]:
+        """List the immediate "sub-folders" (CommonPrefixes) under a prefix"""
+        prefixes = []
+        async for result in self._iter_list_results(prefix, delimiter=delimiter):
+            prefixes.extend(p['Prefix'] for p in result.get('CommonPrefixes', []))
+        return prefixes
+
+    async def delete_prefix(self, prefix: str) -> Dict[str, Any]:
+        """Delete every object under a prefix, page by page (internal use only; not exposed by any route)"""
+        if not prefix:
+            return {
+                "success": False,
+                "error": "Prefix is required"
+            }
+
+        deleted = 0
+        failed = []
+        try:
+            async for page in self.iter_list_pages(prefix):
+                if not page:
+                    continue
+                results = await self.delete_multiple_files([item['Key'] for item in page])
+                for result in results:
+                    if result["success"]:
+                        deleted += 1
+                    else:
+                        failed.append({"key": result["key"], "error": result["error"]})
+
+            return {
+                "success": not failed,
+                "prefix": prefix,
+                "deleted": deleted,
+                "failed": failed
+            }
+
+        except Exception as e:
+            logger.error(f"Delete prefix error: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "deleted": deleted
+            }
+
     async def list_files(
         self, 
         prefix: str = "", 
-        max_keys: int = 1000
+        max_keys: int = 1000,
+        continuation_token: Optional[str] = None
     ) -> Dict[str, Any]:
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: self.s3_client.list_objects_v2(
-                    Bucket=self.bucket_name,
-                    Prefix=prefix,
-                    MaxKeys=max_keys
-                )
-            )
+            params = {
+                'Bucket': self.bucket_name,
+                'Prefix': prefix,
+                'MaxKeys': max_keys
+            }
+            if continuation_token:
+                params['ContinuationToken'] = continuation_token
+
+            result = await self._run(self.s3_client.list_objects_v2, **params)
             
             files = []
             if 'Contents' in result:
@@ -301,9 +598,7 @@ class S3Handler:
                 'Key': source_key
             }
             
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
+            result = await self._run(
                 lambda: self.s3_client.copy_object(
                     CopySource=copy_source,
                     Bucket=self.bucket_name,
@@ -335,9 +630,7 @@ class S3Handler:
 
     async def file_exists(self, key: str) -> Dict[str, Any]:
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
+            await self._run(
                 lambda: self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
             )
             
@@ -367,15 +660,23 @@ class S3Handler:
         self, 
         key: str, 
         expiration: int = 3600,
-        http_method: str = 'GET'
+        http_method: str = 'GET',
+        client_method: Optional[str] = None,
+        extra_params: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
+        """
+        Presign an S3 operation on key.
+
+        client_method overrides the GET/PUT mapping (e.g. 'upload_part'), and
+        extra_params are merged into the signed parameters (e.g. UploadId).
+        """
         try:
-            loop = asyncio.get_event_loop()
-            url = await loop.run_in_executor(
-                None,
+            method = client_method or ('get_object' if http_method == 'GET' else 'put_object')
+            params = {'Bucket': self.bucket_name, 'Key': key, **(extra_params or {})}
+            url = await self._run(
                 lambda: self.s3_client.generate_presigned_url(
-                    'get_object' if http_method == 'GET' else 'put_object',
-                    Params={'Bucket': self.bucket_name, 'Key': key},
+                    method,
+                    Params=params,
                     ExpiresIn=expiration
                 )
             )
@@ -398,6 +699,153 @@ class S3Handler:
                 "error": str(e)
             }
 
+    async def create_multipart_upload(
+        self,
+        key: str,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        try:
+            params = {'Bucket': self.bucket_name, 'Key': key}
+            if content_type:
+                params['ContentType'] = content_type
+            if metadata:
+                params['Metadata'] = metadata
+
+            result = await self._run(self.s3_client.create_multipart_upload, **params)
+
+            return {
+                "success": True,
+                "key": key,
+                "upload_id": result['UploadId']
+            }
+
+        except ClientError as e:
+            logger.error(f"Create multipart upload error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Create multipart upload error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def upload_part(
+        self,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+        content_md5: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Upload one part of a multipart upload.
+
+        content_md5 (base64 digest) makes S3 reject the part if it arrived
+        corrupted (BadDigest).
+        """
+        try:
+            params = {
+                'Bucket': self.bucket_name,
+                'Key': key,
+                'UploadId': upload_id,
+                'PartNumber': part_number,
+                'Body': data
+            }
+            if content_md5:
+                params['ContentMD5'] = content_md5
+
+            result = await self._run(self.s3_client.upload_part, **params)
+
+            return {
+                "success": True,
+                "part_number": part_number,
+                "etag": result['ETag']
+            }
+
+        except ClientError as e:
+            logger.error(f"Upload part {part_number} error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Upload part {part_number} error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def complete_multipart_upload(
+        self,
+        key: str,
+        upload_id: str,
+        parts: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """parts: [{"PartNumber": int, "ETag": str}, ...]"""
+        try:
+            result = await self._run(
+                lambda: self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={
+                        'Parts': sorted(parts, key=lambda part: part['PartNumber'])
+                    }
+                )
+            )
+
+            return {
+                "success": True,
+                "key": key,
+                "etag": result.get('ETag'),
+                "url": f"https://{self.bucket_name}.s3.{self.config.region}.amazonaws.com/{key}"
+            }
+
+        except ClientError as e:
+            logger.error(f"Complete multipart upload error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Complete multipart upload error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def abort_multipart_upload(self, key: str, upload_id: str) -> Dict[str, Any]:
+        try:
+            await self._run(
+                lambda: self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    UploadId=upload_id
+                )
+            )
+
+            return {
+                "success": True,
+                "message": f"Upload {upload_id} aborted"
+            }
+
+        except ClientError as e:
+            logger.error(f"Abort multipart upload error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Abort multipart upload error: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
     async def get_file_url(self, key: str, public: bool = True) -> str:
         if public:
             return f"https://{self.bucket_name}.s3.{self.config.region}.amazonaws.com/{key}"
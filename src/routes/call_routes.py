@@ -1,8 +1,11 @@
 # src/routes/call_routes.py
 
-from fastapi import APIRouter, Request, WebSocket, Query
+from fastapi import APIRouter, Request, WebSocket, Query, BackgroundTasks, HTTPException
 from fastapi.responses import Response
+from datetime import date, datetime, timedelta
+from typing import Optional
 from services.telephony import get_telephony_provider
+from services.transcript_rollup_service import transcript_rollup_service
 from config.settings import settings
 import logging
 
@@ -119,4 +122,40 @@ async def initiate_outbound_call_unified(
         logger.error(f"Outbound call failed: {e}")
         import traceback
         logger.error(traceback.format_exc())
-        return {"error": str(e)}, 500
\ No newline at end of file
+        return {"error": str(e)}, 500
+
+
+@router.post("/transcripts/rollup")
+async def rollup_transcripts(
+    background_tasks: BackgroundTasks,
+    day: Optional[date] = Query(default=None, description="Day to compact (YYYY-MM-DD), defaults to yesterday UTC"),
+    company_id: Optional[str] = Query(default=None, description="Single company; all companies when omitted"),
+    delete_source: bool = Query(default=False, description="Delete per-call files after compaction")
+):
+    """
+    Compact a day of per-call transcripts into columnar rollup files.
+
+    A single company is rolled up inline and its summary returned; all
+    companies run in the background.
+    """
+    try:
+        day = day or (datetime.utcnow().date() - timedelta(days=1))
+
+        if company_id:
+            result = await transcript_rollup_service.rollup_company_day(company_id, day, delete_source)
+            if not result["success"]:
+                raise HTTPException(status_code=500, detail=result["error"])
+            return result
+
+        background_tasks.add_task(transcript_rollup_service.rollup_day, day, delete_source)
+        return {
+            "success": True,
+            "date": day.isoformat(),
+            "status": "scheduled"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Transcript rollup failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
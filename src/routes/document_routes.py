@@ -1,10 +1,14 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
+import math
 from datetime import datetime
+from urllib.parse import quote, unquote
 import uuid
-from database.config import get_db
+from database.config import get_db, get_async_session
 from database.models import Company, Agent, Document, DocumentType
 from services.pdf_processor_service import PDFProcessorService
 from services.vector_store.qdrant_service import QdrantService
@@ -17,6 +21,86 @@ qdrant_service = QdrantService()
 s3_handler = S3Handler(S3Config())
 pdf_processor = PDFProcessorService(qdrant_service, s3_handler)
 
+# S3 multipart limits: parts are 5MB-5GB (last part may be smaller), max 10000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+MAX_PARTS = 10000
+UPLOAD_URL_EXPIRATION = 3600
+
+
+class UploadSessionRequest(BaseModel):
+    company_id: str
+    agent_id: str
+    filename: str
+    file_size: int = Field(..., gt=0)
+    document_type: str = "custom"
+    part_size: int = Field(DEFAULT_PART_SIZE, ge=MIN_PART_SIZE)
+
+
+class UploadedPart(BaseModel):
+    part_number: int = Field(..., ge=1, le=MAX_PARTS)
+    etag: str
+
+
+class CompleteUploadRequest(BaseModel):
+    company_id: str
+    agent_id: str
+    key: str
+    upload_id: str
+    parts: List[UploadedPart]
+
+
+class AbortUploadRequest(BaseModel):
+    company_id: str
+    agent_id: str
+    key: str
+    upload_id: str
+
+
+def _upload_prefix(company_id: str, agent_id: str) -> str:
+    """S3 key prefix of a company/agent's direct uploads"""
+    return f"documents/{company_id}/{agent_id}/"
+
+
+def _save_document_record(result: dict, company_id: str, agent_id: str, document_type: str, db: AsyncSession):
+    """Add a Document row for a successfully processed PDF (caller commits)"""
+    doc = Document(
+        company_id=company_id,
+        agent_id=agent_id,
+        name=result['filename'],
+        type=DocumentType[document_type],
+        content=f"PDF document with {result['chunks_created']} chunks",
+        file_type="pdf",
+        file_size=result['file_size'],
+        original_filename=result['filename'],
+        chunk_count=result['chunks_created'],
+        embedding_id=result['document_id'],
+        last_embedded=datetime.utcnow()
+    )
+    db.add(doc)
+
+
+async def _process_uploaded_document(key: str, filename: str, company_id: str, agent_id: str, document_type: str):
+    """Background task: extract and embed a directly-uploaded PDF, then record it"""
+    result = await pdf_processor.process_s3_object(
+        key=key,
+        filename=filename,
+        company_id=company_id,
+        agent_id=agent_id,
+        document_type=document_type
+    )
+
+    if not result['success']:
+        logger.error(f"Processing failed for uploaded document {key}: {result.get('error')}")
+        return
+
+    try:
+        async with get_async_session() as db:
+            _save_document_record(result, company_id, agent_id, document_type, db)
+        logger.info(f"Processed uploaded document {key} into {result['chunks_created']} chunks")
+    except Exception as e:
+        logger.error(f"Error saving document record for {key}: {str(e)}")
+
 
 @router.post("/upload-pdfs")
 async def upload_pdfs(
@@ -24,7 +108,7 @@ async def upload_pdfs(
     company_id: str = Form(...),
     agent_id: str = Form(...),
     document_type: str = Form("custom"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Upload multiple PDF files and process them for RAG
@@ -36,11 +120,13 @@ async def upload_pdfs(
     """
     try:
         # Validate company and agent exist
-        company = db.query(Company).filter(Company.id == company_id).first()
+        company = (await db.execute(select(Company).where(Company.id == company_id))).scalar_one_or_none()
         if not company:
             raise HTTPException(status_code=404, detail="Company not found")
         
-        agent = db.query(Agent).filter(Agent.id == agent_id, Agent.company_id == company_id).first()
+        agent = (await db.execute(
+            select(Agent).where(Agent.id == agent_id, Agent.company_id == company_id)
+        )).scalar_one_or_none()
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
         
@@ -67,25 +153,12 @@ async def upload_pdfs(
         for result in results:
             if result['success']:
                 try:
-                    doc = Document(
-                        company_id=company_id,
-                        agent_id=agent_id,
-                        name=result['filename'],
-                        type=DocumentType[document_type],
-                        content=f"PDF document with {result['chunks_created']} chunks",
-                        file_type="pdf",
-                        file_size=result['file_size'],
-                        original_filename=result['filename'],
-                        chunk_count=result['chunks_created'],
-                        embedding_id=result['document_id'],
-                        last_embedded=datetime.utcnow()
-                    )
-                    db.add(doc)
+                    _save_document_record(result, company_id, agent_id, document_type, db)
                     successful_docs.append(result)
                 except Exception as e:
                     logger.error(f"Error saving document record: {str(e)}")
         
-        db.commit()
+        await db.commit()
         
         # Calculate summary
         successful_count = len([r for r in results if r['success']])
@@ -107,20 +180,182 @@ async def upload_pdfs(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/upload-sessions")
+async def create_upload_session(
+    request: UploadSessionRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Start a direct-to-S3 multipart upload for a PDF
+
+    Returns one presigned URL per part. The client PUTs each part to its URL,
+    keeps the ETag response header, then calls /upload-sessions/complete.
+    """
+    try:
+        company = (await db.execute(select(Company).where(Company.id == request.company_id))).scalar_one_or_none()
+        if not company:
+            raise HTTPException(status_code=404, detail="Company not found")
+
+        agent = (await db.execute(
+            select(Agent).where(Agent.id == request.agent_id, Agent.company_id == request.company_id)
+        )).scalar_one_or_none()
+        if not agent:
+            raise HTTPException(status_code=404, detail="Agent not found")
+
+        if not request.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+        if request.document_type not in DocumentType.__members__:
+            raise HTTPException(status_code=400, detail=f"Invalid document type: {request.document_type}")
+
+        part_count = math.ceil(request.file_size / request.part_size)
+        if part_count > MAX_PARTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File needs {part_count} parts; increase part_size (max {MAX_PARTS} parts)"
+            )
+
+        key = f"{_upload_prefix(request.company_id, request.agent_id)}{uuid.uuid4()}_{request.filename}"
+
+        # Session details travel as object metadata, so completion needs no server-side state.
+        # S3 user metadata must be ASCII, so the filename is URL-encoded.
+        session = await s3_handler.create_multipart_upload(
+            key=key,
+            content_type="application/pdf",
+            metadata={
+                "company_id": request.company_id,
+                "agent_id": request.agent_id,
+                "document_type": request.document_type,
+                "filename": quote(request.filename)
+            }
+        )
+        if not session['success']:
+            raise HTTPException(status_code=502, detail=session['error'])
+
+        parts = []
+        for part_number in range(1, part_count + 1):
+            presigned = await s3_handler.generate_presigned_url(
+                key,
+                expiration=UPLOAD_URL_EXPIRATION,
+                client_method='upload_part',
+                extra_params={'UploadId': session['upload_id'], 'PartNumber': part_number}
+            )
+            if not presigned['success']:
+                await s3_handler.abort_multipart_upload(key, session['upload_id'])
+                raise HTTPException(status_code=502, detail=presigned['error'])
+            parts.append({"part_number": part_number, "url": presigned['url']})
+
+        logger.info(f"Created upload session for {key} with {part_count} parts")
+
+        return {
+            "success": True,
+            "key": key,
+            "upload_id": session['upload_id'],
+            "part_size": request.part_size,
+            "expires_in": UPLOAD_URL_EXPIRATION,
+            "parts": parts
+        }
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error creating upload session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/upload-sessions/complete")
+async def complete_upload_session(
+    request: CompleteUploadRequest,
+    background_tasks: BackgroundTasks
+):
+    """Complete a direct-to-S3 upload and queue extraction and embedding"""
+    try:
+        if not request.key.startswith(_upload_prefix(request.company_id, request.agent_id)):
+            raise HTTPException(status_code=403, detail="Upload key does not belong to this company and agent")
+
+        if not request.parts:
+            raise HTTPException(status_code=400, detail="No parts provided")
+
+        completed = await s3_handler.complete_multipart_upload(
+            key=request.key,
+            upload_id=request.upload_id,
+            parts=[{"PartNumber": part.part_number, "ETag": part.etag} for part in request.parts]
+        )
+        if not completed['success']:
+            raise HTTPException(status_code=400, detail=completed['error'])
+
+        details = await s3_handler.get_file_details(request.key)
+        if not details['success']:
+            raise HTTPException(status_code=502, detail=details['error'])
+
+        metadata = details['metadata']
+        company_id = metadata.get("company_id")
+        agent_id = metadata.get("agent_id")
+        if not company_id or not agent_id:
+            raise HTTPException(status_code=400, detail="Upload was not created by an upload session")
+        if (company_id, agent_id) != (request.company_id, request.agent_id):
+            raise HTTPException(status_code=403, detail="Upload session belongs to another company or agent")
+
+        filename = unquote(metadata.get("filename") or request.key.rsplit("/", 1)[-1])
+        document_type = metadata.get("document_type", "custom")
+
+        background_tasks.add_task(
+            _process_uploaded_document,
+            request.key,
+            filename,
+            company_id,
+            agent_id,
+            document_type
+        )
+
+        return {
+            "success": True,
+            "key": request.key,
+            "file_size": details['size'],
+            "status": "processing",
+            "message": f"Upload of {filename} completed; processing started"
+        }
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error completing upload session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/upload-sessions/abort")
+async def abort_upload_session(request: AbortUploadRequest):
+    """Abort a direct-to-S3 upload and discard its uploaded parts"""
+    try:
+        if not request.key.startswith(_upload_prefix(request.company_id, request.agent_id)):
+            raise HTTPException(status_code=403, detail="Upload key does not belong to this company and agent")
+
+        result = await s3_handler.abort_multipart_upload(request.key, request.upload_id)
+        if not result['success']:
+            raise HTTPException(status_code=400, detail=result['error'])
+        return result
+
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error aborting upload session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/documents/{company_id}")
 async def get_documents(
     company_id: str,
     agent_id: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get list of documents for a company/agent"""
     try:
-        query = db.query(Document).filter(Document.company_id == company_id)
+        query = select(Document).where(Document.company_id == company_id)
         
         if agent_id:
-            query = query.filter(Document.agent_id == agent_id)
+            query = query.where(Document.agent_id == agent_id)
         
-        documents = query.all()
+        documents = (await db.execute(query)).scalars().all()
         
         return {
             "success": True,
@@ -146,11 +381,11 @@ async def get_documents(
 @router.delete("/documents/{document_id}")
 async def delete_document(
     document_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a document and its embeddings"""
     try:
-        document = db.query(Document).filter(Document.id == document_id).first()
+        document = (await db.execute(select(Document).where(Document.id == document_id))).scalar_one_or_none()
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
@@ -160,8 +395,8 @@ async def delete_document(
             except Exception as e:
                 logger.warning(f"Could not delete from S3: {str(e)}")
         
-        db.delete(document)
-        db.commit()
+        await db.delete(document)
+        await db.commit()
         
         return {
             "success": True,
@@ -16,10 +16,10 @@
 
 from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from database.config import SessionLocal
-from database.models import CallType, ConversationTurn, Call
+from database.config import get_async_session
+from database.models import CallType, Call
 from services.speech.deepgram_ws_service import DeepgramWebSocketService
+from services.speech.audio_codec import convert_exotel_audio_to_deepgram, convert_elevenlabs_to_exotel
 from services.voice.elevenlabs_service import elevenlabs_service
 from services.rag.rag_service import get_rag_service
 from services.rag_routing_service import rag_routing_service
@@ -29,41 +29,48 @@ from services.company_service import company_service
 from services.intent_router_service import intent_router_service
 from services.agent_config_service import agent_config_service
 from services.prompt_template_service import prompt_template_service
-from services.call_recording_service import call_recording_service
+from services.db_write_buffer import db_write_buffer
+from services.call_finalization_service import call_finalization_service
+from services.call_audio_recording_service import call_audio_recording_service
+from services.call_state_store import call_state_store
+from services.call_context_token import call_context_signer, TOKEN_PARAM
+from services.pacing_controller import pacing_controller
+from services.turn_tracer import turn_tracer
+from services.turn_deadline import turn_deadlines
+from services.conversation_memory import conversation_memory_service
 from services.agent_tools import execute_function
 from services.intent_detection_service import intent_detection_service
-from services.slot_manager_service import SlotManagerService
+from services.slot_manager_service import slot_manager_service
 from config.settings import settings
 from datetime import datetime, timedelta
 from urllib.parse import quote
+from xml.sax.saxutils import escape
 import logging
 import json
 import asyncio
-import base64
-import audioop
+import time
 import uuid
 import httpx
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/exotel-elevenlabs", tags=["exotel-elevenlabs"])
 
-# Shared state
-call_context = {}
-agent_cache = {}
-interrupted_text_storage = {}
+# Per-call state (context, interrupted text, agent cache) lives in call_state_store
 AGENT_CACHE_TTL = 300  # 5 minutes
 
-from_number_global = None
-to_number_global = None
 
-
-def get_cached_agent(cache_key: str):
+async def get_cached_agent(cache_key: str):
     """Get cached agent data if not expired"""
-    if cache_key in agent_cache:
-        cached = agent_cache[cache_key]
-        if (datetime.utcnow() - cached['cached_at']).total_seconds() < AGENT_CACHE_TTL:
-            return cached
-    return None
+    return await call_state_store.get_cached(f"agent:{cache_key}")
+
+
+async def cache_agent(cache_key: str, agent: dict, company_name: str):
+    """Share pre-fetched agent data with every worker for AGENT_CACHE_TTL"""
+    await call_state_store.set_cached(
+        f"agent:{cache_key}",
+        {'agent': agent, 'company_name': company_name},
+        AGENT_CACHE_TTL
+    )
 
 
 async def _prewarm_agent_cache(company_id: str, agent_id: str):
@@ -71,68 +78,16 @@ async def _prewarm_agent_cache(company_id: str, agent_id: str):
     cache_key = f"{company_id}_{agent_id}"
     try:
         master_agent = await agent_config_service.get_master_agent(company_id, agent_id)
-        company_name = company_service.get_company_name_by_id(company_id)
-        agent_cache[cache_key] = {
-            'agent': master_agent,
-            'company_name': company_name,
-            'cached_at': datetime.utcnow()
-        }
+        company_name = await company_service.get_company_name_by_id(company_id)
+        await cache_agent(cache_key, master_agent, company_name)
         logger.info(f"✅ Pre-warmed agent cache: {cache_key}")
     except Exception as e:
         logger.error(f"Pre-warm failed: {e}")
 
 
 def save_to_db_background(call_sid: str, role: str, content: str):
-    """Fire-and-forget DB write - saves ~100-300ms"""
-    async def _save():
-        db = None
-        try:
-            db = SessionLocal()
-            db.add(ConversationTurn(
-                call_sid=call_sid,
-                role=role,
-                content=content,
-                created_at=datetime.utcnow()
-            ))
-            db.commit()
-        except Exception as e:
-            logger.error(f"Background DB error: {e}")
-            if db:
-                db.rollback()
-        finally:
-            if db:
-                db.close()
-    
-    asyncio.create_task(_save())
-
-
-def convert_exotel_audio_to_deepgram(base64_audio: str) -> bytes:
-    """
-    Convert Exotel's 16-bit PCM 8kHz audio to Deepgram format
-    Exotel sends: 16-bit PCM, 8kHz, mono, base64-encoded
-    """
-    try:
-        pcm_data = base64.b64decode(base64_audio)
-        # Exotel sends 16-bit PCM at 8kHz - Deepgram expects same
-        return pcm_data
-    except Exception as e:
-        logger.error(f"Error converting Exotel audio: {e}")
-        return b""
-
-
-def convert_elevenlabs_to_exotel(mulaw_chunk: str) -> str:
-    """
-    Convert ElevenLabs mulaw audio to Exotel's format
-    ElevenLabs: mulaw 8kHz base64
-    Exotel expects: 16-bit PCM 8kHz base64
-    """
-    try:
-        mulaw_data = base64.b64decode(mulaw_chunk)
-        pcm_data = audioop.ulaw2lin(mulaw_data, 2)  # 2 = 16-bit width
-        return base64.b64encode(pcm_data).decode('utf-8')
-    except Exception as e:
-        logger.error(f"Error converting audio for Exotel: {e}")
-        return ""
+    """Fire-and-forget DB write - batched by the write-behind buffer"""
+    db_write_buffer.add_turn(call_sid, role, content)
 
 
 async def stream_elevenlabs_audio_optimized(
@@ -160,10 +115,12 @@ async def stream_elevenlabs_audio_optimized(
             return
         
         # Stream audio chunks with interruption checking
+        tts_started = time.perf_counter()
         async for audio_chunk in elevenlabs_service.generate(text):
             if stop_flag_ref.get('stop', False):
                 logger.warning(f"🛑 STOP FLAG DETECTED at chunk {chunk_count} - halting!")
                 try:
+                    call_audio_recording_service.clear(stream_sid)
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
                     logger.info("✅ CLEAR sent during chunk streaming")
                 except:
@@ -171,6 +128,8 @@ async def stream_elevenlabs_audio_optimized(
                 return
             
             if audio_chunk and stream_sid:
+                if chunk_count == 0:
+                    turn_tracer.mark("tts_first_byte")
                 # Convert mulaw to PCM for Exotel
                 exotel_audio = convert_elevenlabs_to_exotel(audio_chunk)
                 
@@ -180,6 +139,10 @@ async def stream_elevenlabs_audio_optimized(
                     "media": {"payload": exotel_audio}
                 }
                 await websocket.send_json(message)
+                call_audio_recording_service.outbound(stream_sid, audio_chunk)
+                if chunk_count == 0:
+                    pacing_controller.record_latency("tts", time.perf_counter() - tts_started)
+                    turn_tracer.mark("first_media_sent")
                 chunk_count += 1
         
         logger.info(f"✓ Sent {chunk_count} chunks to Exotel")
@@ -196,6 +159,7 @@ async def stream_elevenlabs_audio_optimized(
             if stop_flag_ref.get('stop', False):
                 logger.warning(f"🛑 STOP during playback wait at {elapsed:.2f}s")
                 try:
+                    call_audio_recording_service.clear(stream_sid)
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
                 except:
                     pass
@@ -209,6 +173,7 @@ async def stream_elevenlabs_audio_optimized(
     except asyncio.CancelledError:
         logger.warning(f"🛑 Audio task CANCELLED at chunk {chunk_count}")
         try:
+            call_audio_recording_service.clear(stream_sid)
             await websocket.send_json({"event": "clear", "streamSid": stream_sid})
             logger.info("✅ CLEAR sent on task cancellation")
         except:
@@ -225,16 +190,12 @@ async def stream_elevenlabs_audio_optimized(
 @router.post("/incoming-call")
 async def handle_incoming_call_exotel(request: Request):
     """Exotel incoming call handler"""
-    global from_number_global, to_number_global
-    
     try:
         form_data = await request.form()
         call_sid = form_data.get("CallSid") or form_data.get("Sid")
         from_number = form_data.get("From")
         to_number = form_data.get("To")
         
-        from_number_global = from_number
-        to_number_global = to_number
 
         company_id = request.query_params.get("company_id")
         agent_id = request.query_params.get("agent_id")
@@ -245,27 +206,28 @@ async def handle_incoming_call_exotel(request: Request):
         
         # PRE-WARM: Start fetching agent data immediately
         cache_key = f"{company_id}_{agent_id}"
-        if not get_cached_agent(cache_key):
+        if not await get_cached_agent(cache_key):
             asyncio.create_task(_prewarm_agent_cache(company_id, agent_id))
         
-        # Store context
-        call_context[call_sid] = {
+        # Signed context travels with the stream; no server-side state
+        context_token = call_context_signer.encode({
+            "call_sid": call_sid,
             "company_id": company_id,
             "agent_id": agent_id,
             "from_number": from_number,
             "to_number": to_number
-        }
+        })
         
         # Generate Exotel-compatible XML
         ws_domain = settings.base_url.replace('https://', '').replace('http://', '')
-        stream_url = f"wss://{ws_domain}/api/v1/exotel-elevenlabs/media-stream?call_sid={call_sid}"
+        stream_url = f"wss://{ws_domain}/api/v1/exotel-elevenlabs/media-stream?call_sid={call_sid}&{TOKEN_PARAM}={context_token}"
         
         logger.info(f"Stream URL: {stream_url}")
         
         response_xml = f"""<?xml version="1.0" encoding="UTF-8"?>
 <Response>
     <Connect>
-        <Stream url="{stream_url}" />
+        <Stream url="{escape(stream_url)}" />
     </Connect>
 </Response>"""
         
@@ -294,25 +256,12 @@ async def handle_call_status_exotel(request: Request):
         
         logger.info(f"📞 Exotel status update: {call_sid} -> {call_status}")
         
-        async def _update():
-            db = None
-            try:
-                db = SessionLocal()
-                call_record = db.query(Call).filter_by(call_sid=call_sid).first()
-                if call_record:
-                    call_record.status = call_status
-                    if call_status == 'completed':
-                        call_record.ended_at = datetime.utcnow()
-                    db.commit()
-            except Exception as e:
-                logger.error(f"DB error: {e}")
-                if db:
-                    db.rollback()
-            finally:
-                if db:
-                    db.close()
-        
-        asyncio.create_task(_update())
+        db_write_buffer.update_call_status(
+            call_sid,
+            call_status,
+            ended_at=datetime.utcnow() if call_status == 'completed' else None
+        )
+        db_write_buffer.add_event(call_sid, f"status.{call_status}", dict(form_data))
         return {"status": "ok"}
     except Exception as e:
         logger.error(f"Error handling call status: {e}")
@@ -322,8 +271,6 @@ async def handle_call_status_exotel(request: Request):
 @router.websocket("/media-stream")
 async def handle_media_stream_exotel(websocket: WebSocket):
     """Exotel WebSocket handler with ALL features from Twilio implementation"""
-    global from_number_global, to_number_global
-    
     try:
         logger.info("WebSocket connection attempt...")
         await websocket.accept()
@@ -379,8 +326,11 @@ async def handle_media_stream_exotel(websocket: WebSocket):
     
     logger.info(f"Call SID validated: {call_sid}")
     
-    # Get context from stored data
-    context = call_context.get(call_sid, {})
+    # Verify and decode the signed context from the webhook
+    context = call_context_signer.from_stream(websocket.query_params, first_message_data, call_sid)
+    if context is None:
+        await websocket.close(code=1008, reason="Invalid call context")
+        return
     company_id = context.get("company_id")
     master_agent_id = context.get("agent_id")
     
@@ -388,27 +338,23 @@ async def handle_media_stream_exotel(websocket: WebSocket):
     
     # CHECK CACHE FIRST for faster startup
     cache_key = f"{company_id}_{master_agent_id}"
-    cached = get_cached_agent(cache_key)
+    cached = await get_cached_agent(cache_key)
     
     if cached:
         logger.info("⚡ Using CACHED agent data")
         master_agent = cached['agent']
     else:
         master_agent = await agent_config_service.get_master_agent(company_id, master_agent_id)
-        company_name = company_service.get_company_name_by_id(company_id)
-        agent_cache[cache_key] = {
-            'agent': master_agent,
-            'company_name': company_name,
-            'cached_at': datetime.utcnow()
-        }
+        company_name = await company_service.get_company_name_by_id(company_id)
+        await cache_agent(cache_key, master_agent, company_name)
     
     agent_name = master_agent["name"]
     current_agent_context = master_agent
     
     call_metadata = {
         'start_time': datetime.utcnow(),
-        'from_number': from_number_global,
-        'to_number': to_number_global,
+        'from_number': context.get("from_number"),
+        'to_number': context.get("to_number"),
         'company_id': company_id,
         'provider': 'exotel'
     }
@@ -431,11 +377,10 @@ async def handle_media_stream_exotel(websocket: WebSocket):
     logger.info(f"Specialized agents: {[a['name'] for a in specialized_agents]}")
     
     # PRE-GENERATE GREETING before Deepgram init
-    greeting = prompt_template_service.generate_greeting(master_agent, company_id, agent_name)
+    greeting = await prompt_template_service.generate_greeting(master_agent, company_id, agent_name)
     logger.info(f"💬 Greeting pre-generated: '{greeting[:50]}...'")
     
     # Initialize services
-    db = SessionLocal()
     deepgram_service = DeepgramWebSocketService()
     rag = get_rag_service()
     stream_sid = None
@@ -462,17 +407,18 @@ async def handle_media_stream_exotel(websocket: WebSocket):
             # ALWAYS send CLEAR to Exotel
             if stream_sid:
                 try:
+                    call_audio_recording_service.clear(stream_sid)
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
                     logger.info(f"✅ CLEAR sent to Exotel for {stream_sid}")
                 except Exception as e:
                     logger.error(f"Failed to send CLEAR: {e}")
             
             # FIX: ALWAYS save the interrupted text
-            interrupted_text_storage[call_sid] = {
+            await call_state_store.set(call_sid, "interrupted_text", {
                 'text': transcript,
-                'timestamp': datetime.utcnow(),
+                'timestamp': datetime.utcnow().isoformat(),
                 'confidence': confidence
-            }
+            })
             logger.info(f"💾 Saved interrupted text: '{transcript}'")
             
             if not is_speaking:
@@ -519,10 +465,10 @@ async def handle_media_stream_exotel(websocket: WebSocket):
                     return
             
             # FIX: Check for pending interrupted text and USE it
-            if call_sid in interrupted_text_storage:
-                interrupted = interrupted_text_storage.pop(call_sid)
+            interrupted = await call_state_store.pop(call_sid, "interrupted_text")
+            if interrupted:
                 interrupted_text = interrupted['text']
-                age = (datetime.utcnow() - interrupted['timestamp']).total_seconds()
+                age = (datetime.utcnow() - datetime.fromisoformat(interrupted['timestamp'])).total_seconds()
                 
                 if age < 10.0:
                     if interrupted_text.lower() not in transcript.lower():
@@ -534,6 +480,10 @@ async def handle_media_stream_exotel(websocket: WebSocket):
             
             logger.info(f"👤 CUSTOMER SAID: '{transcript}'")
             
+            turn_tracer.start_turn(call_sid, "exotel", company_id, master_agent_id)
+            
+            turn_deadlines.start()
+            
             conversation_transcript.append({
                 'role': 'user',
                 'content': transcript,
@@ -555,17 +505,23 @@ async def handle_media_stream_exotel(websocket: WebSocket):
             current_agent_id = master_agent_id
             
             if specialized_agents:
-                detected_agent = await intent_router_service.detect_intent(
-                    transcript,
-                    company_id,
-                    master_agent,
-                    specialized_agents
+                # Out of turn budget: stay with the agent the call is already with
+                detected_agent = await turn_deadlines.run(
+                    "agent_routing",
+                    intent_router_service.detect_intent(
+                        transcript,
+                        company_id,
+                        master_agent,
+                        specialized_agents
+                    ),
+                    fallback=lambda: intent_router_service.get_current_agent(call_sid, None)
                 )
                 
                 if detected_agent:
-                    previous_agent_id = intent_router_service.get_current_agent(call_sid, master_agent_id)
-                    intent_router_service.set_current_agent(call_sid, detected_agent)
+                    previous_agent_id = await intent_router_service.get_current_agent(call_sid, master_agent_id)
+                    await intent_router_service.set_current_agent(call_sid, detected_agent)
                     current_agent_id = detected_agent
+                    turn_tracer.set_agent(detected_agent)
                     
                     agent_info = await agent_config_service.get_agent_by_id(detected_agent)
                     
@@ -607,7 +563,6 @@ async def handle_media_stream_exotel(websocket: WebSocket):
                     websocket=websocket,
                     stream_sid=stream_sid,
                     stop_audio_flag=stop_audio_flag,
-                    db=db,
                     call_sid=call_sid,
                     current_agent_context=current_agent_context,
                     current_agent_id=current_agent_id,
@@ -635,7 +590,7 @@ async def handle_media_stream_exotel(websocket: WebSocket):
         deepgram_init_task = asyncio.create_task(
             deepgram_service.initialize_session(
                 session_id=session_id,
-                callback=on_deepgram_transcript,
+                callback=turn_tracer.scoped(on_deepgram_transcript),
                 interruption_callback=on_interim_transcript
             )
         )
@@ -643,6 +598,7 @@ async def handle_media_stream_exotel(websocket: WebSocket):
         # Process first message if we have it
         if first_message_data and first_message_data.get("event") == "start":
             stream_sid = first_message_data.get("streamSid") or first_message_data.get("start", {}).get("streamSid")
+            call_audio_recording_service.start(stream_sid, call_sid, inbound_encoding="pcm16")
             logger.info(f"✅ Stream started: {stream_sid}")
             
             # SEND GREETING IMMEDIATELY
@@ -692,6 +648,7 @@ async def handle_media_stream_exotel(websocket: WebSocket):
                 elif event == "start":
                     if not greeting_sent:
                         stream_sid = data.get("streamSid") or data.get("start", {}).get("streamSid")
+                        call_audio_recording_service.start(stream_sid, call_sid, inbound_encoding="pcm16")
                         logger.info(f"✅ Stream started (late): {stream_sid}")
                         
                         is_agent_speaking_ref['speaking'] = True
@@ -720,6 +677,7 @@ async def handle_media_stream_exotel(websocket: WebSocket):
                     # Process audio for transcription (Exotel sends PCM)
                     payload = data.get("media", {}).get("payload")
                     if payload:
+                        call_audio_recording_service.inbound(stream_sid, payload)
                         audio = convert_exotel_audio_to_deepgram(payload)
                         if audio:
                             await deepgram_service.process_audio_chunk(session_id, audio)
@@ -745,69 +703,30 @@ async def handle_media_stream_exotel(websocket: WebSocket):
     finally:
         logger.info(f"🧹 Cleaning up {call_sid}")
         
-        # Clean up interrupted text storage
-        interrupted_text_storage.pop(call_sid, None)
-        
-        try:
-            call_duration = 0
-            if call_metadata.get('start_time'):
-                call_duration = int((datetime.utcnow() - call_metadata['start_time']).total_seconds())
-            
-            s3_urls = await call_recording_service.save_call_data(
-                call_sid=call_sid,
-                company_id=company_id,
-                agent_id=master_agent_id,
-                transcript=conversation_transcript,
-                recording_url=None,
-                duration=call_duration,
-                from_number=call_metadata.get('from_number'),
-                to_number=call_metadata.get('to_number')
-            )
-            
-            try:
-                call_record = db.query(Call).filter_by(call_sid=call_sid).first()
-                
-                if call_record:
-                    call_record.transcription = s3_urls.get('transcript_url')
-                    call_record.company_id = s3_urls.get('company_id')
-                    call_record.from_number = s3_urls.get('from_number')
-                    call_record.to_number = s3_urls.get('to_number')
-                    call_record.duration = call_duration
-                    call_record.status = 'completed'
-                    call_record.ended_at = datetime.utcnow()
-                    call_record.provider = 'exotel'
-                    db.commit()
-                else:
-                    new_call = Call(
-                        call_sid=call_sid,
-                        company_id=call_metadata.get('company_id'),
-                        from_number=call_metadata.get('from_number'),
-                        to_number=call_metadata.get('to_number'),
-                        status='completed',
-                        duration=call_duration,
-                        transcription=s3_urls.get('transcript_url'),
-                        provider='exotel',
-                        created_at=call_metadata['start_time'],
-                        ended_at=datetime.utcnow()
-                    )
-                    db.add(new_call)
-                    db.commit()
-            except Exception as db_error:
-                logger.error(f"Database update error: {db_error}")
-                db.rollback()
-        
-        except Exception as upload_error:
-            logger.error(f"S3 upload error: {upload_error}")
+        local_recording_path = call_audio_recording_service.finish(stream_sid)
+        # Hand off S3 upload and DB upsert; the socket is released immediately
+        await call_finalization_service.enqueue(
+            call_sid=call_sid,
+            company_id=company_id,
+            agent_id=master_agent_id,
+            transcript=conversation_transcript,
+            started_at=call_metadata.get('start_time'),
+            from_number=call_metadata.get('from_number'),
+            to_number=call_metadata.get('to_number'),
+            call_type=call_metadata.get('call_type', 'incoming'),
+            provider='exotel',
+            local_recording_path=local_recording_path
+        )
         
-        intent_router_service.clear_call(call_sid)
+        await intent_router_service.clear_call(call_sid)
         
         try:
             await deepgram_service.close_session(session_id)
         except:
             pass
         
-        call_context.pop(call_sid, None)
-        db.close()
+        await call_state_store.clear_call(call_sid)
+        conversation_memory_service.clear_call(call_sid)
 
 
 # PROCESS AND RESPOND - Same logic as Twilio
@@ -816,7 +735,6 @@ async def process_and_respond_incoming(
     websocket: WebSocket,
     stream_sid: str,
     stop_audio_flag: dict,
-    db: Session,
     call_sid: str,
     current_agent_context: dict,
     current_agent_id: str,
@@ -837,10 +755,13 @@ async def process_and_respond_incoming(
             logger.info("Skipping response - interrupted")
             return
         
+        # Token-budgeted history (recent turns + rolling summary) shared by router and answer LLM
+        memory = conversation_memory_service.for_transcript(call_sid, conversation_transcript)
+        
         # AI-POWERED DECISION for routing
         routing_decision = await rag_routing_service.should_retrieve_documents(
             user_message=transcript,
-            conversation_history=conversation_transcript,
+            conversation_history=memory.messages(settings.conversation_router_history_tokens),
             call_type="incoming",
             agent_context=current_agent_context
         )
@@ -849,15 +770,10 @@ async def process_and_respond_incoming(
         logger.info(f"🎯 AI Routing: {response_strategy}")
         
         # Build conversation context
-        conversation_messages = []
-        for msg in conversation_transcript[-10:]:
-            if msg['role'] in ['user', 'assistant']:
-                conversation_messages.append({
-                    'role': msg['role'],
-                    'content': msg['content']
-                })
+        conversation_messages = memory.messages()
         
         llm_response = None
+        llm_started = time.perf_counter()
         
         # Strategy 1 - Direct canned response
         if response_strategy == 'direct_canned':
@@ -869,6 +785,7 @@ async def process_and_respond_incoming(
             response_chunks = []
             async for chunk in rag.llm.astream(simple_prompt):
                 if chunk.content:
+                    turn_tracer.mark("llm_first_token")
                     response_chunks.append(chunk.content)
             
             llm_response = "".join(response_chunks)
@@ -893,22 +810,25 @@ You are continuing an active conversation. Use the conversation history to respo
                 'content': support_context
             })
             
-            response = await rag.llm_with_functions.ainvoke(conversation_messages)
+            with turn_tracer.span("llm"):
+                response = await rag.llm_with_functions.ainvoke(conversation_messages)
+            turn_tracer.mark("llm_first_token")
             
             if hasattr(response, 'additional_kwargs') and 'function_call' in response.additional_kwargs:
                 function_call = response.additional_kwargs['function_call']
                 function_name = function_call['name']
                 arguments = json.loads(function_call['arguments'])
                 
-                llm_response = await execute_function(
-                    function_name=function_name,
-                    arguments=arguments,
-                    company_id=company_id,
-                    call_sid=call_sid or "unknown",
-                    campaign_id=None,
-                    user_timezone=call_metadata.get('user_timezone', 'UTC') if call_metadata else 'UTC',
-                    business_hours={'start': '09:00', 'end': '18:00'}
-                )
+                with turn_tracer.span("function_call"):
+                    llm_response = await execute_function(
+                        function_name=function_name,
+                        arguments=arguments,
+                        company_id=company_id,
+                        call_sid=call_sid or "unknown",
+                        campaign_id=None,
+                        user_timezone=call_metadata.get('user_timezone', 'UTC') if call_metadata else 'UTC',
+                        business_hours={'start': '09:00', 'end': '18:00'}
+                    )
             else:
                 llm_response = response.content
         
@@ -941,6 +861,7 @@ You are on a LIVE SUPPORT PHONE CALL. Use the provided documentation to give acc
                 conversation_context=conversation_messages,
                 call_type="incoming"
             ):
+                turn_tracer.mark("llm_first_token")
                 response_chunks.append(chunk)
             
             llm_response = "".join(response_chunks)
@@ -948,6 +869,12 @@ You are on a LIVE SUPPORT PHONE CALL. Use the provided documentation to give acc
         else:
             llm_response = "I'm here to help. Could you tell me more about what you need?"
         
+        if response_strategy in ('direct_canned', 'conversation_context', 'document_retrieval'):
+            # direct_canned is a tiny call; it would drag down the p95 pacing plans around
+            if response_strategy != 'direct_canned':
+                pacing_controller.record_latency("llm", time.perf_counter() - llm_started)
+            turn_tracer.mark("llm_complete")
+        
         if stop_audio_flag.get('stop', False):
             logger.info("Skipping audio - interrupted")
             return
@@ -1007,7 +934,6 @@ async def process_and_respond_outbound(
     websocket: WebSocket,
     stream_sid: str,
     stop_audio_flag: dict,
-    db: Session,
     call_sid: str,
     current_agent_context: dict,
     current_agent_id: str,
@@ -1028,7 +954,7 @@ async def process_and_respond_outbound(
             return
         
         # Get booking session if exists
-        booking_session = booking_orchestrator.get_session(call_sid)
+        booking_session = await booking_orchestrator.get_session(call_sid)
         is_booking_mode = booking_session is not None
         
         # Check for rejection
@@ -1084,7 +1010,6 @@ async def process_and_respond_outbound(
         
         # FIX #6: Only fetch datetime/slots when in booking mode
         datetime_info = None
-        available_slots = []
         available_slots_text = ""
         
         if is_booking_mode and booking_session:
@@ -1093,23 +1018,17 @@ async def process_and_respond_outbound(
             
             # Only fetch slots if we don't have date/time yet
             collected = booking_session.get('collected_data', {})
-            if not collected.get('date') or not collected.get('time'):
+            campaign_id = booking_session.get('customer_info', {}).get('campaign_id')
+            if campaign_id and (not collected.get('date') or not collected.get('time')):
                 try:
-                    slot_manager = SlotManagerService()
-                    available_slots = await slot_manager.get_available_slots(
-                        company_id=company_id,
-                        start_date=datetime.utcnow().date(),
-                        days_ahead=7
+                    slots_data = await turn_deadlines.run(
+                        "slot_fetch",
+                        slot_manager_service.get_upcoming_slots(campaign_id),
+                        fallback=None
                     )
                     
-                    if available_slots:
-                        slots_formatted = []
-                        for slot in available_slots[:3]:
-                            slot_dt = slot['datetime']
-                            slots_formatted.append(
-                                f"{slot_dt.strftime('%A, %B %d')} at {slot_dt.strftime('%I:%M %p')}"
-                            )
-                        available_slots_text = " or ".join(slots_formatted)
+                    if slots_data:
+                        available_slots_text = slot_manager_service.format_slots_for_prompt(slots_data)
                         logger.info(f"📅 Available slots: {available_slots_text}")
                 except Exception as e:
                     logger.error(f"Error fetching slots: {e}")
@@ -1119,11 +1038,11 @@ async def process_and_respond_outbound(
             logger.info(f"📅 AI extracted: {datetime_info.get('user_friendly')}")
             
             if datetime_info.get('date'):
-                booking_orchestrator.update_session_data(call_sid, 'date', datetime_info['date'])
+                booking_session = await booking_orchestrator.update_session_data(call_sid, 'date', datetime_info['date']) or booking_session
             if datetime_info.get('time'):
-                booking_orchestrator.update_session_data(call_sid, 'time', datetime_info['time'])
+                booking_session = await booking_orchestrator.update_session_data(call_sid, 'time', datetime_info['time']) or booking_session
             if datetime_info.get('datetime_iso'):
-                booking_orchestrator.update_session_data(call_sid, 'datetime_iso', datetime_info['datetime_iso'])
+                booking_session = await booking_orchestrator.update_session_data(call_sid, 'datetime_iso', datetime_info['datetime_iso']) or booking_session
         
         # Extract email if present
         import re
@@ -1132,20 +1051,14 @@ async def process_and_respond_outbound(
         
         if email_match and booking_session:
             email = email_match.group(0)
-            booking_orchestrator.update_session_data(call_sid, 'email', email)
+            booking_session = await booking_orchestrator.update_session_data(call_sid, 'email', email) or booking_session
             logger.info(f"📧 Extracted email: {email}")
         
         # Build conversation context
-        conversation_messages = []
-        for msg in conversation_transcript[-6:]:
-            if msg['role'] in ['user', 'assistant']:
-                conversation_messages.append({
-                    'role': msg['role'],
-                    'content': msg['content']
-                })
+        conversation_messages = conversation_memory_service.for_transcript(call_sid, conversation_transcript).messages()
         
         # Get context
-        company_name = company_service.get_company_name_by_id(company_id)
+        company_name = await company_service.get_company_name_by_id(company_id)
         
         # Build prompt based on mode
         if is_booking_mode:
@@ -1155,7 +1068,7 @@ async def process_and_respond_outbound(
             customer_name = customer.get('name', 'there')
             customer_phone = customer.get('phone', 'unknown')
             
-            next_action = booking_orchestrator.get_next_action(call_sid) if booking_session else ""
+            next_action = await booking_orchestrator.get_next_action(call_sid) if booking_session else ""
             prompt_hint = "Ask for datetime" if not next_action else next_action
             
             has_date = collected.get('date') is not None
@@ -1226,7 +1139,12 @@ Be conversational."""
         
         # Single LLM call with functions
         logger.info("🤖 Calling LLM...")
-        response = await rag.llm_with_functions.ainvoke(conversation_messages)
+        llm_started = time.perf_counter()
+        with turn_tracer.span("llm"):
+            response = await rag.llm_with_functions.ainvoke(conversation_messages)
+        pacing_controller.record_latency("llm", time.perf_counter() - llm_started)
+        turn_tracer.mark("llm_first_token")
+        turn_tracer.mark("llm_complete")
         
         # Handle function calls
         if hasattr(response, 'additional_kwargs') and 'function_call' in response.additional_kwargs:
@@ -1243,43 +1161,44 @@ Be conversational."""
             else:
                 # Update state before execution
                 if function_name == 'check_slot_availability' and booking_session:
-                    booking_orchestrator.transition_state(
+                    await booking_orchestrator.transition_state(
                         call_sid, 
                         BookingState.CHECKING_AVAILABILITY, 
                         "Verifying slot"
                     )
                 
-                llm_response = await execute_function(
-                    function_name=function_name,
-                    arguments=arguments,
-                    company_id=company_id,
-                    call_sid=call_sid,
-                    campaign_id=None,
-                    user_timezone='UTC',
-                    business_hours={'start': '09:00', 'end': '18:00'}
-                )
+                with turn_tracer.span("function_call"):
+                    llm_response = await execute_function(
+                        function_name=function_name,
+                        arguments=arguments,
+                        company_id=company_id,
+                        call_sid=call_sid,
+                        campaign_id=None,
+                        user_timezone='UTC',
+                        business_hours={'start': '09:00', 'end': '18:00'}
+                    )
                 
                 logger.info(f"✅ Result: {llm_response[:80]}...")
                 
                 # Update state after execution
                 if function_name == 'check_slot_availability':
                     if 'available' in llm_response.lower() and 'available not' not in llm_response.lower():
-                        booking_orchestrator.update_session_data(call_sid, 'slot_available', True)
-                        booking_orchestrator.transition_state(
+                        await booking_orchestrator.update_session_data(call_sid, 'slot_available', True)
+                        await booking_orchestrator.transition_state(
                             call_sid,
                             BookingState.COLLECTING_EMAIL,
                             "Slot confirmed"
                         )
                     else:
-                        booking_orchestrator.transition_state(
+                        await booking_orchestrator.transition_state(
                             call_sid,
                             BookingState.COLLECTING_DATE,
                             "Slot unavailable"
                         )
                 
                 elif function_name == 'verify_customer_email':
-                    booking_orchestrator.update_session_data(call_sid, 'email_verified', True)
-                    booking_orchestrator.transition_state(
+                    await booking_orchestrator.update_session_data(call_sid, 'email_verified', True)
+                    await booking_orchestrator.transition_state(
                         call_sid,
                         BookingState.CONFIRMING_BOOKING,
                         "Email verified"
@@ -1287,7 +1206,7 @@ Be conversational."""
                 
                 elif function_name == 'create_booking':
                     if 'booking id' in llm_response.lower() or 'scheduled' in llm_response.lower() and 'failed' not in llm_response.lower():
-                        booking_orchestrator.transition_state(
+                        await booking_orchestrator.transition_state(
                             call_sid,
                             BookingState.COMPLETED,
                             "Booking complete!"
@@ -1295,7 +1214,7 @@ Be conversational."""
                         logger.info(f"🎉 BOOKING COMPLETED for {customer_name}")
                     else:
                         logger.error(f"❌ BOOKING FAILED: {llm_response[:100]}")
-                        booking_orchestrator.transition_state(
+                        await booking_orchestrator.transition_state(
                             call_sid,
                             BookingState.COLLECTING_DATE,
                             "Booking failed"
@@ -1386,16 +1305,12 @@ Be conversational."""
 @router.post("/outbound-connect")
 async def handle_outbound_connect_exotel(request: Request):
     """Exotel outbound call handler"""
-    global from_number_global, to_number_global
-    
     try:
         form_data = await request.form()
         call_sid = form_data.get("CallSid") or form_data.get("Sid")
         from_number = form_data.get("From")
         to_number = form_data.get("To")
         
-        from_number_global = from_number
-        to_number_global = to_number
         
         campaign_id = request.query_params.get("campaign_id")
         company_id = request.query_params.get("company_id")
@@ -1406,8 +1321,9 @@ async def handle_outbound_connect_exotel(request: Request):
         logger.info(f"   From: {from_number}, To: {to_number}")
         logger.info(f"   Company: {company_id}, Agent: {agent_id}, Customer: {customer_name}")
         
-        # Store context
-        call_context[call_sid] = {
+        # Signed context travels with the stream; no server-side state
+        context_token = call_context_signer.encode({
+            "call_sid": call_sid,
             "company_id": company_id,
             "agent_id": agent_id,
             "from_number": from_number,
@@ -1415,16 +1331,16 @@ async def handle_outbound_connect_exotel(request: Request):
             "customer_name": customer_name,
             "campaign_id": campaign_id,
             "call_type": "outgoing"
-        }
+        })
         
         # Generate Exotel XML response
         ws_domain = settings.base_url.replace('https://', '').replace('http://', '')
-        stream_url = f"wss://{ws_domain}/api/v1/exotel-elevenlabs/outbound-stream?call_sid={call_sid}"
+        stream_url = f"wss://{ws_domain}/api/v1/exotel-elevenlabs/outbound-stream?call_sid={call_sid}&{TOKEN_PARAM}={context_token}"
         
         response_xml = f"""<?xml version="1.0" encoding="UTF-8"?>
 <Response>
     <Connect>
-        <Stream url="{stream_url}" />
+        <Stream url="{escape(stream_url)}" />
     </Connect>
 </Response>"""
         
@@ -1445,8 +1361,6 @@ async def handle_outbound_connect_exotel(request: Request):
 @router.websocket("/outbound-stream")
 async def handle_outbound_stream_exotel(websocket: WebSocket):
     """Exotel outbound call streaming with ALL fixes applied"""
-    global from_number_global, to_number_global
-    
     try:
         await websocket.accept()
         logger.info("✅ WebSocket ACCEPTED")
@@ -1491,8 +1405,11 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
     
     logger.info(f"📞 Outbound Call SID: {call_sid}")
     
-    # Get context
-    context = call_context.get(call_sid, {})
+    # Verify and decode the signed context from the webhook
+    context = call_context_signer.from_stream(websocket.query_params, first_message_data, call_sid)
+    if context is None:
+        await websocket.close(code=1008, reason="Invalid call context")
+        return
     company_id = context.get("company_id")
     agent_id = context.get("agent_id")
     customer_name = context.get("customer_name", "")
@@ -1503,34 +1420,26 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
     
     # PRE-WARM agent cache
     cache_key = f"{company_id}_{agent_id}"
-    if not get_cached_agent(cache_key):
+    if not await get_cached_agent(cache_key):
         logger.info(f"🔥 PRE-WARMING agent cache for {cache_key}...")
         try:
             master_agent = await agent_config_service.get_master_agent(company_id, agent_id)
-            company_name = company_service.get_company_name_by_id(company_id)
-            agent_cache[cache_key] = {
-                'agent': master_agent,
-                'company_name': company_name,
-                'cached_at': datetime.utcnow()
-            }
+            company_name = await company_service.get_company_name_by_id(company_id)
+            await cache_agent(cache_key, master_agent, company_name)
             logger.info(f"✅ Agent data cached - greeting will be instant!")
         except Exception as e:
             logger.error(f"Pre-warm failed: {e}")
     
     # Get cached agent
-    cached = get_cached_agent(cache_key)
+    cached = await get_cached_agent(cache_key)
     if cached:
         master_agent = cached['agent']
     else:
         start_time = datetime.utcnow()
         master_agent = await agent_config_service.get_master_agent(company_id, agent_id)
-        company_name = company_service.get_company_name_by_id(company_id)
+        company_name = await company_service.get_company_name_by_id(company_id)
         
-        agent_cache[cache_key] = {
-            'agent': master_agent,
-            'company_name': company_name,
-            'cached_at': datetime.utcnow()
-        }
+        await cache_agent(cache_key, master_agent, company_name)
         init_duration = (datetime.utcnow() - start_time).total_seconds()
         logger.info(f"⏱️ Fetched in {init_duration:.2f}s")
     
@@ -1544,8 +1453,8 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
     
     call_metadata = {
         'start_time': datetime.utcnow(),
-        'from_number': from_number_global,
-        'to_number': to_number_global,
+        'from_number': context.get("from_number"),
+        'to_number': context.get("to_number"),
         'company_id': company_id,
         'call_type': call_type,
         'provider': 'exotel'
@@ -1555,14 +1464,14 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
     additional_context = master_agent.get('additional_context', {})
     business_context = additional_context.get('businessContext', '')
     
-    greeting = f"Hello {customer_name}! This is {agent_name} calling from {company_service.get_company_name_by_id(company_id)}. "
+    company_name = cached['company_name'] if cached else company_name
+    greeting = f"Hello {customer_name}! This is {agent_name} calling from {company_name}. "
     greeting += f"I'm reaching out because we offer {business_context}. "
     greeting += "Would you be interested in learning more?"
     
     logger.info(f"💬 Greeting pre-generated: '{greeting[:50]}...'")
     
     # Initialize services
-    db = SessionLocal()
     deepgram_service = DeepgramWebSocketService()
     rag = get_rag_service()
     stream_sid = None
@@ -1581,16 +1490,17 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
             
             if stream_sid:
                 try:
+                    call_audio_recording_service.clear(stream_sid)
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
                     logger.info(f"✅ CLEAR sent to Exotel for {stream_sid}")
                 except Exception as e:
                     logger.error(f"Failed to send CLEAR: {e}")
             
-            interrupted_text_storage[call_sid] = {
+            await call_state_store.set(call_sid, "interrupted_text", {
                 'text': transcript,
-                'timestamp': datetime.utcnow(),
+                'timestamp': datetime.utcnow().isoformat(),
                 'confidence': confidence
-            }
+            })
             logger.info(f"💾 Saved interrupted text: '{transcript}'")
             
             if not is_speaking:
@@ -1625,10 +1535,10 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
                     return
             
             # Handle interrupted text
-            if call_sid in interrupted_text_storage:
-                interrupted = interrupted_text_storage.pop(call_sid)
+            interrupted = await call_state_store.pop(call_sid, "interrupted_text")
+            if interrupted:
                 interrupted_text = interrupted['text']
-                age = (datetime.utcnow() - interrupted['timestamp']).total_seconds()
+                age = (datetime.utcnow() - datetime.fromisoformat(interrupted['timestamp'])).total_seconds()
                 
                 if age < 10.0:
                     if interrupted_text.lower() not in transcript.lower():
@@ -1637,6 +1547,10 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
             
             logger.info(f"👤 CUSTOMER: '{transcript}'")
             
+            turn_tracer.start_turn(call_sid, "exotel", company_id, agent_id)
+            
+            turn_deadlines.start()
+            
             # Fast-path for simple responses
             simple_words = ['yes', 'no', 'hello', 'hi', 'okay', 'sure', 'yeah', 'nope', 'yep', 'hey']
             is_simple = len(transcript.split()) <= 5 and any(w in transcript.lower() for w in simple_words)
@@ -1660,7 +1574,9 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
                 # Full intent detection
                 intent_analysis = await intent_detection_service.detect_customer_intent(
                     customer_message=transcript,
-                    conversation_history=conversation_transcript,
+                    conversation_history=conversation_memory_service.for_transcript(
+                        call_sid, conversation_transcript
+                    ).messages(settings.conversation_router_history_tokens),
                     call_type=call_type
                 )
             
@@ -1686,7 +1602,6 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
                     websocket=websocket,
                     stream_sid=stream_sid,
                     stop_audio_flag=stop_audio_flag,
-                    db=db,
                     call_sid=call_sid,
                     current_agent_context=current_agent_context,
                     current_agent_id=agent_id,
@@ -1710,7 +1625,7 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
         deepgram_init_task = asyncio.create_task(
             deepgram_service.initialize_session(
                 session_id=session_id,
-                callback=on_deepgram_transcript,
+                callback=turn_tracer.scoped(on_deepgram_transcript),
                 interruption_callback=on_interim_transcript
             )
         )
@@ -1718,6 +1633,7 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
         # Send greeting immediately
         if first_message_data and first_message_data.get("event") == "start":
             stream_sid = first_message_data.get("streamSid") or first_message_data.get("start", {}).get("streamSid")
+            call_audio_recording_service.start(stream_sid, call_sid, inbound_encoding="pcm16")
             logger.info(f"✅ Stream started: {stream_sid}")
             
             is_agent_speaking_ref['speaking'] = True
@@ -1764,6 +1680,7 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
                 elif event == "start":
                     if not greeting_sent:
                         stream_sid = data.get("streamSid")
+                        call_audio_recording_service.start(stream_sid, call_sid, inbound_encoding="pcm16")
                         logger.info(f"✅ Stream started (late): {stream_sid}")
                         
                         is_agent_speaking_ref['speaking'] = True
@@ -1791,6 +1708,7 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
                 elif event == "media":
                     payload = data.get("media", {}).get("payload")
                     if payload:
+                        call_audio_recording_service.inbound(stream_sid, payload)
                         audio = convert_exotel_audio_to_deepgram(payload)
                         if audio:
                             await deepgram_service.process_audio_chunk(session_id, audio)
@@ -1816,43 +1734,28 @@ async def handle_outbound_stream_exotel(websocket: WebSocket):
     finally:
         logger.info(f"🧹 Cleaning up {call_sid}")
         
-        interrupted_text_storage.pop(call_sid, None)
-        
-        try:
-            call_duration = int((datetime.utcnow() - call_metadata['start_time']).total_seconds())
-            
-            s3_urls = await call_recording_service.save_call_data(
-                call_sid=call_sid,
-                company_id=company_id,
-                agent_id=agent_id,
-                transcript=conversation_transcript,
-                recording_url=None,
-                duration=call_duration,
-                from_number=call_metadata.get('from_number'),
-                to_number=call_metadata.get('to_number')
-            )
-            
-            try:
-                call_record = db.query(Call).filter_by(call_sid=call_sid).first()
-                if call_record:
-                    call_record.transcription = s3_urls.get('transcript_url')
-                    call_record.duration = call_duration
-                    call_record.status = 'completed'
-                    call_record.ended_at = datetime.utcnow()
-                    call_record.provider = 'exotel'
-                    db.commit()
-            except:
-                db.rollback()
-        except:
-            pass
+        local_recording_path = call_audio_recording_service.finish(stream_sid)
+        # Hand off S3 upload and DB upsert; the socket is released immediately
+        await call_finalization_service.enqueue(
+            call_sid=call_sid,
+            company_id=company_id,
+            agent_id=agent_id,
+            transcript=conversation_transcript,
+            started_at=call_metadata.get('start_time'),
+            from_number=call_metadata.get('from_number'),
+            to_number=call_metadata.get('to_number'),
+            call_type=call_metadata.get('call_type', 'incoming'),
+            provider='exotel',
+            local_recording_path=local_recording_path
+        )
         
         try:
             await deepgram_service.close_session(session_id)
         except:
             pass
         
-        call_context.pop(call_sid, None)
-        db.close()
+        await call_state_store.clear_call(call_sid)
+        conversation_memory_service.clear_call(call_sid)
 
 
 @router.post("/initiate-outbound-call")
@@ -1908,27 +1811,20 @@ async def initiate_outbound_call_exotel(request: Request):
                 
                 # Background DB save
                 async def _save():
-                    db = None
                     try:
-                        db = SessionLocal()
-                        new_call = Call(
-                            call_sid=call_sid,
-                            company_id=company_id,
-                            from_number=from_number,
-                            to_number=to_number,
-                            call_type=CallType.outgoing,
-                            status='initiated',
-                            provider='exotel',
-                            created_at=datetime.utcnow()
-                        )
-                        db.add(new_call)
-                        db.commit()
-                    except:
-                        if db:
-                            db.rollback()
-                    finally:
-                        if db:
-                            db.close()
+                        async with get_async_session() as db:
+                            db.add(Call(
+                                call_sid=call_sid,
+                                company_id=company_id,
+                                from_number=from_number,
+                                to_number=to_number,
+                                call_type=CallType.outgoing,
+                                status='initiated',
+                                provider='exotel',
+                                created_at=datetime.utcnow()
+                            ))
+                    except Exception as e:
+                        logger.error(f"Background DB error: {e}")
                 
                 asyncio.create_task(_save())
                 
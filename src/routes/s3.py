@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Header
 from typing import List, Optional
+from email.utils import format_datetime
 from handlers.s3_handler import S3Handler, S3Config
 #from middleware.auth_middleware import get_current_user
 #from app.models.schemas import UserResponse
 from fastapi.responses import StreamingResponse
-import io
+import re
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,28 @@ s3_handler = S3Handler()
 def get_s3_handler() -> S3Handler:
     return S3Handler()
 
+_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def parse_range_header(range_header: Optional[str]) -> Optional[str]:
+    """
+    Validate a client Range header for pass-through to S3.
+
+    Only a single byte range is supported (S3 does not serve multipart
+    ranges); anything else is ignored and the full object is returned,
+    as allowed by RFC 7233.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if start and end and int(end) < int(start):
+        return None
+    return range_header.strip()
+
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
@@ -99,21 +122,38 @@ async def get_file_details(
 @router.get("/download/{key:path}")
 async def download_file(
     key: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
     #current_user: UserResponse = Depends(get_current_user)
 ):
     try:
-        result = await s3_handler.download_file(key)
+        byte_range = parse_range_header(range_header)
+        result = await s3_handler.open_download_stream(key, byte_range=byte_range)
         
         if result["success"]:
-            file_stream = io.BytesIO(result["data"])
+            headers = {
+                "Content-Disposition": f"attachment; filename={key.split('/')[-1]}",
+                "Accept-Ranges": "bytes"
+            }
+            if result.get("content_length") is not None:
+                headers["Content-Length"] = str(result["content_length"])
+            if result.get("etag"):
+                headers["ETag"] = result["etag"]
+            if result.get("last_modified"):
+                headers["Last-Modified"] = format_datetime(result["last_modified"], usegmt=True)
+            if result["partial"]:
+                headers["Content-Range"] = result["content_range"]
             
             return StreamingResponse(
-                io.BytesIO(result["data"]),
-                media_type=result.get("content_type", "application/octet-stream"),
-                headers={
-                    "Content-Disposition": f"attachment; filename={key.split('/')[-1]}"
-                }
+                s3_handler.iter_body(result["body"]),
+                status_code=206 if result["partial"] else 200,
+                media_type=result.get("content_type") or "application/octet-stream",
+                headers=headers
             )
+        elif result.get("range_not_satisfiable"):
+            headers = {}
+            if result.get("object_size") is not None:
+                headers["Content-Range"] = f"bytes */{result['object_size']}"
+            raise HTTPException(status_code=416, detail=result["error"], headers=headers)
         else:
             status_code = 404 if "not found" in result["error"].lower() else 400
             raise HTTPException(status_code=status_code, detail=result["error"])
@@ -169,10 +209,15 @@ async def delete_multiple_files(
 async def list_files(
     prefix: str = Query("", description="File prefix to filter by"),
     max_keys: int = Query(1000, description="Maximum number of files to return"),
+    continuation_token: Optional[str] = Query(None, description="Token from a previous truncated listing"),
     #current_user: UserResponse = Depends(get_current_user)
 ):
     try:
-        result = await s3_handler.list_files(prefix=prefix, max_keys=max_keys)
+        result = await s3_handler.list_files(
+            prefix=prefix,
+            max_keys=max_keys,
+            continuation_token=continuation_token
+        )
         
         if result["success"]:
             return result
@@ -10,9 +10,8 @@
 
 from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect, Depends
 from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from database.config import SessionLocal
-from database.models import CallType, ConversationTurn
+from database.config import get_async_session
+from database.models import CallType
 from services.speech.deepgram_ws_service import DeepgramWebSocketService
 from services.voice.elevenlabs_service import elevenlabs_service
 from services.rag.rag_service import get_rag_service
@@ -27,46 +26,52 @@ from database.config import get_db
 import logging
 import json
 import asyncio
+import time
 from services.intent_router_service import intent_router_service
 from services.agent_config_service import agent_config_service
 from services.prompt_template_service import prompt_template_service
-from services.call_recording_service import call_recording_service
-from database.models import ConversationTurn, Call
+from services.db_write_buffer import db_write_buffer
+from services.call_finalization_service import call_finalization_service
+from services.call_audio_recording_service import call_audio_recording_service
+from services.call_state_store import call_state_store
+from services.call_context_token import call_context_signer, TOKEN_PARAM
+from services.pacing_controller import pacing_controller
+from services.turn_tracer import turn_tracer
+from services.turn_deadline import turn_deadlines
+from services.conversation_memory import conversation_memory_service
+from database.models import Call
 from pydantic import BaseModel, Field
 from twilio.rest import Client
 from urllib.parse import quote
 from services.agent_tools import execute_function
 from services.intent_detection_service import intent_detection_service
 import uuid
-from services.slot_manager_service import SlotManagerService
+from services.slot_manager_service import slot_manager_service
 
 twilio_client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/twilio-elevenlabs", tags=["twilio-elevenlabs"])
 
-# Active call context
-call_context = {}
+# Per-call state (context, interrupted text, agent cache) lives in call_state_store
+# so the webhook and the media stream can be served by different workers
 
-# Cache for pre-initialized agent data (with TTL)
-agent_cache = {}
+# Cache TTL for pre-initialized agent data
 AGENT_CACHE_TTL = 300  # 5 minutes
 
-# FIX #1: Storage for interrupted text (so it's not lost!)
-interrupted_text_storage = {}
 
-# Global numbers
-from_number_global = None
-to_number_global = None
+async def get_cached_agent(cache_key: str):
+    """Get cached agent data if not expired"""
+    return await call_state_store.get_cached(f"agent:{cache_key}")
 
 
-def get_cached_agent(cache_key: str):
-    """Get cached agent data if not expired"""
-    if cache_key in agent_cache:
-        cached = agent_cache[cache_key]
-        if (datetime.utcnow() - cached['cached_at']).total_seconds() < AGENT_CACHE_TTL:
-            return cached
-    return None
+async def cache_agent(cache_key: str, agent: dict, company_name: str):
+    """Share pre-fetched agent data with every worker for AGENT_CACHE_TTL"""
+    await call_state_store.set_cached(
+        f"agent:{cache_key}",
+        {'agent': agent, 'company_name': company_name},
+        AGENT_CACHE_TTL
+    )
 
 
 async def _prewarm_agent_cache(company_id: str, agent_id: str):
@@ -74,52 +79,25 @@ async def _prewarm_agent_cache(company_id: str, agent_id: str):
     cache_key = f"{company_id}_{agent_id}"
     try:
         master_agent = await agent_config_service.get_master_agent(company_id, agent_id)
-        company_name = company_service.get_company_name_by_id(company_id)
-        agent_cache[cache_key] = {
-            'agent': master_agent,
-            'company_name': company_name,
-            'cached_at': datetime.utcnow()
-        }
+        company_name = await company_service.get_company_name_by_id(company_id)
+        await cache_agent(cache_key, master_agent, company_name)
         logger.info(f"Pre-warmed agent cache: {cache_key}")
     except Exception as e:
         logger.error(f"Pre-warm failed: {e}")
 
 def save_to_db_background(call_sid: str, role: str, content: str):
-    """Fire-and-forget DB write - saves ~100-300ms"""
-    async def _save():
-        db = None
-        try:
-            db = SessionLocal()
-            db.add(ConversationTurn(
-                call_sid=call_sid,
-                role=role,
-                content=content,
-                created_at=datetime.utcnow()
-            ))
-            db.commit()
-        except Exception as e:
-            logger.error(f"Background DB error: {e}")
-            if db:
-                db.rollback()
-        finally:
-            if db:
-                db.close()
-    
-    asyncio.create_task(_save())
+    """Fire-and-forget DB write - batched by the write-behind buffer"""
+    db_write_buffer.add_turn(call_sid, role, content)
 
 @router.post("/incoming-call")
 async def handle_incoming_call_elevenlabs(request: Request):
     """Incoming call handler with ElevenLabs via WebSocket"""
-    global from_number_global, to_number_global
-    
     try:
         form_data = await request.form()
         call_sid = form_data.get("CallSid")
         from_number = form_data.get("From")
         to_number = form_data.get("To")
         
-        from_number_global = from_number
-        to_number_global = to_number
 
         company_id = request.query_params.get("company_id")
         agent_id = request.query_params.get("agent_id")
@@ -130,7 +108,7 @@ async def handle_incoming_call_elevenlabs(request: Request):
         
         # PRE-WARM: Start fetching agent data immediately
         cache_key = f"{company_id}_{agent_id}"
-        if not get_cached_agent(cache_key):
+        if not await get_cached_agent(cache_key):
             asyncio.create_task(_prewarm_agent_cache(company_id, agent_id))
         
         # Generate TwiML response
@@ -138,17 +116,21 @@ async def handle_incoming_call_elevenlabs(request: Request):
         connect = Connect()
         ws_domain = settings.base_url.replace('https://', '').replace('http://', '')
 
-        call_context[call_sid] = {
+        # Signed context travels with the stream; no server-side state
+        context_token = call_context_signer.encode({
+            "call_sid": call_sid,
             "company_id": company_id,
             "agent_id": agent_id,
             "from_number": from_number,
             "to_number": to_number
-        }
+        })
         
         stream_url = f"wss://{ws_domain}/api/v1/twilio-elevenlabs/media-stream?call_sid={call_sid}"
         logger.info(f"Stream URL: {stream_url}")
         
-        connect.stream(url=stream_url)
+        # Twilio drops query strings from stream URLs; custom parameters arrive in the start event
+        stream = connect.stream(url=stream_url)
+        stream.parameter(name=TOKEN_PARAM, value=context_token)
         response.append(connect)
         
         twiml_str = str(response)
@@ -176,25 +158,12 @@ async def handle_call_status(request: Request):
         
         logger.info(f"📞 Call status update: {call_sid} -> {call_status}")
         
-        async def _update():
-            db = None
-            try:
-                db = SessionLocal()
-                call_record = db.query(Call).filter_by(call_sid=call_sid).first()
-                if call_record:
-                    call_record.status = call_status
-                    if call_status == 'completed':
-                        call_record.ended_at = datetime.utcnow()
-                    db.commit()
-            except Exception as e:
-                logger.error(f"DB error: {e}")
-                if db:
-                    db.rollback()
-            finally:
-                if db:
-                    db.close()
-        
-        asyncio.create_task(_update())
+        db_write_buffer.update_call_status(
+            call_sid,
+            call_status,
+            ended_at=datetime.utcnow() if call_status == 'completed' else None
+        )
+        db_write_buffer.add_event(call_sid, f"status.{call_status}", dict(form_data))
         return {"status": "ok"}
     except Exception as e:
         logger.error(f"Error handling call status: {e}")
@@ -208,6 +177,7 @@ async def send_clear_to_twilio(websocket: WebSocket, stream_sid: str):
     try:
         clear_message = {"event": "clear", "streamSid": stream_sid}
         await websocket.send_json(clear_message)
+        call_audio_recording_service.clear(stream_sid)
         logger.info("✅ CLEAR command sent to Twilio")
     except Exception as e:
         logger.error(f"Error sending clear: {e}")
@@ -244,11 +214,13 @@ async def stream_elevenlabs_audio_optimized(
             return
         
         # Stream audio chunks with interruption checking
+        tts_started = time.perf_counter()
         async for audio_chunk in elevenlabs_service.generate(text):
             # CHECK STOP FLAG BEFORE EVERY CHUNK
             if stop_flag_ref.get('stop', False):
                 logger.warning(f"🛑 STOP FLAG DETECTED at chunk {chunk_count} - halting!")
                 try:
+                    call_audio_recording_service.clear(stream_sid)
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
                     logger.info("✅ CLEAR sent during chunk streaming")
                 except:
@@ -256,12 +228,18 @@ async def stream_elevenlabs_audio_optimized(
                 return
             
             if audio_chunk and stream_sid:
+                if chunk_count == 0:
+                    turn_tracer.mark("tts_first_byte")
                 message = {
                     "event": "media",
                     "streamSid": stream_sid,
                     "media": {"payload": audio_chunk}
                 }
                 await websocket.send_json(message)
+                call_audio_recording_service.outbound(stream_sid, audio_chunk)
+                if chunk_count == 0:
+                    pacing_controller.record_latency("tts", time.perf_counter() - tts_started)
+                    turn_tracer.mark("first_media_sent")
                 chunk_count += 1
         
         logger.info(f"✓ Sent {chunk_count} chunks to Twilio")
@@ -279,6 +257,7 @@ async def stream_elevenlabs_audio_optimized(
             if stop_flag_ref.get('stop', False):
                 logger.warning(f"🛑 STOP during playback wait at {elapsed:.2f}s")
                 try:
+                    call_audio_recording_service.clear(stream_sid)
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
                 except:
                     pass
@@ -292,6 +271,7 @@ async def stream_elevenlabs_audio_optimized(
     except asyncio.CancelledError:
         logger.warning(f"🛑 Audio task CANCELLED at chunk {chunk_count}")
         try:
+            call_audio_recording_service.clear(stream_sid)
             await websocket.send_json({"event": "clear", "streamSid": stream_sid})
             logger.info("✅ CLEAR sent on task cancellation")
         except:
@@ -308,8 +288,6 @@ async def stream_elevenlabs_audio_optimized(
 @router.websocket("/media-stream")
 async def handle_media_stream(websocket: WebSocket):
     """Incoming call handler with proper interruption handling"""
-    global from_number_global, to_number_global
-    
     try:
         logger.info("WebSocket connection attempt...")
         await websocket.accept()
@@ -365,8 +343,11 @@ async def handle_media_stream(websocket: WebSocket):
     
     logger.info(f"Call SID validated: {call_sid}")
     
-    # Get context from stored data
-    context = call_context.get(call_sid, {})
+    # Verify and decode the signed context from the webhook
+    context = call_context_signer.from_stream(websocket.query_params, first_message_data, call_sid)
+    if context is None:
+        await websocket.close(code=1008, reason="Invalid call context")
+        return
     company_id = context.get("company_id")
     master_agent_id = context.get("agent_id")
     
@@ -374,27 +355,23 @@ async def handle_media_stream(websocket: WebSocket):
     
     # CHECK CACHE FIRST for faster startup
     cache_key = f"{company_id}_{master_agent_id}"
-    cached = get_cached_agent(cache_key)
+    cached = await get_cached_agent(cache_key)
     
     if cached:
         logger.info("⚡ Using CACHED agent data")
         master_agent = cached['agent']
     else:
         master_agent = await agent_config_service.get_master_agent(company_id, master_agent_id)
-        company_name = company_service.get_company_name_by_id(company_id)
-        agent_cache[cache_key] = {
-            'agent': master_agent,
-            'company_name': company_name,
-            'cached_at': datetime.utcnow()
-        }
+        company_name = await company_service.get_company_name_by_id(company_id)
+        await cache_agent(cache_key, master_agent, company_name)
     
     agent_name = master_agent["name"]
     current_agent_context = master_agent
     
     call_metadata = {
         'start_time': datetime.utcnow(),
-        'from_number': from_number_global,
-        'to_number': to_number_global,
+        'from_number': context.get("from_number"),
+        'to_number': context.get("to_number"),
         'company_id': company_id
     }
     
@@ -416,11 +393,10 @@ async def handle_media_stream(websocket: WebSocket):
     logger.info(f"Specialized agents: {[a['name'] for a in specialized_agents]}")
     
     # PRE-GENERATE GREETING before Deepgram init
-    greeting = prompt_template_service.generate_greeting(master_agent, company_id, agent_name)
+    greeting = await prompt_template_service.generate_greeting(master_agent, company_id, agent_name)
     logger.info(f"💬 Greeting pre-generated: '{greeting[:50]}...'")
     
     # Initialize services
-    db = SessionLocal()
     deepgram_service = DeepgramWebSocketService()
     rag = get_rag_service()
     stream_sid = None
@@ -447,17 +423,18 @@ async def handle_media_stream(websocket: WebSocket):
             # ALWAYS send CLEAR to Twilio
             if stream_sid:
                 try:
+                    call_audio_recording_service.clear(stream_sid)
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
                     logger.info(f"✅ CLEAR sent to Twilio for {stream_sid}")
                 except Exception as e:
                     logger.error(f"Failed to send CLEAR: {e}")
             
             # FIX: ALWAYS save the interrupted text (so it's not lost!)
-            interrupted_text_storage[call_sid] = {
+            await call_state_store.set(call_sid, "interrupted_text", {
                 'text': transcript,
-                'timestamp': datetime.utcnow(),
+                'timestamp': datetime.utcnow().isoformat(),
                 'confidence': confidence
-            }
+            })
             logger.info(f"💾 Saved interrupted text: '{transcript}'")
             
             if not is_speaking:
@@ -504,10 +481,10 @@ async def handle_media_stream(websocket: WebSocket):
                     return
             
             # FIX: Check for pending interrupted text and USE it
-            if call_sid in interrupted_text_storage:
-                interrupted = interrupted_text_storage.pop(call_sid)
+            interrupted = await call_state_store.pop(call_sid, "interrupted_text")
+            if interrupted:
                 interrupted_text = interrupted['text']
-                age = (datetime.utcnow() - interrupted['timestamp']).total_seconds()
+                age = (datetime.utcnow() - datetime.fromisoformat(interrupted['timestamp'])).total_seconds()
                 
                 if age < 10.0:  # Only use if recent
                     if interrupted_text.lower() not in transcript.lower():
@@ -521,6 +498,10 @@ async def handle_media_stream(websocket: WebSocket):
             
             logger.info(f"👤 CUSTOMER SAID: '{transcript}'")
             
+            turn_tracer.start_turn(call_sid, "twilio", company_id, master_agent_id)
+            
+            turn_deadlines.start()
+            
             conversation_transcript.append({
                 'role': 'user',
                 'content': transcript,
@@ -542,17 +523,23 @@ async def handle_media_stream(websocket: WebSocket):
             current_agent_id = master_agent_id
             
             if specialized_agents:
-                detected_agent = await intent_router_service.detect_intent(
-                    transcript,
-                    company_id,
-                    master_agent,
-                    specialized_agents
+                # Out of turn budget: stay with the agent the call is already with
+                detected_agent = await turn_deadlines.run(
+                    "agent_routing",
+                    intent_router_service.detect_intent(
+                        transcript,
+                        company_id,
+                        master_agent,
+                        specialized_agents
+                    ),
+                    fallback=lambda: intent_router_service.get_current_agent(call_sid, None)
                 )
                 
                 if detected_agent:
-                    previous_agent_id = intent_router_service.get_current_agent(call_sid, master_agent_id)
-                    intent_router_service.set_current_agent(call_sid, detected_agent)
+                    previous_agent_id = await intent_router_service.get_current_agent(call_sid, master_agent_id)
+                    await intent_router_service.set_current_agent(call_sid, detected_agent)
                     current_agent_id = detected_agent
+                    turn_tracer.set_agent(detected_agent)
                     
                     agent_info = await agent_config_service.get_agent_by_id(detected_agent)
                     
@@ -594,7 +581,6 @@ async def handle_media_stream(websocket: WebSocket):
                     websocket=websocket,
                     stream_sid=stream_sid,
                     stop_audio_flag=stop_audio_flag,
-                    db=db,
                     call_sid=call_sid,
                     current_agent_context=current_agent_context,
                     current_agent_id=current_agent_id,
@@ -622,7 +608,7 @@ async def handle_media_stream(websocket: WebSocket):
         deepgram_init_task = asyncio.create_task(
             deepgram_service.initialize_session(
                 session_id=session_id,
-                callback=on_deepgram_transcript,
+                callback=turn_tracer.scoped(on_deepgram_transcript),
                 interruption_callback=on_interim_transcript
             )
         )
@@ -630,6 +616,7 @@ async def handle_media_stream(websocket: WebSocket):
         # Process first message if we have it
         if first_message_data and first_message_data.get("event") == "start":
             stream_sid = first_message_data.get("streamSid")
+            call_audio_recording_service.start(stream_sid, call_sid, inbound_encoding="mulaw")
             logger.info(f"✅ Stream started: {stream_sid}")
             
             # SEND GREETING IMMEDIATELY - Don't wait for Deepgram!
@@ -679,6 +666,7 @@ async def handle_media_stream(websocket: WebSocket):
                 elif event == "start":
                     if not greeting_sent:
                         stream_sid = data.get("streamSid")
+                        call_audio_recording_service.start(stream_sid, call_sid, inbound_encoding="mulaw")
                         logger.info(f"✅ Stream started (late): {stream_sid}")
                         
                         is_agent_speaking_ref['speaking'] = True
@@ -707,6 +695,7 @@ async def handle_media_stream(websocket: WebSocket):
                     # Process audio for transcription
                     payload = data.get("media", {}).get("payload")
                     if payload:
+                        call_audio_recording_service.inbound(stream_sid, payload)
                         audio = await deepgram_service.convert_twilio_audio(payload, session_id)
                         if audio:
                             await deepgram_service.process_audio_chunk(session_id, audio)
@@ -732,67 +721,30 @@ async def handle_media_stream(websocket: WebSocket):
     finally:
         logger.info(f"🧹 Cleaning up {call_sid}")
         
-        # Clean up interrupted text storage
-        interrupted_text_storage.pop(call_sid, None)
-        
-        try:
-            call_duration = 0
-            if call_metadata.get('start_time'):
-                call_duration = int((datetime.utcnow() - call_metadata['start_time']).total_seconds())
-            
-            s3_urls = await call_recording_service.save_call_data(
-                call_sid=call_sid,
-                company_id=company_id,
-                agent_id=master_agent_id,
-                transcript=conversation_transcript,
-                recording_url=None,
-                duration=call_duration,
-                from_number=call_metadata.get('from_number'),
-                to_number=call_metadata.get('to_number')
-            )
-            
-            try:
-                call_record = db.query(Call).filter_by(call_sid=call_sid).first()
-                
-                if call_record:
-                    call_record.transcription = s3_urls.get('transcript_url')
-                    call_record.company_id = s3_urls.get('company_id')
-                    call_record.from_number = s3_urls.get('from_number')
-                    call_record.to_number = s3_urls.get('to_number')
-                    call_record.duration = call_duration
-                    call_record.status = 'completed'
-                    call_record.ended_at = datetime.utcnow()
-                    db.commit()
-                else:
-                    new_call = Call(
-                        call_sid=call_sid,
-                        company_id=call_metadata.get('company_id'),
-                        from_number=call_metadata.get('from_number'),
-                        to_number=call_metadata.get('to_number'),
-                        status='completed',
-                        duration=call_duration,
-                        transcription=s3_urls.get('transcript_url'),
-                        created_at=call_metadata['start_time'],
-                        ended_at=datetime.utcnow()
-                    )
-                    db.add(new_call)
-                    db.commit()
-            except Exception as db_error:
-                logger.error(f"Database update error: {db_error}")
-                db.rollback()
-        
-        except Exception as upload_error:
-            logger.error(f"S3 upload error: {upload_error}")
+        local_recording_path = call_audio_recording_service.finish(stream_sid)
+        # Hand off S3 upload and DB upsert; the socket is released immediately
+        await call_finalization_service.enqueue(
+            call_sid=call_sid,
+            company_id=company_id,
+            agent_id=master_agent_id,
+            transcript=conversation_transcript,
+            started_at=call_metadata.get('start_time'),
+            from_number=call_metadata.get('from_number'),
+            to_number=call_metadata.get('to_number'),
+            call_type='incoming',
+            provider='twilio',
+            local_recording_path=local_recording_path
+        )
         
-        intent_router_service.clear_call(call_sid)
+        await intent_router_service.clear_call(call_sid)
         
         try:
             await deepgram_service.close_session(session_id)
         except:
             pass
         
-        call_context.pop(call_sid, None)
-        db.close()
+        await call_state_store.clear_call(call_sid)
+        conversation_memory_service.clear_call(call_sid)
 
 
 async def process_and_respond_incoming(
@@ -800,7 +752,6 @@ async def process_and_respond_incoming(
     websocket: WebSocket,
     stream_sid: str,
     stop_audio_flag: dict,
-    db: Session,
     call_sid: str,
     current_agent_context: dict,
     current_agent_id: str,
@@ -822,10 +773,13 @@ async def process_and_respond_incoming(
             logger.info("Skipping response - interrupted")
             return
         
+        # Token-budgeted history (recent turns + rolling summary) shared by router and answer LLM
+        memory = conversation_memory_service.for_transcript(call_sid, conversation_transcript)
+        
         # AI-POWERED DECISION for routing
         routing_decision = await rag_routing_service.should_retrieve_documents(
             user_message=transcript,
-            conversation_history=conversation_transcript,
+            conversation_history=memory.messages(settings.conversation_router_history_tokens),
             call_type="incoming",
             agent_context=current_agent_context
         )
@@ -835,15 +789,10 @@ async def process_and_respond_incoming(
         logger.info(f"🎯 AI Routing: {response_strategy}")
         
         # Build conversation context
-        conversation_messages = []
-        for msg in conversation_transcript[-10:]:
-            if msg['role'] in ['user', 'assistant']:
-                conversation_messages.append({
-                    'role': msg['role'],
-                    'content': msg['content']
-                })
+        conversation_messages = memory.messages()
         
         llm_response = None
+        llm_started = time.perf_counter()
         
         # Strategy 1 - Direct canned response
         if response_strategy == 'direct_canned':
@@ -855,6 +804,7 @@ async def process_and_respond_incoming(
             response_chunks = []
             async for chunk in rag.llm.astream(simple_prompt):
                 if chunk.content:
+                    turn_tracer.mark("llm_first_token")
                     response_chunks.append(chunk.content)
             
             llm_response = "".join(response_chunks)
@@ -879,22 +829,25 @@ You are continuing an active conversation. Use the conversation history to respo
                 'content': support_context
             })
             
-            response = await rag.llm_with_functions.ainvoke(conversation_messages)
+            with turn_tracer.span("llm"):
+                response = await rag.llm_with_functions.ainvoke(conversation_messages)
+            turn_tracer.mark("llm_first_token")
             
             if hasattr(response, 'additional_kwargs') and 'function_call' in response.additional_kwargs:
                 function_call = response.additional_kwargs['function_call']
                 function_name = function_call['name']
                 arguments = json.loads(function_call['arguments'])
                 
-                llm_response = await execute_function(
-                    function_name=function_name,
-                    arguments=arguments,
-                    company_id=company_id,
-                    call_sid=call_sid or "unknown",
-                    campaign_id=None,
-                    user_timezone=call_metadata.get('user_timezone', 'UTC') if call_metadata else 'UTC',
-                    business_hours={'start': '09:00', 'end': '18:00'}
-                )
+                with turn_tracer.span("function_call"):
+                    llm_response = await execute_function(
+                        function_name=function_name,
+                        arguments=arguments,
+                        company_id=company_id,
+                        call_sid=call_sid or "unknown",
+                        campaign_id=None,
+                        user_timezone=call_metadata.get('user_timezone', 'UTC') if call_metadata else 'UTC',
+                        business_hours={'start': '09:00', 'end': '18:00'}
+                    )
             else:
                 llm_response = response.content
         
@@ -927,6 +880,7 @@ You are on a LIVE SUPPORT PHONE CALL. Use the provided documentation to give acc
                 conversation_context=conversation_messages,
                 call_type="incoming"
             ):
+                turn_tracer.mark("llm_first_token")
                 response_chunks.append(chunk)
             
             llm_response = "".join(response_chunks)
@@ -934,6 +888,12 @@ You are on a LIVE SUPPORT PHONE CALL. Use the provided documentation to give acc
         else:
             llm_response = "I'm here to help. Could you tell me more about what you need?"
         
+        if response_strategy in ('direct_canned', 'conversation_context', 'document_retrieval'):
+            # direct_canned is a tiny call; it would drag down the p95 pacing plans around
+            if response_strategy != 'direct_canned':
+                pacing_controller.record_latency("llm", time.perf_counter() - llm_started)
+            turn_tracer.mark("llm_complete")
+        
         # Check for interruption before streaming
         if stop_audio_flag.get('stop', False):
             logger.info("Skipping audio - interrupted")
@@ -995,7 +955,6 @@ async def process_and_respond_outbound(
     websocket: WebSocket,
     stream_sid: str,
     stop_audio_flag: dict,
-    db: Session,
     call_sid: str,
     current_agent_context: dict,
     current_agent_id: str,
@@ -1004,7 +963,8 @@ async def process_and_respond_outbound(
     intent_analysis: dict,
     call_type: str,
     is_agent_speaking_ref: dict,
-    current_audio_task_ref: dict
+    current_audio_task_ref: dict,
+    call_context: dict = None
 ):
     """Outbound call processing with proper state management"""
     
@@ -1017,14 +977,14 @@ async def process_and_respond_outbound(
             return
         
         # Get call metadata
-        call_metadata = call_context.get(call_sid, {})
+        call_metadata = call_context or {}
         campaign_id = call_metadata.get('campaign_id')
         customer_name = call_metadata.get('customer_name', 'Customer')
         customer_phone = call_metadata.get('to_number')
         
         # Check booking session
-        booking_session = booking_orchestrator.get_session(call_sid)
-        is_booking_mode = booking_session and booking_orchestrator.is_booking_active(call_sid)
+        booking_session = await booking_orchestrator.get_session(call_sid)
+        is_booking_mode = booking_session and await booking_orchestrator.is_booking_active(call_sid)
         
         # Intent analysis
         buying_readiness = intent_analysis.get('buying_readiness', 0)
@@ -1038,14 +998,16 @@ async def process_and_respond_outbound(
         
         # Initialize booking
         if should_start_booking and not booking_session:
-            booking_session = booking_orchestrator.initialize_booking(
+            booking_session = await booking_orchestrator.initialize_booking(
                 call_sid=call_sid,
                 customer_name=customer_name,
                 customer_phone=customer_phone,
                 campaign_id=campaign_id
             )
             is_booking_mode = True
-            booking_orchestrator.transition_state(call_sid, BookingState.COLLECTING_DATE, "Customer interested")
+            booking_session = await booking_orchestrator.transition_state(
+                call_sid, BookingState.COLLECTING_DATE, "Customer interested"
+            ) or booking_session
             logger.info(f"🎫 Booking started for {customer_name}")
         
         is_sales_call = is_booking_mode or buying_readiness >= 50
@@ -1066,23 +1028,17 @@ async def process_and_respond_outbound(
             
             async def fetch_slots():
                 try:
-                    slot_manager = SlotManagerService()
-                    slots_data = await slot_manager.get_available_slots(
-                        campaign_id=campaign_id,
-                        start_date=now,
-                        end_date=now + timedelta(days=7),
-                        count=5
-                    )
-                    return slot_manager.format_slots_for_prompt(slots_data)
+                    slots_data = await slot_manager_service.get_upcoming_slots(campaign_id)
+                    return slot_manager_service.format_slots_for_prompt(slots_data)
                 except Exception as e:
                     logger.error(f"Slot fetch error: {e}")
                     tomorrow = now + timedelta(days=1)
                     return f"Suggest: tomorrow ({tomorrow.strftime('%A, %B %d')}) at 10 AM, 2 PM, or 4 PM"
             
-            # Run in parallel
+            # Run in parallel, within the turn budget (the prompt has defaults for both)
             datetime_info, available_slots_text = await asyncio.gather(
-                fetch_datetime_info(),
-                fetch_slots(),
+                turn_deadlines.run("datetime_parse", fetch_datetime_info(), fallback={}),
+                turn_deadlines.run("slot_fetch", fetch_slots(), fallback=""),
                 return_exceptions=True
             )
             
@@ -1101,11 +1057,11 @@ async def process_and_respond_outbound(
             logger.info(f"✓ AI extracted: {datetime_info.get('user_friendly')}")
             
             if datetime_info.get('date'):
-                booking_orchestrator.update_session_data(call_sid, 'date', datetime_info['date'])
+                booking_session = await booking_orchestrator.update_session_data(call_sid, 'date', datetime_info['date']) or booking_session
             if datetime_info.get('time'):
-                booking_orchestrator.update_session_data(call_sid, 'time', datetime_info['time'])
+                booking_session = await booking_orchestrator.update_session_data(call_sid, 'time', datetime_info['time']) or booking_session
             if datetime_info.get('datetime_iso'):
-                booking_orchestrator.update_session_data(call_sid, 'datetime_iso', datetime_info['datetime_iso'])
+                booking_session = await booking_orchestrator.update_session_data(call_sid, 'datetime_iso', datetime_info['datetime_iso']) or booking_session
         
         # Extract email if present
         import re
@@ -1113,24 +1069,18 @@ async def process_and_respond_outbound(
         email_match = re.search(email_pattern, transcript)
         if email_match and booking_session:
             email = email_match.group(0)
-            booking_orchestrator.update_session_data(call_sid, 'email', email)
+            booking_session = await booking_orchestrator.update_session_data(call_sid, 'email', email) or booking_session
             logger.info(f"📧 Extracted email: {email}")
         
         # Build conversation context
-        conversation_messages = []
-        for msg in conversation_transcript[-6:]:
-            if msg['role'] in ['user', 'assistant']:
-                conversation_messages.append({
-                    'role': msg['role'],
-                    'content': msg['content']
-                })
+        conversation_messages = conversation_memory_service.for_transcript(call_sid, conversation_transcript).messages()
         
         # Get context
-        company_name = company_service.get_company_name_by_id(company_id)
+        company_name = await company_service.get_company_name_by_id(company_id)
         
         # Build prompt based on mode
         if is_sales_call:
-            next_action = booking_orchestrator.get_next_action(call_sid) if booking_session else {'prompt_hint': 'Ask for date/time'}
+            next_action = await booking_orchestrator.get_next_action(call_sid) if booking_session else {'prompt_hint': 'Ask for date/time'}
             collected = booking_session['collected_data'] if booking_session else {}
             customer = booking_session['customer_info'] if booking_session else {}
             
@@ -1196,7 +1146,12 @@ Be conversational."""
         # Single LLM call with functions
         logger.info("💬 Calling LLM...")
         
-        response = await rag.llm_with_functions.ainvoke(conversation_messages)
+        llm_started = time.perf_counter()
+        with turn_tracer.span("llm"):
+            response = await rag.llm_with_functions.ainvoke(conversation_messages)
+        pacing_controller.record_latency("llm", time.perf_counter() - llm_started)
+        turn_tracer.mark("llm_first_token")
+        turn_tracer.mark("llm_complete")
         
         # Handle function calls
         if hasattr(response, 'additional_kwargs') and 'function_call' in response.additional_kwargs:
@@ -1213,39 +1168,40 @@ Be conversational."""
             else:
                 # Update state before execution
                 if function_name == 'check_slot_availability' and booking_session:
-                    booking_orchestrator.transition_state(call_sid, BookingState.CHECKING_AVAILABILITY, "Verifying slot")
+                    await booking_orchestrator.transition_state(call_sid, BookingState.CHECKING_AVAILABILITY, "Verifying slot")
                 
-                llm_response = await execute_function(
-                    function_name=function_name,
-                    arguments=arguments,
-                    company_id=company_id,
-                    call_sid=call_sid,
-                    campaign_id=campaign_id,
-                    user_timezone=call_metadata.get('user_timezone', 'UTC'),
-                    business_hours={'start': '09:00', 'end': '18:00'}
-                )
+                with turn_tracer.span("function_call"):
+                    llm_response = await execute_function(
+                        function_name=function_name,
+                        arguments=arguments,
+                        company_id=company_id,
+                        call_sid=call_sid,
+                        campaign_id=campaign_id,
+                        user_timezone=call_metadata.get('user_timezone', 'UTC'),
+                        business_hours={'start': '09:00', 'end': '18:00'}
+                    )
                 
                 logger.info(f"✓ Result: {llm_response[:80]}...")
                 
                 # Update state after execution
                 if function_name == 'check_slot_availability':
                     if 'available' in llm_response.lower() and 'not available' not in llm_response.lower():
-                        booking_orchestrator.update_session_data(call_sid, 'slot_available', True)
-                        booking_orchestrator.transition_state(call_sid, BookingState.COLLECTING_EMAIL, "Slot confirmed")
+                        await booking_orchestrator.update_session_data(call_sid, 'slot_available', True)
+                        await booking_orchestrator.transition_state(call_sid, BookingState.COLLECTING_EMAIL, "Slot confirmed")
                     else:
-                        booking_orchestrator.transition_state(call_sid, BookingState.COLLECTING_DATE, "Slot unavailable")
+                        await booking_orchestrator.transition_state(call_sid, BookingState.COLLECTING_DATE, "Slot unavailable")
                 
                 elif function_name == 'verify_customer_email':
-                    booking_orchestrator.update_session_data(call_sid, 'email_verified', True)
-                    booking_orchestrator.transition_state(call_sid, BookingState.CONFIRMING_BOOKING, "Email verified")
+                    await booking_orchestrator.update_session_data(call_sid, 'email_verified', True)
+                    await booking_orchestrator.transition_state(call_sid, BookingState.CONFIRMING_BOOKING, "Email verified")
                 
                 elif function_name == 'create_booking':
                     if ('booking id' in llm_response.lower() or 'scheduled' in llm_response.lower()) and 'failed' not in llm_response.lower():
-                        booking_orchestrator.transition_state(call_sid, BookingState.COMPLETED, "Booking complete!")
+                        await booking_orchestrator.transition_state(call_sid, BookingState.COMPLETED, "Booking complete!")
                         logger.info(f"✅ BOOKING COMPLETED for {customer_name}")
                     else:
                         logger.error(f"❌ BOOKING FAILED: {llm_response[:100]}")
-                        booking_orchestrator.transition_state(call_sid, BookingState.COLLECTING_DATE, "Booking failed")
+                        await booking_orchestrator.transition_state(call_sid, BookingState.COLLECTING_DATE, "Booking failed")
         else:
             llm_response = response.content
             logger.info(f"💬 Direct response: {llm_response[:80]}...")
@@ -1320,16 +1276,12 @@ Be conversational."""
 @router.post("/outbound-connect")
 async def handle_outbound_connect(request: Request):
     """Outbound call handler"""
-    global from_number_global, to_number_global
-    
     try:
         form_data = await request.form()
         call_sid = form_data.get("CallSid")
         from_number = form_data.get("From")
         to_number = form_data.get("To")
         
-        from_number_global = from_number
-        to_number_global = to_number
         
         # Get parameters
         campaign_id = request.query_params.get("campaign_id")
@@ -1347,8 +1299,9 @@ async def handle_outbound_connect(request: Request):
         connect = Connect()
         ws_domain = settings.base_url.replace('https://', '').replace('http://', '')
         
-        # Store context
-        call_context[call_sid] = {
+        # Signed context travels with the stream; no server-side state
+        context_token = call_context_signer.encode({
+            "call_sid": call_sid,
             "company_id": company_id,
             "agent_id": agent_id,
             "from_number": from_number,
@@ -1356,11 +1309,12 @@ async def handle_outbound_connect(request: Request):
             "customer_name": customer_name,
             "campaign_id": campaign_id,
             "call_type": "outgoing"
-        }
+        })
         
         stream_url = f"wss://{ws_domain}/api/v1/twilio-elevenlabs/outbound-stream?call_sid={call_sid}"
         
-        connect.stream(url=stream_url)
+        stream = connect.stream(url=stream_url)
+        stream.parameter(name=TOKEN_PARAM, value=context_token)
         response.append(connect)
         
         return Response(content=str(response), media_type="application/xml")
@@ -1378,8 +1332,6 @@ async def handle_outbound_connect(request: Request):
 @router.websocket("/outbound-stream")
 async def handle_outbound_stream(websocket: WebSocket):
     """Outbound call streaming with ALL fixes applied"""
-    global from_number_global, to_number_global
-    
     try:
         await websocket.accept()
         logger.info("✅ WebSocket ACCEPTED")
@@ -1422,8 +1374,11 @@ async def handle_outbound_stream(websocket: WebSocket):
         await websocket.close(code=1008)
         return
     
-    # Get context
-    context = call_context.get(call_sid, {})
+    # Verify and decode the signed context from the webhook
+    context = call_context_signer.from_stream(websocket.query_params, first_message_data, call_sid)
+    if context is None:
+        await websocket.close(code=1008, reason="Invalid call context")
+        return
     company_id = context.get("company_id")
     master_agent_id = context.get("agent_id")
     customer_name = context.get("customer_name", "")
@@ -1432,7 +1387,7 @@ async def handle_outbound_stream(websocket: WebSocket):
     
     # CHECK CACHE FIRST (should be pre-warmed)
     cache_key = f"{company_id}_{master_agent_id}"
-    cached = get_cached_agent(cache_key)
+    cached = await get_cached_agent(cache_key)
     
     if cached:
         logger.info(f"⚡ Using CACHED agent data")
@@ -1443,14 +1398,10 @@ async def handle_outbound_stream(websocket: WebSocket):
         start_time = datetime.utcnow()
         
         master_agent = await agent_config_service.get_master_agent(company_id, master_agent_id)
-        company_name = company_service.get_company_name_by_id(company_id)
+        company_name = await company_service.get_company_name_by_id(company_id)
         
         # Cache it
-        agent_cache[cache_key] = {
-            'agent': master_agent,
-            'company_name': company_name,
-            'cached_at': datetime.utcnow()
-        }
+        await cache_agent(cache_key, master_agent, company_name)
         
         init_duration = (datetime.utcnow() - start_time).total_seconds()
         logger.info(f"⚡ Fetched in {init_duration:.2f}s")
@@ -1465,8 +1416,8 @@ async def handle_outbound_stream(websocket: WebSocket):
     
     call_metadata = {
         'start_time': datetime.utcnow(),
-        'from_number': from_number_global,
-        'to_number': to_number_global,
+        'from_number': context.get("from_number"),
+        'to_number': context.get("to_number"),
         'company_id': company_id,
         'campaign_id': campaign_id,
         'call_type': call_type
@@ -1492,7 +1443,6 @@ async def handle_outbound_stream(websocket: WebSocket):
     ]
     
     # Initialize services
-    db = SessionLocal()
     deepgram_service = DeepgramWebSocketService()
     rag = get_rag_service()
     stream_sid = None
@@ -1519,17 +1469,18 @@ async def handle_outbound_stream(websocket: WebSocket):
             # ALWAYS send CLEAR to Twilio
             if stream_sid:
                 try:
+                    call_audio_recording_service.clear(stream_sid)
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
                     logger.info(f"✅ CLEAR sent to Twilio for {stream_sid}")
                 except Exception as e:
                     logger.error(f"Failed to send CLEAR: {e}")
             
             # FIX: ALWAYS save the interrupted text!
-            interrupted_text_storage[call_sid] = {
+            await call_state_store.set(call_sid, "interrupted_text", {
                 'text': transcript,
-                'timestamp': datetime.utcnow(),
+                'timestamp': datetime.utcnow().isoformat(),
                 'confidence': confidence
-            }
+            })
             logger.info(f"💾 Saved interrupted text: '{transcript}'")
             
             if not is_speaking:
@@ -1578,10 +1529,10 @@ async def handle_outbound_stream(websocket: WebSocket):
                     return
             
             # FIX: Check for pending interrupted text and USE it
-            if call_sid in interrupted_text_storage:
-                interrupted = interrupted_text_storage.pop(call_sid)
+            interrupted = await call_state_store.pop(call_sid, "interrupted_text")
+            if interrupted:
                 interrupted_text = interrupted['text']
-                age = (datetime.utcnow() - interrupted['timestamp']).total_seconds()
+                age = (datetime.utcnow() - datetime.fromisoformat(interrupted['timestamp'])).total_seconds()
                 
                 if age < 10.0:
                     if interrupted_text.lower() not in transcript.lower():
@@ -1593,6 +1544,10 @@ async def handle_outbound_stream(websocket: WebSocket):
             
             logger.info(f"👤 CUSTOMER: '{transcript}'")
             
+            turn_tracer.start_turn(call_sid, "twilio", company_id, master_agent_id)
+            
+            turn_deadlines.start()
+            
             # FIX #6: Fast-path for simple responses (skip expensive AI calls)
             simple_words = ['yes', 'no', 'hello', 'hi', 'okay', 'sure', 'yeah', 'nope', 'yep', 'hey']
             is_simple = len(transcript.split()) <= 5 and any(w in transcript.lower() for w in simple_words)
@@ -1615,7 +1570,9 @@ async def handle_outbound_stream(websocket: WebSocket):
             else:
                 intent_analysis = await intent_detection_service.detect_customer_intent(
                     customer_message=transcript,
-                    conversation_history=conversation_transcript,
+                    conversation_history=conversation_memory_service.for_transcript(
+                        call_sid, conversation_transcript
+                    ).messages(settings.conversation_router_history_tokens),
                     call_type=call_type
                 )
             
@@ -1676,16 +1633,22 @@ async def handle_outbound_stream(websocket: WebSocket):
             current_agent_id = master_agent_id
             
             if specialized_agents and not is_simple:
-                detected_agent = await intent_router_service.detect_intent(
-                    transcript,
-                    company_id,
-                    master_agent,
-                    specialized_agents
+                # Out of turn budget: stay with the agent the call is already with
+                detected_agent = await turn_deadlines.run(
+                    "agent_routing",
+                    intent_router_service.detect_intent(
+                        transcript,
+                        company_id,
+                        master_agent,
+                        specialized_agents
+                    ),
+                    fallback=lambda: intent_router_service.get_current_agent(call_sid, None)
                 )
                 
                 if detected_agent:
-                    intent_router_service.set_current_agent(call_sid, detected_agent)
+                    await intent_router_service.set_current_agent(call_sid, detected_agent)
                     current_agent_id = detected_agent
+                    turn_tracer.set_agent(detected_agent)
             elif is_simple:
                 logger.info("⚡ Skipped agent routing (simple response)")
             
@@ -1700,7 +1663,6 @@ async def handle_outbound_stream(websocket: WebSocket):
                     websocket=websocket,
                     stream_sid=stream_sid,
                     stop_audio_flag=stop_audio_flag,
-                    db=db,
                     call_sid=call_sid,
                     current_agent_context=current_agent_context,
                     current_agent_id=current_agent_id,
@@ -1709,7 +1671,8 @@ async def handle_outbound_stream(websocket: WebSocket):
                     intent_analysis=intent_analysis,
                     call_type=call_type,
                     is_agent_speaking_ref=is_agent_speaking_ref,
-                    current_audio_task_ref=current_audio_task_ref
+                    current_audio_task_ref=current_audio_task_ref,
+                    call_context=context
                 )
             except asyncio.CancelledError:
                 logger.info("Response cancelled")
@@ -1723,7 +1686,7 @@ async def handle_outbound_stream(websocket: WebSocket):
         deepgram_init_task = asyncio.create_task(
             deepgram_service.initialize_session(
                 session_id=session_id,
-                callback=on_deepgram_transcript,
+                callback=turn_tracer.scoped(on_deepgram_transcript),
                 interruption_callback=on_interim_transcript
             )
         )
@@ -1731,6 +1694,7 @@ async def handle_outbound_stream(websocket: WebSocket):
         # Send greeting immediately when stream starts
         if first_message_data and first_message_data.get("event") == "start":
             stream_sid = first_message_data.get("streamSid")
+            call_audio_recording_service.start(stream_sid, call_sid, inbound_encoding="mulaw")
             logger.info(f"✅ Stream started: {stream_sid}")
             
             # SEND GREETING IMMEDIATELY
@@ -1778,6 +1742,7 @@ async def handle_outbound_stream(websocket: WebSocket):
                 if event == "start":
                     if not greeting_sent:
                         stream_sid = data.get("streamSid")
+                        call_audio_recording_service.start(stream_sid, call_sid, inbound_encoding="mulaw")
                         
                         is_agent_speaking_ref['speaking'] = True
                         stop_audio_flag['stop'] = False
@@ -1804,6 +1769,7 @@ async def handle_outbound_stream(websocket: WebSocket):
                 elif event == "media":
                     payload = data.get("media", {}).get("payload")
                     if payload:
+                        call_audio_recording_service.inbound(stream_sid, payload)
                         audio = await deepgram_service.convert_twilio_audio(payload, session_id)
                         if audio:
                             await deepgram_service.process_audio_chunk(session_id, audio)
@@ -1827,44 +1793,28 @@ async def handle_outbound_stream(websocket: WebSocket):
     finally:
         logger.info(f"🧹 Cleanup {call_sid}")
         
-        # Clean up interrupted text storage
-        interrupted_text_storage.pop(call_sid, None)
-        
-        try:
-            call_duration = int((datetime.utcnow() - call_metadata['start_time']).total_seconds())
-            
-            s3_urls = await call_recording_service.save_call_data(
-                call_sid=call_sid,
-                company_id=company_id,
-                agent_id=master_agent_id,
-                transcript=conversation_transcript,
-                recording_url=None,
-                duration=call_duration,
-                from_number=call_metadata.get('from_number'),
-                to_number=call_metadata.get('to_number')
-            )
-            
-            try:
-                call_record = db.query(Call).filter_by(call_sid=call_sid).first()
-                
-                if call_record:
-                    call_record.transcription = s3_urls.get('transcript_url')
-                    call_record.duration = call_duration
-                    call_record.status = 'completed'
-                    call_record.ended_at = datetime.utcnow()
-                    db.commit()
-            except:
-                db.rollback()
-        except:
-            pass
+        local_recording_path = call_audio_recording_service.finish(stream_sid)
+        # Hand off S3 upload and DB upsert; the socket is released immediately
+        await call_finalization_service.enqueue(
+            call_sid=call_sid,
+            company_id=company_id,
+            agent_id=master_agent_id,
+            transcript=conversation_transcript,
+            started_at=call_metadata.get('start_time'),
+            from_number=call_metadata.get('from_number'),
+            to_number=call_metadata.get('to_number'),
+            call_type='outgoing',
+            provider='twilio',
+            local_recording_path=local_recording_path
+        )
         
         try:
             await deepgram_service.close_session(session_id)
         except:
             pass
         
-        call_context.pop(call_sid, None)
-        db.close()
+        await call_state_store.clear_call(call_sid)
+        conversation_memory_service.clear_call(call_sid)
 
 
 @router.post("/initiate-outbound-call")
@@ -1890,16 +1840,12 @@ async def initiate_outbound_call(request: Request):
         
         # PRE-WARM: Fetch and cache agent data BEFORE call connects
         cache_key = f"{company_id}_{agent_id}"
-        if not get_cached_agent(cache_key):
+        if not await get_cached_agent(cache_key):
             logger.info(f"⚡ PRE-WARMING agent cache for {cache_key}...")
             try:
                 master_agent = await agent_config_service.get_master_agent(company_id, agent_id)
-                company_name = company_service.get_company_name_by_id(company_id)
-                agent_cache[cache_key] = {
-                    'agent': master_agent,
-                    'company_name': company_name,
-                    'cached_at': datetime.utcnow()
-                }
+                company_name = await company_service.get_company_name_by_id(company_id)
+                await cache_agent(cache_key, master_agent, company_name)
                 logger.info(f"✅ Agent data cached - greeting will be instant!")
             except Exception as e:
                 logger.error(f"Pre-warm failed: {e}")
@@ -1933,26 +1879,19 @@ async def initiate_outbound_call(request: Request):
         
         # Background DB save
         async def _save():
-            db = None
             try:
-                db = SessionLocal()
-                new_call = Call(
-                    call_sid=call.sid,
-                    company_id=company_id,
-                    from_number=from_number,
-                    to_number=to_number,
-                    call_type=CallType.outgoing,
-                    status='initiated',
-                    created_at=datetime.utcnow()
-                )
-                db.add(new_call)
-                db.commit()
-            except:
-                if db:
-                    db.rollback()
-            finally:
-                if db:
-                    db.close()
+                async with get_async_session() as db:
+                    db.add(Call(
+                        call_sid=call.sid,
+                        company_id=company_id,
+                        from_number=from_number,
+                        to_number=to_number,
+                        call_type=CallType.outgoing,
+                        status='initiated',
+                        created_at=datetime.utcnow()
+                    ))
+            except Exception as e:
+                logger.error(f"Background DB error: {e}")
         
         asyncio.create_task(_save())
         
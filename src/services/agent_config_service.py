@@ -7,7 +7,7 @@ logger = logging.getLogger(__name__)
 
 class AgentConfigService:
     def __init__(self):
-        self.api_base = "https://beta.callsure.ai"
+        self.api_base = settings.callsure_api_base_url
         self.auth_token = settings.callsure_api_token
         self.user_id = None
         
@@ -3,7 +3,7 @@ from typing import Dict, Any, List
 from services.ticket_service import ticket_service
 from services.booking_service import booking_service
 from services.datetime_parser_service import datetime_parser_service
-from services.slot_manager_service import SlotManagerService  # NEW IMPORT
+from services.slot_manager_service import slot_manager_service
 from datetime import datetime, timedelta
 import logging
 
@@ -185,8 +185,7 @@ async def execute_function(
             logger.info(f"  AI reasoning: {parsed.get('ai_reasoning', 'N/A')}")
             
             # NEW: Check capacity from backend using SlotManagerService
-            slot_manager = SlotManagerService()
-            capacity_info = await slot_manager.check_slot_capacity(
+            capacity_info = await slot_manager_service.check_slot_capacity(
                 campaign_id=campaign_id,
                 slot_start=datetime.fromisoformat(slot_start.replace('Z', '+00:00')),
                 slot_end=slot_end_dt
@@ -294,6 +293,8 @@ async def execute_function(
             if result.get("success"):
                 booking_id = result.get("booking_id")
                 logger.info(f"✅ Booking created: {booking_id}")
+                # The booked slot's capacity changed; next offer refetches
+                slot_manager_service.invalidate(campaign_id)
                 return (
                     f"Excellent! I've scheduled your appointment for {parsed.get('user_friendly')}. "
                     f"Your booking ID is {booking_id}. "
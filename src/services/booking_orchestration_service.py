@@ -4,6 +4,9 @@ from enum import Enum
 from typing import Dict, Optional
 import logging
 
+from services.call_state_store import call_state_store
+from services.slot_manager_service import slot_manager_service
+
 logger = logging.getLogger(__name__)
 
 class BookingState(Enum):
@@ -18,12 +21,28 @@ class BookingState(Enum):
     COMPLETED = "completed"
 
 class BookingOrchestrationService:
-    """Manages booking flow - asks for email (we have name+phone already)"""
+    """
+    Manages booking flow - asks for email (we have name+phone already)
+    
+    Sessions live in the call state store (namespace "booking") so any worker
+    handling the call sees the same booking.
+    """
+    
+    NAMESPACE = "booking"
     
     def __init__(self):
-        self.sessions: Dict[str, Dict] = {}
+        self.store = call_state_store
+    
+    async def _load(self, call_sid: str) -> Optional[Dict]:
+        session = await self.store.get(call_sid, self.NAMESPACE)
+        if session:
+            session['state'] = BookingState(session['state'])
+        return session
+    
+    async def _save(self, call_sid: str, session: Dict):
+        await self.store.set(call_sid, self.NAMESPACE, {**session, 'state': session['state'].value})
     
-    def initialize_booking(
+    async def initialize_booking(
         self,
         call_sid: str,
         customer_name: str,
@@ -51,47 +70,55 @@ class BookingOrchestrationService:
             'history': []
         }
         
-        self.sessions[call_sid] = session
+        await self._save(call_sid, session)
+        # Warm the slot cache so the first booking turn doesn't wait on the backend
+        slot_manager_service.prefetch(campaign_id)
         logger.info(f"🎫 Booking initialized for {customer_name} ({customer_phone})")
         logger.info(f"   Need to collect: date, time, email")
         
         return session
     
-    def get_session(self, call_sid: str) -> Optional[Dict]:
+    async def get_session(self, call_sid: str) -> Optional[Dict]:
         """Get existing booking session"""
-        return self.sessions.get(call_sid)
+        return await self._load(call_sid)
     
-    def update_session_data(self, call_sid: str, key: str, value: any):
-        """Update collected data"""
-        if call_sid in self.sessions:
+    async def update_session_data(self, call_sid: str, key: str, value: any) -> Optional[Dict]:
+        """Update collected data; returns the updated session"""
+        session = await self._load(call_sid)
+        if session:
             if key == 'email':
                 # Store email in customer_info, not collected_data
-                self.sessions[call_sid]['customer_info']['email'] = value
+                session['customer_info']['email'] = value
                 logger.info(f"📧 Email: {value}")
             else:
-                self.sessions[call_sid]['collected_data'][key] = value
+                session['collected_data'][key] = value
                 logger.info(f"📝 {key} = {value}")
+            await self._save(call_sid, session)
+        return session
     
-    def transition_state(self, call_sid: str, new_state: BookingState, reason: str = ""):
-        """Move to next state"""
-        if call_sid in self.sessions:
-            old_state = self.sessions[call_sid]['state']
-            self.sessions[call_sid]['state'] = new_state
+    async def transition_state(self, call_sid: str, new_state: BookingState, reason: str = "") -> Optional[Dict]:
+        """Move to next state; returns the updated session"""
+        session = await self._load(call_sid)
+        if session:
+            old_state = session['state']
+            session['state'] = new_state
             
-            self.sessions[call_sid]['history'].append({
+            session['history'].append({
                 'from': old_state.value,
                 'to': new_state.value,
                 'reason': reason
             })
+            await self._save(call_sid, session)
             
             logger.info(f"🔄 {old_state.value} → {new_state.value} ({reason})")
+        return session
     
-    def get_next_action(self, call_sid: str) -> Dict:
+    async def get_next_action(self, call_sid: str) -> Dict:
         """Determine what to ask for next"""
-        if call_sid not in self.sessions:
+        session = await self._load(call_sid)
+        if not session:
             return {'action': 'initialize', 'prompt_hint': 'Start booking'}
         
-        session = self.sessions[call_sid]
         state = session['state']
         collected = session['collected_data']
         customer = session['customer_info']
@@ -148,18 +175,19 @@ class BookingOrchestrationService:
         
         return {'action': 'continue', 'prompt_hint': 'Keep conversation going'}
     
-    def is_booking_active(self, call_sid: str) -> bool:
+    async def is_booking_active(self, call_sid: str) -> bool:
         """Check if booking in progress"""
-        if call_sid not in self.sessions:
+        session = await self._load(call_sid)
+        if not session:
             return False
-        return self.sessions[call_sid]['state'] != BookingState.COMPLETED
+        return session['state'] != BookingState.COMPLETED
     
-    def can_create_booking(self, call_sid: str) -> bool:
+    async def can_create_booking(self, call_sid: str) -> bool:
         """Check if we have everything needed to create booking"""
-        if call_sid not in self.sessions:
+        session = await self._load(call_sid)
+        if not session:
             return False
         
-        session = self.sessions[call_sid]
         collected = session['collected_data']
         customer = session['customer_info']
         
@@ -173,10 +201,9 @@ class BookingOrchestrationService:
             collected['slot_available'] # ✅ System checks
         ])
     
-    def clear_session(self, call_sid: str):
+    async def clear_session(self, call_sid: str):
         """Remove booking session"""
-        if call_sid in self.sessions:
-            del self.sessions[call_sid]
+        if await self.store.pop(call_sid, self.NAMESPACE):
             logger.info(f"🗑️ Cleared: {call_sid}")
 
 # Global instance
@@ -0,0 +1,100 @@
+from typing import Dict, Optional
+import logging
+import os
+
+from config.settings import settings
+from services.resource_registry import resource_registry
+from services.speech.call_audio_recorder import CallAudioRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class CallAudioRecordingService:
+    """
+    Registry of per-call audio recorders, keyed by stream_sid.
+
+    Keyed by stream_sid (not call_sid) so the TTS streaming helpers, which
+    only know the stream, can tap outbound audio without extra plumbing.
+    All methods are no-ops for streams without a recorder, so call sites
+    don't need to check whether recording is enabled. Recorders whose stream
+    stops sending audio without a finish() are closed by the resource reaper
+    and their WAV deleted.
+    """
+
+    def __init__(self, enabled: bool, directory: str):
+        self.enabled = enabled
+        self.directory = directory
+        self._recorders: Dict[str, CallAudioRecorder] = {}
+        self._resource = resource_registry.register(
+            "audio_recorders",
+            self._recorders,
+            ttl=settings.call_resource_idle_seconds,
+            max_entries=settings.call_resource_max_entries,
+            on_evict=self._close_orphaned
+        )
+
+    @staticmethod
+    def _close_orphaned(stream_sid: str, recorder: CallAudioRecorder):
+        # No teardown means no finalization job will ever upload the WAV; delete it
+        logger.warning(f"Closing orphaned recorder for stream {stream_sid}, discarding {recorder.path}")
+        recorder.close()
+        try:
+            os.remove(recorder.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Could not delete orphaned recording {recorder.path}: {e}")
+
+    def start(self, stream_sid: str, call_sid: str, inbound_encoding: str = "mulaw") -> Optional[CallAudioRecorder]:
+        if not self.enabled or not stream_sid:
+            return None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            recorder = CallAudioRecorder(
+                path=os.path.join(self.directory, f"{call_sid or stream_sid}.wav"),
+                inbound_encoding=inbound_encoding
+            )
+        except Exception as e:
+            logger.error(f"Could not start recorder for {call_sid}: {e}")
+            return None
+
+        self._recorders[stream_sid] = recorder
+        self._resource.touch(stream_sid)
+        logger.info(f"🎙️ Recording {call_sid} to {recorder.path}")
+        return recorder
+
+    def inbound(self, stream_sid: str, payload: str):
+        recorder = self._recorders.get(stream_sid)
+        if recorder:
+            recorder.write_inbound(payload)
+            self._resource.touch(stream_sid)
+
+    def outbound(self, stream_sid: str, payload: str):
+        recorder = self._recorders.get(stream_sid)
+        if recorder:
+            recorder.write_outbound(payload)
+
+    def clear(self, stream_sid: str):
+        recorder = self._recorders.get(stream_sid)
+        if recorder:
+            recorder.clear_outbound()
+
+    def finish(self, stream_sid: Optional[str]) -> Optional[str]:
+        """Close the recorder and return the finished WAV path (None if not recording)"""
+        recorder = self._recorders.pop(stream_sid, None) if stream_sid else None
+        if not recorder:
+            return None
+        path = recorder.close()
+        if path:
+            logger.info(f"🎙️ Recording finished: {path} ({recorder.duration_seconds:.1f}s)")
+        return path
+
+    def active_count(self) -> int:
+        return len(self._recorders)
+
+
+# Global instance
+call_audio_recording_service = CallAudioRecordingService(
+    enabled=settings.local_recording_enabled,
+    directory=settings.local_recording_dir
+)
@@ -0,0 +1,136 @@
+from typing import Any, Dict, Mapping, Optional
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Query / custom parameter name the token travels under
+TOKEN_PARAM = "ctx"
+
+# Short wire names keep the token small enough for a stream URL
+_FIELDS = {
+    "call_sid": "s",
+    "company_id": "c",
+    "agent_id": "a",
+    "from_number": "f",
+    "to_number": "t",
+    "customer_name": "n",
+    "campaign_id": "m",
+    "call_type": "k",
+}
+_FIELDS_REVERSE = {short: name for name, short in _FIELDS.items()}
+
+_SIGNATURE_BYTES = 16
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class CallContextSigner:
+    """
+    Stateless call context for media streams.
+
+    The voice webhook signs the call's context (company, agent, numbers, ...)
+    into a compact `payload.signature` token and hands it to the provider with
+    the stream URL. The WebSocket handler verifies and decodes it, so any
+    worker can accept any stream without a shared lookup and nothing is left
+    behind when a stream never connects.
+
+    Tokens are HMAC-SHA256 signed, expire after `ttl` seconds and are bound to
+    the call_sid, so one cannot be replayed for another call.
+    """
+
+    def __init__(self, secret: str, ttl: int):
+        self._key = secret.encode("utf-8")
+        self.ttl = ttl
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self._key, payload.encode("ascii"), hashlib.sha256).digest()
+        return _b64encode(digest[:_SIGNATURE_BYTES])
+
+    def encode(self, context: Dict[str, Any]) -> str:
+        """Sign a call context; None / empty values are dropped"""
+        body = {_FIELDS[k]: v for k, v in context.items() if k in _FIELDS and v not in (None, "")}
+        body["x"] = int(time.time()) + self.ttl
+        payload = _b64encode(json.dumps(body, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def decode(self, token: str, call_sid: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Verified context, or None if the token is malformed, forged, expired or for another call"""
+        try:
+            payload, signature = token.split(".", 1)
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                logger.warning("Call context token signature mismatch")
+                return None
+            body = json.loads(_b64decode(payload))
+        except Exception as e:
+            logger.warning(f"Malformed call context token: {e}")
+            return None
+
+        if body.pop("x", 0) < time.time():
+            logger.warning("Call context token expired")
+            return None
+
+        context = {_FIELDS_REVERSE[k]: v for k, v in body.items() if k in _FIELDS_REVERSE}
+        if call_sid and context.get("call_sid") and context["call_sid"] != call_sid:
+            logger.warning(f"Call context token issued for {context['call_sid']}, not {call_sid}")
+            return None
+        return context
+
+    def from_stream(
+        self,
+        query_params: Mapping[str, str],
+        start_message: Optional[Dict[str, Any]],
+        call_sid: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find and decode the token for a media stream.
+
+        Exotel keeps it in the stream URL query; Twilio drops query strings
+        from stream URLs, so there it arrives as a <Parameter> in the start
+        event's customParameters.
+        """
+        token = query_params.get(TOKEN_PARAM)
+        if not token and start_message:
+            start = start_message.get("start", {})
+            parameters = start.get("customParameters") or start.get("custom_parameters") or {}
+            token = parameters.get(TOKEN_PARAM)
+        if not token:
+            logger.warning(f"No call context token on stream for {call_sid}")
+            return None
+        return self.decode(token, call_sid)
+
+
+def _signing_secret() -> str:
+    """
+    CALL_CONTEXT_TOKEN_SECRET, else a non-default SECRET_KEY. The default
+    secret_key is public, so signing with it would let anyone forge a
+    context for any company / agent; refuse to start instead.
+    """
+    if settings.call_context_token_secret:
+        return settings.call_context_token_secret
+    default_secret_key = type(settings).model_fields["secret_key"].default
+    if settings.secret_key and settings.secret_key != default_secret_key:
+        return settings.secret_key
+    raise RuntimeError(
+        "Call context tokens need a secret: set CALL_CONTEXT_TOKEN_SECRET or SECRET_KEY "
+        "(the default SECRET_KEY is public)"
+    )
+
+
+# Global instance
+call_context_signer = CallContextSigner(
+    secret=_signing_secret(),
+    ttl=settings.call_context_token_ttl_seconds
+)
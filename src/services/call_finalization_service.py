@@ -0,0 +1,447 @@
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config.settings import settings
+from database.config import get_async_session
+from database.models import Call, CallEvent, CallType
+from services.call_recording_service import call_recording_service
+
+logger = logging.getLogger(__name__)
+
+
+class CallFinalizationService:
+    """
+    Durable post-call pipeline.
+
+    Media-stream teardown enqueues one call-summary record and returns. The
+    record is spooled to disk as <call_sid>.json before it is queued, so work
+    still pending when the process dies is picked up again on the next start.
+    Workers run each step (S3 upload, Call upsert, analytics event) and persist
+    the completed steps back into the spool file after each one; a retry skips
+    steps already done. call_sid is the idempotency key throughout: S3 keys are
+    derived from it and the Call write is an upsert on the unique call_sid column.
+
+    Every uvicorn worker shares the spool directory, so a process holds an
+    flock on <call_sid>.lock for each job it owns. The lock dies with the
+    process, which lets the next start pick up a dead worker's jobs but never
+    a live one's.
+    """
+
+    STEPS = ("upload", "db_upsert", "analytics")
+
+    def __init__(
+        self,
+        spool_dir: str,
+        workers: int = 4,
+        max_attempts: int = 8,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0
+    ):
+        self.spool_dir = spool_dir
+        self.failed_dir = os.path.join(spool_dir, "failed")
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queued: set = set()
+        self._tasks: List[asyncio.Task] = []
+        self._locks: Dict[str, int] = {}
+        self._running = False
+
+        self.stats = {
+            "enqueued": 0,
+            "completed": 0,
+            "retries": 0,
+            "failed": 0,
+            "recovered": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Spool I/O (blocking, run on the default executor)
+    # ------------------------------------------------------------------
+
+    def _path(self, call_sid: str, directory: Optional[str] = None) -> str:
+        safe_sid = "".join(c for c in call_sid if c.isalnum() or c in "-_")
+        return os.path.join(directory or self.spool_dir, f"{safe_sid}.json")
+
+    def _write_record(self, record: Dict[str, Any]):
+        path = self._path(record["call_sid"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_record(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(call_sid), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _remove_record(self, call_sid: str):
+        try:
+            os.remove(self._path(call_sid))
+        except FileNotFoundError:
+            pass
+
+    def _remove_file(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _move_to_failed(self, call_sid: str):
+        os.makedirs(self.failed_dir, exist_ok=True)
+        os.replace(self._path(call_sid), self._path(call_sid, self.failed_dir))
+
+    def _lock(self, call_sid: str) -> bool:
+        """Take ownership of a spooled job; False if another process holds it"""
+        if call_sid in self._locks:
+            return True
+        fd = os.open(self._path(call_sid)[:-len(".json")] + ".lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._locks[call_sid] = fd
+        return True
+
+    def _unlock(self, call_sid: str):
+        fd = self._locks.pop(call_sid, None)
+        if fd is None:
+            return
+        self._remove_file(self._path(call_sid)[:-len(".json")] + ".lock")
+        os.close(fd)
+
+    def _list_spooled(self) -> List[str]:
+        return [
+            name[:-len(".json")]
+            for name in os.listdir(self.spool_dir)
+            if name.endswith(".json")
+        ]
+
+    async def _io(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+
+    # ------------------------------------------------------------------
+    # Producer
+    # ------------------------------------------------------------------
+
+    async def enqueue(
+        self,
+        call_sid: str,
+        company_id: Optional[str],
+        agent_id: Optional[str],
+        transcript: List[Dict],
+        started_at: Optional[datetime],
+        from_number: Optional[str] = None,
+        to_number: Optional[str] = None,
+        call_type: str = "incoming",
+        provider: str = "twilio",
+        recording_url: Optional[str] = None,
+        campaign_id: Optional[str] = None,
+        local_recording_path: Optional[str] = None
+    ) -> bool:
+        """Persist a call summary and hand it to the workers"""
+        if not call_sid:
+            return False
+
+        ended_at = datetime.utcnow()
+        record = {
+            "call_sid": call_sid,
+            "company_id": company_id,
+            "agent_id": agent_id,
+            "campaign_id": campaign_id,
+            "provider": provider,
+            "call_type": call_type,
+            "from_number": from_number,
+            "to_number": to_number,
+            "recording_url": recording_url,
+            "local_recording_path": local_recording_path,
+            "started_at": started_at.isoformat() if started_at else None,
+            "ended_at": ended_at.isoformat(),
+            "duration": int((ended_at - started_at).total_seconds()) if started_at else 0,
+            "transcript": transcript,
+            "transcript_url": None,
+            "recording_s3_url": None,
+            "completed_steps": [],
+            "attempts": 0,
+            "last_error": None
+        }
+
+        try:
+            if not await self._io(self._lock, call_sid):
+                logger.warning(f"Finalization for {call_sid} is already owned by another process")
+                return False
+            await self._io(self._write_record, record)
+        except Exception as e:
+            logger.error(f"Could not spool finalization for {call_sid}: {e}")
+            return False
+
+        self.stats["enqueued"] += 1
+        self._submit(call_sid)
+        logger.info(f"Queued finalization for {call_sid} ({len(transcript)} turns)")
+        return True
+
+    def _submit(self, call_sid: str, delay: float = 0):
+        if call_sid in self._queued:
+            return
+        self._queued.add(call_sid)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, call_sid)
+        else:
+            self._queue.put_nowait(call_sid)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Create the spool, requeue anything left from a previous run, start workers"""
+        if self._running:
+            return
+
+        await self._io(lambda: os.makedirs(self.spool_dir, exist_ok=True))
+        # Jobs locked by another live worker process are left to it
+        pending = [
+            call_sid for call_sid in await self._io(self._list_spooled)
+            if await self._io(self._lock, call_sid)
+        ]
+        for call_sid in pending:
+            self._submit(call_sid)
+        self.stats["recovered"] += len(pending)
+
+        self._running = True
+        self._tasks = [
+            asyncio.create_task(self._worker(i))
+            for i in range(self.workers)
+        ]
+        logger.info(
+            f"Call finalization started: {self.workers} workers, {len(pending)} recovered from {self.spool_dir}"
+        )
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Give in-flight jobs a moment to finish, then stop workers.
+
+        Anything unfinished stays in the spool and is resumed on next start.
+        """
+        self._running = False
+        if not self._tasks:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Finalization stop timed out; {self._queue.qsize()} jobs left in spool")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "workers": len(self._tasks),
+            "queue_depth": self._queue.qsize(),
+            "pending": len(self._queued),
+            **self.stats
+        }
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    async def _worker(self, worker_id: int):
+        while True:
+            call_sid = await self._queue.get()
+            try:
+                await self._process(call_sid)
+            except Exception as e:
+                logger.error(f"Finalization worker {worker_id} error for {call_sid}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, call_sid: str):
+        self._queued.discard(call_sid)
+
+        record = await self._io(self._read_record, call_sid)
+        if record is None:
+            await self._io(self._unlock, call_sid)
+            return
+
+        start = time.perf_counter()
+        record["attempts"] += 1
+        try:
+            for step in self.STEPS:
+                if step in record["completed_steps"]:
+                    continue
+                await getattr(self, f"_step_{step}")(record)
+                record["completed_steps"].append(step)
+                if step != self.STEPS[-1]:
+                    # A crash from here on resumes after this step
+                    await self._io(self._write_record, record)
+
+        except Exception as e:
+            record["last_error"] = str(e)
+            await self._handle_failure(record)
+            return
+
+        await self._io(self._remove_record, call_sid)
+        await self._io(self._unlock, call_sid)
+        if record.get("local_recording_path"):
+            await self._io(self._remove_file, record["local_recording_path"])
+        self.stats["completed"] += 1
+        logger.info(
+            f"Finalized {call_sid} in {(time.perf_counter() - start) * 1000:.0f}ms "
+            f"(attempt {record['attempts']})"
+        )
+
+    async def _handle_failure(self, record: Dict[str, Any]):
+        call_sid = record["call_sid"]
+
+        if record["attempts"] >= self.max_attempts:
+            await self._io(self._write_record, record)
+            await self._io(self._move_to_failed, call_sid)
+            await self._io(self._unlock, call_sid)
+            self.stats["failed"] += 1
+            logger.error(
+                f"Finalization for {call_sid} failed after {record['attempts']} attempts: {record['last_error']}"
+            )
+            return
+
+        await self._io(self._write_record, record)
+        delay = min(self.base_backoff * (2 ** (record["attempts"] - 1)), self.max_backoff)
+        self.stats["retries"] += 1
+        logger.warning(
+            f"Finalization for {call_sid} failed ({record['last_error']}); retry {record['attempts']} in {delay:.0f}s"
+        )
+        if self._running:
+            self._submit(call_sid, delay=delay)
+
+    # ------------------------------------------------------------------
+    # Steps
+    # ------------------------------------------------------------------
+
+    async def _step_upload(self, record: Dict[str, Any]):
+        if not call_recording_service.s3_enabled:
+            return
+
+        if record.get("local_recording_path"):
+            recording_s3_url = await call_recording_service.upload_local_recording(
+                call_sid=record["call_sid"],
+                company_id=record["company_id"],
+                path=record["local_recording_path"],
+                ended_at=datetime.fromisoformat(record["ended_at"])
+            )
+            if not recording_s3_url:
+                raise Exception("Local recording upload failed")
+            record["recording_s3_url"] = recording_s3_url
+
+        if not record["transcript"] and not record["recording_url"]:
+            return
+
+        s3_urls = await call_recording_service.save_call_data(
+            call_sid=record["call_sid"],
+            company_id=record["company_id"],
+            agent_id=record["agent_id"],
+            transcript=record["transcript"],
+            recording_url=record["recording_url"],
+            duration=record["duration"],
+            from_number=record["from_number"],
+            to_number=record["to_number"],
+            campaign_id=record["campaign_id"],
+            ended_at=datetime.fromisoformat(record["ended_at"])
+        )
+
+        if record["transcript"] and not s3_urls.get("transcript_url"):
+            raise Exception("Transcript upload failed")
+        if record["recording_url"] and not s3_urls.get("recording_url"):
+            raise Exception("Recording upload failed")
+
+        record["transcript_url"] = s3_urls.get("transcript_url")
+        record["recording_s3_url"] = s3_urls.get("recording_url") or record["recording_s3_url"]
+
+    async def _step_db_upsert(self, record: Dict[str, Any]):
+        ended_at = datetime.fromisoformat(record["ended_at"])
+        started_at = datetime.fromisoformat(record["started_at"]) if record["started_at"] else ended_at
+        table = Call.__table__
+
+        statement = pg_insert(table).values(
+            call_sid=record["call_sid"],
+            company_id=record["company_id"],
+            from_number=record["from_number"],
+            to_number=record["to_number"],
+            call_type=CallType.outgoing if record["call_type"] == "outgoing" else CallType.incoming,
+            status="completed",
+            duration=record["duration"],
+            transcription=record["transcript_url"],
+            recording_url=record["recording_s3_url"],
+            created_at=started_at,
+            ended_at=ended_at
+        )
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.call_sid],
+            set_={
+                "company_id": func.coalesce(table.c.company_id, excluded.company_id),
+                "from_number": func.coalesce(table.c.from_number, excluded.from_number),
+                "to_number": func.coalesce(table.c.to_number, excluded.to_number),
+                "status": excluded.status,
+                "duration": excluded.duration,
+                "transcription": func.coalesce(excluded.transcription, table.c.transcription),
+                "recording_url": func.coalesce(excluded.recording_url, table.c.recording_url),
+                "ended_at": excluded.ended_at,
+                "updated_at": datetime.utcnow()
+            }
+        )
+
+        async with get_async_session() as db:
+            await db.execute(statement)
+
+    async def _step_analytics(self, record: Dict[str, Any]):
+        # Written directly, not through db_write_buffer: the spool record is
+        # removed right after this step, so the event must already be stored
+        statement = insert(CallEvent.__table__).values(
+            call_sid=record["call_sid"],
+            event="call.finalized",
+            payload={
+                "provider": record["provider"],
+                "call_type": record["call_type"],
+                "company_id": record["company_id"],
+                "agent_id": record["agent_id"],
+                "campaign_id": record["campaign_id"],
+                "duration": record["duration"],
+                "turns": len(record["transcript"]),
+                "user_turns": sum(1 for t in record["transcript"] if t.get("role") == "user"),
+                "attempts": record["attempts"]
+            },
+            occurred_at=datetime.utcnow()
+        )
+
+        async with get_async_session() as db:
+            await db.execute(statement)
+
+
+# Global instance
+call_finalization_service = CallFinalizationService(
+    spool_dir=settings.finalization_spool_dir,
+    workers=settings.finalization_workers,
+    max_attempts=settings.finalization_max_attempts
+)
@@ -1,25 +1,49 @@
-from typing import Optional, Dict, List, Set
+from typing import Optional, Dict, Set, Any
 from datetime import datetime
 from asyncio import Event, Lock, sleep, create_task
 import asyncio
+import itertools
 import logging
+import os
+import socket
+import uuid
 from twilio.rest import Client
 
 from config.settings import settings
 from services.campaign_service import CampaignService, CampaignCall
+from services.dialer_backend import DialerBackend, create_dialer_backend
+from services.pacing_controller import PacingController, pacing_controller
+from services.resource_registry import resource_registry
 
 logger = logging.getLogger(__name__)
 
+# Rows leased by other workers skipped per dispatch before backing off
+MAX_CLAIM_ATTEMPTS = 5
+LOST_CLAIM_BACKOFF_SECONDS = 1.0
+
 
 class CallQueueConfig:
     """Configuration for call queue"""
     def __init__(
         self,
-        max_concurrent_calls: int = 5,
-        delay_between_calls: int = 1  # seconds
+        max_concurrent_calls: int = 5,  # across all workers sharing the dialer backend
+        delay_between_calls: float = 1,  # seconds; sets the default per-caller-ID rate
+        caller_id_calls_per_second: Optional[float] = None,
+        caller_id_burst: int = 1,
+        provider_calls_per_second: float = 5.0,
+        provider_burst: int = 5,
+        max_call_seconds: int = 3600
     ):
         self.max_concurrent_calls = max_concurrent_calls
         self.delay_between_calls = delay_between_calls
+        self.caller_id_calls_per_second = caller_id_calls_per_second or (
+            1.0 / delay_between_calls if delay_between_calls > 0 else provider_calls_per_second
+        )
+        self.caller_id_burst = caller_id_burst
+        self.provider_calls_per_second = provider_calls_per_second
+        self.provider_burst = provider_burst
+        # Calls older than this are assumed to have lost their status callback
+        self.max_call_seconds = max_call_seconds
 
 
 class QueuedCampaign:
@@ -28,15 +52,39 @@ class QueuedCampaign:
         self,
         campaign_id: str,
         agent_id: Optional[str] = None,
-        service: str = 'elevenlabs'
+        service: str = 'elevenlabs',
+        priority: int = 0
     ):
         self.campaign_id = campaign_id
         self.agent_id = agent_id
         self.service = service
+        self.priority = priority
         self.status = 'pending'
+        self.calls_made = 0
         self.start_time: Optional[datetime] = None
         self.end_time: Optional[datetime] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Shared registry record (per-worker counters are not shared)"""
+        return {
+            'campaign_id': self.campaign_id,
+            'agent_id': self.agent_id,
+            'service': self.service,
+            'priority': self.priority,
+            'status': self.status
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QueuedCampaign':
+        campaign = cls(
+            campaign_id=data['campaign_id'],
+            agent_id=data.get('agent_id'),
+            service=data.get('service', 'elevenlabs'),
+            priority=data.get('priority', 0)
+        )
+        campaign.status = data.get('status', 'pending')
+        return campaign
+
 
 class ActiveCall:
     """Active call tracking"""
@@ -46,18 +94,27 @@ class ActiveCall:
         campaign_id: str,
         campaign_call_id: str,
         phone_number: str,
-        start_time: datetime
+        start_time: datetime,
+        slot_id: Optional[str] = None
     ):
         self.call_sid = call_sid
         self.campaign_id = campaign_id
         self.campaign_call_id = campaign_call_id
         self.phone_number = phone_number
         self.start_time = start_time
+        self.slot_id = slot_id
 
 
 class CallQueueService:
-    """Service for managing call queue and campaign execution"""
-    
+    """
+    Service for managing call queue and campaign execution.
+
+    Each worker runs its own dispatcher, coordinated through a DialerBackend:
+    campaigns are registered in the backend so every worker dials them, a
+    CampaignCall is only dialed by the worker holding its lease, and
+    concurrency and rate limits are global counters in the backend.
+    """
+
     _instance: Optional['CallQueueService'] = None
     _lock = Lock()
     
@@ -66,16 +123,33 @@ class CallQueueService:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
+    def __init__(
+        self,
+        backend: Optional[DialerBackend] = None,
+        pacing: Optional[PacingController] = None
+    ):
         if not hasattr(self, '_initialized'):
             self.config = CallQueueConfig(
-                max_concurrent_calls=5,
+                max_concurrent_calls=settings.dialer_max_concurrent_calls,
                 delay_between_calls=1
             )
+            self.backend = backend or create_dialer_backend()
+            self.pacing = pacing or pacing_controller
+            self.node_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            # Calls dialed by this worker (slots it must heartbeat)
             self.active_calls: Dict[str, ActiveCall] = {}
-            self.campaign_queue: List[QueuedCampaign] = []
-            self.processing_campaigns: Set[str] = set()
+            # Reaped by _reap_stale_calls (which also releases slots); registered for accounting
+            resource_registry.register("dialer_active_calls", self.active_calls)
+            self.campaigns: Dict[str, QueuedCampaign] = {}
+            # (-priority, seq, campaign): highest priority first, round-robin within a priority
+            self._ready: asyncio.PriorityQueue = asyncio.PriorityQueue()
+            self._seq = itertools.count()
+            # Campaigns with no pending calls left but calls still in flight
+            self._draining: Set[str] = set()
+            self._slots_in_use = 0
             self.is_processing = False
+            self._dispatcher_task: Optional[asyncio.Task] = None
+            self._maintenance_task: Optional[asyncio.Task] = None
             self._shutdown_event = Event()
             self.twilio_client = Client(
                 settings.twilio_account_sid,
@@ -94,19 +168,45 @@ class CallQueueService:
         logger.info(
             f"CallQueue -> Configuration updated: "
             f"max_concurrent={config.max_concurrent_calls}, "
-            f"delay={config.delay_between_calls}s"
+            f"caller_id_rate={config.caller_id_calls_per_second}/s, "
+            f"provider_rate={config.provider_calls_per_second}/s"
         )
     
+    async def start(self):
+        """Start the dispatcher and the heartbeat / campaign sync / pacing loop on this worker"""
+        self.pacing.update(self.config.max_concurrent_calls)
+        self._ensure_dispatcher()
+        logger.info(f"CallQueue -> Worker {self.node_id} started")
+    
+    def _enqueue(self, campaign: QueuedCampaign):
+        """Make a campaign eligible for its next dial"""
+        self._ready.put_nowait((-campaign.priority, next(self._seq), campaign))
+    
+    def _ensure_dispatcher(self):
+        if not self.is_processing:
+            self.is_processing = True
+            self._shutdown_event.clear()
+            self._dispatcher_task = create_task(self._process_queue())
+        if not self._maintenance_task or self._maintenance_task.done():
+            self._maintenance_task = create_task(self._maintenance_loop())
+    
+    def _track_campaign(self, campaign: QueuedCampaign):
+        self.campaigns[campaign.campaign_id] = campaign
+        if campaign.status != 'paused':
+            self._enqueue(campaign)
+    
     async def add_campaign_to_queue(
         self,
         campaign_id: str,
         agent_id: Optional[str] = None,
-        service: str = 'elevenlabs'
+        service: str = 'elevenlabs',
+        priority: int = 0
     ) -> Dict[str, any]:
-        """Add campaign to processing queue"""
+        """Add campaign to processing queue (higher priority dials first)"""
         try:
             # Check if campaign is already in queue or processing
-            if campaign_id in self.processing_campaigns:
+            registered = {c['campaign_id'] for c in await self.backend.list_campaigns()}
+            if campaign_id in self.campaigns or campaign_id in registered:
                 logger.warning(f"CallQueue -> Campaign {campaign_id} is already in queue or processing")
                 return {
                     'success': False,
@@ -121,31 +221,31 @@ class CallQueueService:
                     'error': 'Campaign not found'
                 }
             
-            # Add to queue
+            # Add to queue; other workers pick it up on their next sync
             queued_campaign = QueuedCampaign(
                 campaign_id=campaign_id,
                 agent_id=agent_id,
-                service=service
+                service=service,
+                priority=priority
             )
             
-            self.campaign_queue.append(queued_campaign)
-            self.processing_campaigns.add(campaign_id)
+            await self.backend.upsert_campaign(queued_campaign.to_dict())
+            self._track_campaign(queued_campaign)
             
             logger.info(
-                f"CallQueue -> Campaign {campaign_id} added to queue. "
-                f"Queue length: {len(self.campaign_queue)}"
+                f"CallQueue -> Campaign {campaign_id} added to queue (priority {priority}). "
+                f"Campaigns: {len(self.campaigns)}"
             )
             
-            # Start processing if not already running
-            if not self.is_processing:
-                create_task(self._process_queue())
+            self._ensure_dispatcher()
             
             return {
                 'success': True,
                 'campaign_id': campaign_id,
-                'queue_position': len(self.campaign_queue)
+                'priority': priority,
+                'queue_position': self._ready.qsize()
             }
-            
+        
         except Exception as e:
             logger.error(f"CallQueue -> Error adding campaign to queue: {e}")
             return {
@@ -156,19 +256,21 @@ class CallQueueService:
     async def pause_campaign(self, campaign_id: str) -> bool:
         """Pause campaign execution"""
         try:
-            # Find campaign in queue
-            for campaign in self.campaign_queue:
-                if campaign.campaign_id == campaign_id:
-                    campaign.status = 'paused'
-                    logger.info(f"CallQueue -> Campaign {campaign_id} paused")
-                    
-                    # Update database status
-                    await CampaignService.update_campaign_status(campaign_id, 'paused')
-                    return True
+            campaign = self.campaigns.get(campaign_id)
+            if not campaign:
+                logger.warning(f"CallQueue -> Campaign {campaign_id} not found in queue")
+                return False
             
-            logger.warning(f"CallQueue -> Campaign {campaign_id} not found in queue")
-            return False
+            # The dispatcher drops paused campaigns when it next pops them
+            campaign.status = 'paused'
+            self._draining.discard(campaign_id)
+            await self.backend.upsert_campaign(campaign.to_dict())
+            logger.info(f"CallQueue -> Campaign {campaign_id} paused")
             
+            # Update database status
+            await CampaignService.update_campaign_status(campaign_id, 'paused')
+            return True
+        
         except Exception as e:
             logger.error(f"CallQueue -> Error pausing campaign: {e}")
             return False
@@ -176,133 +278,258 @@ class CallQueueService:
     async def resume_campaign(self, campaign_id: str) -> bool:
         """Resume paused campaign"""
         try:
-            # Find paused campaign
-            for campaign in self.campaign_queue:
-                if campaign.campaign_id == campaign_id and campaign.status == 'paused':
-                    campaign.status = 'pending'
-                    logger.info(f"CallQueue -> Campaign {campaign_id} resumed")
-                    
-                    # Update database status
-                    await CampaignService.update_campaign_status(campaign_id, 'active')
-                    
-                    # Restart processing if needed
-                    if not self.is_processing:
-                        create_task(self._process_queue())
-                    
-                    return True
+            campaign = self.campaigns.get(campaign_id)
+            if not campaign or campaign.status != 'paused':
+                logger.warning(f"CallQueue -> Campaign {campaign_id} not found or not paused")
+                return False
             
-            logger.warning(f"CallQueue -> Campaign {campaign_id} not found or not paused")
-            return False
+            campaign.status = 'processing' if campaign.start_time else 'pending'
+            await self.backend.upsert_campaign(campaign.to_dict())
+            logger.info(f"CallQueue -> Campaign {campaign_id} resumed")
             
+            # Update database status
+            await CampaignService.update_campaign_status(campaign_id, 'active')
+            
+            self._enqueue(campaign)
+            self._ensure_dispatcher()
+            return True
+        
         except Exception as e:
             logger.error(f"CallQueue -> Error resuming campaign: {e}")
             return False
     
     async def _process_queue(self):
-        """Main queue processing loop"""
-        if self.is_processing:
-            return
+        """
+        Dispatcher loop.
         
-        self.is_processing = True
+        Blocks on the ready queue instead of polling: a campaign is popped, one
+        call is dialed for it once a global slot and rate tokens are available,
+        and it is pushed back behind campaigns of the same priority.
+        """
         logger.info("CallQueue -> Starting queue processor")
         
         try:
-            while self.campaign_queue and not self._shutdown_event.is_set():
-                # Get next campaign
-                campaign = self.campaign_queue[0]
+            while not self._shutdown_event.is_set():
+                _, _, campaign = await self._ready.get()
                 
-                # Skip if paused
-                if campaign.status == 'paused':
-                    await sleep(1)
+                # Paused or removed campaigns are re-queued by resume_campaign / sync
+                if campaign.status == 'paused' or self.campaigns.get(campaign.campaign_id) is not campaign:
                     continue
                 
-                # Process campaign
-                campaign.status = 'processing'
-                campaign.start_time = datetime.now()
-                
-                logger.info(f"CallQueue -> Processing campaign {campaign.campaign_id}")
-                
                 try:
-                    await self._process_campaign(campaign)
-                    
-                    # Mark campaign as completed
-                    campaign.status = 'completed'
-                    campaign.end_time = datetime.now()
-                    
-                    # Remove from queue and processing set
-                    self.campaign_queue.pop(0)
-                    self.processing_campaigns.discard(campaign.campaign_id)
-                    
-                    logger.info(
-                        f"CallQueue -> Campaign {campaign.campaign_id} completed. "
-                        f"Remaining in queue: {len(self.campaign_queue)}"
-                    )
-                    
+                    if await self._dispatch_next(campaign):
+                        self._enqueue(campaign)
+                
                 except Exception as e:
                     logger.error(f"CallQueue -> Error processing campaign {campaign.campaign_id}: {e}")
                     campaign.status = 'failed'
                     campaign.end_time = datetime.now()
-                    
-                    # Remove from queue and processing set
-                    self.campaign_queue.pop(0)
-                    self.processing_campaigns.discard(campaign.campaign_id)
+                    self.campaigns.pop(campaign.campaign_id, None)
+                    self._draining.discard(campaign.campaign_id)
+                    await self.backend.remove_campaign(campaign.campaign_id)
                     
                     # Update database status
                     await CampaignService.update_campaign_status(campaign.campaign_id, 'failed')
         
+        except asyncio.CancelledError:
+            pass
         finally:
             self.is_processing = False
             logger.info("CallQueue -> Queue processor stopped")
     
-    async def _process_campaign(self, campaign: QueuedCampaign):
-        """Process a single campaign"""
-        try:
+    async def _acquire_slot(self) -> str:
+        """Wait for a free global call slot; woken by slot releases on any worker"""
+        slot_id = f"{self.node_id}:{uuid.uuid4().hex}"
+        # Predictive pacing target, never above the configured hard limit
+        while not await self.backend.acquire_slot(
+            slot_id, self.pacing.concurrency, settings.dialer_slot_ttl_seconds
+        ):
+            await self.backend.wait_for_slot(timeout=settings.dialer_slot_ttl_seconds)
+        return slot_id
+    
+    async def _pace(self, key: str, rate: float, burst: int):
+        """Wait for a token from a cluster-wide bucket"""
+        while True:
+            wait = await self.backend.take_token(key, rate, burst)
+            if wait <= 0:
+                return
+            await sleep(wait)
+    
+    async def _dispatch_next(self, campaign: QueuedCampaign) -> bool:
+        """Dial the next pending call of a campaign; returns True if it should be re-queued"""
+        if campaign.status == 'pending':
             # Update campaign status to active
+            campaign.status = 'processing'
+            campaign.start_time = datetime.now()
             await CampaignService.update_campaign_status(campaign.campaign_id, 'active')
-            
-            # Process calls until campaign is complete
-            while not await CampaignService.is_campaign_complete(campaign.campaign_id):
-                # Check if paused
-                if campaign.status == 'paused':
-                    logger.info(f"CallQueue -> Campaign {campaign.campaign_id} is paused")
-                    break
-                
-                # Wait if at max concurrent calls
-                while len(self.active_calls) >= self.config.max_concurrent_calls:
-                    await sleep(0.5)
-                
-                # Get next pending call
-                next_call = await CampaignService.get_next_pending_call(campaign.campaign_id)
-                
-                if not next_call:
-                    # No pending calls, wait a bit and check again
-                    await sleep(1)
-                    continue
-                
-                # Make the call
-                await self._make_campaign_call(
-                    campaign_call=next_call,
-                    agent_id=campaign.agent_id,
-                    service=campaign.service
-                )
-                
-                # Delay between calls
-                await sleep(self.config.delay_between_calls)
-            
-            # Mark campaign as completed if all calls are done
-            if await CampaignService.is_campaign_complete(campaign.campaign_id):
-                await CampaignService.mark_campaign_completed(campaign.campaign_id)
-                logger.info(f"CallQueue -> Campaign {campaign.campaign_id} marked as completed")
-            
-        except Exception as e:
-            logger.error(f"CallQueue -> Error in campaign processing: {e}")
+            logger.info(f"CallQueue -> Processing campaign {campaign.campaign_id}")
+        
+        slot_id = await self._acquire_slot()
+        
+        try:
+            next_call = await self._claim_next_call(campaign)
+        except Exception:
+            await self.backend.release_slot(slot_id)
             raise
+        
+        if next_call is None:
+            await self.backend.release_slot(slot_id)
+            await self._finish_or_drain(campaign)
+            return False
+        
+        if next_call is False:
+            # Every row we looked at is being dialed by another worker; retry
+            # after a pause instead of spinning on the same rows
+            await self.backend.release_slot(slot_id)
+            asyncio.get_running_loop().call_later(LOST_CLAIM_BACKOFF_SECONDS, self._requeue, campaign)
+            return False
+        
+        # Pace by caller ID (carrier spam heuristics) and by provider API limits
+        await self._pace(
+            f"caller:{settings.from_number}",
+            self.config.caller_id_calls_per_second,
+            self.config.caller_id_burst
+        )
+        await self._pace("provider:twilio", self.config.provider_calls_per_second, self.config.provider_burst)
+        if self.pacing.dial_rate > 0:
+            await self._pace("pacing", self.pacing.dial_rate, max(1, self.pacing.concurrency))
+        
+        tracked = len(self.active_calls)
+        try:
+            await self._make_campaign_call(
+                campaign_call=next_call,
+                agent_id=campaign.agent_id,
+                service=campaign.service,
+                slot_id=slot_id
+            )
+            campaign.calls_made += 1
+        except Exception:
+            # The call was marked failed; free its slot unless the dial itself went
+            # through (its status callback will release it) and keep the campaign going
+            if len(self.active_calls) == tracked:
+                await self.backend.release_slot(slot_id)
+        finally:
+            # The row is no longer pending (calling or failed), so the lease is done
+            await self.backend.release_call(str(next_call.id), self.node_id)
+        
+        return True
+    
+    async def _claim_next_call(self, campaign: QueuedCampaign):
+        """
+        Lease the campaign's next pending row that no other worker holds.
+
+        Rows leased elsewhere are excluded from the next lookup, so workers
+        spread over distinct rows instead of queueing on the head row.
+        Returns the row, None if nothing is pending, or False if every row
+        tried was leased by another worker.
+        """
+        skipped = []
+        for _ in range(MAX_CLAIM_ATTEMPTS):
+            next_call = await CampaignService.get_next_pending_call(campaign.campaign_id, exclude_ids=skipped)
+            if not next_call:
+                return None if not skipped else False
+            if await self.backend.claim_call(str(next_call.id), self.node_id, settings.dialer_call_lease_seconds):
+                return next_call
+            skipped.append(str(next_call.id))
+        return False
+    
+    def _requeue(self, campaign: QueuedCampaign):
+        if self.campaigns.get(campaign.campaign_id) is campaign and not self._shutdown_event.is_set():
+            self._enqueue(campaign)
+    
+    async def _finish_or_drain(self, campaign: QueuedCampaign):
+        """No pending calls left: complete the campaign or wait for in-flight calls"""
+        if await CampaignService.is_campaign_complete(campaign.campaign_id):
+            # Every worker may reach this; marking completed is idempotent
+            await CampaignService.mark_campaign_completed(campaign.campaign_id)
+            await self.backend.remove_campaign(campaign.campaign_id)
+            campaign.status = 'completed'
+            campaign.end_time = datetime.now()
+            self.campaigns.pop(campaign.campaign_id, None)
+            self._draining.discard(campaign.campaign_id)
+            logger.info(
+                f"CallQueue -> Campaign {campaign.campaign_id} completed. "
+                f"Remaining campaigns: {len(self.campaigns)}"
+            )
+            return
+        
+        if any(c.campaign_id == campaign.campaign_id for c in self.active_calls.values()):
+            # handle_call_status_update re-queues it when one of its calls ends
+            self._draining.add(campaign.campaign_id)
+        else:
+            # Calls owned by another worker or scheduled retries; check back later
+            asyncio.get_running_loop().call_later(
+                self.config.max_call_seconds / 60, self._enqueue, campaign
+            )
+    
+    async def _maintenance_loop(self):
+        """Heartbeat this worker's slots and pick up campaigns added on other workers"""
+        interval = min(settings.dialer_slot_ttl_seconds / 3, settings.dialer_campaign_sync_seconds)
+        try:
+            while not self._shutdown_event.is_set():
+                try:
+                    self.pacing.update(self.config.max_concurrent_calls)
+                    await self._heartbeat()
+                    await self._sync_campaigns()
+                    await self._reap_stale_calls()
+                except Exception as e:
+                    logger.error(f"CallQueue -> Maintenance error: {e}")
+                try:
+                    await asyncio.wait_for(self._shutdown_event.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            pass
+    
+    async def _heartbeat(self):
+        slot_ids = [c.slot_id for c in self.active_calls.values() if c.slot_id]
+        await self.backend.refresh_slots(slot_ids, settings.dialer_slot_ttl_seconds)
+        self._slots_in_use = await self.backend.slots_in_use()
+    
+    async def _sync_campaigns(self):
+        registered = {c['campaign_id']: c for c in await self.backend.list_campaigns()}
+        
+        for campaign_id, data in registered.items():
+            campaign = self.campaigns.get(campaign_id)
+            if campaign is None:
+                self._track_campaign(QueuedCampaign.from_dict(data))
+                self._ensure_dispatcher()
+            elif campaign.status == 'paused' and data.get('status') != 'paused':
+                campaign.status = data.get('status', 'pending')
+                self._enqueue(campaign)
+            elif data.get('status') == 'paused':
+                campaign.status = 'paused'
+        
+        # Completed or failed on another worker
+        for campaign_id in [c for c in self.campaigns if c not in registered]:
+            self.campaigns.pop(campaign_id, None)
+            self._draining.discard(campaign_id)
+    
+    async def _reap_stale_calls(self):
+        now = datetime.now()
+        for call_sid, call in list(self.active_calls.items()):
+            if (now - call.start_time).total_seconds() > self.config.max_call_seconds:
+                logger.warning(f"CallQueue -> No final status for {call_sid}, releasing its slot")
+                await self.backend.pop_call(call_sid)
+                await self._release_call(call_sid, call.campaign_id, call.slot_id)
+    
+    async def _release_call(self, call_sid: str, campaign_id: str, slot_id: Optional[str]):
+        """Free a finished call's slot and wake its campaign if it was draining here"""
+        self.active_calls.pop(call_sid, None)
+        if slot_id:
+            await self.backend.release_slot(slot_id)
+        
+        campaign = self.campaigns.get(campaign_id)
+        if campaign and campaign_id in self._draining:
+            self._draining.discard(campaign_id)
+            self._enqueue(campaign)
     
     async def _make_campaign_call(
         self,
         campaign_call: CampaignCall,
         agent_id: Optional[str],
-        service: str
+        service: str,
+        slot_id: Optional[str] = None
     ):
         """Make a single campaign call"""
         try:
@@ -327,7 +554,8 @@ class CallQueueService:
                 f"for campaign {campaign_call.campaign_id}"
             )
             
-            call = self.twilio_client.calls.create(
+            call = await asyncio.to_thread(
+                self.twilio_client.calls.create,
                 url=url,
                 to=full_number,
                 from_=settings.from_number,
@@ -341,11 +569,24 @@ class CallQueueService:
                 campaign_id=campaign_call.campaign_id,
                 campaign_call_id=campaign_call.id,
                 phone_number=full_number,
-                start_time=datetime.now()
+                start_time=datetime.now(),
+                slot_id=slot_id
             )
             
             self.active_calls[call.sid] = active_call
             
+            # The status callback may land on any worker
+            await self.backend.track_call(
+                call.sid,
+                {
+                    'campaign_id': campaign_call.campaign_id,
+                    'campaign_call_id': str(campaign_call.id),
+                    'slot_id': slot_id,
+                    'node_id': self.node_id
+                },
+                ttl=self.config.max_call_seconds
+            )
+            
             # Update call status with SID
             await CampaignService.update_campaign_call_status(
                 campaign_call.id,
@@ -357,7 +598,7 @@ class CallQueueService:
                 f"CallQueue -> Call initiated: {call.sid} to {full_number}. "
                 f"Active calls: {len(self.active_calls)}"
             )
-            
+        
         except Exception as e:
             logger.error(f"CallQueue -> Error making campaign call: {e}")
             
@@ -376,52 +617,67 @@ class CallQueueService:
         status: str,
         duration: Optional[int] = None
     ):
-        """Handle Twilio call status callback"""
+        """Handle Twilio call status callback (for calls dialed by any worker)"""
         try:
-            if call_sid not in self.active_calls:
-                logger.warning(f"CallQueue -> Received status for unknown call: {call_sid}")
+            if status not in ['completed', 'failed', 'busy', 'no-answer', 'canceled']:
+                if status == 'in-progress':
+                    self.pacing.record_answered(call_sid)
+                logger.info(f"CallQueue -> Call status update: {call_sid} -> {status}")
                 return
             
-            active_call = self.active_calls[call_sid]
+            # Twilio only reports 'completed' for calls that were answered
+            self.pacing.record_outcome(call_sid, answered=status == 'completed', duration=duration)
+            
+            record = await self.backend.pop_call(call_sid)
+            if not record:
+                logger.warning(f"CallQueue -> Received status for unknown call: {call_sid}")
+                return
             
             logger.info(
                 f"CallQueue -> Call status update: {call_sid} -> {status} "
-                f"(Campaign: {active_call.campaign_id})"
+                f"(Campaign: {record['campaign_id']})"
             )
             
-            # Update campaign call status
-            if status in ['completed', 'failed', 'busy', 'no-answer', 'canceled']:
-                await CampaignService.update_campaign_call_status(
-                    active_call.campaign_call_id,
-                    status,
-                    duration=duration
-                )
-                
-                # Remove from active calls
-                del self.active_calls[call_sid]
-                
-                logger.info(
-                    f"CallQueue -> Call {call_sid} finished. "
-                    f"Active calls: {len(self.active_calls)}"
-                )
+            # Free the slot first so dispatchers are not held up by the DB write
+            await self._release_call(call_sid, record['campaign_id'], record.get('slot_id'))
             
+            await CampaignService.update_campaign_call_status(
+                record['campaign_call_id'],
+                status,
+                duration=duration
+            )
+            
+            logger.info(
+                f"CallQueue -> Call {call_sid} finished. "
+                f"Active calls on this worker: {len(self.active_calls)}"
+            )
+        
         except Exception as e:
             logger.error(f"CallQueue -> Error handling call status update: {e}")
     
     def get_queue_status(self) -> Dict[str, any]:
         """Get current queue status"""
         return {
+            'node_id': self.node_id,
+            'backend': type(self.backend).__name__,
             'is_processing': self.is_processing,
-            'queued_campaigns': len(self.campaign_queue),
+            'queued_campaigns': len(self.campaigns),
+            'ready_queue_depth': self._ready.qsize(),
+            'draining_campaigns': len(self._draining),
             'active_calls': len(self.active_calls),
             'max_concurrent_calls': self.config.max_concurrent_calls,
+            # Cluster-wide, as of the last heartbeat
+            'slots_in_use': self._slots_in_use,
+            'pacing': self.pacing.get_state(),
             'campaigns': [
                 {
                     'campaign_id': c.campaign_id,
                     'status': c.status,
+                    'priority': c.priority,
+                    'calls_made': c.calls_made,
                     'start_time': c.start_time.isoformat() if c.start_time else None
                 }
-                for c in self.campaign_queue
+                for c in self.campaigns.values()
             ],
             'active_call_details': [
                 {
@@ -439,8 +695,13 @@ class CallQueueService:
         logger.info("CallQueue -> Shutting down...")
         self._shutdown_event.set()
         
-        # Wait for processing to stop
-        while self.is_processing:
-            await sleep(0.5)
+        # The dispatcher may be parked on the queue, a slot or a rate token
+        for task in (self._dispatcher_task, self._maintenance_task):
+            if task and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        
+        # Live calls keep their slots until their status callbacks (or the slot TTL)
+        await self.backend.close()
         
         logger.info("CallQueue -> Shutdown complete")
@@ -1,5 +1,9 @@
 import logging
 import json
+import gzip
+import asyncio
+import base64
+import hashlib
 from typing import Optional, Dict, List
 from datetime import datetime
 import httpx
@@ -8,6 +12,16 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+TRANSCRIPT_PREFIX = "call-transcripts"
+TRANSCRIPT_SUFFIX = ".ndjson.gz"
+
+# Recording transfer: S3 parts must be >= 5MB (except the last), so memory per
+# transfer is bounded by one part plus one read chunk
+RECORDING_PART_SIZE = 8 * 1024 * 1024
+RECORDING_READ_CHUNK_SIZE = 64 * 1024
+RECORDING_PART_RETRIES = 3
+RECORDING_DOWNLOAD_RETRIES = 3
+
 
 class CallRecordingService:
     """Service to handle call recordings and transcript uploads to S3"""
@@ -27,7 +41,6 @@ class CallRecordingService:
         
     async def save_call_data(
         self,
-        campaign_id: str,
         call_sid: str,
         company_id: str,
         agent_id: str,
@@ -35,8 +48,16 @@ class CallRecordingService:
         recording_url: Optional[str] = None,
         duration: int = 0,
         from_number: str = None,
-        to_number: str = None
+        to_number: str = None,
+        campaign_id: Optional[str] = None,
+        ended_at: Optional[datetime] = None
     ) -> Dict[str, str]:
+        """
+        Upload transcript and recording for a finished call.
+
+        Keys are derived from call_sid and ended_at, so repeating the call
+        (e.g. a finalization retry) overwrites the same objects.
+        """
 
         try:
             if not self.s3_enabled:
@@ -57,7 +78,8 @@ class CallRecordingService:
                     transcript=transcript,
                     duration=duration,
                     from_number=from_number,
-                    to_number=to_number
+                    to_number=to_number,
+                    ended_at=ended_at
                 )
                 if transcript_url:
                     result['transcript_url'] = transcript_url
@@ -70,7 +92,8 @@ class CallRecordingService:
                 recording_s3_url = await self._upload_recording(
                     call_sid=call_sid,
                     company_id=company_id,
-                    recording_url=recording_url
+                    recording_url=recording_url,
+                    ended_at=ended_at
                 )
                 if recording_s3_url:
                     result['recording_url'] = recording_s3_url
@@ -94,67 +117,50 @@ class CallRecordingService:
         transcript: List[Dict],
         duration: int,
         from_number: str = None,
-        to_number: str = None
+        to_number: str = None,
+        ended_at: Optional[datetime] = None
     ) -> Optional[str]:
-        """Upload transcript JSON to S3"""
+        """
+        Upload transcript to S3 as gzip-compressed NDJSON.
+
+        One line per turn: the whole turn as recorded (role, content,
+        timestamp, strategy, booking_mode, ...) plus the call-level fields,
+        so the daily rollup (see transcript_rollup_service) can load files
+        straight into columns without a per-call join. A call without turns
+        gets a single metadata line (turn_index null).
+        """
         try:
-            # Format transcript data
-            transcript_data = {
+            ended_at = ended_at or datetime.utcnow()
+            
+            # Generate S3 key with date-based path
+            date_path = ended_at.strftime('%Y/%m/%d')
+            s3_key = f"{TRANSCRIPT_PREFIX}/{company_id}/{date_path}/{call_sid}{TRANSCRIPT_SUFFIX}"
+            
+            call_fields = {
                 'call_sid': call_sid,
                 'company_id': company_id,
                 'agent_id': agent_id,
                 'from_number': from_number,
                 'to_number': to_number,
                 'duration_seconds': duration,
-                'timestamp': datetime.utcnow().isoformat(),
-                'conversation_turns': len(transcript),
-                'conversation': transcript
+                'ended_at': ended_at.isoformat()
             }
+            records = [
+                {**turn, **call_fields, 'turn_index': index}
+                for index, turn in enumerate(transcript)
+            ] or [{**call_fields, 'turn_index': None}]
+            lines = [
+                json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str)
+                for record in records
+            ]
+            body = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'), compresslevel=6)
             
-            # Generate S3 key with date-based path
-            date_path = datetime.utcnow().strftime('%Y/%m/%d')
-            s3_key = f"call-transcripts/{company_id}/{date_path}/{call_sid}.json"
-            
-            # Convert to JSON bytes
-            json_content = json.dumps(transcript_data, indent=2, ensure_ascii=False)
-            json_bytes = json_content.encode('utf-8')
-            
-            # Create a file-like object for upload
-            from io import BytesIO
-            file_obj = BytesIO(json_bytes)
-            
-            # Create a mock UploadFile
-            class MockUploadFile:
-                def __init__(self, content: bytes, filename: str, content_type: str):
-                    self._content = content
-                    self.filename = filename
-                    self.content_type = content_type
-                    self._position = 0
-                
-                async def read(self, size: int = -1) -> bytes:
-                    if size == -1:
-                        result = self._content[self._position:]
-                        self._position = len(self._content)
-                    else:
-                        result = self._content[self._position:self._position + size]
-                        self._position += size
-                    return result
-                
-                async def seek(self, position: int) -> int:
-                    self._position = position
-                    return self._position
-            
-            mock_file = MockUploadFile(
-                content=json_bytes,
-                filename=f"{call_sid}.json",
-                content_type='application/json'
-            )
-            
-            # Upload to S3
-            upload_result = await self.s3_handler.upload_file(
-                file=mock_file,
-                enable_public_read_access=False,
-                custom_key=s3_key
+            upload_result = await self.s3_handler.put_bytes(
+                key=s3_key,
+                data=body,
+                content_type='application/x-ndjson',
+                content_encoding='gzip',
+                metadata={'turns': str(len(transcript))}
             )
             
             if upload_result.get('success'):
@@ -173,81 +179,24 @@ class CallRecordingService:
         self,
         call_sid: str,
         company_id: str,
-        recording_url: str
+        recording_url: str,
+        ended_at: Optional[datetime] = None
     ) -> Optional[str]:
-        """Download Twilio recording and upload to S3"""
+        """Stream Twilio recording into a multipart S3 upload"""
         try:
-            # Download recording from Twilio
-            logger.info(f"Downloading recording from Twilio: {recording_url}")
+            ended_at = ended_at or datetime.utcnow()
+
+            logger.info(f"Streaming recording from Twilio: {recording_url}")
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    recording_url,
-                    auth=(self.twilio_account_sid, self.twilio_auth_token),
-                    timeout=60.0,
-                    follow_redirects=True
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"Failed to download recording: HTTP {response.status_code}")
-                    return None
-                
-                audio_content = response.content
-                content_type = response.headers.get('Content-Type', 'audio/mpeg')
-                
-                logger.info(f"Downloaded {len(audio_content)} bytes, content-type: {content_type}")
-                
-                # Determine file extension from content type
-                extension = 'mp3'
-                if 'wav' in content_type.lower():
-                    extension = 'wav'
-                elif 'mp4' in content_type.lower():
-                    extension = 'mp4'
-                
-                # Generate S3 key with date-based path
-                date_path = datetime.utcnow().strftime('%Y/%m/%d')
-                s3_key = f"call-recordings/{company_id}/{date_path}/{call_sid}.{extension}"
-                
-                # Create a mock UploadFile
-                class MockUploadFile:
-                    def __init__(self, content: bytes, filename: str, content_type: str):
-                        self._content = content
-                        self.filename = filename
-                        self.content_type = content_type
-                        self._position = 0
-                    
-                    async def read(self, size: int = -1) -> bytes:
-                        if size == -1:
-                            result = self._content[self._position:]
-                            self._position = len(self._content)
-                        else:
-                            result = self._content[self._position:self._position + size]
-                            self._position += size
-                        return result
-                    
-                    async def seek(self, position: int) -> int:
-                        self._position = position
-                        return self._position
-                
-                mock_file = MockUploadFile(
-                    content=audio_content,
-                    filename=f"{call_sid}.{extension}",
-                    content_type=content_type
-                )
-                
-                # Upload to S3
-                upload_result = await self.s3_handler.upload_file(
-                    file=mock_file,
-                    enable_public_read_access=False,
-                    custom_key=s3_key
+            async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0)) as client:
+                return await self._stream_recording_to_s3(
+                    client=client,
+                    call_sid=call_sid,
+                    company_id=company_id,
+                    recording_url=recording_url,
+                    ended_at=ended_at
                 )
                 
-                if upload_result.get('success'):
-                    return upload_result.get('url')
-                else:
-                    logger.error(f"S3 upload failed: {upload_result.get('error')}")
-                    return None
-                
         except httpx.TimeoutException:
             logger.error("Timeout downloading recording from Twilio")
             return None
@@ -256,6 +205,155 @@ class CallRecordingService:
             import traceback
             logger.error(traceback.format_exc())
             return None
+
+    async def _stream_recording_to_s3(
+        self,
+        client: httpx.AsyncClient,
+        call_sid: str,
+        company_id: str,
+        recording_url: str,
+        ended_at: datetime
+    ) -> Optional[str]:
+        """
+        Pipe the recording body into S3 one part at a time.
+
+        At most one part (RECORDING_PART_SIZE) is held in memory. A dropped
+        download resumes from the last received byte with a Range request,
+        failed parts are retried, and every part carries a Content-MD5 so S3
+        rejects a corrupted part (BadDigest). ETags are not compared: they
+        are not MD5 digests under SSE-KMS / SSE-C. The multipart upload is
+        aborted on any failure.
+        """
+        key = None
+        upload_id = None
+        parts: List[Dict] = []
+        buffer = bytearray()
+        received = 0
+        download_retries = 0
+
+        try:
+            while True:
+                headers = {'Range': f'bytes={received}-'} if received else {}
+                try:
+                    async with client.stream(
+                        'GET',
+                        recording_url,
+                        auth=(self.twilio_account_sid, self.twilio_auth_token),
+                        headers=headers,
+                        follow_redirects=True
+                    ) as response:
+                        if received and response.status_code != 206:
+                            raise Exception(f"Recording source cannot resume (HTTP {response.status_code})")
+                        if not received and response.status_code != 200:
+                            logger.error(f"Failed to download recording: HTTP {response.status_code}")
+                            return None
+
+                        if upload_id is None:
+                            content_type = response.headers.get('Content-Type', 'audio/mpeg')
+                            
+                            # Determine file extension from content type
+                            extension = 'mp3'
+                            if 'wav' in content_type.lower():
+                                extension = 'wav'
+                            elif 'mp4' in content_type.lower():
+                                extension = 'mp4'
+                            
+                            # Generate S3 key with date-based path
+                            date_path = ended_at.strftime('%Y/%m/%d')
+                            key = f"call-recordings/{company_id}/{date_path}/{call_sid}.{extension}"
+
+                            session = await self.s3_handler.create_multipart_upload(key, content_type=content_type)
+                            if not session['success']:
+                                raise Exception(f"Could not start multipart upload: {session['error']}")
+                            upload_id = session['upload_id']
+
+                        async for chunk in response.aiter_bytes(RECORDING_READ_CHUNK_SIZE):
+                            buffer.extend(chunk)
+                            received += len(chunk)
+                            while len(buffer) >= RECORDING_PART_SIZE:
+                                await self._upload_recording_part(
+                                    key, upload_id, parts, bytes(buffer[:RECORDING_PART_SIZE])
+                                )
+                                del buffer[:RECORDING_PART_SIZE]
+                    break
+
+                except httpx.TransportError as e:
+                    download_retries += 1
+                    if download_retries > RECORDING_DOWNLOAD_RETRIES:
+                        raise
+                    logger.warning(
+                        f"Recording download interrupted at {received} bytes ({e}); "
+                        f"resuming (retry {download_retries})"
+                    )
+                    await asyncio.sleep(download_retries)
+
+            # Last part may be smaller than the 5MB minimum
+            if buffer or not parts:
+                await self._upload_recording_part(key, upload_id, parts, bytes(buffer))
+                buffer.clear()
+
+            completed = await self.s3_handler.complete_multipart_upload(key, upload_id, parts)
+            if not completed['success']:
+                raise Exception(f"Could not complete multipart upload: {completed['error']}")
+            upload_id = None
+
+            logger.info(f"Streamed {received} bytes in {len(parts)} parts to {key}")
+            return completed['url']
+
+        finally:
+            if upload_id is not None:
+                await self.s3_handler.abort_multipart_upload(key, upload_id)
+
+    async def _upload_recording_part(
+        self,
+        key: str,
+        upload_id: str,
+        parts: List[Dict],
+        data: bytes
+    ):
+        """Upload one part with Content-MD5 (S3 verifies it), retrying on failure"""
+        part_number = len(parts) + 1
+        content_md5 = base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+
+        for attempt in range(1, RECORDING_PART_RETRIES + 1):
+            result = await self.s3_handler.upload_part(key, upload_id, part_number, data, content_md5=content_md5)
+            if result['success']:
+                parts.append({"PartNumber": part_number, "ETag": result['etag']})
+                return
+
+            logger.warning(f"Part {part_number} of {key} failed (attempt {attempt}): {result.get('error')}")
+            await asyncio.sleep(attempt)
+
+        raise Exception(f"Part {part_number} of {key} failed after {RECORDING_PART_RETRIES} attempts")
+    
+    async def upload_local_recording(
+        self,
+        call_sid: str,
+        company_id: str,
+        path: str,
+        ended_at: Optional[datetime] = None
+    ) -> Optional[str]:
+        """Upload a server-side stereo WAV captured from the media stream"""
+        try:
+            ended_at = ended_at or datetime.utcnow()
+            date_path = ended_at.strftime('%Y/%m/%d')
+            s3_key = f"call-recordings/{company_id}/{date_path}/{call_sid}.stream.wav"
+
+            upload_result = await self.s3_handler.upload_local_file(
+                path=path,
+                key=s3_key,
+                content_type='audio/wav'
+            )
+
+            if upload_result.get('success'):
+                return upload_result.get('url')
+            else:
+                logger.error(f"S3 upload failed: {upload_result.get('error')}")
+                return None
+
+        except Exception as e:
+            logger.error(f"Error uploading local recording: {str(e)}")
+            return None
     
     async def get_recording_url_from_twilio(self, call_sid: str) -> Optional[str]:
         """
@@ -0,0 +1,195 @@
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+import time
+
+from config.settings import settings
+from services.resource_registry import resource_registry
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CallStateStore:
+    """
+    Per-call state shared by every worker handling a call.
+
+    The webhook that answers a call and the media-stream WebSocket for it can
+    land on different workers, so anything one writes for the other goes
+    through here rather than module-level dicts. State is namespaced per call
+    ("context", "booking", "routing", ...) and expires after `ttl` seconds of
+    inactivity; clear_call drops every namespace at once.
+
+    Values must be JSON-serializable for the Redis backend. Readers get a copy,
+    so mutate-then-set is required.
+
+    The cache methods hold short-lived shared data that is not tied to a call
+    (e.g. pre-warmed agent configs).
+    """
+
+    async def get(self, call_sid: str, namespace: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    async def set(self, call_sid: str, namespace: str, value: Any):
+        raise NotImplementedError
+
+    async def pop(self, call_sid: str, namespace: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    async def clear_call(self, call_sid: str):
+        raise NotImplementedError
+
+    async def get_cached(self, key: str) -> Any:
+        raise NotImplementedError
+
+    async def set_cached(self, key: str, value: Any, ttl: int):
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+    async def close(self):
+        pass
+
+
+class InMemoryCallStateStore(CallStateStore):
+    """
+    Single-process store (one worker); values are JSON round-tripped like Redis.
+
+    Both maps are registered with the resource registry, which expires idle
+    calls after `ttl` and caps each map at `max_entries`.
+    """
+
+    def __init__(self, ttl: int, max_entries: Optional[int] = None):
+        self.ttl = ttl
+        self._calls: Dict[str, Dict[str, str]] = {}
+        self._cache: Dict[str, Tuple[float, str]] = {}
+        self._calls_resource = resource_registry.register(
+            "call_state", self._calls, ttl=ttl, max_entries=max_entries
+        )
+        self._cache_resource = resource_registry.register(
+            "call_state_cache", self._cache, max_entries=max_entries,
+            expired=lambda entry, now: entry[0] <= now
+        )
+
+    def _namespaces(self, call_sid: str, create: bool = False) -> Optional[Dict[str, str]]:
+        namespaces = self._calls.get(call_sid)
+        if namespaces is None:
+            if not create:
+                return None
+            namespaces = self._calls[call_sid] = {}
+        # Any access keeps a live call's state alive
+        self._calls_resource.touch(call_sid)
+        return namespaces
+
+    async def get(self, call_sid: str, namespace: str, default: Any = None) -> Any:
+        namespaces = self._namespaces(call_sid)
+        if not namespaces or namespace not in namespaces:
+            return default
+        return json.loads(namespaces[namespace])
+
+    async def set(self, call_sid: str, namespace: str, value: Any):
+        self._namespaces(call_sid, create=True)[namespace] = json.dumps(value, default=str)
+
+    async def pop(self, call_sid: str, namespace: str, default: Any = None) -> Any:
+        namespaces = self._namespaces(call_sid)
+        raw = namespaces.pop(namespace, _MISSING) if namespaces else _MISSING
+        return default if raw is _MISSING else json.loads(raw)
+
+    async def clear_call(self, call_sid: str):
+        self._calls.pop(call_sid, None)
+
+    async def get_cached(self, key: str) -> Any:
+        entry = self._cache.get(key)
+        if not entry or entry[0] <= time.monotonic():
+            return None
+        return json.loads(entry[1])
+
+    async def set_cached(self, key: str, value: Any, ttl: int):
+        self._cache[key] = (time.monotonic() + ttl, json.dumps(value, default=str))
+        self._cache_resource.touch(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "calls": len(self._calls),
+            "cached_entries": len(self._cache)
+        }
+
+
+class RedisCallStateStore(CallStateStore):
+    """
+    Shared store for multi-worker / multi-host deployments.
+
+    One hash per call ({prefix}:{call_sid}), one field per namespace, with the
+    TTL refreshed on every write.
+    """
+
+    def __init__(self, redis_url: str, ttl: int, key_prefix: str = "csai:call"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        self.client = aioredis.from_url(redis_url, decode_responses=True)
+        self.ttl = ttl
+        self.prefix = key_prefix
+
+    def _key(self, call_sid: str) -> str:
+        return f"{self.prefix}:{call_sid}"
+
+    async def get(self, call_sid: str, namespace: str, default: Any = None) -> Any:
+        raw = await self.client.hget(self._key(call_sid), namespace)
+        return default if raw is None else json.loads(raw)
+
+    async def set(self, call_sid: str, namespace: str, value: Any):
+        key = self._key(call_sid)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, namespace, json.dumps(value, default=str))
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def pop(self, call_sid: str, namespace: str, default: Any = None) -> Any:
+        key = self._key(call_sid)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hget(key, namespace)
+            pipe.hdel(key, namespace)
+            raw, _ = await pipe.execute()
+        return default if raw is None else json.loads(raw)
+
+    async def clear_call(self, call_sid: str):
+        await self.client.delete(self._key(call_sid))
+
+    async def get_cached(self, key: str) -> Any:
+        raw = await self.client.get(f"{self.prefix}:cache:{key}")
+        return None if raw is None else json.loads(raw)
+
+    async def set_cached(self, key: str, value: Any, ttl: int):
+        await self.client.set(f"{self.prefix}:cache:{key}", json.dumps(value, default=str), ex=ttl)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_call_state_store() -> CallStateStore:
+    """Store selected by the call_state_backend setting"""
+    if settings.call_state_backend == "redis":
+        logger.info(f"Call state store: redis ({settings.call_state_key_prefix})")
+        return RedisCallStateStore(
+            settings.redis_url,
+            ttl=settings.call_state_ttl_seconds,
+            key_prefix=settings.call_state_key_prefix
+        )
+    return InMemoryCallStateStore(
+        ttl=settings.call_state_ttl_seconds,
+        max_entries=settings.call_resource_max_entries
+    )
+
+
+# Global instance
+call_state_store = create_call_state_store()
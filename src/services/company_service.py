@@ -1,8 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from typing import Optional
 import logging
 from database.models import Company
-from database.config import db_manager
+from database.config import get_async_session
 
 logger = logging.getLogger(__name__)
 
@@ -11,14 +11,17 @@ class CompanyService:
     def __init__(self):
         pass
     
-    def get_company_name_by_id(self, company_id: str) -> Optional[str]:
+    async def get_company_name_by_id(self, company_id: str) -> Optional[str]:
         """Get company name by ID using a fresh database session"""
-        with db_manager.get_session_context() as db:
+        async with get_async_session() as db:
             try:
-                company = db.query(Company).filter(Company.id == company_id).first()
+                result = await db.execute(
+                    select(Company.name).where(Company.id == company_id)
+                )
+                name = result.scalar_one_or_none()
                 
-                if company:
-                    return company.name
+                if name:
+                    return name
                 
                 logger.warning(f"Company not found with id: {company_id}")
                 return None
@@ -27,11 +30,14 @@ class CompanyService:
                 logger.error(f"Error fetching company name for id {company_id}: {str(e)}")
                 raise
     
-    def get_company_by_id(self, company_id: str) -> Optional[Company]:
+    async def get_company_by_id(self, company_id: str) -> Optional[Company]:
         """Get company object by ID using a fresh database session"""
-        with db_manager.get_session_context() as db:
+        async with get_async_session() as db:
             try:
-                company = db.query(Company).filter(Company.id == company_id).first()
+                result = await db.execute(
+                    select(Company).where(Company.id == company_id)
+                )
+                company = result.scalar_one_or_none()
                 
                 if not company:
                     logger.warning(f"Company not found with id: {company_id}")
@@ -43,9 +49,9 @@ class CompanyService:
                 raise
 
 
-def get_company_name(company_id: str) -> Optional[str]:
+async def get_company_name(company_id: str) -> Optional[str]:
     """Standalone function to get company name"""
     service = CompanyService()
-    return service.get_company_name_by_id(company_id)
+    return await service.get_company_name_by_id(company_id)
 
 company_service = CompanyService()
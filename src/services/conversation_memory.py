@@ -0,0 +1,237 @@
+# src/services/conversation_memory.py
+from typing import Dict, List, Optional
+import asyncio
+import functools
+import logging
+
+from openai import AsyncOpenAI
+from config.settings import settings
+from services.resource_registry import resource_registry
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Chat format overhead per message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+
+def _load_encoding():
+    if not TIKTOKEN_AVAILABLE:
+        logger.warning("tiktoken not installed, estimating tokens as characters / 4")
+        return None
+    try:
+        return tiktoken.encoding_for_model(settings.openai_model)
+    except Exception:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+_encoding = _load_encoding()
+
+
+@functools.lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Tokens in `text` (memoized: history messages are counted once, not every turn)"""
+    if not text:
+        return 0
+    if _encoding is None:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message.get('content') or '') + MESSAGE_OVERHEAD_TOKENS
+
+
+def trim_to_budget(messages: Optional[List[Dict[str, str]]], budget_tokens: int) -> List[Dict[str, str]]:
+    """
+    Newest messages of `messages` that fit in `budget_tokens`, oldest first.
+    A leading summary message is kept if it still fits after the recent turns.
+    """
+    if not messages:
+        return []
+    summary = None
+    if messages[0].get('role') == 'system' and (messages[0].get('content') or '').startswith(SUMMARY_PREFIX):
+        summary, messages = messages[0], messages[1:]
+
+    kept = []
+    for message in reversed(messages):
+        cost = message_tokens(message)
+        if cost > budget_tokens:
+            break
+        budget_tokens -= cost
+        kept.append(message)
+    kept.reverse()
+    if summary is not None and message_tokens(summary) <= budget_tokens:
+        kept.insert(0, summary)
+    return kept
+
+
+def format_history(messages: List[Dict[str, str]]) -> str:
+    """'ROLE: content' lines for classifier prompts; the summary is labelled as such"""
+    lines = []
+    for msg in messages:
+        if msg.get('role') == 'system':
+            lines.append(msg.get('content', ''))
+        else:
+            lines.append(f"{msg['role'].upper()}: {msg['content']}")
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """
+    Token-budgeted memory of one call's dialogue.
+
+    The newest `recent_tokens` worth of messages stay verbatim. Older ones
+    are folded into a rolling summary generated in a background task, so
+    no turn ever waits for it; until a refresh lands, the not-yet-folded
+    messages are simply left out of the window. Token counts are computed
+    once per message as the transcript grows.
+    """
+
+    def __init__(self, call_sid: str, recent_tokens: int, summary_trigger_tokens: int):
+        self.call_sid = call_sid
+        self.recent_tokens = recent_tokens
+        self.summary_trigger_tokens = summary_trigger_tokens
+        self._messages: List[Dict[str, str]] = []
+        self._tokens: List[int] = []
+        self._synced = 0
+        self._summarized = 0          # messages before this index are in the summary
+        self.summary = ""
+        self._summary_task: Optional[asyncio.Task] = None
+
+    def sync(self, transcript: List[Dict]):
+        """Pick up dialogue appended to the call transcript since the last sync"""
+        for entry in transcript[self._synced:]:
+            if entry.get('role') in ('user', 'assistant') and entry.get('content'):
+                message = {'role': entry['role'], 'content': entry['content']}
+                self._messages.append(message)
+                self._tokens.append(message_tokens(message))
+        self._synced = len(transcript)
+        self._maybe_summarize()
+
+    def _summary_message(self) -> Optional[Dict[str, str]]:
+        return {'role': 'system', 'content': f"{SUMMARY_PREFIX} {self.summary}"} if self.summary else None
+
+    def _window_start(self) -> int:
+        """Index of the oldest message kept verbatim (`recent_tokens` less the summary)"""
+        summary = self._summary_message()
+        budget = self.recent_tokens - (message_tokens(summary) if summary else 0)
+        start = len(self._messages)
+        while start > self._summarized and self._tokens[start - 1] <= budget:
+            budget -= self._tokens[start - 1]
+            start -= 1
+        return start
+
+    def messages(self, budget_tokens: Optional[int] = None) -> List[Dict[str, str]]:
+        """[summary] + the newest verbatim messages, within `budget_tokens` (default: recent_tokens)"""
+        summary = self._summary_message()
+        history = ([summary] if summary else []) + self._messages[self._window_start():]
+        return trim_to_budget(history, budget_tokens or self.recent_tokens)
+
+    # Rolling summary
+
+    def _maybe_summarize(self):
+        if self._summary_task is not None and not self._summary_task.done():
+            return
+        upto = self._window_start()
+        if sum(self._tokens[self._summarized:upto]) < self.summary_trigger_tokens:
+            return
+        try:
+            self._summary_task = asyncio.get_running_loop().create_task(self._summarize(upto))
+        except RuntimeError:
+            pass
+
+    async def _summarize(self, upto: int):
+        folded = self._messages[self._summarized:upto]
+        try:
+            summary = await conversation_memory_service.summarize(self.summary, folded)
+        except Exception as e:
+            logger.error(f"Conversation summary failed for {self.call_sid}: {e}")
+            return
+        if summary:
+            self.summary = summary
+            self._summarized = upto
+            logger.info(f"🧠 Folded {len(folded)} messages into summary for {self.call_sid}")
+
+    def close(self):
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
+
+
+class ConversationMemoryService:
+    """Per-call ConversationMemory instances shared by the routers and the answer LLM"""
+
+    def __init__(self):
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+        self.model = settings.conversation_summary_model
+        self._memories: Dict[str, ConversationMemory] = {}
+        self._resource = resource_registry.register(
+            "conversation_memory",
+            self._memories,
+            ttl=settings.call_resource_idle_seconds,
+            max_entries=settings.call_resource_max_entries,
+            on_evict=lambda call_sid, memory: memory.close()
+        )
+
+    def get(self, call_sid: str) -> ConversationMemory:
+        memory = self._memories.get(call_sid)
+        if memory is None:
+            memory = self._memories[call_sid] = ConversationMemory(
+                call_sid,
+                recent_tokens=settings.conversation_history_tokens,
+                summary_trigger_tokens=settings.conversation_summary_trigger_tokens
+            )
+        self._resource.touch(call_sid)
+        return memory
+
+    def for_transcript(self, call_sid: str, transcript: List[Dict]) -> ConversationMemory:
+        """The call's memory, synced with its transcript"""
+        memory = self.get(call_sid)
+        memory.sync(transcript)
+        return memory
+
+    def clear_call(self, call_sid: str):
+        memory = self._memories.pop(call_sid, None)
+        if memory is not None:
+            memory.close()
+
+    async def summarize(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """Fold `messages` into `previous_summary`"""
+        dialogue = format_history(messages)
+        prompt = (
+            f"Current summary:\n{previous_summary or '(none yet)'}\n\n"
+            f"New conversation lines:\n{dialogue}\n\n"
+            "Update the summary of this phone call in at most 5 short sentences. Keep every concrete "
+            "fact the customer gave (name, dates, times, email, products, problems, objections, "
+            "decisions) and what the agent offered or promised. No commentary."
+        )
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You maintain running summaries of customer phone calls."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0,
+            max_tokens=settings.conversation_summary_max_tokens
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    def get_stats(self) -> Dict:
+        return {
+            "calls": len(self._memories),
+            "summarizing": sum(
+                1 for m in self._memories.values()
+                if m._summary_task is not None and not m._summary_task.done()
+            )
+        }
+
+
+# Global instance
+conversation_memory_service = ConversationMemoryService()
@@ -8,14 +8,36 @@ from openai import AsyncOpenAI
 import json
 import os
 
+from services.datetime_rules import parse_datetime_rules
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_BUSINESS_HOURS = {"start": "09:00", "end": "18:00"}
+
 class DateTimeParserService:
-    """AI-powered date/time parsing - no hardcoded keywords needed"""
+    """Rule-based date/time parsing first, AI-powered parsing for whatever the rules can't resolve"""
     
     def __init__(self):
         self.default_timezone = "UTC"
         self.client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # How utterances were answered: rules found a date/time, rules found none, sent to the LLM
+        self.stats = {"rules": 0, "no_datetime": 0, "llm": 0}
+    
+    def parse_datetime_from_text(
+        self,
+        user_input: str,
+        user_timezone: str = None,
+        business_hours: Dict = None
+    ) -> Dict:
+        """
+        Rule-based parsing only (no LLM call), same result shape as
+        parse_user_datetime. Unresolvable phrasing returns parsed_successfully False.
+        """
+        tz = pytz.timezone(user_timezone or self.default_timezone)
+        now = datetime.now(tz)
+        business_hours = business_hours or DEFAULT_BUSINESS_HOURS
+        rules = parse_datetime_rules(user_input, now.date(), business_hours)
+        return self._build_result(user_input, tz, now, business_hours, rules, parser="rules")
     
     async def parse_user_datetime(
         self,
@@ -24,8 +46,11 @@ class DateTimeParserService:
         business_hours: Dict = None
     ) -> Dict:
         """
-        Use AI to intelligently extract date/time from natural language
-        No keyword matching - GPT figures it out
+        Extract date/time from natural language. Common phrasing (weekdays,
+        relative days, ordinal dates, parts of the day, 12/24-hour times) is
+        resolved by rules; GPT is asked only when the utterance has date/time
+        words the rules can't pin down. Utterances without any ("yes", "my
+        email is ...") never reach the LLM.
         
         Args:
             user_input: User's message
@@ -45,6 +70,17 @@ class DateTimeParserService:
         try:
             tz = pytz.timezone(user_timezone or self.default_timezone)
             now = datetime.now(tz)
+            business_hours = business_hours or DEFAULT_BUSINESS_HOURS
+            
+            # Deterministic fast path
+            rules = parse_datetime_rules(user_input, now.date(), business_hours)
+            if rules['resolved']:
+                self.stats["rules" if rules['has_datetime'] else "no_datetime"] += 1
+                logger.info(f"⚡ Rule-based datetime: {rules['reasoning']}")
+                return self._build_result(user_input, tz, now, business_hours, rules, parser="rules")
+            
+            self.stats["llm"] += 1
+            logger.info(f"🤖 Datetime needs AI: {rules['reasoning']}")
             
             # Ask GPT to extract date/time intelligently
             prompt = f"""Extract date and/or time from user's message.
@@ -110,14 +146,6 @@ Respond with ONLY the JSON, no other text."""
             
             logger.info(f"🤖 AI datetime analysis: {result.get('reasoning')}")
             
-            # If no datetime found, return early
-            if not result.get('has_datetime'):
-                return {
-                    'parsed_successfully': False,
-                    'original_input': user_input,
-                    'ai_reasoning': result.get('reasoning')
-                }
-            
             # Parse the AI-extracted date/time
             parsed_date = None
             parsed_time = None
@@ -134,67 +162,17 @@ Respond with ONLY the JSON, no other text."""
                 except:
                     logger.warning(f"Could not parse AI-provided time: {result['time']}")
             
-            # Handle "now" scenario
-            if result.get('is_now') and business_hours:
-                start_time = datetime.strptime(business_hours['start'], '%H:%M').time()
-                end_time = datetime.strptime(business_hours['end'], '%H:%M').time()
-                current_time = now.time()
-                
-                if start_time <= current_time <= end_time:
-                    # Within business hours - schedule 30 min from now
-                    next_slot = now + timedelta(minutes=30)
-                    parsed_date = next_slot.date()
-                    parsed_time = next_slot.time()
-                    logger.info(f"'now' → {parsed_date} at {parsed_time}")
-                else:
-                    # After hours - schedule next business day at opening
-                    if current_time > end_time:
-                        parsed_date = (now + timedelta(days=1)).date()
-                    else:
-                        parsed_date = now.date()
-                    parsed_time = start_time
-                    logger.info(f"After hours 'now' → {parsed_date} at {parsed_time}")
-            
-            # If we have both date and time, return success
-            if parsed_date and parsed_time:
-                dt = datetime.combine(parsed_date, parsed_time)
-                dt = tz.localize(dt)
-                
-                # Validate business hours
-                within_hours = True
-                if business_hours:
-                    start_time = datetime.strptime(business_hours['start'], '%H:%M').time()
-                    end_time = datetime.strptime(business_hours['end'], '%H:%M').time()
-                    within_hours = start_time <= parsed_time <= end_time
-                
-                return {
-                    'date': parsed_date.strftime('%Y-%m-%d'),
-                    'time': parsed_time.strftime('%H:%M'),
-                    'datetime_iso': dt.isoformat(),
-                    'parsed_successfully': True,
-                    'within_business_hours': within_hours,
-                    'user_friendly': self._format_user_friendly(parsed_date, parsed_time),
-                    'ai_reasoning': result.get('reasoning'),
-                    'timezone': str(tz)
-                }
-            
-            # Only date or only time parsed
-            elif parsed_date:
-                return {
-                    'date': parsed_date.strftime('%Y-%m-%d'),
-                    'time': None,
-                    'parsed_successfully': True,
-                    'needs_time': True,
-                    'ai_reasoning': result.get('reasoning'),
-                    'timezone': str(tz)
-                }
-            
-            else:
-                return {
-                    'parsed_successfully': False,
-                    'original_input': user_input,
-                    'ai_reasoning': result.get('reasoning')
-                }
+            return self._build_result(
+                user_input, tz, now, business_hours,
+                {
+                    'has_datetime': result.get('has_datetime'),
+                    'date': parsed_date,
+                    'time': parsed_time,
+                    'is_now': result.get('is_now'),
+                    'reasoning': result.get('reasoning')
+                },
+                parser="llm"
+            )
         
         except json.JSONDecodeError as e:
             logger.error(f"AI returned invalid JSON: {result_text}")
@@ -215,6 +193,100 @@ Respond with ONLY the JSON, no other text."""
                 'original_input': user_input
             }
     
+    def _build_result(
+        self,
+        user_input: str,
+        tz,
+        now: datetime,
+        business_hours: Dict,
+        extracted: Dict,
+        parser: str
+    ) -> Dict:
+        """Result dict from an extracted {'has_datetime', 'date', 'time', 'is_now', 'reasoning'}"""
+        # If no datetime found, return early
+        if not extracted.get('has_datetime'):
+            return {
+                'parsed_successfully': False,
+                'original_input': user_input,
+                'ai_reasoning': extracted.get('reasoning'),
+                'parser': parser
+            }
+        
+        parsed_date = extracted.get('date')
+        parsed_time = extracted.get('time')
+        
+        # Handle "now" scenario
+        if extracted.get('is_now') and business_hours:
+            start_time = datetime.strptime(business_hours['start'], '%H:%M').time()
+            end_time = datetime.strptime(business_hours['end'], '%H:%M').time()
+            current_time = now.time()
+            
+            if start_time <= current_time <= end_time:
+                # Within business hours - schedule 30 min from now
+                next_slot = now + timedelta(minutes=30)
+                parsed_date = next_slot.date()
+                parsed_time = next_slot.time()
+                logger.info(f"'now' → {parsed_date} at {parsed_time}")
+            else:
+                # After hours - schedule next business day at opening
+                if current_time > end_time:
+                    parsed_date = (now + timedelta(days=1)).date()
+                else:
+                    parsed_date = now.date()
+                parsed_time = start_time
+                logger.info(f"After hours 'now' → {parsed_date} at {parsed_time}")
+        
+        # If we have both date and time, return success
+        if parsed_date and parsed_time:
+            dt = datetime.combine(parsed_date, parsed_time)
+            dt = tz.localize(dt)
+            
+            # Validate business hours
+            within_hours = True
+            if business_hours:
+                start_time = datetime.strptime(business_hours['start'], '%H:%M').time()
+                end_time = datetime.strptime(business_hours['end'], '%H:%M').time()
+                within_hours = start_time <= parsed_time <= end_time
+            
+            return {
+                'date': parsed_date.strftime('%Y-%m-%d'),
+                'time': parsed_time.strftime('%H:%M'),
+                'datetime_iso': dt.isoformat(),
+                'parsed_successfully': True,
+                'within_business_hours': within_hours,
+                'user_friendly': self._format_user_friendly(parsed_date, parsed_time),
+                'ai_reasoning': extracted.get('reasoning'),
+                'timezone': str(tz),
+                'parser': parser
+            }
+        
+        # Only date or only time parsed
+        elif parsed_date:
+            return {
+                'date': parsed_date.strftime('%Y-%m-%d'),
+                'time': None,
+                'parsed_successfully': True,
+                'needs_time': True,
+                'ai_reasoning': extracted.get('reasoning'),
+                'timezone': str(tz),
+                'parser': parser
+            }
+        
+        else:
+            return {
+                'parsed_successfully': False,
+                'original_input': user_input,
+                'ai_reasoning': extracted.get('reasoning'),
+                'parser': parser
+            }
+    
+    def get_stats(self) -> Dict:
+        total = sum(self.stats.values())
+        return {
+            **self.stats,
+            "llm_rate": round(self.stats["llm"] / total, 3) if total else 0.0
+        }
+    
     def _format_user_friendly(self, date_obj: date, time_obj: time) -> str:
         """Format for user readability: 'Monday, December 1st at 2:00 PM'"""
         day_name = date_obj.strftime('%A')
@@ -0,0 +1,307 @@
+# src/services/datetime_rules.py
+#
+# Rule-based date/time extraction for booking utterances, tried before the
+# LLM in DateTimeParserService. Pure and dependency-free, so it can be
+# measured on its own (see benchmarks/bench_datetime_parser.py).
+import re
+from datetime import date, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6
+}
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3,
+    "april": 4, "apr": 4, "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7,
+    "august": 8, "aug": 8, "september": 9, "sept": 9, "sep": 9,
+    "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12
+}
+
+# Same defaults the LLM prompt uses for parts of the day
+DAY_PARTS = {"morning": time(10, 0), "afternoon": time(14, 0), "evening": time(18, 0), "tonight": time(18, 0)}
+
+NUMBER_WORDS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7}
+
+_ORDINAL_UNITS = ["first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth", "ninth"]
+ORDINAL_WORDS = {word: i + 1 for i, word in enumerate(_ORDINAL_UNITS)}
+ORDINAL_WORDS.update({
+    "tenth": 10, "eleventh": 11, "twelfth": 12, "thirteenth": 13, "fourteenth": 14, "fifteenth": 15,
+    "sixteenth": 16, "seventeenth": 17, "eighteenth": 18, "nineteenth": 19, "twentieth": 20, "thirtieth": 30
+})
+for _i, _word in enumerate(_ORDINAL_UNITS):
+    ORDINAL_WORDS[f"twenty {_word}"] = ORDINAL_WORDS[f"twenty-{_word}"] = 21 + _i
+ORDINAL_WORDS["thirty first"] = ORDINAL_WORDS["thirty-first"] = 31
+
+
+def _alternation(words) -> str:
+    return "|".join(sorted((re.escape(w) for w in words), key=len, reverse=True))
+
+
+_MONTH = _alternation(MONTHS)
+_WEEKDAY = _alternation(WEEKDAYS)
+_ORDINAL_WORD = _alternation(ORDINAL_WORDS)
+_DAY = rf"(?:(?P<num>\d{{1,2}})(?:st|nd|rd|th)?|(?P<word>{_ORDINAL_WORD}))"
+
+EMAIL_RE = re.compile(r"\S+@\S+")
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+MONTH_DAY_RE = re.compile(rf"\b(?P<month>{_MONTH})\.?\s+(?:the\s+)?{_DAY}\b")
+DAY_MONTH_RE = re.compile(rf"\b(?:the\s+)?{_DAY}\s+(?:of\s+)?(?P<month>{_MONTH})\b")
+# "the 15th", "on the first", "the first of the month"; a bare word ordinal
+# ("the first one", "the second option") usually picks an offered slot, so
+# it is only a date with "on" or "of the month" and otherwise goes to the LLM
+ORDINAL_DAY_RE = re.compile(
+    rf"\b(?P<on>on\s+)?the\s+(?:(?P<num>\d{{1,2}})(?:st|nd|rd|th)|(?P<word>{_ORDINAL_WORD}))\b"
+    r"(?P<of_month>\s+of\s+(?:the|this)\s+month\b)?"
+    r"(?!\s+(?:one|ones|option|options|slot|slots|choice|of\s+(?:those|these|them)))"
+)
+RELATIVE_DAY_RE = re.compile(r"\b(day after tomorrow|today|tonight|tomorrow|tmrw)\b")
+IN_DAYS_RE = re.compile(rf"\bin\s+(\d+|{_alternation(NUMBER_WORDS)})\s+days?\b")
+WEEKDAY_RE = re.compile(rf"\b(?:(this|next|coming)\s+)?({_WEEKDAY})s?\b")
+ASAP_RE = re.compile(r"\b(asap|as soon as possible|immediately|right away|earliest(?: possible| available)?)\b")
+
+MERIDIEM_TIME_RE = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(a\.?\s?m\.?|p\.?\s?m\.?)(?![a-z])")
+CLOCK_TIME_RE = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+AT_HOUR_RE = re.compile(
+    r"\b(?:at|around|about)\s+(\d{1,2})(?:\s*o'?\s?clock)?\b(?![:.]?\d|\s*(?:st|nd|rd|th|%|days?|weeks?|months?|years?))"
+)
+OCLOCK_RE = re.compile(r"\b(\d{1,2})\s*o'?\s?clock\b")
+# "at 0930", "at 1530 hours": hour and minutes written without a separator
+COMPACT_TIME_RE = re.compile(r"\b(?:at|around|about|by)\s+(\d{1,2})([0-5]\d)(?:\s*(?:hours|hrs))?\b")
+NOON_RE = re.compile(r"\b(noon|midday|midnight)\b")
+DAY_PART_RE = re.compile(r"\b(morning|afternoon|evening|tonight)\b")
+
+# Date/time vocabulary these rules do not resolve; left over after the
+# patterns above, it sends the utterance to the LLM
+UNRESOLVED_RE = re.compile(
+    r"\b(now|later|week|weekend|weekends|month|year|fortnight|days?|hours?|minutes?|mins?|o'?clock|noon|"
+    r"half past|quarter|january|february|april|june|july|august|september|october|november|december|"
+    rf"{_WEEKDAY}|\d{{1,2}}(?:st|nd|rd|th)?|\d{{3,4}}|the\s+(?:{_ORDINAL_WORD}))\b|\b\d{{1,2}}[/.-]\d{{1,2}}\b"
+)
+# Hindi / Hinglish date words (the agents reply in Hinglish to Hindi speakers);
+# not resolved here, they go to the LLM
+HINDI_HINT_RE = re.compile(
+    r"[\u0900-\u097f]|\b(aaj|kal|parso|parson|subah|dopahar|shaam|sham|raat|baje|bje|somvar|mangalvar|"
+    r"budhvar|guruvar|shukravar|shanivar|ravivar|hafte|mahine|tarikh)\b"
+)
+NEGATION_RE = re.compile(r"\b(not|no|can't|cannot|won't|isn't|doesn't|don't|except|instead|rather|busy|unavailable)\b")
+
+
+def _day_number(match) -> int:
+    return int(match.group("num")) if match.group("num") else ORDINAL_WORDS[match.group("word")]
+
+
+def _month_day(today: date, month: int, day: int) -> Optional[date]:
+    """The next `month`/`day` on or after today"""
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = date(year, month, day)
+        except ValueError:
+            return None
+        if candidate >= today:
+            return candidate
+    return None
+
+
+def _day_of_month(today: date, day: int) -> Optional[date]:
+    """The next date with day-of-month `day` on or after today"""
+    year, month = today.year, today.month
+    for _ in range(3):
+        try:
+            candidate = date(year, month, day)
+            if candidate >= today:
+                return candidate
+        except ValueError:
+            pass
+        month, year = (1, year + 1) if month == 12 else (month + 1, year)
+    return None
+
+
+def _within(value: time, business_hours: Dict) -> bool:
+    start = time.fromisoformat(business_hours.get("start", "09:00"))
+    end = time.fromisoformat(business_hours.get("end", "18:00"))
+    return start <= value <= end
+
+
+def _bare_hour(hour: int, minute: int, day_part: Optional[str], business_hours: Dict) -> Optional[time]:
+    """'at 3' / '3:30' without am/pm: the day part decides, else whichever is within business hours"""
+    if hour > 23 or minute > 59:
+        return None
+    if hour >= 13 or hour == 0:
+        return time(hour, minute)
+    if day_part in ("afternoon", "evening", "tonight"):
+        return time(hour % 12 + 12, minute)
+    if day_part == "morning":
+        return time(hour % 12, minute)
+    morning, afternoon = time(hour, minute), time(hour % 12 + 12, minute)
+    if _within(morning, business_hours) or not _within(afternoon, business_hours):
+        return morning
+    return afternoon
+
+
+class _Scan:
+    """Matches found so far and the character spans they consumed"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.spans: List[Tuple[int, int]] = []
+        self.dates: List[date] = []
+        self.times: List[time] = []
+        self.notes: List[str] = []
+        self.invalid = False
+
+    def free(self, match) -> bool:
+        start, end = match.span()
+        return all(end <= s or start >= e for s, e in self.spans)
+
+    def take(self, match, note: str):
+        self.spans.append(match.span())
+        self.notes.append(note)
+
+    def remainder(self) -> str:
+        chars = list(self.text)
+        for start, end in self.spans:
+            chars[start:end] = " " * (end - start)
+        return "".join(chars)
+
+
+def parse_datetime_rules(text: str, today: date, business_hours: Optional[Dict] = None) -> Dict:
+    """
+    Extract a date and/or time from a booking utterance without the LLM.
+
+    Returns {'resolved', 'has_datetime', 'date', 'time', 'is_now', 'reasoning'}.
+    `resolved` is False when the text has date/time words these rules cannot
+    pin down (ranges, "next week", negations, conflicting dates, ...); the
+    caller should ask the LLM then. Otherwise the result is final, including
+    "no date or time mentioned".
+    """
+    business_hours = business_hours or {"start": "09:00", "end": "18:00"}
+    scan = _Scan(EMAIL_RE.sub(lambda m: " " * len(m.group(0)), (text or "").lower()))
+    day_part_match = DAY_PART_RE.search(scan.text)
+    day_part = day_part_match.group(1) if day_part_match else None
+
+    # Dates, most specific first
+    for match in ISO_DATE_RE.finditer(scan.text):
+        try:
+            scan.dates.append(date(int(match.group(1)), int(match.group(2)), int(match.group(3))))
+            scan.take(match, "ISO date")
+        except ValueError:
+            scan.invalid = True
+    for pattern in (MONTH_DAY_RE, DAY_MONTH_RE):
+        for match in pattern.finditer(scan.text):
+            if not scan.free(match):
+                continue
+            resolved = _month_day(today, MONTHS[match.group("month")], _day_number(match))
+            if resolved is None:
+                scan.invalid = True
+                continue
+            scan.dates.append(resolved)
+            scan.take(match, "month and day")
+    for match in ORDINAL_DAY_RE.finditer(scan.text):
+        if not scan.free(match):
+            continue
+        if match.group("word") and not (match.group("on") or match.group("of_month")):
+            continue
+        resolved = _day_of_month(today, _day_number(match))
+        if resolved is None:
+            scan.invalid = True
+            continue
+        scan.dates.append(resolved)
+        scan.take(match, "day of month")
+    for match in RELATIVE_DAY_RE.finditer(scan.text):
+        word = match.group(1)
+        offset = {"day after tomorrow": 2, "tomorrow": 1, "tmrw": 1}.get(word, 0)
+        scan.dates.append(today + timedelta(days=offset))
+        scan.take(match, word)
+        if word == "tonight":
+            # "tonight" is also the day part; keep its span free for the time pass
+            scan.spans.pop()
+    for match in IN_DAYS_RE.finditer(scan.text):
+        count = match.group(1)
+        scan.dates.append(today + timedelta(days=int(count) if count.isdigit() else NUMBER_WORDS[count]))
+        scan.take(match, "in N days")
+    for match in WEEKDAY_RE.finditer(scan.text):
+        qualifier, weekday = match.group(1), WEEKDAYS[match.group(2)]
+        delta = (weekday - today.weekday()) % 7
+        if delta == 0 and qualifier != "this":
+            delta = 7
+        scan.dates.append(today + timedelta(days=delta))
+        scan.take(match, "weekday")
+
+    # Times: explicit clock times, then noon/midnight, then parts of the day
+    for match in MERIDIEM_TIME_RE.finditer(scan.text):
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            scan.invalid = True
+            continue
+        pm = match.group(3).startswith("p")
+        scan.times.append(time(hour % 12 + (12 if pm else 0), minute))
+        scan.take(match, "clock time")
+    for pattern in (CLOCK_TIME_RE, COMPACT_TIME_RE, AT_HOUR_RE, OCLOCK_RE):
+        for match in pattern.finditer(scan.text):
+            if not scan.free(match):
+                continue
+            minute = int(match.group(2)) if pattern in (CLOCK_TIME_RE, COMPACT_TIME_RE) else 0
+            resolved = _bare_hour(int(match.group(1)), minute, day_part, business_hours)
+            if resolved is None:
+                scan.invalid = True
+                continue
+            scan.times.append(resolved)
+            scan.take(match, "clock time")
+    for match in NOON_RE.finditer(scan.text):
+        scan.times.append(time(0, 0) if match.group(1) == "midnight" else time(12, 0))
+        scan.take(match, match.group(1))
+    for match in DAY_PART_RE.finditer(scan.text):
+        if not scan.times:
+            scan.times.append(DAY_PARTS[match.group(1)])
+        scan.take(match, match.group(1))
+
+    is_now = False
+    asap = ASAP_RE.search(scan.text)
+    if asap:
+        scan.take(asap, "as soon as possible")
+        is_now = not scan.dates and not scan.times
+
+    dates, times = set(scan.dates), set(scan.times)
+    mentioned = bool(dates or times or is_now)
+    remainder = scan.remainder()
+    leftover = UNRESOLVED_RE.search(remainder) or HINDI_HINT_RE.search(remainder)
+
+    if scan.invalid:
+        return _unresolved("Date or time out of range")
+    if len(dates) > 1 or len(times) > 1:
+        return _unresolved("More than one date or time mentioned")
+    if mentioned and NEGATION_RE.search(scan.text):
+        return _unresolved("Date or time mentioned with a negation")
+    if leftover:
+        return _unresolved(f"Unresolved date/time words: '{leftover.group(0)}'")
+
+    if not mentioned:
+        return {
+            "resolved": True,
+            "has_datetime": False,
+            "date": None,
+            "time": None,
+            "is_now": False,
+            "reasoning": "No date or time mentioned"
+        }
+    return {
+        "resolved": True,
+        "has_datetime": True,
+        "date": scan.dates[0] if dates else None,
+        "time": scan.times[0] if times else None,
+        "is_now": is_now,
+        "reasoning": "Rule-based: " + ", ".join(dict.fromkeys(scan.notes))
+    }
+
+
+def _unresolved(reason: str) -> Dict:
+    return {
+        "resolved": False,
+        "has_datetime": False,
+        "date": None,
+        "time": None,
+        "is_now": False,
+        "reasoning": reason
+    }
@@ -0,0 +1,295 @@
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+from sqlalchemy import insert, update, bindparam, func
+from sqlalchemy.exc import InterfaceError, OperationalError, StatementError
+
+from config.settings import settings
+from database.config import engine
+from database.models import Call, CallEvent, ConversationTurn
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failed flushes before the batch is retried row by row, so one
+# bad row (constraint violation, bad data) can't hold back everything else
+ISOLATE_AFTER_FAILURES = 3
+
+
+def _is_row_error(error: Exception) -> bool:
+    """The statement itself was rejected, as opposed to the database being unreachable"""
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return False
+    return isinstance(error, StatementError) and not getattr(error, "connection_invalidated", False)
+
+
+class DBWriteBuffer:
+    """
+    Write-behind buffer for high-volume, fire-and-forget call writes.
+
+    Conversation turns and CallEvent rows are appended to in-memory lists and
+    Call status updates are coalesced per call_sid (last write wins). A single
+    background task flushes everything in one transaction every
+    flush_interval_ms, or sooner once batch_size rows are pending, using
+    executemany inserts/updates so a flush costs a handful of round-trips
+    regardless of how many calls produced the rows.
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: int = 250,
+        batch_size: int = 500,
+        max_buffered: int = 50000
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+
+        self._turns: List[Dict[str, Any]] = []
+        self._events: List[Dict[str, Any]] = []
+        self._status_updates: Dict[str, Dict[str, Any]] = {}
+
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._consecutive_failures = 0
+
+        self.stats = {
+            "flushes": 0,
+            "failed_flushes": 0,
+            "rows_written": 0,
+            "rows_dropped": 0,
+            "rows_rejected": 0,
+            "last_flush_ms": 0.0,
+            "last_flush_rows": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Producers (non-blocking, safe to call from any coroutine)
+    # ------------------------------------------------------------------
+
+    def add_turn(self, call_sid: str, role: str, content: str, created_at: Optional[datetime] = None):
+        """Queue a ConversationTurn insert"""
+        self._turns.append({
+            "call_sid": call_sid,
+            "role": role,
+            "content": content,
+            "created_at": created_at or datetime.utcnow()
+        })
+        self._after_enqueue()
+
+    def add_event(self, call_sid: str, event: str, payload: Optional[Dict[str, Any]] = None):
+        """Queue a CallEvent insert"""
+        self._events.append({
+            "call_sid": call_sid,
+            "event": event,
+            "payload": payload,
+            "occurred_at": datetime.utcnow()
+        })
+        self._after_enqueue()
+
+    def update_call_status(self, call_sid: str, status: str, ended_at: Optional[datetime] = None):
+        """Queue a Call status update; only the latest update per call is written"""
+        previous = self._status_updates.get(call_sid)
+        self._status_updates[call_sid] = {
+            "b_call_sid": call_sid,
+            "b_status": status,
+            "b_ended_at": ended_at or (previous["b_ended_at"] if previous else None)
+        }
+        self._after_enqueue()
+
+    def queue_depth(self) -> int:
+        return len(self._turns) + len(self._events) + len(self._status_updates)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "queue_depth": self.queue_depth(),
+            "pending_turns": len(self._turns),
+            "pending_events": len(self._events),
+            "pending_status_updates": len(self._status_updates),
+            **self.stats
+        }
+
+    def _after_enqueue(self):
+        self._shed_overflow()
+        if self.queue_depth() >= self.batch_size:
+            self._wakeup.set()
+
+    def _shed_overflow(self):
+        overflow = self.queue_depth() - self.max_buffered
+        if overflow > 0:
+            # DB is unreachable or far behind: shed the oldest rows rather than grow unbounded
+            dropped = self._drop_oldest(overflow)
+            self.stats["rows_dropped"] += dropped
+            logger.warning(f"DB write buffer full, dropped {dropped} oldest rows")
+
+    def _drop_oldest(self, count: int) -> int:
+        dropped = 0
+        for rows in (self._events, self._turns):
+            take = min(count - dropped, len(rows))
+            if take:
+                del rows[:take]
+                dropped += take
+        # Status updates last: they are coalesced per call and the most valuable
+        for call_sid in list(self._status_updates)[:count - dropped]:
+            del self._status_updates[call_sid]
+            dropped += 1
+        return dropped
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._flush_loop())
+        logger.info(
+            f"DB write buffer started (interval={self.flush_interval * 1000:.0f}ms, batch={self.batch_size})"
+        )
+
+    async def stop(self):
+        """Stop the flusher and write everything still buffered"""
+        self._running = False
+        if self._task:
+            self._wakeup.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        logger.info("DB write buffer stopped")
+
+    async def _flush_loop(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"DB write buffer flush loop error: {e}")
+
+    # ------------------------------------------------------------------
+    # Flush
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """Write all buffered rows in a single transaction; returns rows written"""
+        async with self._flush_lock:
+            if not self.queue_depth():
+                return 0
+
+            turns, self._turns = self._turns, []
+            events, self._events = self._events, []
+            status_updates, self._status_updates = self._status_updates, {}
+
+            start = time.perf_counter()
+            try:
+                async with engine.begin() as conn:
+                    await self._write(conn, turns, events, list(status_updates.values()))
+
+            except Exception as e:
+                self.stats["failed_flushes"] += 1
+                self._consecutive_failures += 1
+                if self._consecutive_failures < ISOLATE_AFTER_FAILURES:
+                    logger.error(f"DB write buffer flush failed, re-queueing rows: {e}")
+                    self._requeue(turns, events, status_updates)
+                    return 0
+                logger.error(
+                    f"DB write buffer flush failed {self._consecutive_failures} times, writing rows one by one: {e}"
+                )
+                written, complete = await self._write_one_by_one(turns, events, status_updates)
+            else:
+                written, complete = len(turns) + len(events) + len(status_updates), True
+
+            if complete:
+                self._consecutive_failures = 0
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += written
+            self.stats["last_flush_rows"] = written
+            self.stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return written
+
+    async def _write(self, conn, turns, events, status_updates):
+        if turns:
+            await conn.execute(insert(ConversationTurn.__table__), turns)
+        if events:
+            await conn.execute(insert(CallEvent.__table__), events)
+        if status_updates:
+            await conn.execute(
+                update(Call.__table__)
+                .where(Call.__table__.c.call_sid == bindparam("b_call_sid"))
+                .values(
+                    status=bindparam("b_status"),
+                    ended_at=func.coalesce(bindparam("b_ended_at"), Call.__table__.c.ended_at),
+                    updated_at=datetime.now()
+                ),
+                status_updates
+            )
+
+    async def _write_one_by_one(self, turns, events, status_updates) -> Tuple[int, bool]:
+        """
+        Write a repeatedly failing batch a row per transaction. Rows the
+        database rejects are logged and dropped; if it becomes unreachable
+        the unwritten rest is re-queued. Returns (rows written, whether the
+        whole batch was handled).
+        """
+        rows = (
+            [("turn", row) for row in turns]
+            + [("event", row) for row in events]
+            + [("status", row) for row in status_updates.values()]
+        )
+        written = 0
+        for index, (kind, row) in enumerate(rows):
+            try:
+                async with engine.begin() as conn:
+                    await self._write(
+                        conn,
+                        [row] if kind == "turn" else [],
+                        [row] if kind == "event" else [],
+                        [row] if kind == "status" else []
+                    )
+                written += 1
+            except Exception as e:
+                if not _is_row_error(e):
+                    logger.error(f"DB write buffer lost the database mid-batch, re-queueing rows: {e}")
+                    rest = rows[index:]
+                    self._requeue(
+                        [r for k, r in rest if k == "turn"],
+                        [r for k, r in rest if k == "event"],
+                        {r["b_call_sid"]: r for k, r in rest if k == "status"}
+                    )
+                    return written, False
+                self.stats["rows_rejected"] += 1
+                call_sid = row.get("call_sid") or row.get("b_call_sid")
+                logger.error(f"DB write buffer dropped a rejected {kind} row for {call_sid}: {e}")
+        return written, True
+
+    def _requeue(self, turns, events, status_updates):
+        """Put a failed batch back in front of anything queued since"""
+        self._turns = turns + self._turns
+        self._events = events + self._events
+        # Updates queued after the failed batch are newer and take precedence
+        self._status_updates = {**status_updates, **self._status_updates}
+        # No wakeup here: the retry waits for the next interval instead of spinning
+        self._shed_overflow()
+
+
+# Global instance
+db_write_buffer = DBWriteBuffer(
+    flush_interval_ms=settings.db_write_flush_interval_ms,
+    batch_size=settings.db_write_batch_size,
+    max_buffered=settings.db_write_max_buffered
+)
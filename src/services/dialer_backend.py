@@ -0,0 +1,322 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+from config.settings import settings
+from services.resource_registry import resource_registry
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class DialerBackend:
+    """
+    Shared state for the campaign dialer.
+
+    Every worker runs its own dispatcher; the backend is what keeps them from
+    stepping on each other:
+      - campaigns: the shared campaign registry all dispatchers dial from
+      - call leases: a CampaignCall row is dialed by whoever holds its lease
+      - slots: the global concurrent-call limit, one slot per live call,
+        kept alive by heartbeats so a dead worker's slots expire
+      - rate tokens: token buckets shared by every worker
+      - calls: in-flight call records, so a status callback landing on any
+        worker can release the slot taken by the worker that dialed
+    """
+
+    # Campaign registry
+    async def upsert_campaign(self, campaign: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def remove_campaign(self, campaign_id: str):
+        raise NotImplementedError
+
+    async def list_campaigns(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    # Call leases
+    async def claim_call(self, call_id: str, owner: str, ttl: int) -> bool:
+        """Lease a call row for `ttl` seconds; succeeds if free or already held by `owner`"""
+        raise NotImplementedError
+
+    async def release_call(self, call_id: str, owner: str):
+        raise NotImplementedError
+
+    # Global concurrency slots
+    async def acquire_slot(self, slot_id: str, limit: int, ttl: int) -> bool:
+        raise NotImplementedError
+
+    async def refresh_slots(self, slot_ids: List[str], ttl: int):
+        raise NotImplementedError
+
+    async def release_slot(self, slot_id: str):
+        raise NotImplementedError
+
+    async def slots_in_use(self) -> int:
+        raise NotImplementedError
+
+    async def wait_for_slot(self, timeout: float):
+        """Block until some slot is released (anywhere) or the timeout passes"""
+        raise NotImplementedError
+
+    # Rate limiting
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; returns 0 if granted, else seconds until one is due"""
+        raise NotImplementedError
+
+    # In-flight calls
+    async def track_call(self, call_sid: str, record: Dict[str, Any], ttl: int):
+        raise NotImplementedError
+
+    async def pop_call(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemoryDialerBackend(DialerBackend):
+    """Single-process backend; the default and what tests run against"""
+
+    def __init__(self):
+        self._campaigns: Dict[str, Dict[str, Any]] = {}
+        self._leases: Dict[str, tuple] = {}      # call_id -> (owner, expires_at)
+        self._slots: Dict[str, float] = {}       # slot_id -> expires_at
+        self._buckets: Dict[str, tuple] = {}     # key -> (tokens, updated_at)
+        self._calls: Dict[str, tuple] = {}      # call_sid -> (expires_at, record)
+        self._slot_released = asyncio.Condition()
+
+        # Leases and call records whose release / status callback never came
+        # are reaped once expired; idle rate buckets after a while
+        resource_registry.register("dialer_leases", self._leases, expired=lambda lease, now: lease[1] <= now)
+        resource_registry.register("dialer_calls", self._calls, expired=lambda call, now: call[0] <= now)
+        self._buckets_resource = resource_registry.register(
+            "dialer_buckets", self._buckets, ttl=settings.call_resource_idle_seconds
+        )
+
+    async def upsert_campaign(self, campaign: Dict[str, Any]):
+        self._campaigns[campaign['campaign_id']] = dict(campaign)
+
+    async def remove_campaign(self, campaign_id: str):
+        self._campaigns.pop(campaign_id, None)
+
+    async def list_campaigns(self) -> List[Dict[str, Any]]:
+        return [dict(c) for c in self._campaigns.values()]
+
+    async def claim_call(self, call_id: str, owner: str, ttl: int) -> bool:
+        now = time.monotonic()
+        lease = self._leases.get(call_id)
+        if lease and lease[1] > now and lease[0] != owner:
+            return False
+        self._leases[call_id] = (owner, now + ttl)
+        return True
+
+    async def release_call(self, call_id: str, owner: str):
+        lease = self._leases.get(call_id)
+        if lease and lease[0] == owner:
+            del self._leases[call_id]
+
+    def _expire_slots(self):
+        now = time.monotonic()
+        for slot_id in [s for s, expires in self._slots.items() if expires <= now]:
+            del self._slots[slot_id]
+
+    async def acquire_slot(self, slot_id: str, limit: int, ttl: int) -> bool:
+        self._expire_slots()
+        if slot_id not in self._slots and len(self._slots) >= limit:
+            return False
+        self._slots[slot_id] = time.monotonic() + ttl
+        return True
+
+    async def refresh_slots(self, slot_ids: List[str], ttl: int):
+        expires = time.monotonic() + ttl
+        for slot_id in slot_ids:
+            if slot_id in self._slots:
+                self._slots[slot_id] = expires
+
+    async def release_slot(self, slot_id: str):
+        if self._slots.pop(slot_id, None) is not None:
+            async with self._slot_released:
+                self._slot_released.notify_all()
+
+    async def slots_in_use(self) -> int:
+        self._expire_slots()
+        return len(self._slots)
+
+    async def wait_for_slot(self, timeout: float):
+        async with self._slot_released:
+            try:
+                await asyncio.wait_for(self._slot_released.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (float(burst), now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets_resource.touch(key)
+        return wait
+
+    async def track_call(self, call_sid: str, record: Dict[str, Any], ttl: int):
+        self._calls[call_sid] = (time.monotonic() + ttl, dict(record))
+
+    async def pop_call(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        entry = self._calls.pop(call_sid, None)
+        return entry[1] if entry else None
+
+
+# Slot acquisition is check-and-add, so it must be atomic across workers.
+# Scores are expiry times taken from the Redis clock to avoid worker clock skew.
+_ACQUIRE_SLOT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local expires = now + tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) or redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], expires, ARGV[1])
+    return 1
+end
+return 0
+"""
+
+_REFRESH_SLOTS_SCRIPT = """
+local t = redis.call('TIME')
+local expires = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000) + tonumber(ARGV[1])
+for i = 2, #ARGV do
+    redis.call('ZADD', KEYS[1], 'XX', expires, ARGV[i])
+end
+return #ARGV - 1
+"""
+
+_TAKE_TOKEN_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+# A lease is taken if free or already held by the same owner (re-claim extends it)
+_CLAIM_LEASE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner and owner ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisDialerBackend(DialerBackend):
+    """Cluster backend: every worker pointed at the same Redis shares one dialer"""
+
+    def __init__(self, redis_url: str, key_prefix: str = "csai:dialer"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        self.client = aioredis.from_url(redis_url, decode_responses=True)
+        self.prefix = key_prefix
+        self._campaigns_key = f"{key_prefix}:campaigns"
+        self._slots_key = f"{key_prefix}:slots"
+        self._released_channel = f"{key_prefix}:slot-released"
+        self._acquire_slot = self.client.register_script(_ACQUIRE_SLOT_SCRIPT)
+        self._refresh_slots = self.client.register_script(_REFRESH_SLOTS_SCRIPT)
+        self._take_token = self.client.register_script(_TAKE_TOKEN_SCRIPT)
+        self._claim_lease = self.client.register_script(_CLAIM_LEASE_SCRIPT)
+        self._release_lease = self.client.register_script(_RELEASE_LEASE_SCRIPT)
+        self._pubsub = None
+
+    async def upsert_campaign(self, campaign: Dict[str, Any]):
+        await self.client.hset(self._campaigns_key, campaign['campaign_id'], json.dumps(campaign))
+
+    async def remove_campaign(self, campaign_id: str):
+        await self.client.hdel(self._campaigns_key, campaign_id)
+
+    async def list_campaigns(self) -> List[Dict[str, Any]]:
+        raw = await self.client.hgetall(self._campaigns_key)
+        return [json.loads(value) for value in raw.values()]
+
+    async def claim_call(self, call_id: str, owner: str, ttl: int) -> bool:
+        return bool(await self._claim_lease(keys=[f"{self.prefix}:lease:{call_id}"], args=[owner, ttl]))
+
+    async def release_call(self, call_id: str, owner: str):
+        await self._release_lease(keys=[f"{self.prefix}:lease:{call_id}"], args=[owner])
+
+    async def acquire_slot(self, slot_id: str, limit: int, ttl: int) -> bool:
+        return bool(await self._acquire_slot(keys=[self._slots_key], args=[slot_id, limit, ttl * 1000]))
+
+    async def refresh_slots(self, slot_ids: List[str], ttl: int):
+        if slot_ids:
+            await self._refresh_slots(keys=[self._slots_key], args=[ttl * 1000, *slot_ids])
+
+    async def release_slot(self, slot_id: str):
+        if await self.client.zrem(self._slots_key, slot_id):
+            await self.client.publish(self._released_channel, slot_id)
+
+    async def slots_in_use(self) -> int:
+        return await self.client.zcard(self._slots_key)
+
+    async def wait_for_slot(self, timeout: float):
+        if self._pubsub is None:
+            self._pubsub = self.client.pubsub()
+            await self._pubsub.subscribe(self._released_channel)
+        try:
+            await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Dialer slot subscription error: {e}")
+            await asyncio.sleep(timeout)
+
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        return float(await self._take_token(keys=[f"{self.prefix}:bucket:{key}"], args=[rate, burst]))
+
+    async def track_call(self, call_sid: str, record: Dict[str, Any], ttl: int):
+        await self.client.set(f"{self.prefix}:call:{call_sid}", json.dumps(record), ex=ttl)
+
+    async def pop_call(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.getdel(f"{self.prefix}:call:{call_sid}")
+        return json.loads(raw) if raw else None
+
+    async def close(self):
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self.client.aclose()
+
+
+def create_dialer_backend() -> DialerBackend:
+    """Backend selected by the dialer_backend setting"""
+    if settings.dialer_backend == "redis":
+        logger.info(f"Dialer backend: redis ({settings.dialer_key_prefix})")
+        return RedisDialerBackend(settings.redis_url, settings.dialer_key_prefix)
+    return InMemoryDialerBackend()
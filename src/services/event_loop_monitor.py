@@ -0,0 +1,65 @@
+from typing import Any, Deque, Dict, Optional
+from collections import deque
+import asyncio
+import logging
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopMonitor:
+    """
+    Measures event-loop lag: how late a periodic sleep wakes up.
+
+    Every media frame, transcript and TTS chunk of every call on a worker is
+    handled on one loop, so lag here is added directly to each caller's
+    latency; /stats reports its percentiles alongside the task count.
+    """
+
+    def __init__(self, interval: float, window: int = 600):
+        self.interval = interval
+        self._lag: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._lag.append(max(0.0, loop.time() - expected))
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sample())
+            logger.info(f"Event loop monitor started (every {self.interval}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        ordered = sorted(self._lag)
+        stats = {"samples": len(ordered), "interval_seconds": self.interval}
+        try:
+            stats["tasks"] = len(asyncio.all_tasks())
+        except RuntimeError:
+            stats["tasks"] = None
+        if ordered:
+            last = len(ordered) - 1
+            stats.update({
+                "lag_p50_ms": round(ordered[min(last, int(len(ordered) * 0.50))] * 1000, 2),
+                "lag_p95_ms": round(ordered[min(last, int(len(ordered) * 0.95))] * 1000, 2),
+                "lag_p99_ms": round(ordered[min(last, int(len(ordered) * 0.99))] * 1000, 2),
+                "lag_max_ms": round(ordered[-1] * 1000, 2)
+            })
+        return stats
+
+
+# Global instance
+event_loop_monitor = EventLoopMonitor(interval=settings.event_loop_lag_sample_seconds)
@@ -4,6 +4,9 @@ import logging
 from typing import Dict, Optional
 from openai import AsyncOpenAI
 from config.settings import settings
+from services.turn_tracer import turn_tracer
+from services.turn_deadline import turn_deadlines
+from services.conversation_memory import format_history, trim_to_budget
 import json
 
 logger = logging.getLogger(__name__)
@@ -12,9 +15,10 @@ class IntentDetectionService:
     """AI-powered intent and sentiment detection for sales calls"""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
         self.model = "gpt-4o-mini"
     
+    @turn_tracer.traced("customer_intent")
     async def detect_customer_intent(
         self,
         customer_message: str,
@@ -40,18 +44,15 @@ class IntentDetectionService:
         
         try:
             # Build conversation context
-            context_messages = []
             last_agent_question = ""
             
-            if conversation_history and len(conversation_history) > 0:
-                for msg in conversation_history[-6:]:  # Last 3 exchanges
-                    context_messages.append(f"{msg['role'].upper()}: {msg['content']}")
-                    
-                    # Track what agent last asked
-                    if msg['role'] == 'assistant':
-                        last_agent_question = msg['content']
+            context_messages = trim_to_budget(conversation_history, settings.conversation_router_history_tokens)
+            for msg in context_messages:
+                # Track what agent last asked
+                if msg['role'] == 'assistant':
+                    last_agent_question = msg['content']
             
-            conversation_context = "\n".join(context_messages) if context_messages else "No prior conversation"
+            conversation_context = format_history(context_messages) if context_messages else "No prior conversation"
             
             # prompt for intent detection
             system_prompt = f"""You are an expert at analyzing customer intent in {call_type} sales calls.
@@ -123,16 +124,21 @@ class IntentDetectionService:
             )
 
 
-            # Call OpenAI
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"}
+            # Call OpenAI (within the turn budget)
+            response = await turn_deadlines.run(
+                "intent_detection",
+                self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.1,
+                    response_format={"type": "json_object"}
+                )
             )
+            if response is None:
+                return self._fallback_intent('Turn budget exhausted, defaulting to neutral')
             
             result_text = response.choices[0].message.content
             
@@ -153,17 +159,21 @@ class IntentDetectionService:
             logger.error(traceback.format_exc())
             
             # Fallback to neutral
-            return {
-                'intent_type': 'neutral',
-                'sentiment': 'neutral',
-                'buying_readiness': 50,
-                'should_book': False,
-                'should_persuade': True,
-                'should_end_call': False,
-                'objection_type': 'none',
-                'reasoning': 'AI detection failed, defaulting to neutral',
-                'suggested_response_tone': 'informative'
-            }
+            return self._fallback_intent('AI detection failed, defaulting to neutral')
+
+    @staticmethod
+    def _fallback_intent(reasoning: str) -> Dict:
+        return {
+            'intent_type': 'neutral',
+            'sentiment': 'neutral',
+            'buying_readiness': 50,
+            'should_book': False,
+            'should_persuade': True,
+            'should_end_call': False,
+            'objection_type': 'none',
+            'reasoning': reasoning,
+            'suggested_response_tone': 'informative'
+        }
 
 # Global instance
 intent_detection_service = IntentDetectionService()
@@ -3,6 +3,8 @@ import logging
 from typing import Optional, Dict, List
 from openai import AsyncOpenAI
 from config.settings import settings
+from services.call_state_store import call_state_store
+from services.turn_tracer import turn_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -10,10 +12,11 @@ class IntentRouterService:
     """Route calls to appropriate specialized agents based on intent"""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
-        self.current_agent = {}  # Track current agent per call_sid
-        self.interaction_count = {}  # Track interaction count per call
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+        # Current agent and interaction count per call live in the shared call state store
+        self.store = call_state_store
         
+    @turn_tracer.traced("intent_routing")
     async def detect_intent(
         self,
         user_message: str,
@@ -105,24 +108,25 @@ Analyze the customer's request and determine which specialist can best help them
             logger.error(traceback.format_exc())
             return None
     
-    def set_current_agent(self, call_sid: str, agent_id: str):
+    async def set_current_agent(self, call_sid: str, agent_id: str):
         """Set the current agent for a call"""
-        self.current_agent[call_sid] = agent_id
+        await self.store.set(call_sid, "current_agent", agent_id)
         logger.info(f"Call {call_sid[:8]}... → Agent {agent_id[:8]}...")
     
-    def get_current_agent(self, call_sid: str, default_agent_id: str) -> str:
+    async def get_current_agent(self, call_sid: str, default_agent_id: str) -> str:
         """Get the current agent for a call"""
-        return self.current_agent.get(call_sid, default_agent_id)
+        return await self.store.get(call_sid, "current_agent", default_agent_id)
     
-    def increment_interaction(self, call_sid: str) -> int:
+    async def increment_interaction(self, call_sid: str) -> int:
         """Increment and return interaction count"""
-        self.interaction_count[call_sid] = self.interaction_count.get(call_sid, 0) + 1
-        return self.interaction_count[call_sid]
+        count = await self.store.get(call_sid, "interaction_count", 0) + 1
+        await self.store.set(call_sid, "interaction_count", count)
+        return count
     
-    def clear_call(self, call_sid: str):
+    async def clear_call(self, call_sid: str):
         """Clear call routing info"""
-        self.current_agent.pop(call_sid, None)
-        self.interaction_count.pop(call_sid, None)
+        await self.store.pop(call_sid, "current_agent")
+        await self.store.pop(call_sid, "interaction_count")
 
 # Global instance
 intent_router_service = IntentRouterService()
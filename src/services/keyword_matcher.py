@@ -0,0 +1,100 @@
+# src/services/keyword_matcher.py
+from typing import Dict, List, Optional, Sequence, Tuple
+import re
+
+
+def _trie_pattern(keywords: Sequence[str]) -> str:
+    """
+    Regex alternation for `keywords` shaped as a character trie
+    ("card lost|card stolen" -> "card\\ (?:lost|stolen)"), so the regex
+    engine branches once per character instead of retrying every keyword.
+    Longer keywords are preferred where one extends another.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        terminal = "" in node
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if terminal else "")
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """
+    Matches several named keyword lists against a text in one regex pass.
+
+    All keywords are compiled into a single trie-shaped regex with word
+    boundaries ("ok" does not match "book", "pain" does not match
+    "painting"). Every keyword present is reported, including ones inside a
+    longer phrase ("card lost" also reports "lost"), in the order the
+    keywords were listed. Build once and reuse; match() is the per-turn cost.
+    """
+
+    def __init__(self, categories: Dict[str, Sequence[str]]):
+        self.categories = {name: [kw.lower() for kw in keywords] for name, keywords in categories.items()}
+
+        # keyword -> [(category, position in that category's list)]
+        self._owners: Dict[str, List[Tuple[str, int]]] = {}
+        for name, keywords in self.categories.items():
+            for position, keyword in enumerate(keywords):
+                self._owners.setdefault(keyword, []).append((name, position))
+
+        # The lookahead lets matches overlap ("no thanks" and "thanks")
+        self._pattern = (
+            re.compile(r"(?=\b(" + _trie_pattern(list(self._owners)) + r")\b)") if self._owners else None
+        )
+
+        # Shorter keywords inside a keyword that starts at the same position
+        # are not reported by the regex, so add them when it matches
+        self._contained: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(
+                kw for kw in self._owners
+                if kw != keyword and re.search(r"\b" + re.escape(kw) + r"\b", keyword)
+            )
+            for keyword in self._owners
+        }
+
+        # keyword -> index of the first listed category it (or a keyword inside it) belongs to
+        order = {name: i for i, name in enumerate(self.categories)}
+        self._rank: Dict[str, int] = {
+            keyword: min(order[name] for kw in (keyword,) + self._contained[keyword] for name, _ in self._owners[kw])
+            for keyword in self._owners
+        }
+        self._names = list(self.categories)
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """{category: [matched keywords]} for every category with a match; `text` is lowercased here"""
+        if not self._pattern or not text:
+            return {}
+
+        found = set()
+        for keyword in self._pattern.findall(text.lower()):
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self._contained[keyword])
+
+        hits: Dict[str, List[Tuple[int, str]]] = {}
+        for keyword in found:
+            for name, position in self._owners[keyword]:
+                hits.setdefault(name, []).append((position, keyword))
+        return {name: [kw for _, kw in sorted(matches)] for name, matches in hits.items()}
+
+    def first_category(self, text: str) -> Optional[str]:
+        """The earliest-listed category with a match in `text`, for first-rule-wins lookups"""
+        if not self._pattern or not text:
+            return None
+        matches = self._pattern.findall(text.lower())
+        if not matches:
+            return None
+        rank = self._rank
+        return self._names[min(rank[keyword] for keyword in matches)]
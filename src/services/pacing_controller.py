@@ -0,0 +1,192 @@
+from typing import Any, Deque, Dict, Optional, Tuple
+from collections import deque
+import logging
+import math
+import time
+
+from config.settings import settings
+from services.resource_registry import resource_registry
+
+logger = logging.getLogger(__name__)
+
+# Before enough outcomes are seen, assume a typical outbound answer rate
+DEFAULT_ANSWER_RATE = 0.3
+DEFAULT_HANDLE_SECONDS = 120.0
+MIN_OUTCOMES = 10
+MIN_ANSWER_RATE = 0.05
+
+
+class PacingController:
+    """
+    Predictive pacing for outbound campaigns.
+
+    Goal: keep `target_utilization * max_live_calls` conversations connected.
+
+      concurrency = live target / answer rate         (dials in flight, incl. ringing)
+      dial rate   = live target / (AHT * answer rate) (Little's law on answered calls)
+
+    Both are scaled by a latency factor driven AIMD-style by the live pipeline:
+    when p95 LLM or TTS latency breaches its SLO the factor is cut, otherwise
+    it recovers additively. The dialer treats its configured limits as hard
+    ceilings on top of this.
+    """
+
+    def __init__(
+        self,
+        max_live_calls: int,
+        target_utilization: float,
+        llm_latency_slo_ms: float,
+        tts_latency_slo_ms: float,
+        window_seconds: int = 900,
+        latency_window_seconds: int = 60,
+        min_concurrency: int = 1,
+        decrease_factor: float = 0.7,
+        increase_step: float = 0.05,
+        min_latency_factor: float = 0.2,
+        max_call_seconds: int = 3600
+    ):
+        self.max_live_calls = max_live_calls
+        self.target_utilization = target_utilization
+        self.latency_slo_ms = {"llm": llm_latency_slo_ms, "tts": tts_latency_slo_ms}
+        self.window_seconds = window_seconds
+        self.latency_window_seconds = latency_window_seconds
+        self.min_concurrency = min_concurrency
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.min_latency_factor = min_latency_factor
+
+        self._outcomes: Deque[Tuple[float, bool]] = deque()          # (ts, answered)
+        self._handle_times: Deque[Tuple[float, float]] = deque()     # (ts, seconds)
+        self._latencies: Dict[str, Deque[Tuple[float, float]]] = {
+            "llm": deque(maxlen=2000),
+            "tts": deque(maxlen=2000)
+        }
+        # call_sid -> answered_at; a call whose terminal status never arrives
+        # stops counting as live after max_call_seconds
+        self._live: Dict[str, float] = {}
+        self._live_resource = resource_registry.register(
+            "pacing_live_calls",
+            self._live,
+            ttl=max_call_seconds,
+            max_entries=settings.call_resource_max_entries
+        )
+
+        self.latency_factor = 1.0
+        self._last_decrease = float("-inf")
+        self.concurrency = min_concurrency
+        self.dial_rate = 0.0
+        self.updated_at: Optional[float] = None
+
+    # Inputs
+
+    def record_answered(self, call_sid: str):
+        self._live[call_sid] = time.monotonic()
+        self._live_resource.touch(call_sid)
+
+    def record_outcome(self, call_sid: str, answered: bool, duration: Optional[float] = None):
+        now = time.monotonic()
+        self._live.pop(call_sid, None)
+        self._outcomes.append((now, answered))
+        if answered and duration:
+            self._handle_times.append((now, float(duration)))
+
+    def record_latency(self, stage: str, seconds: float):
+        """Observed latency of a pipeline stage ('llm' or 'tts') for one turn"""
+        samples = self._latencies.get(stage)
+        if samples is not None:
+            samples.append((time.monotonic(), seconds * 1000))
+
+    # Derived metrics
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        for window in (self._outcomes, self._handle_times):
+            while window and window[0][0] < cutoff:
+                window.popleft()
+        # Latency reacts to the last minute, not the whole outcome window
+        latency_cutoff = now - self.latency_window_seconds
+        for window in self._latencies.values():
+            while window and window[0][0] < latency_cutoff:
+                window.popleft()
+
+    def answer_rate(self) -> float:
+        if len(self._outcomes) < MIN_OUTCOMES:
+            return DEFAULT_ANSWER_RATE
+        answered = sum(1 for _, a in self._outcomes if a)
+        return max(MIN_ANSWER_RATE, answered / len(self._outcomes))
+
+    def average_handle_time(self) -> float:
+        if not self._handle_times:
+            return DEFAULT_HANDLE_SECONDS
+        return sum(s for _, s in self._handle_times) / len(self._handle_times)
+
+    def latency_p95_ms(self, stage: str) -> Optional[float]:
+        samples = sorted(ms for _, ms in self._latencies[stage])
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    # Control
+
+    def update(self, max_concurrency: int) -> Tuple[int, float]:
+        """Recompute the concurrency and dial rate (calls/sec) targets"""
+        now = time.monotonic()
+        self._trim(now)
+
+        breached = []
+        for stage, slo in self.latency_slo_ms.items():
+            p95 = self.latency_p95_ms(stage)
+            if p95 is not None and p95 > slo:
+                breached.append(stage)
+
+        if breached:
+            # Cut at most once per latency window, so one slow spell is not punished repeatedly
+            if now - self._last_decrease >= self.latency_window_seconds:
+                self.latency_factor = max(self.min_latency_factor, self.latency_factor * self.decrease_factor)
+                self._last_decrease = now
+        else:
+            self.latency_factor = min(1.0, self.latency_factor + self.increase_step)
+
+        live_target = self.max_live_calls * self.target_utilization * self.latency_factor
+        answer_rate = self.answer_rate()
+
+        self.concurrency = max(
+            self.min_concurrency,
+            min(max_concurrency, math.ceil(live_target / answer_rate))
+        )
+        self.dial_rate = live_target / (self.average_handle_time() * answer_rate)
+        self.updated_at = now
+
+        if breached:
+            logger.warning(
+                f"Pacing -> latency SLO breached ({', '.join(breached)}), "
+                f"factor={self.latency_factor:.2f} concurrency={self.concurrency}"
+            )
+        return self.concurrency, self.dial_rate
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "dial_rate_per_minute": round(self.dial_rate * 60, 2),
+            "latency_factor": round(self.latency_factor, 3),
+            "live_calls": len(self._live),
+            "max_live_calls": self.max_live_calls,
+            "target_utilization": self.target_utilization,
+            "utilization": round(len(self._live) / self.max_live_calls, 3) if self.max_live_calls else None,
+            "answer_rate": round(self.answer_rate(), 3),
+            "outcomes_in_window": len(self._outcomes),
+            "average_handle_seconds": round(self.average_handle_time(), 1),
+            "llm_p95_ms": self.latency_p95_ms("llm"),
+            "tts_p95_ms": self.latency_p95_ms("tts"),
+            "latency_slo_ms": self.latency_slo_ms
+        }
+
+
+# Global instance
+pacing_controller = PacingController(
+    max_live_calls=settings.pacing_max_live_calls,
+    target_utilization=settings.pacing_target_utilization,
+    llm_latency_slo_ms=settings.pacing_llm_latency_slo_ms,
+    tts_latency_slo_ms=settings.pacing_tts_latency_slo_ms,
+    window_seconds=settings.pacing_window_seconds
+)
@@ -64,63 +64,119 @@ class PDFProcessorService:
             if not s3_result['success']:
                 raise Exception(f"S3 upload failed: {s3_result.get('error')}")
             
-            text = await self.extract_text_from_pdf(file_content, file.filename)
-            
-            if not text or len(text.strip()) < 10:
-                raise Exception(f"No text extracted from {file.filename}")
-            
-            chunks = self.text_splitter.split_text(text)
-            logger.info(f"Split {file.filename} into {len(chunks)} chunks")
-            
-            embeddings = await self.qdrant_service.embeddings.aembed_documents(chunks)
-            
-            points = []
-            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                point_id = str(uuid.uuid4())
-                points.append(
-                    models.PointStruct(
-                        id=point_id,
-                        vector=embedding,
-                        payload={
-                            "page_content": chunk,
-                            "metadata": {
-                                "company_id": company_id,
-                                "agent_id": agent_id,
-                                "document_id": s3_result['key'],
-                                "document_name": file.filename,
-                                "document_type": document_type,
-                                "chunk_index": idx,
-                                "total_chunks": len(chunks),
-                                "s3_url": s3_result['url'],
-                                "created_at": datetime.utcnow().isoformat(),
-                                "file_size": s3_result['data']['size']
-                            }
-                        }
-                    )
-                )
-            
-            success = await self.qdrant_service.add_points(company_id, points)
-            
-            if not success:
-                raise Exception("Failed to add points to Qdrant")
+            return await self._ingest_pdf_bytes(
+                file_content=file_content,
+                filename=file.filename,
+                key=s3_result['key'],
+                url=s3_result['url'],
+                file_size=s3_result['data']['size'],
+                company_id=company_id,
+                agent_id=agent_id,
+                document_type=document_type
+            )
             
+        except Exception as e:
+            logger.error(f"Error processing PDF {file.filename}: {str(e)}")
             return {
-                "success": True,
+                "success": False,
                 "filename": file.filename,
-                "document_id": s3_result['key'],
-                "s3_url": s3_result['url'],
-                "chunks_created": len(chunks),
-                "file_size": s3_result['data']['size'],
-                "message": f"Successfully processed {file.filename}"
+                "error": str(e)
             }
-            
+
+    async def process_s3_object(
+        self,
+        key: str,
+        filename: str,
+        company_id: str,
+        agent_id: str,
+        document_type: str = "custom"
+    ) -> Dict[str, Any]:
+        """Process a PDF that was uploaded directly to S3 and store in Qdrant"""
+        try:
+            download = await self.s3_handler.download_file(key)
+            if not download['success']:
+                raise Exception(f"S3 download failed: {download.get('error')}")
+
+            return await self._ingest_pdf_bytes(
+                file_content=download['data'],
+                filename=filename,
+                key=key,
+                url=f"https://{self.s3_handler.bucket_name}.s3.{self.s3_handler.config.region}.amazonaws.com/{key}",
+                file_size=download['size'],
+                company_id=company_id,
+                agent_id=agent_id,
+                document_type=document_type
+            )
+
         except Exception as e:
-            logger.error(f"Error processing PDF {file.filename}: {str(e)}")
+            logger.error(f"Error processing S3 object {key}: {str(e)}")
             return {
                 "success": False,
-                "filename": file.filename,
+                "filename": filename,
                 "error": str(e)
             }
+
+    async def _ingest_pdf_bytes(
+        self,
+        file_content: bytes,
+        filename: str,
+        key: str,
+        url: str,
+        file_size: int,
+        company_id: str,
+        agent_id: str,
+        document_type: str
+    ) -> Dict[str, Any]:
+        """Extract, chunk and embed a stored PDF, then add its points to Qdrant"""
+        text = await self.extract_text_from_pdf(file_content, filename)
+        
+        if not text or len(text.strip()) < 10:
+            raise Exception(f"No text extracted from {filename}")
+        
+        chunks = self.text_splitter.split_text(text)
+        logger.info(f"Split {filename} into {len(chunks)} chunks")
+        
+        embeddings = await self.qdrant_service.embeddings.aembed_documents(chunks)
+        
+        points = []
+        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            point_id = str(uuid.uuid4())
+            points.append(
+                models.PointStruct(
+                    id=point_id,
+                    vector=embedding,
+                    payload={
+                        "page_content": chunk,
+                        "metadata": {
+                            "company_id": company_id,
+                            "agent_id": agent_id,
+                            "document_id": key,
+                            "document_name": filename,
+                            "document_type": document_type,
+                            "chunk_index": idx,
+                            "total_chunks": len(chunks),
+                            "s3_url": url,
+                            "created_at": datetime.utcnow().isoformat(),
+                            "file_size": file_size
+                        }
+                    }
+                )
+            )
+        
+        success = await self.qdrant_service.add_points(company_id, points)
+        
+        if not success:
+            raise Exception("Failed to add points to Qdrant")
+        
+        return {
+            "success": True,
+            "filename": filename,
+            "document_id": key,
+            "s3_url": url,
+            "chunks_created": len(chunks),
+            "file_size": file_size,
+            "message": f"Successfully processed {filename}"
+        }
     
     async def process_multiple_pdfs(
         self,
@@ -1,12 +1,126 @@
 # src/services/prompt_template_service.py
 
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+import functools
 import json
 from services.company_service import company_service
+from services.keyword_matcher import KeywordMatcher
+from services.turn_tracer import turn_tracer
 
 logger = logging.getLogger(__name__)
 
+# Keyword lists for sentiment / urgency detection. Matching is on word
+# boundaries, so inflections the old substring checks caught implicitly
+# ("thanks", "problems") are listed explicitly.
+
+# High urgency keywords (universal)
+HIGH_URGENCY_KEYWORDS = (
+    'emergency', 'urgent', 'immediately', 'asap', 'critical',
+    'lost', 'stolen', 'fraud', 'unauthorized', 'hacked',
+    'dying', 'death', 'accident', 'injury', 'pain',
+    'blocked', 'locked out', 'can\'t access', 'not working'
+)
+
+# Context-specific urgencies: (businessContext markers, keywords)
+CONTEXT_URGENCY_KEYWORDS = (
+    (('health', 'medical'), (
+        'chest pain', 'bleeding', 'severe pain', 'difficulty breathing',
+        'unconscious', 'allergic reaction'
+    )),
+    (('financial', 'insurance'), (
+        'card lost', 'card stolen', 'fraud alert', 'unauthorized transaction',
+        'account hacked', 'identity theft'
+    )),
+    (('diagnostic', 'lab'), (
+        'test results', 'abnormal results', 'urgent report'
+    )),
+)
+
+BUYING_INTENT_KEYWORDS = (
+    'yes', 'yeah', 'sure', 'okay', 'ok', 'definitely', 'absolutely',
+    'interested', 'want', 'would like', 'book', 'schedule', 'sign up',
+    'enroll', 'register', 'purchase', 'buy', 'get started', 'lets do it',
+    'sounds good', 'that works', 'ill take it', 'count me in'
+)
+
+MEDIUM_URGENCY_KEYWORDS = (
+    'soon', 'today', 'this week', 'important', 'need help',
+    'problem', 'problems', 'issue', 'issues', 'trouble', 'concern', 'concerned', 'worried'
+)
+
+NEGATIVE_KEYWORDS = (
+    'angry', 'frustrated', 'upset', 'disappointed', 'terrible',
+    'awful', 'horrible', 'worst', 'unhappy', 'dissatisfied',
+    'complaint', 'complaints', 'unacceptable', 'ridiculous'
+)
+
+POSITIVE_KEYWORDS = (
+    'thank', 'thanks', 'great', 'excellent', 'good', 'happy', 'satisfied',
+    'appreciate', 'appreciated', 'wonderful', 'perfect', 'love', 'amazing'
+)
+
+REJECTION_PHRASES = (
+    "don't want", "dont want", "not interested", "no thanks", "not for me",
+    "don't need", "dont need", "not now", "maybe later", "call back later",
+    "not looking", "already have", "no thank you", "not today", "too busy",
+    "stop calling", "remove me", "take me off", "unsubscribe", "leave me alone"
+)
+
+# RAG acknowledgments, first matching rule wins
+ACKNOWLEDGMENT_RULES = (
+    ('pricing', (
+        'price', 'prices', 'pricing', 'cost', 'costs', 'fee', 'fees',
+        'charge', 'charges', 'payment', 'payments', 'amount'
+    ), "Let me pull up our current pricing information for you."),
+    ('policy', (
+        'policy', 'policies', 'terms', 'condition', 'conditions', 'coverage', 'include', 'includes', 'included'
+    ), "Let me check the policy details for you. One moment please."),
+    ('offering', (
+        'available', 'offer', 'offers', 'provide', 'service', 'services', 'plan', 'plans'
+    ), "Great question! Let me look up what we have available for you."),
+    ('process', (
+        'how', 'process', 'procedure', 'step', 'steps'
+    ), "Let me walk you through that process. Give me just a moment."),
+    ('timing', (
+        'when', 'time', 'schedule', 'appointment'
+    ), "Let me check our availability for you."),
+    ('benefits', (
+        'benefit', 'benefits', 'advantage', 'advantages', 'feature', 'features'
+    ), "Let me get you the details on those benefits."),
+    ('comparison', (
+        'compare', 'comparison', 'difference', 'versus', 'vs'
+    ), "Good question! Let me gather that comparison information for you."),
+)
+
+_ACKNOWLEDGMENT_MATCHER = KeywordMatcher({name: keywords for name, keywords, _ in ACKNOWLEDGMENT_RULES})
+_ACKNOWLEDGMENTS = {name: acknowledgment for name, _, acknowledgment in ACKNOWLEDGMENT_RULES}
+
+
+@functools.lru_cache(maxsize=1024)
+def _context_groups(business_context: str) -> Tuple[int, ...]:
+    """Indexes of CONTEXT_URGENCY_KEYWORDS that apply to a businessContext"""
+    business_context = business_context.lower()
+    return tuple(
+        i for i, (markers, _) in enumerate(CONTEXT_URGENCY_KEYWORDS)
+        if any(marker in business_context for marker in markers)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_sentiment_matcher(context_groups: Tuple[int, ...]) -> KeywordMatcher:
+    high_urgency = list(HIGH_URGENCY_KEYWORDS)
+    for i in context_groups:
+        high_urgency.extend(CONTEXT_URGENCY_KEYWORDS[i][1])
+    return KeywordMatcher({
+        'high_urgency': high_urgency,
+        'medium_urgency': MEDIUM_URGENCY_KEYWORDS,
+        'negative': NEGATIVE_KEYWORDS,
+        'positive': POSITIVE_KEYWORDS,
+        'buying_intent': BUYING_INTENT_KEYWORDS,
+        'rejection': REJECTION_PHRASES
+    })
+
 class PromptTemplateService:
     def __init__(self):
         pass
@@ -165,36 +279,26 @@ GUARDRAILS - STRICT RULES YOU MUST FOLLOW:
         """
         Generate intelligent acknowledgment before RAG query based on user's question
         """
-        query_lower = user_query.lower()
-        
-        # Analyze query intent
-        if any(word in query_lower for word in ['price', 'cost', 'fee', 'charge', 'payment', 'amount']):
-            return "Let me pull up our current pricing information for you."
-        
-        elif any(word in query_lower for word in ['policy', 'terms', 'condition', 'coverage', 'include']):
-            return "Let me check the policy details for you. One moment please."
-        
-        elif any(word in query_lower for word in ['available', 'offer', 'provide', 'service', 'plan']):
-            return "Great question! Let me look up what we have available for you."
-        
-        elif any(word in query_lower for word in ['how', 'process', 'procedure', 'step']):
-            return "Let me walk you through that process. Give me just a moment."
+        rule = _ACKNOWLEDGMENT_MATCHER.first_category(user_query)
+        if rule:
+            return _ACKNOWLEDGMENTS[rule]
         
-        elif any(word in query_lower for word in ['when', 'time', 'schedule', 'appointment']):
-            return "Let me check our availability for you."
-        
-        elif any(word in query_lower for word in ['benefit', 'advantage', 'feature']):
-            return "Let me get you the details on those benefits."
-        
-        elif any(word in query_lower for word in ['compare', 'difference', 'versus', 'vs']):
-            return "Good question! Let me gather that comparison information for you."
-        
-        else:
-            # Default intelligent acknowledgment
-            return "Let me find the most accurate information for you. Just a moment."
+        # Default intelligent acknowledgment
+        return "Let me find the most accurate information for you. Just a moment."
     
     # ========== REQUIREMENT iv) Sentiment & Urgency Detection ==========
     
+    def _sentiment_matcher(self, agent: Dict) -> KeywordMatcher:
+        """
+        Compiled keyword matcher for an agent. Only businessContext changes
+        the keyword set, so matchers are cached by it and an edited agent
+        config gets a fresh one.
+        """
+        additional_context = agent.get('additional_context') or {}
+        business_context = additional_context.get('businessContext') or ''
+        return _compile_sentiment_matcher(_context_groups(business_context))
+    
+    @turn_tracer.traced("sentiment")
     def detect_sentiment_and_urgency(self, user_message: str, agent: Dict) -> Dict:
         """
         Detect sentiment and urgency from user message
@@ -205,84 +309,21 @@ GUARDRAILS - STRICT RULES YOU MUST FOLLOW:
             'suggested_action': '...'
         }
         """
-        message_lower = user_message.lower()
-        
-        # Define dynamic urgency keywords based on business context
-        additional_context = agent.get('additional_context', {})
-        business_context = additional_context.get('businessContext', '').lower()
-        
-        # High urgency keywords (universal + context-specific)
-        high_urgency_keywords = [
-            'emergency', 'urgent', 'immediately', 'asap', 'critical',
-            'lost', 'stolen', 'fraud', 'unauthorized', 'hacked',
-            'dying', 'death', 'accident', 'injury', 'pain',
-            'blocked', 'locked out', 'can\'t access', 'not working'
-        ]
-
-        buying_intent_keywords = [
-            'yes', 'yeah', 'sure', 'okay', 'ok', 'definitely', 'absolutely',
-            'interested', 'want', 'would like', 'book', 'schedule', 'sign up',
-            'enroll', 'register', 'purchase', 'buy', 'get started', 'lets do it',
-            'sounds good', 'that works', 'ill take it', 'count me in'
-        ]
-        
-        # Add context-specific urgencies
-        if 'health' in business_context or 'medical' in business_context:
-            high_urgency_keywords.extend([
-                'chest pain', 'bleeding', 'severe pain', 'difficulty breathing',
-                'unconscious', 'allergic reaction'
-            ])
-        
-        if 'financial' in business_context or 'insurance' in business_context:
-            high_urgency_keywords.extend([
-                'card lost', 'card stolen', 'fraud alert', 'unauthorized transaction',
-                'account hacked', 'identity theft'
-            ])
-        
-        if 'diagnostic' in business_context or 'lab' in business_context:
-            high_urgency_keywords.extend([
-                'test results', 'abnormal results', 'urgent report'
-            ])
-        
-        # Medium urgency keywords
-        medium_urgency_keywords = [
-            'soon', 'today', 'this week', 'important', 'need help',
-            'problem', 'issue', 'trouble', 'concern', 'worried'
-        ]
-        
-        # Negative sentiment keywords
-        negative_keywords = [
-            'angry', 'frustrated', 'upset', 'disappointed', 'terrible',
-            'awful', 'horrible', 'worst', 'unhappy', 'dissatisfied',
-            'complaint', 'unacceptable', 'ridiculous'
-        ]
-        
-        # Positive sentiment keywords
-        positive_keywords = [
-            'thank', 'great', 'excellent', 'good', 'happy', 'satisfied',
-            'appreciate', 'wonderful', 'perfect', 'love', 'amazing'
-        ]
-        
-        rejection_phrases = [
-            "don't want", "dont want", "not interested", "no thanks", "not for me",
-            "don't need", "dont need", "not now", "maybe later", "call back later",
-            "not looking", "already have", "no thank you", "not today", "too busy",
-            "stop calling", "remove me", "take me off", "unsubscribe", "leave me alone"
-        ]
+        matched = self._sentiment_matcher(agent).match(user_message)
 
         # Detection logic
-        detected_rejection = any(phrase in message_lower for phrase in rejection_phrases)
-        detected_high_urgency = [kw for kw in high_urgency_keywords if kw in message_lower]
-        detected_medium_urgency = [kw for kw in medium_urgency_keywords if kw in message_lower]
-        detected_negative = [kw for kw in negative_keywords if kw in message_lower]
-        detected_positive = [kw for kw in positive_keywords if kw in message_lower]
+        detected_rejection = 'rejection' in matched
+        detected_high_urgency = matched.get('high_urgency', [])
+        detected_medium_urgency = matched.get('medium_urgency', [])
+        detected_negative = matched.get('negative', [])
+        detected_positive = matched.get('positive', [])
 
         if detected_rejection:
             detected_buying_intent = []
             buying_intent = False
-            logger.info(f"Rejection detected: '{message_lower}' - No buying intent")
+            logger.info(f"Rejection detected: '{user_message.lower()}' - No buying intent")
         else:
-            detected_buying_intent = [kw for kw in buying_intent_keywords if kw in message_lower]
+            detected_buying_intent = matched.get('buying_intent', [])
             buying_intent = len(detected_buying_intent) > 0
         
         # Determine urgency level
@@ -370,15 +411,15 @@ GUARDRAILS - STRICT RULES YOU MUST FOLLOW:
         else:
             return None
     
-    def _extract_company_name(self, company_id) -> str:
+    async def _extract_company_name(self, company_id) -> str:
         """Extract company name"""
-        return company_service.get_company_name_by_id(company_id)
+        return await company_service.get_company_name_by_id(company_id)
     
-    def generate_greeting(self, agent: Dict, company_id: str, name: str) -> str:
+    async def generate_greeting(self, agent: Dict, company_id: str, name: str) -> str:
         """Generate greeting for incoming calls"""
         try:
             additional_context = agent.get('additional_context', {})
-            company_name = self._extract_company_name(
+            company_name = await self._extract_company_name(
                 company_id
             )
             
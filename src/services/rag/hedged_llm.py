@@ -0,0 +1,249 @@
+# src/services/rag/hedged_llm.py
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from collections import deque
+import asyncio
+import logging
+
+from config.settings import settings
+from services.conversation_memory import count_tokens, message_tokens
+from services.turn_deadline import turn_deadlines
+
+logger = logging.getLogger(__name__)
+
+# First-token samples needed before the hedge delay follows the observed percentile
+MIN_SAMPLES = 20
+
+# The hedge goes out by this share of the deadline at the latest, so it can still win
+HEDGE_DEADLINE_FRACTION = 0.5
+
+
+def _prompt_tokens(messages: Any) -> int:
+    """Input tokens a duplicate request is billed for (approximate)"""
+    if isinstance(messages, str):
+        return count_tokens(messages)
+    total = 0
+    for message in messages or []:
+        if isinstance(message, dict):
+            total += message_tokens(message)
+        else:
+            total += count_tokens(str(getattr(message, 'content', message)))
+    return total
+
+
+def _has_output(chunk: Any) -> bool:
+    """A chunk carrying text or a function call, not just the leading role delta"""
+    return bool(getattr(chunk, 'content', None) or getattr(chunk, 'additional_kwargs', None))
+
+
+async def _close_stream(stream: Any):
+    try:
+        await stream.aclose()
+    except Exception:
+        pass
+
+
+class HedgeMetrics:
+    """
+    First-token latency windows and hedge outcomes per wrapped call, shared
+    by every HedgedLLM with the same name (each RAGService builds its own).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._latencies: Dict[str, deque] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _counter(self, name: str) -> Dict[str, int]:
+        counter = self._counters.get(name)
+        if counter is None:
+            counter = self._counters[name] = {
+                "requests": 0,
+                "hedged": 0,
+                "primary_wins": 0,
+                "hedge_wins": 0,
+                "failovers": 0,
+                "deadline_exceeded": 0,
+                "errors": 0,
+                "extra_prompt_tokens": 0
+            }
+        return counter
+
+    def count(self, name: str, key: str, amount: int = 1):
+        self._counter(name)[key] += amount
+
+    def record_first_token(self, name: str, seconds: float):
+        samples = self._latencies.get(name)
+        if samples is None:
+            samples = self._latencies[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        samples = self._latencies.get(name)
+        if not samples or len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait for the first token before firing the duplicate request"""
+        observed = self.percentile(name, settings.llm_hedge_percentile)
+        if observed is None:
+            return settings.llm_hedge_initial_delay_ms / 1000
+        return min(max(observed, settings.llm_hedge_min_delay_ms / 1000), settings.llm_hedge_max_delay_ms / 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for name, counter in self._counters.items():
+            requests = counter["requests"] or 1
+            hedged = counter["hedged"] or 1
+            p50 = self.percentile(name, 0.50)
+            p95 = self.percentile(name, 0.95)
+            stats[name] = {
+                **counter,
+                "hedge_rate": round(counter["hedged"] / requests, 3),
+                "hedge_win_rate": round(counter["hedge_wins"] / hedged, 3),
+                "first_token_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "first_token_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "hedge_delay_ms": round(self.hedge_delay(name) * 1000, 1)
+            }
+        return {
+            "enabled": settings.llm_hedging_enabled,
+            "fallback_model": settings.llm_hedge_fallback_model,
+            "deadline_seconds": settings.llm_deadline_seconds,
+            "completion_deadline_seconds": settings.llm_completion_deadline_seconds,
+            "calls": stats
+        }
+
+
+class HedgedLLM:
+    """
+    Drop-in for a LangChain chat model / bound runnable (`ainvoke`, `astream`)
+    that hedges slow first tokens.
+
+    The request goes to `primary`; if no first token (for `ainvoke`, the
+    response) arrives within the hedge delay - the configured percentile of
+    recent first-token latencies, and at most half the deadline - the same
+    messages go to `hedge` (a fallback model or endpoint, or `primary`
+    again). Whichever produces output first wins and the other request is
+    cancelled. A primary error before that fails over to the hedge straight
+    away. Nothing arriving by the deadline raises asyncio.TimeoutError, so
+    the caller's error path speaks instead of the line going silent. For
+    `astream` the deadline is on the first chunk: `llm_deadline_seconds`,
+    less if the turn budget is running out. `ainvoke` waits for a whole
+    completion (function calling), so it gets
+    `llm_completion_deadline_seconds` and the turn budget does not cap it.
+    """
+
+    def __init__(self, name: str, primary: Any, hedge: Optional[Any] = None):
+        self.name = name
+        self.primary = primary
+        self.hedge = hedge if hedge is not None else primary
+
+    async def ainvoke(self, messages: Any, **kwargs) -> Any:
+        _, response, _ = await self._race(
+            messages, lambda llm: llm.ainvoke(messages, **kwargs), settings.llm_completion_deadline_seconds
+        )
+        return response
+
+    async def astream(self, messages: Any, **kwargs) -> AsyncIterator[Any]:
+        streams = []
+
+        async def first_output(llm):
+            # Buffer up to the first chunk with content; the stream continues from there
+            stream = llm.astream(messages, **kwargs).__aiter__()
+            streams.append(stream)
+            buffered = []
+            async for chunk in stream:
+                buffered.append(chunk)
+                if _has_output(chunk):
+                    break
+            return stream, buffered
+
+        try:
+            # Only the first chunk is raced against the (turn-budget capped) deadline
+            deadline = turn_deadlines.current().llm_timeout(settings.llm_deadline_seconds)
+            _, (winner, buffered), _ = await self._race(
+                messages, first_output, deadline, budget_capped=deadline < settings.llm_deadline_seconds
+            )
+            for chunk in buffered:
+                yield chunk
+            async for chunk in winner:
+                yield chunk
+        finally:
+            # Losers (already cancelled), and the winner if the caller stopped early
+            for stream in streams:
+                asyncio.ensure_future(_close_stream(stream))
+
+    async def _race(
+        self,
+        messages: Any,
+        start: Callable[[Any], Awaitable],
+        deadline: float,
+        budget_capped: bool = False
+    ) -> Tuple[str, Any, float]:
+        """
+        (winner label, first result, seconds to first result) of primary vs.
+        hedge. `budget_capped`: the turn budget shortened `deadline`.
+        """
+        metrics = llm_hedging_metrics
+        metrics.count(self.name, "requests")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline_at = started + deadline
+        hedge_delay = min(metrics.hedge_delay(self.name), deadline * HEDGE_DEADLINE_FRACTION)
+        hedge_at = started + hedge_delay if settings.llm_hedging_enabled else None
+
+        labels = {}
+        primary = asyncio.ensure_future(start(self.primary))
+        labels[primary] = "primary"
+        pending = {primary}
+        hedged = False
+        error = None
+
+        try:
+            while pending:
+                wake_at = deadline_at if hedged or hedge_at is None else min(hedge_at, deadline_at)
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, wake_at - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None:
+                        elapsed = loop.time() - started
+                        label = labels[task]
+                        metrics.count(self.name, f"{label}_wins")
+                        # When the hedge wins this is a lower bound of the primary's latency
+                        metrics.record_first_token(self.name, elapsed)
+                        if label == "hedge":
+                            logger.info(f"⚡ Hedged {self.name} request won after {elapsed * 1000:.0f}ms")
+                        return label, task.result(), elapsed
+                    error = task.exception()
+                    logger.warning(f"{self.name} {labels[task]} request failed: {error}")
+
+                now = loop.time()
+                if not hedged and hedge_at is not None and now < deadline_at and (now >= hedge_at or not pending):
+                    hedged = True
+                    metrics.count(self.name, "hedged")
+                    metrics.count(self.name, "extra_prompt_tokens", _prompt_tokens(messages))
+                    if not pending:
+                        metrics.count(self.name, "failovers")
+                    hedge = asyncio.ensure_future(start(self.hedge))
+                    labels[hedge] = "hedge"
+                    pending.add(hedge)
+                    continue
+
+                if now >= deadline_at:
+                    metrics.count(self.name, "deadline_exceeded")
+                    if budget_capped:
+                        turn_deadlines.current().record("llm", "timed_out")
+                    raise asyncio.TimeoutError(f"{self.name}: no response within {deadline:.1f}s")
+
+            metrics.count(self.name, "errors")
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+# Global instance
+llm_hedging_metrics = HedgeMetrics(window=settings.llm_hedge_window)
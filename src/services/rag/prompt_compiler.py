@@ -0,0 +1,257 @@
+# src/services/rag/prompt_compiler.py
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import logging
+import re
+
+from config.settings import settings
+from services.conversation_memory import trim_to_budget
+
+logger = logging.getLogger(__name__)
+
+# AI analysis fields the routes write into system messages on outbound calls
+READINESS_RE = re.compile(r'Buying Readiness:\s*(\d+)%')
+INTENT_RE = re.compile(r'Customer Intent:\s*(\w+)')
+SENTIMENT_RE = re.compile(r'Sentiment:\s*(\w+)')
+OBJECTION_RE = re.compile(r'Objection Type:\s*(\w+)')
+CAMPAIGN_ID_RE = re.compile(r'campaign_id[:\s]+([A-Z0-9-]+)')
+
+OUTBOUND_SALES_INSTRUCTIONS = """
+**OUTBOUND SALES CALL - SPECIAL INSTRUCTIONS**:
+
+**YOUR GOAL**: Persuade the customer to book the service
+
+**BOOKING TRIGGER**:
+Only use create_booking function when customer EXPLICITLY says:
+- "Book it"
+- "Schedule me"
+- "Sign me up"
+- "I want to book an appointment"
+- "Let's do it" (in context of booking)
+
+**DO NOT BOOK when customer says:**
+- "Yes" (to hearing more info)
+- "Tell me more"
+- "I'm interested"
+- "Okay" (without context)
+
+**CONVERSATION FLOW:**
+1. Build interest with benefits (if readiness < 70%)
+2. Address objections empathetically
+3. When readiness >= 70%, ask: "Would you like to schedule a consultation?"
+4. ONLY after explicit booking confirmation, use create_booking
+
+**Example Good Flow:**
+Customer: "Yes, I'd like to hear about it"
+Agent: "Great! [Explains benefits]. Would you like to schedule a consultation?"
+Customer: "Yes, book me"
+Agent: [Calls create_booking]
+**Example Bad Flow (DON'T DO THIS):**
+Customer: "Yes, tell me more"
+Agent: [Immediately calls create_booking] ❌ WRONG
+"""
+
+
+class PromptCompiler:
+    """
+    Builds the RAG chat messages as a byte-stable per-agent prefix followed
+    by the volatile parts of the turn.
+
+    Providers cache prompts by exact prefix, so everything that only depends
+    on the agent config (persona, guidelines, instructions, rules) is rendered
+    once per config and reused verbatim; retrieved documents, the customer's
+    readiness / intent and per-turn route instructions go in a system message
+    after the conversation history, right before the customer's message.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._prefixes: "OrderedDict[Tuple, str]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _config_key(agent_config: Dict, call_type: str) -> Tuple:
+        """Everything the prefix depends on; a changed agent config is a new key"""
+        additional_context = agent_config.get('additional_context') or {}
+        return (
+            call_type,
+            agent_config.get('id') or agent_config.get('agent_id'),
+            agent_config.get('name', 'Assistant'),
+            agent_config.get('prompt', ''),
+            agent_config.get('max_response_tokens', 150),
+            additional_context.get('tone', 'professional'),
+            additional_context.get('language', 'english'),
+            additional_context.get('businessContext', ''),
+            additional_context.get('roleDescription', '')
+        )
+
+    def static_prefix(self, agent_config: Dict, call_type: str = "incoming") -> str:
+        """The agent's system prompt, identical for every turn of every call"""
+        key = self._config_key(agent_config, call_type)
+        prefix = self._prefixes.get(key)
+        if prefix is not None:
+            self._prefixes.move_to_end(key)
+            self.stats["hits"] += 1
+            return prefix
+
+        self.stats["misses"] += 1
+        prefix = self._render_prefix(*key)
+        self._prefixes[key] = prefix
+        if len(self._prefixes) > self.max_entries:
+            self._prefixes.popitem(last=False)
+        return prefix
+
+    def _render_prefix(
+        self,
+        call_type: str,
+        agent_id: Optional[str],
+        agent_name: str,
+        base_prompt: str,
+        max_tokens: int,
+        tone: str,
+        language: str,
+        business_context: str,
+        role_description: str
+    ) -> str:
+        sales_instructions = OUTBOUND_SALES_INSTRUCTIONS if call_type == "outgoing" else ""
+
+        system_prompt = f"""You are {agent_name}, a {tone} customer service representative on a live phone call.
+
+**Your Role**: {role_description if role_description else 'Provide helpful customer support'}
+
+**Business Context**:
+{business_context if business_context else 'General customer service'}
+
+**Available Information**:
+Provided in the latest system message, just before the customer's message.
+
+{sales_instructions}
+
+**Communication Guidelines**:
+- Tone: {tone.title()}
+- Language: {language.title()}
+- Keep responses conversational and under {max_tokens // 4} words
+- Be empathetic, clear, and solution-focused
+- Listen actively and acknowledge concerns
+
+**Your Instructions**:
+{base_prompt}
+
+**Function Calling**:
+- If customer reports an issue, problem, or needs help, use the create_ticket function
+- After creating a ticket, inform the customer and provide the ticket ID
+
+**Important Rules**:
+- Never mention competitor companies by name
+- Focus on the customer's specific needs
+- Use the provided context to give accurate information
+- If uncertain, be honest and offer to escalate
+- Respond naturally as in a phone conversation"""
+
+        return system_prompt.strip()
+
+    @staticmethod
+    def extract_analysis(conversation_context: Optional[List[Dict[str, str]]]) -> Dict:
+        """Latest AI analysis values found in system messages (newest wins)"""
+        analysis = {}
+        fields = (
+            ("buying_readiness", READINESS_RE),
+            ("intent_type", INTENT_RE),
+            ("sentiment", SENTIMENT_RE),
+            ("objection_type", OBJECTION_RE)
+        )
+        for msg in reversed(conversation_context or []):
+            if msg.get('role') != 'system':
+                continue
+            content = msg.get('content', '')
+            for name, pattern in fields:
+                if name not in analysis:
+                    match = pattern.search(content)
+                    if match:
+                        analysis[name] = match.group(1)
+            if len(analysis) == len(fields):
+                break
+
+        return {
+            "buying_readiness": int(analysis.get("buying_readiness", 0)),
+            "intent_type": analysis.get("intent_type", "unknown"),
+            "sentiment": analysis.get("sentiment", "neutral"),
+            "objection_type": analysis.get("objection_type", "none")
+        }
+
+    @staticmethod
+    def extract_campaign_id(conversation_context: Optional[List[Dict[str, str]]]) -> Optional[str]:
+        for msg in conversation_context or []:
+            if msg.get('role') == 'system' and 'campaign_id' in msg.get('content', ''):
+                match = CAMPAIGN_ID_RE.search(msg['content'])
+                if match:
+                    return match.group(1)
+        return None
+
+    def dynamic_section(
+        self,
+        context: str,
+        call_type: str = "incoming",
+        conversation_context: Optional[List[Dict[str, str]]] = None,
+        turn_instructions: Optional[List[str]] = None
+    ) -> str:
+        """Per-turn content: route instructions, customer status and retrieved information"""
+        parts = list(turn_instructions or [])
+
+        if call_type == "outgoing":
+            analysis = self.extract_analysis(conversation_context)
+            buying_readiness = analysis["buying_readiness"]
+            if buying_readiness >= 70:
+                stage = (f"CLOSING STAGE - Customer is {buying_readiness}% ready. "
+                         f"Ask directly: 'Would you like me to schedule an appointment for you?'")
+            else:
+                stage = (f"INTEREST BUILDING STAGE - Customer is {buying_readiness}% ready. "
+                         f"Focus on benefits and value.")
+            parts.append(f"""**CURRENT CUSTOMER STATUS**:
+- Buying Readiness: {buying_readiness}%
+- Intent: {analysis["intent_type"]}
+
+**CURRENT STAGE:**
+{stage}""")
+
+        parts.append(f"**Available Information**:\n{context}")
+        return "\n\n".join(parts)
+
+    def build_messages(
+        self,
+        agent_config: Dict,
+        context: str,
+        question: str,
+        call_type: str = "incoming",
+        conversation_context: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        [static prefix] + recent dialogue + [this turn's context] + question.
+
+        System messages in `conversation_context` (per-turn route instructions,
+        the conversation summary) move into the turn's context message instead
+        of sitting between the prefix and the history; the dialogue is held to
+        the conversation history token budget.
+        """
+        conversation_context = conversation_context or []
+        history = [msg for msg in conversation_context if msg.get('role') != 'system']
+        turn_instructions = [msg.get('content', '') for msg in conversation_context if msg.get('role') == 'system']
+        # The routes' history already ends with this question
+        if history and history[-1].get('role') == 'user' and history[-1].get('content') == question:
+            history = history[:-1]
+
+        messages = [{"role": "system", "content": self.static_prefix(agent_config, call_type)}]
+        messages.extend(trim_to_budget(history, settings.conversation_history_tokens))
+        messages.append({
+            "role": "system",
+            "content": self.dynamic_section(context, call_type, conversation_context, turn_instructions)
+        })
+        messages.append({"role": "user", "content": question})
+        return messages
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "cached_prefixes": len(self._prefixes)}
+
+
+# Global instance
+prompt_compiler = PromptCompiler()
@@ -8,7 +8,11 @@ from config.settings import settings
 from services.agent_tools import TICKET_FUNCTIONS, execute_function
 from services.agent_config_service import agent_config_service
 from services.prompt_template_service import prompt_template_service
-import re
+from services.rag.prompt_compiler import prompt_compiler
+from services.rag.hedged_llm import HedgedLLM
+from services.conversation_memory import format_history, trim_to_budget
+from services.turn_tracer import turn_tracer
+from services.turn_deadline import turn_deadlines
 
 logger = logging.getLogger(__name__)
 
@@ -18,161 +22,50 @@ class RAGService:
         """Initialize RAG with function calling support"""
         self.qdrant_service = qdrant_service
         
-        self.llm = ChatOpenAI(
-            model=settings.openai_model or "gpt-4o-mini",
-            temperature=0.3,
-            openai_api_key=settings.openai_api_key,
-            max_tokens=150,
-            streaming=True
+        # Answer-generation calls hedge slow first tokens (see HedgedLLM);
+        # route code uses these two directly as well
+        self.llm = HedgedLLM(
+            "answer_stream",
+            self._chat_model(streaming=True),
+            self._fallback_chat_model(streaming=True)
         )
 
-        self.llm_with_functions = ChatOpenAI(
-            model=settings.openai_model or "gpt-4o-mini",
-            temperature=0.3,
-            max_tokens=150,
-            openai_api_key=settings.openai_api_key
-        ).bind(functions=TICKET_FUNCTIONS)
+        fallback = self._fallback_chat_model()
+        self.llm_with_functions = HedgedLLM(
+            "answer_functions",
+            self._chat_model().bind(functions=TICKET_FUNCTIONS),
+            fallback.bind(functions=TICKET_FUNCTIONS) if fallback is not None else None
+        )
         
         self.embeddings = OpenAIEmbeddings(
             model="text-embedding-3-small",
-            openai_api_key=settings.openai_api_key
+            openai_api_key=settings.openai_api_key,
+            openai_api_base=settings.openai_base_url
         )
     
-    def _build_dynamic_system_prompt(self, 
-        agent_config: Dict, 
-        context: str, 
-        call_type: str = "incoming",
-        conversation_context: Optional[List[Dict[str, str]]] = None) -> str:
-        """
-        Build dynamic system prompt from agent configuration
-        WITHOUT hardcoding company names
-        """
-        # Extract agent details
-        agent_name = agent_config.get('name', 'Assistant')
-        base_prompt = agent_config.get('prompt', '')
-        
-        # Extract additional context
-        additional_context = agent_config.get('additional_context', {})
-        tone = additional_context.get('tone', 'professional')
-        language = additional_context.get('language', 'english')
-        business_context = additional_context.get('businessContext', '')
-        role_description = additional_context.get('roleDescription', '')
-        
-        # Extract response settings
-        max_tokens = agent_config.get('max_response_tokens', 150)
-
-        buying_readiness = 0
-        intent_type = "unknown"
-        sentiment = "neutral"
-        objection_type = "none"
-        
-        campaign_id = None
-        if conversation_context and call_type == "outgoing":
-            for msg in conversation_context:
-                if msg.get('role') == 'system':
-                    content = msg.get('content', '')
-                    
-                    # Extract all AI analysis data
-                    readiness_match = re.search(r'Buying Readiness:\s*(\d+)%', content)
-                    if readiness_match:
-                        buying_readiness = int(readiness_match.group(1))
-                        logger.info(f"Extracted Buying Readiness: {buying_readiness}%")
-                    
-                    intent_match = re.search(r'Customer Intent:\s*(\w+)', content)
-                    if intent_match:
-                        intent_type = intent_match.group(1)
-                        logger.info(f"Extracted Intent: {intent_type}")
-                    
-                    sentiment_match = re.search(r'Sentiment:\s*(\w+)', content)
-                    if sentiment_match:
-                        sentiment = sentiment_match.group(1)
-                    
-                    objection_match = re.search(r'Objection Type:\s*(\w+)', content)
-                    if objection_match:
-                        objection_type = objection_match.group(1)
-
-
-        if call_type == "outgoing":
-            sales_instructions = f"""
-**OUTBOUND SALES CALL - SPECIAL INSTRUCTIONS**:
-
-**YOUR GOAL**: Persuade the customer to book the service
-
-**CURRENT CUSTOMER STATUS**: 
-- Buying Readiness: {buying_readiness}%
-- Intent: {intent_type}
-
-**BOOKING TRIGGER**: 
-Only use create_booking function when customer EXPLICITLY says:
-- "Book it"
-- "Schedule me"
-- "Sign me up"
-- "I want to book an appointment"
-- "Let's do it" (in context of booking)
-
-**DO NOT BOOK when customer says:**
-- "Yes" (to hearing more info)
-- "Tell me more"
-- "I'm interested"
-- "Okay" (without context)
-
-**CURRENT STAGE:**
-{f"CLOSING STAGE - Customer is {buying_readiness}% ready. Ask directly: 'Would you like me to schedule an appointment for you?'" if buying_readiness >= 70 else f"INTEREST BUILDING STAGE - Customer is {buying_readiness}% ready. Focus on benefits and value."}
-
-**CONVERSATION FLOW:**
-1. Build interest with benefits (if readiness < 70%)
-2. Address objections empathetically
-3. When readiness >= 70%, ask: "Would you like to schedule a consultation?"
-4. ONLY after explicit booking confirmation, use create_booking
-
-**Example Good Flow:**
-Customer: "Yes, I'd like to hear about it"
-Agent: "Great! [Explains benefits]. Would you like to schedule a consultation?"
-Customer: "Yes, book me"
-Agent: [Calls create_booking]
-**Example Bad Flow (DON'T DO THIS):**
-Customer: "Yes, tell me more"
-Agent: [Immediately calls create_booking] ❌ WRONG
-"""
-        else:
-            sales_instructions = ""   
-
-        # Build dynamic prompt
-        system_prompt = f"""You are {agent_name}, a {tone} customer service representative on a live phone call.
-
-**Your Role**: {role_description if role_description else 'Provide helpful customer support'}
-
-**Business Context**: 
-{business_context if business_context else 'General customer service'}
-
-**Available Information**:
-{context}
-
-{sales_instructions}
-
-**Communication Guidelines**:
-- Tone: {tone.title()}
-- Language: {language.title()}
-- Keep responses conversational and under {max_tokens // 4} words
-- Be empathetic, clear, and solution-focused
-- Listen actively and acknowledge concerns
-
-**Your Instructions**:
-{base_prompt}
-
-**Function Calling**:
-- If customer reports an issue, problem, or needs help, use the create_ticket function
-- After creating a ticket, inform the customer and provide the ticket ID
-
-**Important Rules**:
-- Never mention competitor companies by name
-- Focus on the customer's specific needs
-- Use the provided context to give accurate information
-- If uncertain, be honest and offer to escalate
-- Respond naturally as in a phone conversation"""
+    @staticmethod
+    def _chat_model(streaming: bool = False, model: Optional[str] = None,
+                    base_url: Optional[str] = None, api_key: Optional[str] = None) -> ChatOpenAI:
+        return ChatOpenAI(
+            model=model or settings.openai_model or "gpt-4o-mini",
+            temperature=0.3,
+            max_tokens=150,
+            openai_api_key=api_key or settings.openai_api_key,
+            openai_api_base=base_url or settings.openai_base_url,
+            streaming=streaming
+        )
 
-        return system_prompt.strip()
- 
+    def _fallback_chat_model(self, streaming: bool = False) -> Optional[ChatOpenAI]:
+        """Model the hedged request goes to; None re-sends to the primary"""
+        if not settings.llm_hedge_fallback_model and not settings.llm_hedge_fallback_base_url:
+            return None
+        return self._chat_model(
+            streaming=streaming,
+            model=settings.llm_hedge_fallback_model,
+            base_url=settings.llm_hedge_fallback_base_url,
+            api_key=settings.llm_hedge_fallback_api_key
+        )
+    
     async def get_answer(
         self,
         company_id: str,
@@ -193,13 +86,11 @@ Agent: [Immediately calls create_booking] ❌ WRONG
             
             logger.info(f"Using agent: {agent_config.get('name')} ({agent_id[:8]}...)")
 
-            query_embedding = await self.embeddings.aembed_query(question)
-            
-            search_results = await self.qdrant_service.search(
-                company_id=company_id,
-                query_vector=query_embedding,
-                agent_id=agent_id,
-                limit=5
+            # Out of turn budget: answer from the conversation instead of documents
+            search_results = await turn_deadlines.run(
+                "retrieval",
+                self._retrieve(company_id, question, agent_id),
+                fallback=[]
             )
 
             if search_results:
@@ -219,11 +110,11 @@ Agent: [Immediately calls create_booking] ❌ WRONG
                     logger.info("Using conversation history as context")
                     
                     # Extract recent conversation summary
-                    recent_messages = conversation_context[-6:]
-                    conversation_summary = "\n".join([
-                        f"{msg.get('role', 'unknown').upper()}: {msg.get('content', '')}"
-                        for msg in recent_messages
-                    ])
+                    recent_messages = trim_to_budget(
+                        [msg for msg in conversation_context if msg.get('role') in ('user', 'assistant')],
+                        settings.conversation_router_history_tokens
+                    )
+                    conversation_summary = format_history(recent_messages)
                     
                     context = f"""**Previous Conversation Context**:
     {conversation_summary}
@@ -245,24 +136,18 @@ Agent: [Immediately calls create_booking] ❌ WRONG
     - Offer to escalate if needed"""
 
 
-            system_prompt = self._build_dynamic_system_prompt(agent_config, 
-                                context, 
-                                call_type,
-                                conversation_context=conversation_context)
-
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            # Add conversation history if available
-            if conversation_context:
-                messages.extend(conversation_context[-10:])  # Last 10 messages
-            
-            # Add current question
-            messages.append({"role": "user", "content": question})
-            logger.info(f"Added {len(conversation_context[-10:])} messages from history")
+            # Cacheable per-agent prefix first, this turn's context last
+            messages = prompt_compiler.build_messages(
+                agent_config,
+                context,
+                question,
+                call_type=call_type,
+                conversation_context=conversation_context
+            )
+            logger.info(f"Built prompt with {len(messages) - 3} messages from history")
 
-            response = await self.llm_with_functions.ainvoke(messages)
+            with turn_tracer.span("llm"):
+                response = await self.llm_with_functions.ainvoke(messages)
             
             # Check for function call
             if hasattr(response, 'additional_kwargs') and 'function_call' in response.additional_kwargs:
@@ -272,24 +157,17 @@ Agent: [Immediately calls create_booking] ❌ WRONG
                 
                 logger.info(f"Function call: {function_name} with args: {arguments}")
 
-                campaign_id = None
-                if conversation_context:
-                    for msg in conversation_context:
-                        if msg.get('role') == 'system' and 'campaign_id' in msg.get('content', ''):
-                            import re
-                            match = re.search(r'campaign_id[:\s]+([A-Z0-9-]+)', msg['content'])
-                            if match:
-                                campaign_id = match.group(1)
-                                break
-                                            
+                campaign_id = prompt_compiler.extract_campaign_id(conversation_context)
+
                 # Execute function
-                function_result = await execute_function(
-                    function_name=function_name,
-                    arguments=arguments,
-                    company_id=company_id,
-                    call_sid=call_sid or "unknown",
-                    campaign_id=campaign_id
-                )
+                with turn_tracer.span("function_call"):
+                    function_result = await execute_function(
+                        function_name=function_name,
+                        arguments=arguments,
+                        company_id=company_id,
+                        call_sid=call_sid or "unknown",
+                        campaign_id=campaign_id
+                    )
                 
                 yield function_result
             else:
@@ -307,6 +185,19 @@ Agent: [Immediately calls create_booking] ❌ WRONG
             logger.error(traceback.format_exc())
             yield "I apologize, I'm having trouble right now. Could you please repeat your question?"
 
+    async def _retrieve(self, company_id: str, question: str, agent_id: Optional[str]) -> List[Dict]:
+        """Embed the question and search the agent's documents"""
+        with turn_tracer.span("embedding"):
+            query_embedding = await self.embeddings.aembed_query(question)
+
+        with turn_tracer.span("vector_search"):
+            return await self.qdrant_service.search(
+                company_id=company_id,
+                query_vector=query_embedding,
+                agent_id=agent_id,
+                limit=5
+            )
+
     async def get_answer_with_acknowledgment(
         self,
         company_id: str,
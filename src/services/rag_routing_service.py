@@ -4,6 +4,9 @@ import logging
 from typing import Dict, Optional
 from openai import AsyncOpenAI
 from config.settings import settings
+from services.turn_tracer import turn_tracer
+from services.turn_deadline import turn_deadlines
+from services.conversation_memory import format_history, trim_to_budget
 import json
 
 logger = logging.getLogger(__name__)
@@ -12,9 +15,10 @@ class RAGRoutingService:
     """AI-powered intelligent routing for RAG queries"""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
         self.model = "gpt-4o-mini"
     
+    @turn_tracer.traced("rag_routing")
     async def should_retrieve_documents(
         self,
         user_message: str,
@@ -36,12 +40,8 @@ class RAGRoutingService:
         
         try:
             # Build conversation context
-            recent_exchanges = []
-            if conversation_history:
-                for msg in conversation_history[-6:]:  # Last 3 exchanges
-                    recent_exchanges.append(f"{msg['role'].upper()}: {msg['content']}")
-            
-            conversation_context = "\n".join(recent_exchanges) if recent_exchanges else "This is the first message"
+            recent_exchanges = trim_to_budget(conversation_history, settings.conversation_router_history_tokens)
+            conversation_context = format_history(recent_exchanges) if recent_exchanges else "This is the first message"
             
             # Get business context
             business_info = ""
@@ -117,16 +117,21 @@ Conversation Length: {len(conversation_history)} messages
 
 Provide the JSON decision."""
 
-            # Call OpenAI
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,
-                response_format={"type": "json_object"}
+            # Call OpenAI (within the turn budget)
+            response = await turn_deadlines.run(
+                "rag_routing",
+                self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.1,
+                    response_format={"type": "json_object"}
+                )
             )
+            if response is None:
+                return self._fallback_decision('Turn budget exhausted, defaulting to conversation context')
             
             result_text = response.choices[0].message.content
             result = json.loads(result_text)
@@ -145,14 +150,18 @@ Provide the JSON decision."""
             logger.error(traceback.format_exc())
             
             # Safe fallback - use conversation context
-            return {
-                'needs_documents': False,
-                'response_strategy': 'conversation_context',
-                'reasoning': 'Routing service failed, defaulting to conversation context',
-                'confidence': 0.5,
-                'topic_continuity': 'unknown',
-                'can_answer_from_history': True
-            }
+            return self._fallback_decision('Routing service failed, defaulting to conversation context')
+
+    @staticmethod
+    def _fallback_decision(reasoning: str) -> Dict:
+        return {
+            'needs_documents': False,
+            'response_strategy': 'conversation_context',
+            'reasoning': reasoning,
+            'confidence': 0.5,
+            'topic_continuity': 'unknown',
+            'can_answer_from_history': True
+        }
 
 # Global instance
 rag_routing_service = RAGRoutingService()
\ No newline at end of file
@@ -0,0 +1,251 @@
+from typing import Any, Awaitable, Callable, Dict, MutableMapping, Optional
+from collections import OrderedDict
+import asyncio
+import inspect
+import logging
+import sys
+import time
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Entries sized per structure for /stats; the rest is extrapolated
+SIZE_SAMPLE = 100
+
+_MISSING = object()
+
+
+def approx_size(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Rough deep size in bytes of plain data (dicts, lists, strings, ...).
+
+    Objects exposing an integer `nbytes` (numpy arrays, recorders) report
+    that; other objects count shallowly so SDK clients and connections are
+    not walked.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + sys.getsizeof(value, 0)
+
+    size = sys.getsizeof(value, 0)
+    if isinstance(value, dict):
+        size += sum(approx_size(k, _seen) + approx_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_size(v, _seen) for v in value)
+    return size
+
+
+class TrackedResource:
+    """
+    One registered per-call structure.
+
+    Owners keep using their dict as before and call touch(key) whenever an
+    entry is created or used. Entries idle longer than `ttl`, or for which
+    `expired(value, now)` is true, are removed by the reaper; inserting past
+    `max_entries` evicts the least recently touched entries immediately.
+    `on_evict(key, value)` (sync or async) releases whatever the entry holds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        entries: MutableMapping,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        on_evict: Optional[Callable[[Any, Any], Optional[Awaitable[None]]]] = None,
+        expired: Optional[Callable[[Any, float], bool]] = None,
+        sizer: Optional[Callable[[Any], int]] = None
+    ):
+        self.name = name
+        self.entries = entries
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self.expired = expired
+        self.sizer = sizer or approx_size
+        self._touched: "OrderedDict[Any, float]" = OrderedDict()
+        self.evicted = {"idle": 0, "expired": 0, "cap": 0}
+
+    def touch(self, key: Any):
+        touched = self._touched
+        if key in touched:
+            touched.move_to_end(key)
+        touched[key] = time.monotonic()
+        if self.max_entries and len(self.entries) > self.max_entries:
+            self._enforce_cap()
+
+    def _sync(self, now: float):
+        """Forget keys the owner removed, adopt keys it never touched"""
+        for key in [k for k in self._touched if k not in self.entries]:
+            del self._touched[key]
+        for key in [k for k in self.entries if k not in self._touched]:
+            self._touched[key] = now
+
+    def _evict(self, key: Any, reason: str) -> Optional[Awaitable[None]]:
+        self._touched.pop(key, None)
+        value = self.entries.pop(key, _MISSING)
+        if value is _MISSING:
+            return None
+        self.evicted[reason] += 1
+        if not self.on_evict:
+            return None
+        try:
+            result = self.on_evict(key, value)
+        except Exception as e:
+            logger.error(f"Error releasing {self.name} entry {key}: {e}")
+            return None
+        return result if inspect.isawaitable(result) else None
+
+    def _enforce_cap(self):
+        self._sync(time.monotonic())
+        pending = []
+        while len(self.entries) > self.max_entries and self._touched:
+            key = next(iter(self._touched))
+            logger.warning(f"{self.name} over {self.max_entries} entries, evicting {key}")
+            cleanup = self._evict(key, "cap")
+            if cleanup is not None:
+                pending.append(cleanup)
+        # Called from sync code paths, so async cleanups run in the background
+        for cleanup in pending:
+            asyncio.ensure_future(cleanup)
+
+    def reap(self, now: float) -> list:
+        """Evict idle / expired entries; returns pending async cleanups"""
+        self._sync(now)
+        pending = []
+        if self.ttl:
+            cutoff = now - self.ttl
+            while self._touched:
+                key, touched_at = next(iter(self._touched.items()))
+                if touched_at > cutoff:
+                    break
+                cleanup = self._evict(key, "idle")
+                if cleanup is not None:
+                    pending.append(cleanup)
+        if self.expired:
+            for key, value in list(self.entries.items()):
+                if self.expired(value, now):
+                    cleanup = self._evict(key, "expired")
+                    if cleanup is not None:
+                        pending.append(cleanup)
+        return pending
+
+    def approx_bytes(self) -> int:
+        count = len(self.entries)
+        size = sys.getsizeof(self.entries, 0)
+        if not count:
+            return size
+        sample = []
+        for key, value in list(self.entries.items())[:SIZE_SAMPLE]:
+            try:
+                sample.append(approx_size(key) + self.sizer(value))
+            except Exception:
+                sample.append(0)
+        return size + int(sum(sample) / len(sample) * count)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "approx_bytes": self.approx_bytes(),
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+            "evicted": dict(self.evicted)
+        }
+
+
+class ResourceRegistry:
+    """
+    Central registry of per-call in-process state.
+
+    Every module-level or shared structure keyed by call / stream / session
+    registers here, so a call that ends badly (stream never connects, socket
+    drops before cleanup, a close that raises) cannot leave entries behind
+    forever: a background reaper applies each structure's TTL, inserts past
+    the cap evict the oldest entries, and /stats reports entry counts and
+    approximate bytes per structure.
+    """
+
+    def __init__(self, reap_interval: float):
+        self.reap_interval = reap_interval
+        self._resources: Dict[str, TrackedResource] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "reaps": 0,
+            "reaped_entries": 0,
+            "last_reap_ms": 0.0
+        }
+
+    def register(self, name: str, entries: MutableMapping, **options) -> TrackedResource:
+        """Track `entries` under `name` (re-registering a name replaces it)"""
+        resource = TrackedResource(name, entries, **options)
+        self._resources[name] = resource
+        return resource
+
+    async def reap(self) -> int:
+        started = time.perf_counter()
+        now = time.monotonic()
+        reaped = 0
+        for resource in list(self._resources.values()):
+            before = len(resource.entries)
+            try:
+                pending = resource.reap(now)
+            except Exception as e:
+                logger.error(f"Error reaping {resource.name}: {e}")
+                continue
+            for cleanup in pending:
+                try:
+                    await cleanup
+                except Exception as e:
+                    logger.error(f"Error releasing {resource.name} entry: {e}")
+            removed = before - len(resource.entries)
+            if removed > 0:
+                logger.info(f"🧹 Reaped {removed} stale {resource.name} entries")
+                reaped += removed
+
+        self.stats["reaps"] += 1
+        self.stats["reaped_entries"] += reaped
+        self.stats["last_reap_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return reaped
+
+    async def _reaper(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.error(f"Resource reaper error: {e}")
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._reaper())
+            logger.info(f"Resource reaper started (every {self.reap_interval}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        structures = {name: r.get_stats() for name, r in self._resources.items()}
+        return {
+            **self.stats,
+            "reap_interval_seconds": self.reap_interval,
+            "total_entries": sum(s["entries"] for s in structures.values()),
+            "total_approx_bytes": sum(s["approx_bytes"] for s in structures.values()),
+            "structures": structures
+        }
+
+
+# Global instance
+resource_registry = ResourceRegistry(reap_interval=settings.resource_reaper_interval_seconds)
@@ -1,24 +1,67 @@
 # src/services/slot_manager_service.py
 import os
+import asyncio
 import aiohttp
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
 import pytz
 
+from config.settings import settings
+from services.resource_registry import resource_registry
+
 logger = logging.getLogger(__name__)
 
 FASTAPI_BASE_URL = os.getenv("FASTAPI_BASE_URL", "https://beta.callsure.ai")
 
+# Window the booking prompt offers slots from
+UPCOMING_DAYS = 7
+UPCOMING_COUNT = 5
+
 
 class SlotManagerService:
     """
     Fetches available slots from csai-fastapi backend.
     Falls back to suggesting general time ranges if DB slots unavailable.
+
+    Slot lists are cached per campaign for `slot_cache_ttl_seconds`, and
+    concurrent fetches of the same list share one request, so booking turns
+    don't pay a backend round-trip per utterance. The list is prefetched
+    when booking mode starts and invalidated when a booking is created.
     """
     
     def __init__(self):
         self.base_url = FASTAPI_BASE_URL
+        self._session: Optional[aiohttp.ClientSession] = None
+        # (campaign_id, count, window days) -> (expires_at, slots_data)
+        self._cache: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        # Bumped by invalidate(); a fetch started before that isn't cached
+        self._generation: Dict[str, int] = {}
+        self._prefetches: Set[asyncio.Task] = set()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "prefetches": 0, "invalidations": 0}
+        self._resource = resource_registry.register(
+            "slot_cache",
+            self._cache,
+            max_entries=settings.slot_cache_max_entries,
+            expired=lambda entry, now: entry[0] <= now
+        )
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session (keep-alive to the backend across calls)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=30)
+            )
+        return self._session
+    
+    async def close(self):
+        for task in list(self._prefetches):
+            task.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def get_available_slots(
         self,
@@ -29,7 +72,10 @@ class SlotManagerService:
         auth_token: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Fetch available slots from backend API.
+        Available slots from the backend API, cached per campaign.
+        
+        The cache ignores how far the window has moved within the TTL:
+        "the next 7 days" fetched a minute ago is reused as is.
         
         Returns:
             {
@@ -39,6 +85,90 @@ class SlotManagerService:
                 "source": "database" | "fallback"
             }
         """
+        key = (campaign_id, count, round((end_date - start_date) / timedelta(days=1)))
+        
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.stats["hits"] += 1
+            return entry[1]
+        
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(
+                self._fetch_and_cache(key, campaign_id, start_date, end_date, count, auth_token)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        
+        # A caller giving up (turn budget, barge-in) doesn't cancel the shared fetch
+        return await asyncio.shield(task)
+    
+    async def get_upcoming_slots(self, campaign_id: str, count: int = UPCOMING_COUNT) -> Dict[str, Any]:
+        """Slots over the next UPCOMING_DAYS days, as offered in the booking prompt"""
+        now = datetime.now()
+        return await self.get_available_slots(
+            campaign_id=campaign_id,
+            start_date=now,
+            end_date=now + timedelta(days=UPCOMING_DAYS),
+            count=count
+        )
+    
+    def prefetch(self, campaign_id: str):
+        """Warm the upcoming-slots cache in the background (booking mode just started)"""
+        if not campaign_id:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self.get_upcoming_slots(campaign_id))
+        except RuntimeError:
+            return
+        self.stats["prefetches"] += 1
+        self._prefetches.add(task)
+        task.add_done_callback(self._prefetches.discard)
+    
+    def invalidate(self, campaign_id: str):
+        """Drop the campaign's cached slots (a booking just took one)"""
+        self._generation[campaign_id] = self._generation.get(campaign_id, 0) + 1
+        for key in [key for key in self._cache if key[0] == campaign_id]:
+            self._cache.pop(key, None)
+        self.stats["invalidations"] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "cached": len(self._cache),
+            "inflight": len(self._inflight),
+            "ttl_seconds": settings.slot_cache_ttl_seconds
+        }
+    
+    async def _fetch_and_cache(
+        self,
+        key: Tuple,
+        campaign_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        count: int,
+        auth_token: Optional[str]
+    ) -> Dict[str, Any]:
+        generation = self._generation.get(campaign_id, 0)
+        slots_data = await self._fetch_slots(campaign_id, start_date, end_date, count, auth_token)
+        # Fallback suggestions (backend down) are not cached, so the next turn retries the backend
+        if slots_data.get("source") == "database" and self._generation.get(campaign_id, 0) == generation:
+            self._cache[key] = (time.monotonic() + settings.slot_cache_ttl_seconds, slots_data)
+            self._resource.touch(key)
+        return slots_data
+    
+    async def _fetch_slots(
+        self,
+        campaign_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        count: int,
+        auth_token: Optional[str]
+    ) -> Dict[str, Any]:
+        """Fetch available slots from backend API (fallback suggestions on failure)"""
         
         try:
             url = f"{self.base_url}/api/bookings/campaigns/{campaign_id}/available-slots"
@@ -52,22 +182,22 @@ class SlotManagerService:
             if auth_token:
                 headers["Authorization"] = f"Bearer {auth_token}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, headers=headers, timeout=5) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        slots = data.get("slots", [])
-                        
-                        if slots:
-                            logger.info(f"✅ Fetched {len(slots)} slots from database for campaign {campaign_id}")
-                            return {
-                                "has_slots": True,
-                                "slots": slots,
-                                "count": len(slots),
-                                "source": "database"
-                            }
-                    else:
-                        logger.warning(f"⚠️ API returned status {response.status} for campaign {campaign_id}")
+            session = self._get_session()
+            async with session.get(url, params=params, headers=headers, timeout=5) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    slots = data.get("slots", [])
+                    
+                    if slots:
+                        logger.info(f"✅ Fetched {len(slots)} slots from database for campaign {campaign_id}")
+                        return {
+                            "has_slots": True,
+                            "slots": slots,
+                            "count": len(slots),
+                            "source": "database"
+                        }
+                else:
+                    logger.warning(f"⚠️ API returned status {response.status} for campaign {campaign_id}")
         
         except Exception as e:
             logger.error(f"❌ Error fetching slots from API: {e}")
@@ -137,13 +267,13 @@ class SlotManagerService:
             if auth_token:
                 headers["Authorization"] = f"Bearer {auth_token}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, headers=headers, timeout=5) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.warning(f"⚠️ Slot capacity check failed: {response.status}")
-                        return {"available": True, "current_bookings": 0, "max_capacity": 1}
+            session = self._get_session()
+            async with session.get(url, params=params, headers=headers, timeout=5) as response:
+                if response.status == 200:
+                    return await response.json()
+                else:
+                    logger.warning(f"⚠️ Slot capacity check failed: {response.status}")
+                    return {"available": True, "current_bookings": 0, "max_capacity": 1}
         
         except Exception as e:
             logger.error(f"❌ Error checking slot capacity: {e}")
@@ -201,4 +331,8 @@ class SlotManagerService:
             if len(formatted) == 1:  # Only header, no valid slots
                 return "No specific slots available. Suggest general time ranges (morning: 9-11 AM, afternoon: 2-4 PM)."
             
-            return "\n".join(formatted)
\ No newline at end of file
+            return "\n".join(formatted)
+
+
+# Global instance
+slot_manager_service = SlotManagerService()
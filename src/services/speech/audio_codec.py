@@ -0,0 +1,58 @@
+# src/services/speech/audio_codec.py
+#
+# Per-frame audio conversions between telephony providers, Deepgram and
+# ElevenLabs. Called for every 20ms media frame, so kept free of I/O and
+# service dependencies (see benchmarks/bench_hot_path.py).
+import base64
+import audioop
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def convert_twilio_audio(payload: str) -> bytes:
+    """
+    Convert Twilio's mulaw audio (8kHz) to linear16 PCM (16kHz) for Deepgram
+    """
+    try:
+        # Decode base64 mulaw audio from Twilio
+        mulaw_audio = base64.b64decode(payload)
+
+        # Convert mulaw to linear PCM (16-bit)
+        pcm_audio = audioop.ulaw2lin(mulaw_audio, 2)
+
+        # Resample from 8kHz to 16kHz
+        return audioop.ratecv(pcm_audio, 2, 1, 8000, 16000, None)[0]
+
+    except Exception as e:
+        logger.error(f"Error converting audio: {str(e)}")
+        return b''
+
+
+def convert_exotel_audio_to_deepgram(base64_audio: str) -> bytes:
+    """
+    Convert Exotel's 16-bit PCM 8kHz audio to Deepgram format
+    Exotel sends: 16-bit PCM, 8kHz, mono, base64-encoded
+    """
+    try:
+        pcm_data = base64.b64decode(base64_audio)
+        # Exotel sends 16-bit PCM at 8kHz - Deepgram expects same
+        return pcm_data
+    except Exception as e:
+        logger.error(f"Error converting Exotel audio: {e}")
+        return b""
+
+
+def convert_elevenlabs_to_exotel(mulaw_chunk: str) -> str:
+    """
+    Convert ElevenLabs mulaw audio to Exotel's format
+    ElevenLabs: mulaw 8kHz base64
+    Exotel expects: 16-bit PCM 8kHz base64
+    """
+    try:
+        mulaw_data = base64.b64decode(mulaw_chunk)
+        pcm_data = audioop.ulaw2lin(mulaw_data, 2)  # 2 = 16-bit width
+        return base64.b64encode(pcm_data).decode('utf-8')
+    except Exception as e:
+        logger.error(f"Error converting audio for Exotel: {e}")
+        return ""
@@ -0,0 +1,165 @@
+import audioop
+import base64
+import logging
+import wave
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+
+# mu-law byte -> int16 sample lookup, so decoding a frame is one np.take
+_ULAW_TO_PCM16 = np.frombuffer(audioop.ulaw2lin(bytes(range(256)), 2), dtype=np.int16)
+
+
+class CallAudioRecorder:
+    """
+    Two-leg (caller / agent) recorder for one media stream.
+
+    Each leg is written into a preallocated int16 ring buffer at its position
+    on a shared sample timeline. Inbound frames arrive in real time and drive
+    the clock; agent audio arrives in bursts faster than real time, so it is
+    placed from the current inbound position onward and truncated on a clear
+    (barge-in), matching what the caller actually heard.
+
+    Once a block of inbound audio is complete it is interleaved into stereo
+    (left = caller, right = agent) and appended to a WAV file, so memory stays
+    at the two ring buffers regardless of call length.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        inbound_encoding: str = "mulaw",
+        outbound_encoding: str = "mulaw",
+        buffer_seconds: int = 60,
+        block_seconds: float = 1.0
+    ):
+        self.path = path
+        self.inbound_encoding = inbound_encoding
+        self.outbound_encoding = outbound_encoding
+
+        self.capacity = buffer_seconds * SAMPLE_RATE
+        self.block = int(block_seconds * SAMPLE_RATE)
+        self._inbound = np.zeros(self.capacity, dtype=np.int16)
+        self._outbound = np.zeros(self.capacity, dtype=np.int16)
+        self._stereo = np.empty((self.block, 2), dtype=np.int16)
+
+        self.inbound_pos = 0
+        self.outbound_pos = 0
+        self.flushed_pos = 0
+        self.dropped_samples = 0
+
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(2)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(SAMPLE_RATE)
+        self.closed = False
+
+    @staticmethod
+    def _decode(payload: str, encoding: str) -> np.ndarray:
+        raw = base64.b64decode(payload)
+        if encoding == "mulaw":
+            return _ULAW_TO_PCM16.take(np.frombuffer(raw, dtype=np.uint8))
+        return np.frombuffer(raw, dtype=np.int16)
+
+    def _write(self, ring: np.ndarray, start: int, samples: np.ndarray) -> int:
+        """Copy samples into ring at absolute position start; returns samples written"""
+        # Never overwrite audio that has not been flushed yet
+        room = self.flushed_pos + self.capacity - start
+        if room <= 0:
+            self.dropped_samples += len(samples)
+            return 0
+        if len(samples) > room:
+            self.dropped_samples += len(samples) - room
+            samples = samples[:room]
+
+        offset = start % self.capacity
+        first = min(len(samples), self.capacity - offset)
+        ring[offset:offset + first] = samples[:first]
+        if first < len(samples):
+            ring[:len(samples) - first] = samples[first:]
+        return len(samples)
+
+    def write_inbound(self, payload: str):
+        """Caller audio frame (base64) from the media stream"""
+        if self.closed:
+            return
+        samples = self._decode(payload, self.inbound_encoding)
+        self.inbound_pos += self._write(self._inbound, self.inbound_pos, samples)
+
+        while self.inbound_pos - self.flushed_pos >= self.block:
+            self._flush_block(self.block)
+
+    def write_outbound(self, payload: str):
+        """Agent audio chunk (base64) as sent to the media stream"""
+        if self.closed:
+            return
+        samples = self._decode(payload, self.outbound_encoding)
+        start = max(self.outbound_pos, self.inbound_pos)
+        self.outbound_pos = start + self._write(self._outbound, start, samples)
+
+    def clear_outbound(self):
+        """Drop agent audio the caller will no longer hear (playback was cleared)"""
+        if self.outbound_pos <= self.inbound_pos:
+            return
+        length = self.outbound_pos - self.inbound_pos
+        offset = self.inbound_pos % self.capacity
+        first = min(length, self.capacity - offset)
+        self._outbound[offset:offset + first] = 0
+        if first < length:
+            self._outbound[:length - first] = 0
+        self.outbound_pos = self.inbound_pos
+
+    def _flush_block(self, length: int):
+        offset = self.flushed_pos % self.capacity
+        end = offset + length
+        stereo = self._stereo[:length]
+        if end <= self.capacity:
+            stereo[:, 0] = self._inbound[offset:end]
+            stereo[:, 1] = self._outbound[offset:end]
+            self._inbound[offset:end] = 0
+            self._outbound[offset:end] = 0
+        else:
+            split = self.capacity - offset
+            stereo[:split, 0] = self._inbound[offset:]
+            stereo[:split, 1] = self._outbound[offset:]
+            stereo[split:, 0] = self._inbound[:end - self.capacity]
+            stereo[split:, 1] = self._outbound[:end - self.capacity]
+            self._inbound[offset:] = 0
+            self._outbound[offset:] = 0
+            self._inbound[:end - self.capacity] = 0
+            self._outbound[:end - self.capacity] = 0
+
+        self._wav.writeframesraw(stereo.tobytes())
+        self.flushed_pos += length
+
+    def close(self) -> Optional[str]:
+        """Flush remaining audio, finalize the WAV header; returns the file path"""
+        if self.closed:
+            return self.path
+        try:
+            end = max(self.inbound_pos, self.outbound_pos)
+            while self.flushed_pos < end:
+                self._flush_block(min(self.block, end - self.flushed_pos))
+            self._wav.close()
+        except Exception as e:
+            logger.error(f"Error finalizing recording {self.path}: {e}")
+            return None
+        finally:
+            self.closed = True
+
+        if self.dropped_samples:
+            logger.warning(f"Recording {self.path} dropped {self.dropped_samples} samples (buffer full)")
+        return self.path
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.flushed_pos / SAMPLE_RATE
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the sample buffers"""
+        return self._inbound.nbytes + self._outbound.nbytes + self._stereo.nbytes
@@ -5,8 +5,6 @@ import json
 import logging
 import os
 from typing import Dict, Callable, Awaitable, Optional
-import base64
-import audioop
 from deepgram import (
     DeepgramClient,
     DeepgramClientOptions,
@@ -14,12 +12,33 @@ from deepgram import (
     LiveOptions,
 )
 
+from config.settings import settings
+from services.resource_registry import resource_registry
+from services.speech.audio_codec import convert_twilio_audio
+
 logger = logging.getLogger(__name__)
 
 
+async def _finish_orphaned_session(session_id: str, session: Dict):
+    connection = session.get("connection")
+    if connection:
+        logger.warning(f"Finishing orphaned Deepgram session {session_id}")
+        await connection.finish()
+
+
 class DeepgramWebSocketService:
+    # Shared by the per-call instances so sessions whose close never ran
+    # (dropped sockets, failed starts) are still found and finished by the reaper
+    sessions: Dict[str, Dict] = {}
+    _sessions_resource = resource_registry.register(
+        "deepgram_sessions",
+        sessions,
+        ttl=settings.call_resource_idle_seconds,
+        max_entries=settings.call_resource_max_entries,
+        on_evict=_finish_orphaned_session
+    )
+
     def __init__(self):
-        self.sessions: Dict[str, Dict] = {}
         self.deepgram_api_key = os.getenv("DEEPGRAM_API_KEY")
         
     async def initialize_session(
@@ -49,6 +68,7 @@ class DeepgramWebSocketService:
             
             # Initialize Deepgram client with keepalive
             config = DeepgramClientOptions(
+                url=settings.deepgram_api_url or "",
                 options={"keepalive": "true"}
             )
             deepgram = DeepgramClient(self.deepgram_api_key, config)
@@ -65,6 +85,7 @@ class DeepgramWebSocketService:
                 "interruption_cooldown": False,
             }
             self.sessions[session_id] = session
+            self._sessions_resource.touch(session_id)
             
             # Event handlers with flexible signatures to handle SDK variations
             async def on_open(*args, **kwargs):
@@ -181,6 +202,7 @@ class DeepgramWebSocketService:
             # Start connection
             if not await dg_connection.start(options):
                 logger.error(f"Failed to start Deepgram connection")
+                await self.close_session(session_id)
                 return False
             
             # Wait for connection with timeout
@@ -191,12 +213,14 @@ class DeepgramWebSocketService:
                 await asyncio.sleep(0.1)
             
             logger.error(f"Timeout waiting for Deepgram connection")
+            await self.close_session(session_id)
             return False
             
         except Exception as e:
             logger.error(f"Error initializing Deepgram: {str(e)}")
             import traceback
             logger.error(traceback.format_exc())
+            await self.close_session(session_id)
             return False
     
     async def _reset_cooldown(self, session_id: str):
@@ -210,21 +234,7 @@ class DeepgramWebSocketService:
         """
         Convert Twilio's mulaw audio (8kHz) to linear16 PCM (16kHz) for Deepgram
         """
-        try:
-            # Decode base64 mulaw audio from Twilio
-            mulaw_audio = base64.b64decode(payload)
-            
-            # Convert mulaw to linear PCM (16-bit)
-            pcm_audio = audioop.ulaw2lin(mulaw_audio, 2)
-            
-            # Resample from 8kHz to 16kHz
-            pcm_audio_16k = audioop.ratecv(pcm_audio, 2, 1, 8000, 16000, None)[0]
-            
-            return pcm_audio_16k
-            
-        except Exception as e:
-            logger.error(f"Error converting audio: {str(e)}")
-            return b''
+        return convert_twilio_audio(payload)
     
     async def process_audio_chunk(self, session_id: str, audio_data: bytes) -> bool:
         """Send audio chunk to Deepgram for processing"""
@@ -233,6 +243,7 @@ class DeepgramWebSocketService:
             if not session or not session["connected"]:
                 return False
             
+            self._sessions_resource.touch(session_id)
             connection = session["connection"]
             await connection.send(audio_data)
             return True
@@ -0,0 +1,276 @@
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+import asyncio
+import gzip
+import io
+import json
+import logging
+
+from handlers.s3_handler import S3Handler
+from services.call_recording_service import TRANSCRIPT_PREFIX, TRANSCRIPT_SUFFIX
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_PREFIX = "call-transcripts-rollup"
+
+# Column order of the rollup file; matches the NDJSON turn records. Any other
+# turn fields (strategy, booking_mode, ...) go into "extra" as a JSON object
+ROLLUP_COLUMNS = [
+    ("call_sid", "string"),
+    ("company_id", "string"),
+    ("agent_id", "string"),
+    ("from_number", "string"),
+    ("to_number", "string"),
+    ("duration_seconds", "int64"),
+    ("ended_at", "string"),
+    ("turn_index", "int32"),
+    ("role", "string"),
+    ("content", "string"),
+    ("timestamp", "string"),
+    ("extra", "string"),
+]
+_KNOWN_FIELDS = {name for name, _ in ROLLUP_COLUMNS}
+
+# Decoding and Parquet encoding are CPU-bound; they run in a separate process
+# so neither the API event loop nor the default executor (ElevenLabs chunk
+# reads on the call path) waits on a rollup
+_rollup_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_rollup_executor() -> ProcessPoolExecutor:
+    """Get (or lazily create) the single-process pool rollups are built in"""
+    global _rollup_executor
+    if _rollup_executor is None:
+        _rollup_executor = ProcessPoolExecutor(max_workers=1)
+    return _rollup_executor
+
+
+def shutdown_rollup_executor():
+    """Stop the rollup process pool (called on application shutdown)"""
+    global _rollup_executor
+    if _rollup_executor is not None:
+        _rollup_executor.shutdown(wait=False, cancel_futures=True)
+        _rollup_executor = None
+
+
+def _build_rollup(
+    payloads: List[bytes],
+    company_id: str,
+    day: date,
+    row_group_size: int,
+    existing: Optional[bytes] = None
+):
+    """Decode NDJSON payloads into a sorted Parquet file plus call_sid index (CPU-bound)
+
+    Rows of an earlier rollup of the same day (``existing``) are carried over,
+    except for calls present in the new payloads, which replace them.
+    """
+    rows = []
+    for payload in payloads:
+        for line in gzip.decompress(payload).decode('utf-8').splitlines():
+            if line:
+                row = json.loads(line)
+                extra = {k: v for k, v in row.items() if k not in _KNOWN_FIELDS}
+                row["extra"] = json.dumps(extra, ensure_ascii=False, default=str) if extra else None
+                rows.append(row)
+
+    if existing:
+        new_calls = {row.get('call_sid') for row in rows}
+        rows.extend(
+            row for row in pq.read_table(io.BytesIO(existing)).to_pylist()
+            if row.get('call_sid') not in new_calls
+        )
+
+    rows.sort(key=lambda r: (r.get('call_sid') or '', r.get('turn_index') or 0))
+
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in ROLLUP_COLUMNS])
+    table = pa.Table.from_pydict(
+        {name: [row.get(name) for row in rows] for name, _ in ROLLUP_COLUMNS},
+        schema=schema
+    )
+
+    buffer = io.BytesIO()
+    pq.write_table(
+        table,
+        buffer,
+        row_group_size=row_group_size,
+        compression='zstd'
+    )
+
+    calls = {}
+    for row_number, row in enumerate(rows):
+        entry = calls.get(row['call_sid'])
+        if entry is None:
+            calls[row['call_sid']] = {
+                "row_start": row_number,
+                "row_count": 1,
+                "row_group": row_number // row_group_size,
+                "agent_id": row.get('agent_id'),
+                "duration_seconds": row.get('duration_seconds'),
+                "ended_at": row.get('ended_at')
+            }
+        else:
+            entry["row_count"] += 1
+
+    index = {
+        "company_id": company_id,
+        "date": day.isoformat(),
+        "created_at": datetime.utcnow().isoformat(),
+        "rows": len(rows),
+        "calls": len(calls),
+        "row_group_size": row_group_size,
+        "columns": [name for name, _ in ROLLUP_COLUMNS],
+        "call_index": calls
+    }
+    return buffer.getvalue(), index
+
+
+class TranscriptRollupService:
+    """
+    Compacts a company-day of per-call NDJSON transcripts into one Parquet file.
+
+    Output per company-day:
+      call-transcripts-rollup/{company}/{Y/m/d}/transcripts.parquet
+      call-transcripts-rollup/{company}/{Y/m/d}/index.json
+
+    Rows are sorted by call_sid and written in fixed-size row groups. The index
+    maps every call_sid to its row range and row group, so a reader can fetch a
+    single call with one ranged read instead of scanning the day.
+
+    Re-running a day merges into the existing rollup, so calls whose source
+    files were already deleted by an earlier run are kept.
+    """
+
+    def __init__(self, row_group_size: int = 50000, download_concurrency: int = 32):
+        self.s3_handler = S3Handler()
+        self.row_group_size = row_group_size
+        self.download_concurrency = download_concurrency
+
+    @staticmethod
+    def _day_path(day: date) -> str:
+        return day.strftime('%Y/%m/%d')
+
+    async def rollup_company_day(
+        self,
+        company_id: str,
+        day: date,
+        delete_source: bool = False
+    ) -> Dict[str, Any]:
+        """Build the Parquet rollup and index for one company-day"""
+        if not PYARROW_AVAILABLE:
+            return {
+                "success": False,
+                "error": "pyarrow is not installed"
+            }
+
+        source_prefix = f"{TRANSCRIPT_PREFIX}/{company_id}/{self._day_path(day)}/"
+        rollup_prefix = f"{ROLLUP_PREFIX}/{company_id}/{self._day_path(day)}"
+
+        try:
+            keys = []
+            async for page in self.s3_handler.iter_list_pages(source_prefix):
+                keys.extend(item['Key'] for item in page if item['Key'].endswith(TRANSCRIPT_SUFFIX))
+
+            if not keys:
+                return {
+                    "success": True,
+                    "company_id": company_id,
+                    "date": day.isoformat(),
+                    "calls": 0,
+                    "message": "No transcripts to roll up"
+                }
+
+            payloads = await self._download_all(keys)
+
+            # Never replace a rollup we could not read: its source files may
+            # already be gone
+            existing = await self.s3_handler.download_file(f"{rollup_prefix}/transcripts.parquet")
+            if not existing['success'] and existing.get('error') != "File not found":
+                raise Exception(f"Existing rollup download failed: {existing.get('error')}")
+
+            loop = asyncio.get_running_loop()
+            parquet_bytes, index = await loop.run_in_executor(
+                get_rollup_executor(), _build_rollup, payloads, company_id, day,
+                self.row_group_size, existing.get('data')
+            )
+
+            parquet_result = await self.s3_handler.put_bytes(
+                key=f"{rollup_prefix}/transcripts.parquet",
+                data=parquet_bytes,
+                content_type='application/vnd.apache.parquet'
+            )
+            if not parquet_result['success']:
+                raise Exception(f"Rollup upload failed: {parquet_result.get('error')}")
+
+            index_result = await self.s3_handler.put_bytes(
+                key=f"{rollup_prefix}/index.json",
+                data=json.dumps(index, separators=(',', ':')).encode('utf-8'),
+                content_type='application/json'
+            )
+            if not index_result['success']:
+                raise Exception(f"Index upload failed: {index_result.get('error')}")
+
+            deleted = 0
+            if delete_source:
+                results = await self.s3_handler.delete_multiple_files(keys)
+                deleted = sum(1 for r in results if r.get("success"))
+
+            logger.info(
+                f"Rolled up {index['calls']} calls / {index['rows']} turns for {company_id} {day} "
+                f"({len(parquet_bytes)} bytes)"
+            )
+
+            return {
+                "success": True,
+                "company_id": company_id,
+                "date": day.isoformat(),
+                "calls": index['calls'],
+                "rows": index['rows'],
+                "size": len(parquet_bytes),
+                "rollup_key": parquet_result['key'],
+                "index_key": index_result['key'],
+                "source_files_deleted": deleted
+            }
+
+        except Exception as e:
+            logger.error(f"Error rolling up transcripts for {company_id} {day}: {str(e)}")
+            return {
+                "success": False,
+                "company_id": company_id,
+                "date": day.isoformat(),
+                "error": str(e)
+            }
+
+    async def rollup_day(self, day: date, delete_source: bool = False) -> List[Dict[str, Any]]:
+        """Roll up every company that has transcripts under the given day"""
+        results = []
+        for company_prefix in await self.s3_handler.list_prefixes(f"{TRANSCRIPT_PREFIX}/"):
+            company_id = company_prefix[len(TRANSCRIPT_PREFIX) + 1:].rstrip('/')
+            results.append(await self.rollup_company_day(company_id, day, delete_source))
+        return results
+
+    async def _download_all(self, keys: List[str]) -> List[bytes]:
+        semaphore = asyncio.Semaphore(self.download_concurrency)
+
+        async def _get(key: str) -> Optional[bytes]:
+            async with semaphore:
+                result = await self.s3_handler.download_file(key)
+            if not result['success']:
+                raise Exception(f"Download failed for {key}: {result.get('error')}")
+            return result['data']
+
+        return await asyncio.gather(*[_get(key) for key in keys])
+
+
+# Global instance
+transcript_rollup_service = TranscriptRollupService()
@@ -0,0 +1,157 @@
+# src/services/turn_deadline.py
+from typing import Any, Awaitable, Dict, Optional
+from contextvars import ContextVar
+import asyncio
+import inspect
+import logging
+import time
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Stages that wait on the turn budget; counters are created for others on first use
+STAGES = ("agent_routing", "rag_routing", "intent_detection", "datetime_parse", "slot_fetch", "retrieval", "llm")
+
+_current_deadline: ContextVar[Optional["TurnDeadline"]] = ContextVar("csai_turn_deadline", default=None)
+
+
+class TurnDeadline:
+    """
+    Latency budget of one turn, measured from the final transcript.
+
+    Stages before the answer (routing, intent detection, datetime parsing,
+    slot fetch, retrieval) get what is left of the budget minus the answer
+    reserve, so the LLM and TTS always keep time to speak. A stage that
+    would overrun is skipped or cut off and the caller degrades to its
+    fallback instead of the customer waiting on silence.
+    """
+
+    def __init__(self, service: "TurnDeadlineService", budget: float, answer_reserve: float):
+        self.service = service
+        self.budget = budget
+        self.answer_reserve = answer_reserve
+        self.started = time.perf_counter()
+        self.exhausted = False
+
+    def remaining(self) -> float:
+        return self.budget - (time.perf_counter() - self.started)
+
+    def stage_timeout(self) -> float:
+        """Seconds a pre-answer stage may take"""
+        return self.remaining() - self.answer_reserve
+
+    def llm_timeout(self, default: float) -> float:
+        """First-chunk deadline for the streamed answer: the rest of the budget, at least the floor"""
+        return min(default, max(self.remaining(), settings.turn_budget_llm_floor_ms / 1000))
+
+    async def run(self, stage: str, awaitable: Awaitable, fallback: Any = None) -> Any:
+        """
+        Await `awaitable` within the stage's share of the budget. On skip or
+        timeout return `fallback` (called, and awaited if needed, when callable).
+        """
+        timeout = self.stage_timeout()
+        if timeout <= 0:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            self.record(stage, "skipped")
+            return await _resolve(fallback)
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            self.record(stage, "timed_out")
+            return await _resolve(fallback)
+
+    def record(self, stage: str, outcome: str):
+        if not self.exhausted:
+            self.exhausted = True
+            self.service.count("turns", "exhausted")
+        self.service.count(stage, outcome)
+        logger.warning(
+            f"⏳ Turn budget: {stage} {outcome.replace('_', ' ')} "
+            f"({(time.perf_counter() - self.started) * 1000:.0f}ms of {self.budget * 1000:.0f}ms used)"
+        )
+
+
+class _NoDeadline:
+    """Stand-in outside a turn (or when budgets are disabled): stages run unbounded"""
+
+    exhausted = False
+
+    def remaining(self) -> float:
+        return float("inf")
+
+    def stage_timeout(self) -> float:
+        return float("inf")
+
+    def llm_timeout(self, default: float) -> float:
+        return default
+
+    async def run(self, stage: str, awaitable: Awaitable, fallback: Any = None) -> Any:
+        return await awaitable
+
+    def record(self, stage: str, outcome: str):
+        pass
+
+
+_NO_DEADLINE = _NoDeadline()
+
+
+async def _resolve(fallback: Any) -> Any:
+    if callable(fallback):
+        fallback = fallback()
+    if inspect.isawaitable(fallback):
+        fallback = await fallback
+    return fallback
+
+
+class TurnDeadlineService:
+    """
+    Starts a TurnDeadline per turn and keeps budget-exhaustion counters per
+    stage. Like the turn tracer, the deadline is carried in a context
+    variable so services deep in the call path can honour it without extra
+    parameters.
+    """
+
+    def __init__(self, enabled: bool, budget_ms: float, answer_reserve_ms: float):
+        self.enabled = enabled
+        self.budget = budget_ms / 1000
+        self.answer_reserve = answer_reserve_ms / 1000
+        self._counters: Dict[str, Dict[str, int]] = {"turns": {"started": 0, "exhausted": 0}}
+        for stage in STAGES:
+            self._counters[stage] = {"skipped": 0, "timed_out": 0}
+
+    def start(self):
+        """Begin the budget of a new turn in the current context"""
+        if not self.enabled:
+            return _NO_DEADLINE
+        deadline = TurnDeadline(self, self.budget, self.answer_reserve)
+        _current_deadline.set(deadline)
+        self.count("turns", "started")
+        return deadline
+
+    def current(self):
+        return _current_deadline.get() or _NO_DEADLINE
+
+    async def run(self, stage: str, awaitable: Awaitable, fallback: Any = None) -> Any:
+        return await self.current().run(stage, awaitable, fallback)
+
+    def count(self, stage: str, outcome: str):
+        counter = self._counters.setdefault(stage, {"skipped": 0, "timed_out": 0})
+        counter[outcome] = counter.get(outcome, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "budget_ms": self.budget * 1000,
+            "answer_reserve_ms": self.answer_reserve * 1000,
+            "counters": self._counters
+        }
+
+
+# Global instance
+turn_deadlines = TurnDeadlineService(
+    enabled=settings.turn_budget_enabled,
+    budget_ms=settings.turn_budget_ms,
+    answer_reserve_ms=settings.turn_budget_answer_reserve_ms
+)
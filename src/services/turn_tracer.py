@@ -0,0 +1,278 @@
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import inspect
+import logging
+import time
+
+from config.settings import settings
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+try:
+    from opentelemetry import trace as otel_trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    otel_trace = None
+    OTEL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Seconds; voice turns live between tens of milliseconds and a few seconds
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0)
+LABELS = ("provider", "company_id", "agent_id")
+
+_current_turn: ContextVar[Optional["TurnTrace"]] = ContextVar("csai_current_turn", default=None)
+
+
+class TurnTrace:
+    """
+    Timing of one conversational turn: final transcript in, audio out.
+
+    Stages are timed spans (classifier calls, embedding, vector search, LLM,
+    ...); milestones are points in time measured from the final transcript
+    (LLM first token, TTS first byte, first media frame sent), each kept once
+    per turn.
+    """
+
+    def __init__(self, tracer: "TurnTracer", call_sid: str, provider: str, company_id: str, agent_id: str):
+        self.tracer = tracer
+        self.call_sid = call_sid
+        self.provider = provider
+        self.company_id = company_id or "unknown"
+        self.agent_id = agent_id or "unknown"
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.milestones: Dict[str, float] = {}
+        self._token = None
+        self._span = None
+
+    @property
+    def labels(self) -> Dict[str, str]:
+        return {"provider": self.provider, "company_id": self.company_id, "agent_id": self.agent_id}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def mark(self, milestone: str):
+        if milestone in self.milestones:
+            return
+        elapsed = self.elapsed()
+        self.milestones[milestone] = elapsed
+        self.tracer._observe_milestone(self, milestone, elapsed)
+        if self._span is not None:
+            self._span.add_event(milestone, {"elapsed_ms": round(elapsed * 1000, 1)})
+
+    @contextmanager
+    def span(self, stage: str):
+        otel_span = self.tracer._start_child_span(self, stage)
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            duration = time.perf_counter() - started
+            # Repeated stages (e.g. two classifier calls) add up within a turn
+            self.stages[stage] = self.stages.get(stage, 0.0) + duration
+            self.tracer._observe_stage(self, stage, duration)
+            if otel_span is not None:
+                otel_span.end()
+
+
+class _NoTurn:
+    """Stand-in when no turn is active, so instrumented code never branches"""
+
+    def mark(self, milestone: str):
+        pass
+
+    @contextmanager
+    def span(self, stage: str):
+        yield self
+
+
+_NO_TURN = _NoTurn()
+
+
+class TurnTracer:
+    """
+    Per-turn latency tracing across STT, routing, RAG, LLM and TTS.
+
+    The media-stream handlers start a turn when a final transcript arrives;
+    it is carried in a context variable, so services deep in the call path
+    (intent classifiers, embeddings, Qdrant, TTS streaming) record against
+    it without extra parameters, and do nothing outside a turn.
+
+    Every stage and milestone is exported as a Prometheus histogram labelled
+    by provider, company and agent, optionally as OpenTelemetry spans (one
+    `turn` span per turn with a child per stage), and kept in a rolling
+    in-process window for the p50/p95/p99 summary on /stats.
+    """
+
+    def __init__(self, enabled: bool, otel_enabled: bool, window: int):
+        self.enabled = enabled
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._otel = otel_trace.get_tracer("csai.turn") if otel_enabled and OTEL_AVAILABLE else None
+        if otel_enabled and not OTEL_AVAILABLE:
+            logger.warning("OpenTelemetry tracing requested but opentelemetry-api is not installed")
+
+        self._stage_hist = self._milestone_hist = self._turn_hist = None
+        if enabled and PROMETHEUS_AVAILABLE:
+            self._stage_hist = Histogram(
+                "csai_turn_stage_seconds", "Duration of a pipeline stage within a turn",
+                ("stage",) + LABELS, buckets=LATENCY_BUCKETS
+            )
+            self._milestone_hist = Histogram(
+                "csai_turn_milestone_seconds", "Time from final transcript to a turn milestone",
+                ("milestone",) + LABELS, buckets=LATENCY_BUCKETS
+            )
+            self._turn_hist = Histogram(
+                "csai_turn_seconds", "Total turn time, final transcript to response played out",
+                LABELS, buckets=LATENCY_BUCKETS
+            )
+
+    # Turn lifecycle
+
+    def start_turn(self, call_sid: str, provider: str, company_id: str = None, agent_id: str = None):
+        """Begin a turn in the current context (finishing any turn still open there)"""
+        if not self.enabled:
+            return _NO_TURN
+        self.finish_turn()
+        turn = TurnTrace(self, call_sid, provider, company_id, agent_id)
+        if self._otel is not None:
+            turn._span = self._otel.start_span("turn", attributes={"call_sid": call_sid, **turn.labels})
+        turn._token = _current_turn.set(turn)
+        return turn
+
+    def finish_turn(self):
+        """Record and close the current turn, if any"""
+        turn = _current_turn.get()
+        if turn is None:
+            return
+        try:
+            _current_turn.reset(turn._token)
+        except ValueError:
+            # Started in another context (e.g. a task); just detach it here
+            _current_turn.set(None)
+
+        total = turn.elapsed()
+        self._record("turn", total)
+        if self._turn_hist is not None:
+            self._turn_hist.labels(**turn.labels).observe(total)
+        if turn._span is not None:
+            turn._span.set_attribute("agent_id", turn.agent_id)
+            turn._span.end()
+        logger.info(
+            f"⏱️ Turn {turn.call_sid}: {total * 1000:.0f}ms | "
+            + " ".join(f"{k}={v * 1000:.0f}ms" for k, v in {**turn.stages, **turn.milestones}.items())
+        )
+
+    def scoped(self, callback: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """Wrap a transcript callback so a turn it starts is finished however it returns"""
+        @functools.wraps(callback)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await callback(*args, **kwargs)
+            finally:
+                self.finish_turn()
+        return wrapper
+
+    # Instrumentation (no-ops outside a turn)
+
+    def current(self):
+        return _current_turn.get() or _NO_TURN
+
+    def set_agent(self, agent_id: str):
+        """Label the rest of the turn with the agent routing picked"""
+        turn = _current_turn.get()
+        if turn is not None and agent_id:
+            turn.agent_id = agent_id
+
+    def mark(self, milestone: str):
+        self.current().mark(milestone)
+
+    def span(self, stage: str):
+        return self.current().span(stage)
+
+    def traced(self, stage: str):
+        """Decorator timing every call of a sync or async function as a stage"""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(stage):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # Recording
+
+    def _start_child_span(self, turn: TurnTrace, stage: str):
+        if self._otel is None or turn._span is None:
+            return None
+        return self._otel.start_span(stage, context=otel_trace.set_span_in_context(turn._span))
+
+    def _record(self, name: str, seconds: float):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def _observe_stage(self, turn: TurnTrace, stage: str, seconds: float):
+        self._record(stage, seconds)
+        if self._stage_hist is not None:
+            self._stage_hist.labels(stage=stage, **turn.labels).observe(seconds)
+
+    def _observe_milestone(self, turn: TurnTrace, milestone: str, seconds: float):
+        self._record(milestone, seconds)
+        if self._milestone_hist is not None:
+            self._milestone_hist.labels(milestone=milestone, **turn.labels).observe(seconds)
+
+    # Reporting
+
+    def get_stats(self) -> Dict[str, Any]:
+        """p50/p95/p99 (ms) per stage and milestone over the last `window` samples"""
+        summary = {}
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            last = len(ordered) - 1
+            summary[name] = {
+                "count": len(ordered),
+                "p50_ms": round(ordered[min(last, int(len(ordered) * 0.50))] * 1000, 1),
+                "p95_ms": round(ordered[min(last, int(len(ordered) * 0.95))] * 1000, 1),
+                "p99_ms": round(ordered[min(last, int(len(ordered) * 0.99))] * 1000, 1)
+            }
+        return {
+            "enabled": self.enabled,
+            "prometheus": self._stage_hist is not None,
+            "opentelemetry": self._otel is not None,
+            "window": self.window,
+            "latency": summary
+        }
+
+    def metrics_payload(self):
+        """(body, content_type) in Prometheus exposition format, or None if unavailable"""
+        if not PROMETHEUS_AVAILABLE:
+            return None
+        return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# Global instance
+turn_tracer = TurnTracer(
+    enabled=settings.turn_metrics_enabled,
+    otel_enabled=settings.turn_tracing_otel_enabled,
+    window=settings.turn_metrics_window
+)
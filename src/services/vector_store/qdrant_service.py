@@ -15,6 +15,7 @@ class QdrantService:
         self.embeddings = OpenAIEmbeddings(
             model="text-embedding-3-small",
             openai_api_key=settings.openai_api_key,
+            openai_api_base=settings.openai_base_url,
             client=None
         )
         qdrant_host = getattr(settings, 'QDRANT_HOST', 'localhost')
@@ -23,11 +23,12 @@ class ElevenLabsVoiceService:
     """ElevenLabs Voice API service for Twilio integration"""
     
     def __init__(self):
-        self.client = ElevenLabs(api_key=settings.eleven_labs_api_key)
+        api_root = settings.elevenlabs_base_url.rstrip("/")
+        self.client = ElevenLabs(api_key=settings.eleven_labs_api_key, base_url=api_root)
         self.api_key = settings.eleven_labs_api_key
         self.voice_id = settings.voice_id
-        self.base_url = "https://api.elevenlabs.io/v1"
-        self.ws_url = "wss://api.elevenlabs.io/v1/text-to-speech"
+        self.base_url = f"{api_root}/v1"
+        self.ws_url = f"{api_root.replace('http', 'ws', 1)}/v1/text-to-speech"
         self.session: Optional[aiohttp.ClientSession] = None
         self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
         self.is_connected = False